@@ -66,16 +66,18 @@ class PollingCommand(PulpCliCommand):
 
     def poll(self, task_list, user_input):
         """
-        Entry point to begin polling on the tasks in the given list. Each task will be polled
-        in order until completion. If an error state is encountered, polling of the remaining
-        tests will be stopped.
+        Entry point to begin polling on the tasks in the given list. All outstanding tasks are
+        retrieved together in a single search each poll interval, and each task is reported as
+        soon as it completes, along with any tasks it spawned. If an error state is encountered,
+        polling of the remaining tasks will be stopped.
 
         This method is intended to handle all task states, from waiting to rejected. The
         appropriate message method below will be called depending on the state encounteres.
         Subclasses should override these methods as necessary to customize the message displayed.
 
-        While each task is being polled, the progress method will be called at regular
-        intervals to allow the subclass to display information on the state of the task.
+        While a single task is being polled, the progress method will be called at regular
+        intervals to allow the subclass to display information on the state of the task. While
+        more than one task is outstanding, the progress_summary method is called instead.
 
         The command has a built in flag for running the process in the background. If this
         is specified, this method will immediately return and not poll the tasks.
@@ -113,46 +115,137 @@ class PollingCommand(PulpCliCommand):
         self.prompt.render_paragraph(msg, tag='abort')
 
         try:
-            # Keep a copy of the final reports for all tasks to return to the caller
-            completed_task_list = []
+            return self._poll_tasks(task_list)
+        except KeyboardInterrupt:
+            # Gracefully handle if the user aborts the polling.
+            return RESULT_ABORTED
 
-            for task in task_list:
-                task = self._poll_task(task)
+    def _poll_tasks(self, task_list):
+        """
+        Polls the given tasks, and the tasks they spawn, until they have all completed or one
+        of them has failed or been cancelled.
+
+        :param task_list: queued tasks
+        :type  task_list: list of pulp.bindings.responses.Task
+
+        :return: the final task reports of the completed tasks
+        :rtype:  list of pulp.bindings.responses.Task
+        """
+        # Keep a copy of the final reports for all tasks to return to the caller
+        completed_task_list = []
+        pending = list(task_list)
+        task_count = len(pending)
+
+        running_spinner = self.context.prompt.create_spinner()
+        running_spinner.spin_tag = 'running-spinner'
+
+        while pending:
+            batch = len(pending) > 1
+            if batch:
+                finished = self._poll_batch(pending, len(completed_task_list))
+            else:
+                finished = [self._poll_task(pending.pop())]
+
+            for task in finished:
+                completed_task_list.append(task)
+
+                # One final call to update the progress with the end state, which
+                # _poll_task has already made for a task polled on its own
+                if batch:
+                    self.progress(task, running_spinner)
+
+                # Look for new tasks that we need to start polling for
+                spawned = self._get_tasks_to_poll(task)
+                pending.extend(spawned)
+                task_count += len(spawned)
 
                 # If there are more than one tasks to poll, we need to display a divider so
-                # the user knows which task is being followed.
-                if len(task_list) > 1:
+                # the user knows which task is being reported.
+                if task_count > 1:
                     self.task_header(task)
 
-                # Look for new tasks that we need to start polling for
-                task_list.extend(self._get_tasks_to_poll(task))
+                if not self._render_result(task):
+                    return completed_task_list
 
-                completed_task_list.append(task)
+        return completed_task_list
 
-                # Display the appropriate message based on the result of the task
-                self.prompt.render_spacer(1)
-                if task.was_successful():
-                    self.succeeded(task)
+    def _poll_batch(self, pending, completed_count):
+        """
+        Polls several tasks at once until at least one of them has completed. All of the tasks
+        are retrieved with a single search each poll interval, and the progress_summary method
+        is called in between.
+
+        :param pending: outstanding tasks; updated in place with the latest reports of the tasks
+                        that have not completed
+        :type  pending: list of pulp.bindings.responses.Task
+        :param completed_count: number of tasks that have already completed
+        :type  completed_count: int
+
+        :return: the final reports of the tasks that completed, in the order they were queued
+        :rtype:  list of pulp.bindings.responses.Task
+        """
+        spinner = self.context.prompt.create_spinner()
+        spinner.spin_tag = 'summary-spinner'
 
-                if task.was_failure():
-                    self.failed(task)
-                    # Check for the error_message in the task_result generically
-                    # so individual handlers don't have to process it.
-                    if task and task.result and 'error_message' in task.result:
-                        self.context.prompt.render_failure_message(task.result['error_message'])
-                    break
+        while True:
+            finished = [t for t in pending if t.is_completed()]
+            if finished:
+                pending[:] = [t for t in pending if not t.is_completed()]
+                return finished
 
-                if task.was_cancelled():
-                    self.cancelled(task)
-                    break
+            self.progress_summary(pending, completed_count, spinner)
+            time.sleep(self.poll_frequency_in_seconds)
+            pending[:] = self._get_tasks([t.task_id for t in pending])
 
-                self.prompt.render_spacer(1)
+    def _get_tasks(self, task_ids):
+        """
+        Retrieves the reports of several tasks with a single search.
 
-            return completed_task_list
+        :param task_ids: IDs of the tasks to retrieve
+        :type  task_ids: list of str
 
-        except KeyboardInterrupt:
-            # Gracefully handle if the user aborts the polling.
-            return RESULT_ABORTED
+        :return: the task reports, in the same order as the IDs
+        :rtype:  list of pulp.bindings.responses.Task
+        """
+        tasks = self.context.server.tasks_search.search(filters={'task_id': {'$in': task_ids}})
+        tasks_by_id = dict((t.task_id, t) for t in tasks)
+        reports = []
+        for task_id in task_ids:
+            task = tasks_by_id.get(task_id)
+            if task is None:
+                # let the server report why the task cannot be found
+                task = self.context.server.tasks.get_task(task_id).response_body
+            reports.append(task)
+        return reports
+
+    def _render_result(self, task):
+        """
+        Displays the appropriate message based on the result of the task.
+
+        :param task: completed task
+        :type  task: pulp.bindings.responses.Task
+
+        :return: False if polling should stop because the task failed or was cancelled
+        :rtype:  bool
+        """
+        self.prompt.render_spacer(1)
+        if task.was_successful():
+            self.succeeded(task)
+
+        if task.was_failure():
+            self.failed(task)
+            # Check for the error_message in the task_result generically
+            # so individual handlers don't have to process it.
+            if task and task.result and 'error_message' in task.result:
+                self.context.prompt.render_failure_message(task.result['error_message'])
+            return False
+
+        if task.was_cancelled():
+            self.cancelled(task)
+            return False
+
+        self.prompt.render_spacer(1)
+        return True
 
     def _get_tasks_to_poll(self, task):
         """
@@ -285,6 +378,24 @@ class PollingCommand(PulpCliCommand):
         msg = _('Running...')
         spinner.next(message=msg)
 
+    def progress_summary(self, tasks, completed_count, spinner):
+        """
+        Called each time several outstanding tasks are polled together, in place of the waiting,
+        accepted and progress methods. The default implementation displays how many tasks are
+        waiting, running and completed.
+
+        :param tasks: full task reports for the outstanding tasks
+        :type  tasks: list of pulp.bindings.responses.Task
+        :param completed_count: number of tasks that have completed
+        :type  completed_count: int
+        :param spinner: used to indicate progress is still taking place
+        :type  spinner: okaara.progress.Spinner
+        """
+        waiting = len([t for t in tasks if t.is_waiting() or t.was_accepted()])
+        template = _('Waiting: %(w)s, Running: %(r)s, Completed: %(c)s')
+        msg = template % {'w': waiting, 'r': len(tasks) - waiting, 'c': completed_count}
+        spinner.next(message=msg)
+
     def succeeded(self, task):
         """
         Called when a task has completed with a status indicating success.
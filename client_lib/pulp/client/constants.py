@@ -1 +1,4 @@
 USER_CONFIG_DIR = '~/.pulp/'
+
+# Name of the manifest of the CLI sections added by each extension, in USER_CONFIG_DIR
+EXTENSIONS_MANIFEST = '%s-extensions.json'
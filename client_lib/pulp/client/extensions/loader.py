@@ -4,10 +4,15 @@
 Functionality related to loading extensions from a set location. The client
 context is constructed ahead of time and provided to this module, which
 then uses it to instantiate the extension components.
+
+Loading every extension is slow, so the CLI sections and commands each
+extension adds are recorded in a manifest. While the extensions are unchanged,
+only the extensions that add to the section or command being run are loaded.
 """
 
 import copy
 from gettext import gettext as _
+import json
 import logging
 import os
 import sys
@@ -27,6 +32,9 @@ DEFAULT_PRIORITY = 5
 
 _MODULES = 'modules'
 _ENTRY_POINTS = 'entry points'
+
+# Incremented when the format of the manifest changes
+MANIFEST_VERSION = 1
 # name of the entry point
 ENTRY_POINT_EXTENSIONS = 'pulp.extensions.%s'
 
@@ -80,7 +88,7 @@ class InvalidExtensionConfig(ExtensionLoaderException):
     pass
 
 
-def load_extensions(extensions_dir, context, role):
+def load_extensions(extensions_dir, context, role, args=None, manifest_path=None):
     """
     @param extensions_dir: directory in which to find extension packs
     @type  extensions_dir: str
@@ -98,12 +106,31 @@ def load_extensions(extensions_dir, context, role):
     @param role:    name of a role, either "admin" or "consumer", so we know
                     which extensions to load
     @type  role:    str
+
+    @param args:    the command line arguments that will be run; when given with
+                    a manifest path, only the extensions adding to the section or
+                    command named by the first argument are loaded
+    @type  args:    list
+
+    @param manifest_path: path to the manifest of the CLI sections and commands
+                    each extension adds; it is written when all extensions are loaded
+    @type  manifest_path: str
     """
 
     # Validation
     if not os.access(extensions_dir, os.F_OK | os.R_OK):
         raise InvalidExtensionsDirectory(extensions_dir)
 
+    entry_points = list(pkg_resources.iter_entry_points(ENTRY_POINT_EXTENSIONS % role))
+
+    key = None
+    if manifest_path is not None and context.cli is not None:
+        key = _manifest_key(extensions_dir, entry_points)
+        selected = _select_extensions(_read_manifest(manifest_path, key), args)
+        if selected is not None:
+            _load_selected(extensions_dir, selected, entry_points, context)
+            return
+
     # identify modules and sort them
     try:
         unsorted_modules = _load_pack_modules(extensions_dir)
@@ -111,14 +138,18 @@ def load_extensions(extensions_dir, context, role):
     except ImportFailed, e:
         raise LoadFailed([e.pack_name]), None, sys.exc_info()[2]
 
-    # find extensions from entry points and add them to the sorted structure
-    for extension in pkg_resources.iter_entry_points(ENTRY_POINT_EXTENSIONS % role):
+    # add the extensions from entry points to the sorted structure
+    for extension in entry_points:
         priority = getattr(extension, PRIORITY_VAR, DEFAULT_PRIORITY)
         sorted_extensions.setdefault(priority, {}).setdefault(_ENTRY_POINTS, []).append(extension)
 
+    # the CLI names each extension adds, in the order the extensions are loaded
+    manifest = []
+
     error_packs = []
     for priority in sorted(sorted_extensions.keys()):
         for module in sorted_extensions[priority].get(_MODULES, []):
+            before = _cli_signature(context) if key else None
             try:
                 _load_pack(extensions_dir, module, context)
             except ExtensionLoaderException, e:
@@ -126,12 +157,186 @@ def load_extensions(extensions_dir, context, role):
                 # the cause will be logged by _load_pack. This method should
                 # continue to load extensions so all of the errors are logged.
                 error_packs.append(module.__name__)
+            if key:
+                manifest.append({'type': _MODULES, 'name': module.__name__,
+                                 'names': _changed_names(before, _cli_signature(context))})
         for entry_point in sorted_extensions[priority].get(_ENTRY_POINTS, []):
+            before = _cli_signature(context) if key else None
             entry_point.load()(context)
+            if key:
+                manifest.append({'type': _ENTRY_POINTS, 'name': str(entry_point),
+                                 'names': _changed_names(before, _cli_signature(context))})
 
     if len(error_packs) > 0:
         raise LoadFailed(error_packs)
 
+    if key:
+        _write_manifest(manifest_path, key, manifest)
+
+
+def _load_selected(extensions_dir, selected, entry_points, context):
+    """
+    Loads the given extensions, in the order given, without importing the others.
+
+    @param selected: manifest entries of the extensions to load
+    @type  selected: list
+
+    @param entry_points: all extension entry points for the role
+    @type  entry_points: list
+
+    @raises LoadFailed: if any of the extension packs fail to load
+    """
+    if extensions_dir not in sys.path:
+        sys.path.append(extensions_dir)
+    entry_points = dict((str(e), e) for e in entry_points)
+
+    error_packs = []
+    for extension in selected:
+        if extension['type'] == _ENTRY_POINTS:
+            entry_points[extension['name']].load()(context)
+            continue
+        try:
+            module = __import__(extension['name'])
+        except Exception:
+            _logger.exception(_('Could not import extension pack [%(p)s]' %
+                                {'p': extension['name']}))
+            error_packs.append(extension['name'])
+            continue
+        try:
+            _load_pack(extensions_dir, module, context)
+        except ExtensionLoaderException:
+            error_packs.append(extension['name'])
+
+    if len(error_packs) > 0:
+        raise LoadFailed(error_packs)
+
+
+def _select_extensions(manifest, args):
+    """
+    Selects the extensions needed to run the given arguments. Those are the
+    extensions that add to the section or command named by the first argument,
+    and the extensions that add nothing to the CLI in case they are needed for
+    something else.
+
+    All extensions are needed to show the sections and commands of the CLI, so
+    None is returned when there are no arguments or when the first argument is
+    not found in the manifest.
+
+    @param manifest: the extensions listed in the manifest, or None
+    @type  manifest: list
+
+    @param args: the command line arguments that will be run
+    @type  args: list
+
+    @return: the manifest entries of the extensions to load, or None if all are needed
+    @rtype:  list
+    """
+    if manifest is None or not args or args[0].startswith('-'):
+        return None
+    name = args[0]
+    if not [e for e in manifest if name in e['names']]:
+        return None
+    return [e for e in manifest if name in e['names'] or not e['names']]
+
+
+def _manifest_key(extensions_dir, entry_points):
+    """
+    Identifies the installed extensions. The manifest is only used while the
+    key it was written with matches.
+
+    @param entry_points: the extension entry points for the role
+    @type  entry_points: list
+
+    @return: the latest modification time of each extension pack, and each entry
+             point with the version of its distribution
+    @rtype:  dict
+    """
+    packs = {}
+    for pack in os.listdir(extensions_dir):
+        if pack.startswith('.'):
+            continue
+        path = os.path.join(extensions_dir, pack)
+        mtimes = [os.path.getmtime(path)]
+        for dir_path, dir_names, file_names in os.walk(path):
+            mtimes.extend(os.path.getmtime(os.path.join(dir_path, f)) for f in file_names
+                          if not f.endswith(('.pyc', '.pyo')))
+        packs[pack] = max(mtimes)
+
+    versions = []
+    for entry_point in entry_points:
+        dist = getattr(entry_point, 'dist', None)
+        versions.append([str(entry_point), getattr(dist, 'version', None)])
+
+    return {'version': MANIFEST_VERSION, 'packs': packs, 'entry_points': sorted(versions)}
+
+
+def _read_manifest(manifest_path, key):
+    """
+    @return: the extensions listed in the manifest, or None if the manifest does
+             not exist, cannot be read or was written for other extensions
+    @rtype:  list
+    """
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if manifest.get('key') != key:
+        return None
+    return manifest.get('extensions')
+
+
+def _write_manifest(manifest_path, key, extensions):
+    """
+    Writes the manifest, logging rather than raising any error since the manifest
+    is only an optimization.
+    """
+    temp_path = '%s.%d' % (manifest_path, os.getpid())
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump({'key': key, 'extensions': extensions}, f)
+        os.rename(temp_path, manifest_path)
+    except (IOError, OSError):
+        _logger.debug(_('Could not write extensions manifest [%(m)s]' % {'m': manifest_path}))
+
+
+def _cli_signature(context):
+    """
+    @return: dict of the signature of each top level section and command of the CLI
+    @rtype:  dict
+    """
+    root = context.cli.root_section
+    signature = dict((n, _section_signature(s)) for n, s in root.subsections.items())
+    signature.update((n, _command_signature(c)) for n, c in root.commands.items())
+    return signature
+
+
+def _section_signature(section):
+    """
+    @return: the names of the subsections, commands and options in the section
+    @rtype:  tuple
+    """
+    return (sorted((n, _section_signature(s)) for n, s in section.subsections.items()),
+            sorted((n, _command_signature(c)) for n, c in section.commands.items()))
+
+
+def _command_signature(command):
+    """
+    @return: the names of the command's options
+    @rtype:  list
+    """
+    return sorted(o.name for o in command.all_options())
+
+
+def _changed_names(before, after):
+    """
+    @return: sorted names of the top level sections and commands added, changed
+             or removed between the two signatures
+    @rtype:  list
+    """
+    names = set(before) | set(after)
+    return sorted(n for n in names if before.get(n) != after.get(n))
+
 
 def _load_pack_modules(extensions_dir):
     """
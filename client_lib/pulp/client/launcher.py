@@ -98,8 +98,15 @@ def main(config, exception_handler_class=ExceptionHandler):
     extensions_dir = os.path.expanduser(extensions_dir)
 
     role = config['client']['role']
+
+    # Only the extensions needed to run the command are loaded, unless the whole
+    # CLI is printed
+    manifest_path = os.path.join(os.path.expanduser(constants.USER_CONFIG_DIR),
+                                 constants.EXTENSIONS_MANIFEST % role)
     try:
-        extensions_loader.load_extensions(extensions_dir, context, role)
+        extensions_loader.load_extensions(extensions_dir, context, role,
+                                          args=None if options.print_map else args,
+                                          manifest_path=manifest_path)
     except extensions_loader.LoadFailed, e:
         prompt.write(
             _('The following extensions failed to load: %(f)s' % {'f': ', '.join(e.failed_packs)}))
@@ -7,13 +7,21 @@ client-side tracking of upload requests on the server.
 
 import copy
 import errno
+import itertools
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
 import os
 import pickle
+import threading
 
 from pulp.common.lock import LockFile
 
 
 DEFAULT_CHUNKSIZE = 1048576  # 1 MB per upload call
+DEFAULT_CONCURRENCY = 1  # upload calls in flight at once
+# Seconds to wait for a parallel chunk to complete before waiting again. Waiting without a
+# timeout would not be interrupted by KeyboardInterrupt.
+RESULT_POLL_TIMEOUT = 0.5
 
 
 class ManagerUninitializedException(Exception):
@@ -71,7 +79,8 @@ class UploadManager(object):
     on disk state files.
     """
 
-    def __init__(self, upload_working_dir, bindings, chunk_size=DEFAULT_CHUNKSIZE):
+    def __init__(self, upload_working_dir, bindings, chunk_size=DEFAULT_CHUNKSIZE,
+                 concurrency=DEFAULT_CONCURRENCY):
         """
         @param upload_working_dir: directory in which to store client-side files
                to track upload requests; if it doesn't exist it will be created
@@ -84,10 +93,15 @@ class UploadManager(object):
         @param chunk_size: size in bytes of data to upload on each call to the
                server
         @type  chunk_size: int
+
+        @param concurrency: maximum number of chunks uploaded to the server at
+               the same time; each one is sent on its own connection
+        @type  concurrency: int
         """
         self.upload_working_dir = upload_working_dir
         self.bindings = bindings
         self.chunk_size = chunk_size
+        self.concurrency = concurrency
 
         # Internal state
         self.tracker_files = {}
@@ -111,7 +125,9 @@ class UploadManager(object):
         upload_working_dir = os.path.join(context.config['filesystem']['upload_working_dir'],
                                           'default')
         upload_working_dir = os.path.expanduser(upload_working_dir)
-        return cls(upload_working_dir, context.server)
+        server_config = context.config.get('server', {})
+        concurrency = server_config.get('upload_concurrency', DEFAULT_CONCURRENCY)
+        return cls(upload_working_dir, context.server, concurrency=int(concurrency))
 
     def initialize(self):
         """
@@ -164,6 +180,7 @@ class UploadManager(object):
         tracker_file.upload_id = upload_id
         tracker_file.location = location
         tracker_file.offset = 0
+        tracker_file.completed_ranges = []
         tracker_file.repo_id = repo_id
         tracker_file.unit_type_id = unit_type_id
         tracker_file.unit_key = unit_key
@@ -184,13 +201,18 @@ class UploadManager(object):
         Begins or resumes the upload process for the given upload request.
         This call will not return until the upload is complete. The other
         expected exit point is a KeyboardError to kill the process. The
-        client-side on disk tracker files will store the current offset and
-        resume the upload from where it left off on the next call to this method.
+        client-side on disk tracker files will store the ranges of the file
+        that have been uploaded and resume the upload from where it left off
+        on the next call to this method.
+
+        Up to the configured concurrency number of chunks are uploaded at the
+        same time. Each is sent with the offset at which it belongs, so chunks
+        may complete (and be written by the server) in any order.
 
         The callback_func is used to get feedback on the upload process. After
         each successful upload segment call to the server, this function
-        will be invoked with the new offset in the file and the file size
-        (intended to be fed into a progress indicator). As this is called
+        will be invoked with the number of bytes uploaded so far and the file
+        size (intended to be fed into a progress indicator). As this is called
         after each upload segment call, the granularity at which it is called
         depends on the chunk_size value for this instance.
 
@@ -227,6 +249,8 @@ class UploadManager(object):
         if not force and tracker_file.is_running:
             raise ConcurrentUploadException()
 
+        f = None
+        pool = None
         try:
             # Flag the upload request as running so other processes don't
             # attempt to run it as well
@@ -236,29 +260,83 @@ class UploadManager(object):
             source_file_size = os.path.getsize(tracker_file.source_filename)
 
             f = open(tracker_file.source_filename, 'r')
-            while True:
-                # Load the chunk to upload
-                f.seek(tracker_file.offset)
-                data = f.read(self.chunk_size)
-                if not data:
-                    break
-
-                # Server request
-                self.bindings.uploads.upload_segment(upload_id, tracker_file.offset, data)
+            f_lock = threading.Lock()
+
+            def upload_chunk(chunk):
+                offset, length = chunk
+                with f_lock:
+                    f.seek(offset)
+                    data = f.read(length)
+                self.bindings.uploads.upload_segment(upload_id, offset, data)
+                return offset, offset + len(data)
+
+            chunks = self._pending_chunks(list(tracker_file.completed_ranges), source_file_size)
+            if self.concurrency > 1:
+                pool = ThreadPool(self.concurrency)
+                completed = self._poll(pool.imap_unordered(upload_chunk, chunks))
+            else:
+                completed = itertools.imap(upload_chunk, chunks)
 
+            for start, end in completed:
                 # Status update and callback notification
-                tracker_file.offset = min(tracker_file.offset + self.chunk_size, source_file_size)
+                tracker_file.add_completed_range(start, end)
                 tracker_file.save()
 
-                callback_func(tracker_file.offset, source_file_size)
+                if callback_func:
+                    callback_func(tracker_file.completed_size(), source_file_size)
 
             tracker_file.is_finished_uploading = True
         finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            if f is not None:
+                f.close()
             # Regardless of how this ends, it's no longer running, so make sure
             # we update the tracker accordingly.
             tracker_file.is_running = False
             tracker_file.save()
 
+    @staticmethod
+    def _poll(results):
+        """
+        Generates the results of a pool's imap iterator as they complete, waiting for each
+        with a timeout so that a KeyboardInterrupt is raised while waiting.
+
+        @param results: results of a pool's imap or imap_unordered call
+        @type  results: multiprocessing.pool.IMapIterator
+
+        @return: generator of the results
+        """
+        while True:
+            try:
+                yield results.next(RESULT_POLL_TIMEOUT)
+            except TimeoutError:
+                continue
+            except StopIteration:
+                return
+
+    def _pending_chunks(self, completed_ranges, source_file_size):
+        """
+        Generates the chunks of the source file that have yet to be uploaded,
+        skipping the ranges that have been recorded as completed.
+
+        @param completed_ranges: sorted, merged [start, end) ranges already uploaded
+        @type  completed_ranges: list
+
+        @param source_file_size: size of the file being uploaded
+        @type  source_file_size: int
+
+        @return: generator of (offset, length) tuples
+        """
+        offset = 0
+        for start, end in completed_ranges + [[source_file_size, source_file_size]]:
+            while offset < start:
+                length = min(self.chunk_size, start - offset)
+                yield offset, length
+                offset += length
+            offset = max(offset, end)
+
     def import_upload(self, upload_id):
         """
         Once the file is finished uploading, this call will request the server
@@ -397,7 +475,8 @@ class UploadTracker(object):
         # Upload call information
         self.upload_id = None
         self.location = None  # URL to the upload request on the server
-        self.offset = None  # start of next chunk to upload
+        self.offset = None  # end of the uploaded data contiguous from the start of the file
+        self.completed_ranges = []  # sorted, merged [start, end) ranges that have been uploaded
         self.source_filename = None  # path on disk to the file to upload
 
         # Import call information
@@ -410,6 +489,37 @@ class UploadTracker(object):
         self.is_running = False
         self.is_finished_uploading = False
 
+    def add_completed_range(self, start, end):
+        """
+        Records the given range of the source file as uploaded, merging it with
+        any adjacent or overlapping ranges. The offset is updated to the end of
+        the data uploaded contiguously from the start of the file.
+
+        @param start: offset of the first byte uploaded
+        @type  start: int
+
+        @param end: offset following the last byte uploaded
+        @type  end: int
+        """
+        merged = []
+        for r_start, r_end in sorted(self.completed_ranges + [[start, end]]):
+            if merged and r_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], r_end)
+            else:
+                merged.append([r_start, r_end])
+        self.completed_ranges = merged
+        if merged and merged[0][0] == 0:
+            self.offset = merged[0][1]
+        else:
+            self.offset = 0
+
+    def completed_size(self):
+        """
+        @return: number of bytes of the source file that have been uploaded
+        @rtype:  int
+        """
+        return sum(end - start for start, end in self.completed_ranges)
+
     def save(self):
         """
         Saves the current state of the tracker file. This will lock on the file
@@ -449,4 +559,10 @@ class UploadTracker(object):
         status_file = pickle.load(f)
         f.close()
 
+        # Trackers saved before ranges were recorded only have the offset
+        if getattr(status_file, 'completed_ranges', None) is None:
+            status_file.completed_ranges = []
+            if status_file.offset:
+                status_file.completed_ranges.append([0, status_file.offset])
+
         return status_file
@@ -100,16 +100,14 @@ class PollingCommandTests(base.PulpClientTests):
 
         expected_tags = [
             'abort',  # default, always displayed
-            # states_1
-            'header', 'delayed-spinner', 'running-spinner', 'running-spinner', 'succeeded',
-            # states_2
-            'header', 'delayed-spinner', 'delayed-spinner', 'running-spinner', 'running-spinner',
-            'succeeded',
-            # states_3
-            'header', 'delayed-spinner', 'running-spinner', 'running-spinner',
-            'running-spinner', 'running-spinner', 'succeeded']
+            # all three tasks are polled together until states_1 completes
+            'summary-spinner', 'summary-spinner', 'running-spinner', 'header', 'succeeded',
+            # states_2 and states_3 are polled together until states_2 completes
+            'summary-spinner', 'running-spinner', 'header', 'succeeded',
+            # states_3 is polled on its own
+            'running-spinner', 'running-spinner', 'header', 'succeeded']
         found_tags = self.prompt.get_write_tags()
-        self.assertEqual(set(expected_tags), set(found_tags))
+        self.assertEqual(expected_tags, found_tags)
 
         self.assertTrue(isinstance(completed_tasks, list))
         self.assertEqual(3, len(completed_tasks))
@@ -146,16 +144,14 @@ class PollingCommandTests(base.PulpClientTests):
 
         expected_tags = [
             'abort',  # default, always displayed
-            # states_1
-            'header', 'delayed-spinner', 'running-spinner', 'running-spinner', 'succeeded',
-            # states_2
-            'header', 'delayed-spinner', 'delayed-spinner', 'running-spinner', 'running-spinner',
-            'succeeded',
-            # states_3
-            'header', 'delayed-spinner', 'running-spinner', 'running-spinner',
-            'running-spinner', 'running-spinner', 'succeeded']
+            # all three tasks are polled together until states_1 completes
+            'summary-spinner', 'summary-spinner', 'running-spinner', 'header', 'succeeded',
+            # states_2 and states_3 are polled together until states_2 completes
+            'summary-spinner', 'running-spinner', 'header', 'succeeded',
+            # states_3 is polled on its own
+            'running-spinner', 'running-spinner', 'header', 'succeeded']
         found_tags = self.prompt.get_write_tags()
-        self.assertEqual(set(expected_tags), set(found_tags))
+        self.assertEqual(expected_tags, found_tags)
 
         self.assertTrue(isinstance(completed_tasks, list))
         self.assertEqual(3, len(completed_tasks))
@@ -193,22 +189,65 @@ class PollingCommandTests(base.PulpClientTests):
 
         expected_tags = [
             'abort',  # default, always displayed
-            # states_1
-            'delayed-spinner', 'running-spinner', 'succeeded',
-            # states_2
-            'header', 'delayed-spinner', 'running-spinner', 'running-spinner',
-            'succeeded',
-            # states_3
-            'header', 'delayed-spinner', 'running-spinner', 'running-spinner',
-            'running-spinner', 'succeeded']
+            # states_1 is polled on its own, then spawns states_2 and states_3
+            'delayed-spinner', 'running-spinner', 'header', 'succeeded',
+            # states_2 and states_3 are polled together until states_2 completes
+            'summary-spinner', 'summary-spinner', 'running-spinner', 'header', 'succeeded',
+            # states_3 is polled on its own
+            'running-spinner', 'running-spinner', 'header', 'succeeded']
         found_tags = self.prompt.get_write_tags()
-        self.assertEqual(set(expected_tags), set(found_tags))
+        self.assertEqual(expected_tags, found_tags)
 
         self.assertTrue(isinstance(completed_tasks, list))
         self.assertEqual(3, len(completed_tasks))
         for i in range(0, 3):
             self.assertEqual(STATE_FINISHED, completed_tasks[i].state)
 
+    @mock.patch('time.sleep')
+    def test_poll_task_list_single_search(self, mock_sleep):
+        """
+        All outstanding tasks are retrieved with one search per poll interval.
+        """
+        sim = TaskSimulator()
+        sim.install(self.bindings)
+        sim.add_task_states('1', [STATE_WAITING, STATE_RUNNING, STATE_FINISHED])
+        sim.add_task_states('2', [STATE_WAITING, STATE_RUNNING, STATE_FINISHED])
+        mock_search = mock.MagicMock(side_effect=sim.search)
+        self.bindings.tasks_search = mock.MagicMock(search=mock_search)
+
+        task_list = sim.get_all_tasks().response_body
+        completed_tasks = self.command.poll(task_list, {})
+
+        self.assertEqual(2, mock_search.call_count)
+        mock_search.assert_called_with(filters={'task_id': {'$in': ['1', '2']}})
+        self.assertEqual(2, mock_sleep.call_count)
+        self.assertEqual(['1', '2'], [t.task_id for t in completed_tasks])
+
+    def test_get_tasks_missing_from_search(self):
+        """
+        A task the search does not return is retrieved on its own.
+        """
+        sim = TaskSimulator()
+        sim.install(self.bindings)
+        sim.add_task_states('1', [STATE_RUNNING])
+        sim.add_task_states('2', [STATE_FINISHED])
+        self.bindings.tasks_search = mock.MagicMock()
+        self.bindings.tasks_search.search.return_value = [sim.tasks_by_id['2'].pop()]
+
+        tasks = self.command._get_tasks(['1', '2'])
+
+        self.assertEqual([STATE_RUNNING, STATE_FINISHED], [t.state for t in tasks])
+
+    def test_progress_summary(self):
+        spinner = mock.MagicMock()
+        tasks = [Task({'task_id': '1', 'state': STATE_WAITING}),
+                 Task({'task_id': '2', 'state': STATE_ACCEPTED}),
+                 Task({'task_id': '3', 'state': STATE_RUNNING})]
+
+        self.command.progress_summary(tasks, 4, spinner)
+
+        spinner.next.assert_called_once_with(message='Waiting: 2, Running: 1, Completed: 4')
+
     def test_get_tasks_to_poll_duplicate_tasks(self):
         sim = TaskSimulator()
         sim.add_task_state('1', STATE_FINISHED)
@@ -295,9 +334,10 @@ class PollingCommandTests(base.PulpClientTests):
 
         expected_tags = [
             'abort',
-            'header', 'delayed-spinner', 'running-spinner', 'succeeded',  # states_1
-            'header', 'delayed-spinner', 'running-spinner', 'failed']  # states_2
-        self.assertEqual(set(expected_tags), set(self.prompt.get_write_tags()))
+            'summary-spinner',  # all three tasks complete on the first poll
+            'running-spinner', 'header', 'succeeded',  # states_1
+            'running-spinner', 'header', 'failed']  # states_2
+        self.assertEqual(expected_tags, self.prompt.get_write_tags())
 
     @mock.patch('pulp.client.commands.polling.PollingCommand._render_coded_error')
     def test_failed_task_calls__render_coded_error(self, mock_render_coded):
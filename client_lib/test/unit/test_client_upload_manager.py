@@ -1,5 +1,6 @@
 import errno
 import math
+from multiprocessing.pool import ThreadPool
 import os
 import shutil
 import unittest
@@ -54,6 +55,16 @@ class UploadManagerTests(unittest.TestCase):
 
         self.assertTrue(isinstance(manager, upload_util.UploadManager))
         self.assertEqual(manager.upload_working_dir, '/a/b/c/default')
+        self.assertEqual(manager.concurrency, upload_util.DEFAULT_CONCURRENCY)
+
+    def test_init_with_defaults_concurrency(self):
+        context = mock.MagicMock()
+        context.config = {'filesystem': {'upload_working_dir': '/a/b/c'},
+                          'server': {'upload_concurrency': '4'}}
+
+        manager = upload_util.UploadManager.init_with_defaults(context)
+
+        self.assertEqual(manager.concurrency, 4)
 
     def test_initialize_no_trackers(self):
         os.makedirs(self.upload_working_dir)
@@ -289,6 +300,124 @@ class UploadManagerTests(unittest.TestCase):
         tracker = self.upload_manager._get_tracker_file_by_id(upload_id)
         self.assertEqual(rpm_size, tracker.offset)
 
+    def test_upload_parallel(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.concurrency = 4
+        self.upload_manager.initialize()
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1',
+                                                          {'k': 'v'}, 'm-1')
+
+        mock_callback = mock.Mock()
+
+        # Test
+        self.upload_manager.upload(upload_id, mock_callback.update_status)
+
+        # Verify
+        rpm_size = os.path.getsize(TEST_RPM_FILENAME)
+        num_upload_calls = int(math.ceil(float(rpm_size) / float(self.upload_manager.chunk_size)))
+        self.assertEqual(num_upload_calls, self.mock_upload_bindings.upload_segment.call_count)
+        self.assertEqual(num_upload_calls, mock_callback.update_status.call_count)
+        self.assertEqual((rpm_size, rpm_size), mock_callback.update_status.call_args[0])
+
+        # Reassemble the file from the segments sent, which may be in any order
+        with open(TEST_RPM_FILENAME, 'r') as f:
+            expected = f.read()
+        segments = sorted(c[0][1:] for c in self.mock_upload_bindings.upload_segment.call_args_list)
+        self.assertEqual(expected, ''.join(data for offset, data in segments))
+
+        tf_filename = self.upload_manager._tracker_filename(upload_id)
+        tracker = upload_util.UploadTracker.load(tf_filename)
+        self.assertEqual(rpm_size, tracker.offset)
+        self.assertEqual([[0, rpm_size]], tracker.completed_ranges)
+        self.assertEqual(True, tracker.is_finished_uploading)
+
+    def test_upload_resume_ranges(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.initialize()
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1',
+                                                          {'k': 'v'}, 'm-1')
+        tracker = self.upload_manager._get_tracker_file_by_id(upload_id)
+        tracker.add_completed_range(0, 100)
+        tracker.add_completed_range(150, 400)
+
+        # Test
+        self.upload_manager.upload(upload_id)
+
+        # Verify only the missing ranges were sent
+        rpm_size = os.path.getsize(TEST_RPM_FILENAME)
+        sent = [(c[0][1], len(c[0][2]))
+                for c in self.mock_upload_bindings.upload_segment.call_args_list]
+        self.assertEqual((100, 50), sent[0])
+        self.assertEqual(400, sent[1][0])
+        self.assertEqual(rpm_size - 350, sum(length for offset, length in sent))
+        self.assertEqual([[0, rpm_size]], tracker.completed_ranges)
+
+    def test_upload_failed_segment(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.concurrency = 2
+        self.upload_manager.initialize()
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1',
+                                                          {'k': 'v'}, 'm-1')
+        self.mock_upload_bindings.upload_segment.side_effect = NotFoundException({})
+
+        # Test
+        self.assertRaises(NotFoundException, self.upload_manager.upload, upload_id)
+
+        # Verify
+        tracker = self.upload_manager._get_tracker_file_by_id(upload_id)
+        self.assertEqual(False, tracker.is_running)
+        self.assertEqual(False, tracker.is_finished_uploading)
+
+    def test_upload_parallel_interrupted(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.concurrency = 2
+        self.upload_manager.initialize()
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1',
+                                                          {'k': 'v'}, 'm-1')
+        pools = []
+
+        def thread_pool(processes):
+            pool = ThreadPool(processes)
+            pool.terminate = mock.Mock(wraps=pool.terminate)
+            pools.append(pool)
+            return pool
+
+        callback = mock.Mock(side_effect=[None, KeyboardInterrupt()])
+
+        # Test
+        with mock.patch.object(upload_util, 'ThreadPool', thread_pool):
+            self.assertRaises(KeyboardInterrupt, self.upload_manager.upload, upload_id,
+                              callback)
+
+        # Verify
+        pools[0].terminate.assert_called_once_with()
+        tf_filename = self.upload_manager._tracker_filename(upload_id)
+        tracker = upload_util.UploadTracker.load(tf_filename)
+        self.assertEqual(False, tracker.is_running)
+        self.assertEqual(False, tracker.is_finished_uploading)
+        self.assertEqual(200, tracker.completed_size())
+
+        # The upload resumes from the ranges recorded before the interruption
+        self.mock_upload_bindings.upload_segment.reset_mock()
+        self.upload_manager.upload(upload_id)
+        rpm_size = os.path.getsize(TEST_RPM_FILENAME)
+        sent = sum(len(c[0][2]) for c in self.mock_upload_bindings.upload_segment.call_args_list)
+        self.assertEqual(rpm_size - 200, sent)
+        tracker = upload_util.UploadTracker.load(tf_filename)
+        self.assertEqual([[0, rpm_size]], tracker.completed_ranges)
+
+    def test_poll_waits_again_after_timeout(self):
+        results = mock.Mock()
+        results.next.side_effect = [upload_util.TimeoutError(), 1, upload_util.TimeoutError(), 2,
+                                    StopIteration()]
+
+        self.assertEqual([1, 2], list(upload_util.UploadManager._poll(results)))
+        results.next.assert_called_with(upload_util.RESULT_POLL_TIMEOUT)
+
     def test_upload_concurrent_upload(self):
         # Setup
         self.upload_manager.initialize()
@@ -444,3 +573,43 @@ class UploadManagerTests(unittest.TestCase):
         Configures the mock bindings to return a valid response on importing an upload.
         """
         self.mock_upload_bindings.import_upload.return_value = Response(200, {})
+
+
+class UploadTrackerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = '/tmp/pulp-upload-tracker-test'
+        if os.path.exists(self.working_dir):
+            shutil.rmtree(self.working_dir)
+        os.makedirs(self.working_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_add_completed_range(self):
+        tracker = upload_util.UploadTracker('t')
+
+        tracker.add_completed_range(100, 200)
+        self.assertEqual([[100, 200]], tracker.completed_ranges)
+        self.assertEqual(0, tracker.offset)
+
+        tracker.add_completed_range(300, 400)
+        tracker.add_completed_range(0, 100)
+        self.assertEqual([[0, 200], [300, 400]], tracker.completed_ranges)
+        self.assertEqual(200, tracker.offset)
+        self.assertEqual(300, tracker.completed_size())
+
+        tracker.add_completed_range(200, 300)
+        self.assertEqual([[0, 400]], tracker.completed_ranges)
+        self.assertEqual(400, tracker.offset)
+
+    def test_load_legacy_tracker(self):
+        filename = os.path.join(self.working_dir, 'legacy')
+        tracker = upload_util.UploadTracker(filename)
+        tracker.offset = 500
+        del tracker.completed_ranges
+        tracker.save()
+
+        tracker = upload_util.UploadTracker.load(filename)
+
+        self.assertEqual([[0, 500]], tracker.completed_ranges)
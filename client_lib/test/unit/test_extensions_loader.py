@@ -1,5 +1,8 @@
+import json
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 import mock
@@ -192,3 +195,83 @@ class ExtensionLoaderTests(unittest.TestCase):
         def foo():
             pass
         self.assertEqual(getattr(foo, loader.PRIORITY_VAR), loader.DEFAULT_PRIORITY)
+
+
+@mock.patch('pkg_resources.iter_entry_points', return_value=())
+class ExtensionManifestTests(unittest.TestCase):
+
+    def setUp(self):
+        super(ExtensionManifestTests, self).setUp()
+        self.working_dir = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.working_dir, 'admin-extensions.json')
+
+    def tearDown(self):
+        super(ExtensionManifestTests, self).tearDown()
+        shutil.rmtree(self.working_dir)
+
+    def _context(self):
+        prompt = PulpPrompt()
+        return ClientContext(None, None, None, prompt, None, cli=PulpCli(prompt))
+
+    def _load(self, args):
+        context = self._context()
+        loader.load_extensions(VALID_SET, context, 'admin', args=args,
+                               manifest_path=self.manifest_path)
+        return sorted(context.cli.root_section.subsections.keys())
+
+    def test_writes_manifest(self, mock_entry):
+        sections = self._load(['section-1'])
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        extensions = [(e['name'], e['names']) for e in manifest['extensions']]
+        self.assertEqual(extensions, [('ext3', ['section-3']), ('ext1', ['section-1']),
+                                      ('ext4', []), ('ext2', ['section-2'])])
+
+    def test_loads_only_needed_extensions(self, mock_entry):
+        self._load(None)
+
+        with mock.patch.object(loader, '_load_pack_modules') as mock_load_pack_modules:
+            sections = self._load(['section-2', 'list'])
+
+        self.assertEqual(sections, ['section-2'])
+        self.assertFalse(mock_load_pack_modules.called)
+
+    def test_no_args_loads_all(self, mock_entry):
+        self._load(None)
+
+        self.assertEqual(self._load([]), ['section-1', 'section-2', 'section-3'])
+
+    def test_unknown_name_loads_all(self, mock_entry):
+        self._load(None)
+
+        self.assertEqual(self._load(['foo']), ['section-1', 'section-2', 'section-3'])
+
+    def test_changed_extensions_load_all(self, mock_entry):
+        self._load(None)
+
+        key = loader._manifest_key(VALID_SET, [])
+        key['packs']['ext1'] += 1
+        with mock.patch.object(loader, '_manifest_key', return_value=key):
+            sections = self._load(['section-2'])
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+
+    def test_unreadable_manifest_loads_all(self, mock_entry):
+        with open(self.manifest_path, 'w') as f:
+            f.write('not json')
+
+        self.assertEqual(self._load(['section-2']), ['section-1', 'section-2', 'section-3'])
+
+    def test_select_extensions(self, mock_entry):
+        manifest = [{'type': loader._MODULES, 'name': 'a', 'names': ['repo']},
+                    {'type': loader._MODULES, 'name': 'b', 'names': []},
+                    {'type': loader._ENTRY_POINTS, 'name': 'c', 'names': ['rpm', 'repo']},
+                    {'type': loader._ENTRY_POINTS, 'name': 'd', 'names': ['rpm']}]
+
+        selected = loader._select_extensions(manifest, ['repo', 'list'])
+
+        self.assertEqual([e['name'] for e in selected], ['a', 'b', 'c'])
+        self.assertTrue(loader._select_extensions(manifest, ['--help']) is None)
+        self.assertTrue(loader._select_extensions(None, ['repo']) is None)
@@ -55,6 +55,7 @@ class TaskSimulator(object):
         :type  bindings: pulp.bindings.bindings.Bindings
         """
         bindings.tasks = self
+        bindings.tasks_search = self
 
     def add_task_state(self, task_id, state, progress_report=None, spawned_tasks=None):
         """
@@ -123,6 +124,18 @@ class TaskSimulator(object):
 
         return response
 
+    def search(self, filters=None, **kwargs):
+        """
+        Returns the next state for each of the tasks whose IDs are listed in the "$in" filter
+        on the task ID, as a task search would. Tasks without configured states are omitted.
+
+        :return: list of tasks as if the bindings had contacted the server
+        :rtype:  list of pulp.bindings.responses.Task
+        """
+        task_ids = (filters or {}).get('task_id', {}).get('$in', self.ordered_task_ids)
+        return [self.tasks_by_id[task_id].pop() for task_id in task_ids
+                if task_id in self.tasks_by_id]
+
     def get_all_tasks(self, tags=()):
         """
         Returns the next state for all tasks that match the given tags, if any. The index
@@ -1,3 +1,5 @@
+from threading import RLock
+
 from pulp_node.error import ErrorList
 from pulp_node.reports import RepositoryReport, RepositoryProgress
 
@@ -65,6 +67,8 @@ class SummaryReport(object):
 class HandlerProgress(object):
     """
     The nodes handler progress report.
+    Repositories may be synchronized concurrently so updates are serialized
+    and each one reports the progress of all repositories.
     :ivar conduit: A handler conduit.
     :type conduit: pulp.agent.lib.conduit.Conduit
     :ivar state: The current state of the synchronization.
@@ -85,6 +89,7 @@ class HandlerProgress(object):
         self.conduit = conduit
         self.state = self.PENDING
         self.progress = []
+        self._lock = RLock()
 
     def started(self, bindings):
         """
@@ -128,18 +133,20 @@ class HandlerProgress(object):
         :param report: The update repository progress report.
         :type report: RepositoryProgress
         """
-        for i, p in enumerate(self.progress):
-            if p.repo_id == report.repo_id:
-                self.progress[i] = report
+        with self._lock:
+            for i, p in enumerate(self.progress):
+                if p.repo_id == report.repo_id:
+                    self.progress[i] = report
+                    break
             self._updated()
-            break
 
     def _updated(self):
         """
         Notification that the report has been updated.
         Reported using the conduit.
         """
-        self.conduit.update_progress(self.dict())
+        with self._lock:
+            self.conduit.update_progress(self.dict())
 
     def dict(self):
         return dict(
@@ -1,6 +1,8 @@
 from gettext import gettext as _
 from logging import getLogger
 from operator import itemgetter
+from Queue import Queue, Empty
+from threading import Thread
 
 from pulp_node import constants
 from pulp_node.error import NodeError, CaughtException
@@ -128,34 +130,83 @@ class HandlerStrategy(object):
         Add or update repositories based on bindings.
           - Merge repositories found in BOTH parent and child.
           - Add repositories found in the parent but NOT in the child.
+        Repositories are merged one at a time unless the request permits
+        several to be merged and synchronized concurrently.
         :param request: A synchronization request.
         :type request: SyncRequest
         """
+        concurrency = repository_concurrency(request.options)
+        if concurrency > 1 and len(request.bindings) > 1:
+            self._merge_concurrently(request, concurrency)
+            return
         for bind in request.bindings:
-            try:
-                repo_id = bind['repo_id']
-                details = bind['details']
-                if request.cancelled():
-                    request.summary[repo_id].action = RepositoryReport.CANCELLED
-                    continue
-                parent = model.Repository(repo_id, details)
-                child = model.Repository.fetch(repo_id)
-                progress = request.progress.find_report(repo_id)
-                progress.begin_merging()
-                if child:
-                    request.summary[repo_id].action = RepositoryReport.MERGED
-                    child.merge(parent)
-                else:
-                    child = model.Repository(repo_id, parent.details)
-                    request.summary[repo_id].action = RepositoryReport.ADDED
-                    child.add()
-                self._synchronize_repository(request, repo_id)
-            except NodeError, ne:
-                request.summary.errors.append(ne)
-            except Exception, e:
-                log.exception(repo_id)
-                error = CaughtException(e, repo_id)
-                request.summary.errors.append(error)
+            self._merge_repository(request, bind)
+
+    def _merge_concurrently(self, request, concurrency):
+        """
+        Merge repositories using a bounded pool of threads.
+        Each thread takes the next binding until none remain. Bindings taken
+        after the request has been cancelled are reported as cancelled and
+        repositories already being synchronized are cancelled by the
+        importer task poller.
+        :param request: A synchronization request.
+        :type request: SyncRequest
+        :param concurrency: The maximum number of repositories merged concurrently.
+        :type concurrency: int
+        """
+        queue = Queue()
+        for bind in request.bindings:
+            queue.put(bind)
+
+        def run():
+            while True:
+                try:
+                    bind = queue.get_nowait()
+                except Empty:
+                    return
+                self._merge_repository(request, bind)
+
+        threads = []
+        for n in range(min(concurrency, len(request.bindings))):
+            thread = Thread(target=run, name='node-sync-%d' % n)
+            thread.setDaemon(True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+    def _merge_repository(self, request, bind):
+        """
+        Add or update the repository referenced by a binding and synchronize it.
+        :param request: A synchronization request.
+        :type request: SyncRequest
+        :param bind: A consumer binding payload.
+        :type bind: dict
+        """
+        repo_id = bind['repo_id']
+        try:
+            details = bind['details']
+            if request.cancelled():
+                request.summary[repo_id].action = RepositoryReport.CANCELLED
+                return
+            parent = model.Repository(repo_id, details)
+            child = model.Repository.fetch(repo_id)
+            progress = request.progress.find_report(repo_id)
+            progress.begin_merging()
+            if child:
+                request.summary[repo_id].action = RepositoryReport.MERGED
+                child.merge(parent)
+            else:
+                child = model.Repository(repo_id, parent.details)
+                request.summary[repo_id].action = RepositoryReport.ADDED
+                child.add()
+            self._synchronize_repository(request, repo_id)
+        except NodeError, ne:
+            request.summary.errors.append(ne)
+        except Exception, e:
+            log.exception(repo_id)
+            error = CaughtException(e, repo_id)
+            request.summary.errors.append(error)
 
     def _synchronize_repository(self, request, repo_id):
         """
@@ -254,6 +305,21 @@ class StrategyUnsupported(Exception):
         Exception.__init__(self, msg)
 
 
+def repository_concurrency(options):
+    """
+    Get the maximum number of repositories synchronized concurrently.
+    :param options: synchronization options.
+    :type options: dict
+    :return: The number of repositories, at least 1.
+    :rtype: int
+    """
+    concurrency = options.get(constants.MAX_REPOSITORY_CONCURRENCY_KEYWORD)
+    try:
+        return max(int(concurrency or constants.DEFAULT_REPOSITORY_CONCURRENCY), 1)
+    except (TypeError, ValueError):
+        return constants.DEFAULT_REPOSITORY_CONCURRENCY
+
+
 def find_strategy(name):
     """
     Find a strategy (class) by name.
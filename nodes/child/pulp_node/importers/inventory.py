@@ -1,4 +1,5 @@
 from pulp_node import constants
+from pulp_node.manifest import ACTION, ADDED, UPDATED, REMOVED
 
 
 class UniqueKey(object):
@@ -99,3 +100,76 @@ class UnitInventory(object):
             if parent_last_updated > child_last_updated:
                 updated.append((unit, ref))
         return updated
+
+
+class DeltaInventory(object):
+    """
+    The unit inventory built from the deltas published by the parent since
+    the manifest last applied by the child.  It provides the same listings as
+    the UnitInventory without the full inventory of either node.
+    """
+
+    @staticmethod
+    def _import_delta_units(units):
+        _units = {}
+        for unit, ref in units:
+            unit.pop('metadata', None)
+            key = UniqueKey(unit)
+            previous = _units.get(key)
+            if previous and previous[0][ACTION] == ADDED and unit[ACTION] == UPDATED:
+                # still not on the child
+                unit[ACTION] = ADDED
+            _units[key] = (unit, ref)
+        return _units
+
+    def __init__(self, base_URL, delta_units):
+        """
+        :param base_URL: The base URL for downloading parent units.
+        :param delta_units: The content units in the deltas, oldest first.
+        :type delta_units: iterable
+        """
+        self.base_URL = base_URL
+        self.delta_units = self._import_delta_units(delta_units)
+        self.child_units = {}
+
+    def removed_units(self):
+        """
+        Listing of units removed from the parent.
+        :return: List of units with the type_id and unit_key.
+        :rtype: list
+        """
+        return [u for u, r in self.delta_units.values() if u[ACTION] == REMOVED]
+
+    def import_child_units(self, units):
+        """
+        Import the units in the child inventory that have been removed from the parent.
+        :param units: The content units in the child node.
+        :type units: iterable
+        """
+        self.child_units = UnitInventory._import_child_units(units)
+
+    def units_on_parent_only(self):
+        """
+        Listing of units added to the parent.
+        :return: List of (unit, ref).
+        :rtype: list
+        """
+        return [r for r in self.delta_units.values() if r[0][ACTION] == ADDED]
+
+    def units_on_child_only(self):
+        """
+        Listing of units contained in the child inventory
+        but removed from the parent.
+        :return: List of units that need to be purged.
+        :rtype: list
+        """
+        return [u for k, u in self.child_units.items()
+                if k in self.delta_units and self.delta_units[k][0][ACTION] == REMOVED]
+
+    def updated_units(self):
+        """
+        Listing of units updated on the parent.
+        :return: List of (unit, ref).
+        :rtype: list
+        """
+        return [r for r in self.delta_units.values() if r[0][ACTION] == UPDATED]
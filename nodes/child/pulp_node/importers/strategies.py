@@ -19,7 +19,7 @@ from pulp_node import constants
 from pulp_node import pathlib
 from pulp_node.conduit import NodesConduit
 from pulp_node.manifest import Manifest, RemoteManifest
-from pulp_node.importers.inventory import UnitInventory
+from pulp_node.importers.inventory import UnitInventory, DeltaInventory
 from pulp_node.importers.download import ContentDownloadListener
 from pulp_node.error import (NodeError, GetChildUnitsError, GetParentUnitsError, AddUnitError,
                              DeleteUnitError, InvalidManifestError, CaughtException)
@@ -50,6 +50,8 @@ class Request(object):
     :type repo_id: str
     :ivar working_dir: The absolute path to a directory to be used as temporary storage.
     :type working_dir: str
+    :ivar manifest_id: The ID of the parent manifest being applied.
+    :type manifest_id: str
     """
 
     def __init__(self, cancel_event, conduit, config, downloader, progress, summary, repo):
@@ -78,6 +80,7 @@ class Request(object):
         self.summary = summary
         self.repo_id = repo.id
         self.working_dir = repo.working_dir
+        self.manifest_id = None
 
     def started(self):
         """
@@ -113,6 +116,8 @@ class ImporterStrategy(object):
 
         try:
             self._synchronize(request)
+            if not request.summary.errors and not request.cancelled():
+                self._manifest_applied(request)
         except NodeError, ne:
             request.summary.errors.append(ne)
         except Exception, e:
@@ -151,14 +156,67 @@ class ImporterStrategy(object):
 
     # --- protected ---------------------------------------------------------------------
 
+    def _applied_manifest(self, request):
+        """
+        Get the ID of the parent manifest last applied by this strategy.
+        :param request: A synchronization request.
+        :type request: SyncRequest
+        :return: The manifest ID or None.
+        :rtype: str
+        """
+        scratchpad = request.conduit.get_scratchpad()
+        if not isinstance(scratchpad, dict):
+            return None
+        applied = scratchpad.get(constants.APPLIED_MANIFEST_KEYWORD) or {}
+        if applied.get(constants.STRATEGY_KEYWORD) != self._strategy_name(request):
+            # units removed on the parent were kept by a different strategy
+            return None
+        return applied.get(constants.MANIFEST_ID_KEYWORD)
+
+    def _manifest_applied(self, request):
+        """
+        Record that the parent manifest has been applied so the next
+        synchronization only needs the deltas published after it.
+        :param request: A synchronization request.
+        :type request: SyncRequest
+        """
+        if not request.manifest_id:
+            return
+        scratchpad = request.conduit.get_scratchpad()
+        if not isinstance(scratchpad, dict):
+            scratchpad = {}
+        scratchpad[constants.APPLIED_MANIFEST_KEYWORD] = {
+            constants.MANIFEST_ID_KEYWORD: request.manifest_id,
+            constants.STRATEGY_KEYWORD: self._strategy_name(request),
+        }
+        request.conduit.set_scratchpad(scratchpad)
+
+    def _strategy_name(self, request):
+        """
+        :param request: A synchronization request.
+        :type request: SyncRequest
+        :return: The name of the strategy used for the request.
+        :rtype: str
+        """
+        return request.config.get(constants.STRATEGY_KEYWORD, constants.DEFAULT_STRATEGY)
+
     def _unit_inventory(self, request):
         """
         Build the unit inventory.
+        When the deltas published by the parent lead from the manifest last applied,
+        the inventory is built from the deltas.  Otherwise, it is built by comparing
+        the full parent and child inventories.
         :param request: A synchronization request.
         :type request: SyncRequest
         :return: The built inventory.
         :rtype: UnitInventory
         """
+        manifest_id = self._applied_manifest(request)
+        if manifest_id:
+            inventory = self._delta_inventory(request, manifest_id)
+            if inventory is not None:
+                return inventory
+
         # fetch child units
         try:
             conduit = NodesConduit()
@@ -201,6 +259,45 @@ class ImporterStrategy(object):
         parent_units = manifest.get_units()
         base_URL = manifest.publishing_details[constants.BASE_URL]
         inventory = UnitInventory(base_URL, parent_units, child_units)
+        request.manifest_id = manifest.id
+        return inventory
+
+    def _delta_inventory(self, request, manifest_id):
+        """
+        Build the unit inventory using the deltas published by the parent
+        since the specified manifest.
+        :param request: A synchronization request.
+        :type request: SyncRequest
+        :param manifest_id: The ID of the manifest last applied.
+        :type manifest_id: str
+        :return: The built inventory or None when the deltas cannot be used.
+        :rtype: DeltaInventory
+        """
+        try:
+            request.progress.begin_manifest_download()
+            url = request.config.get(constants.MANIFEST_URL_KEYWORD)
+            manifest = RemoteManifest(url, request.downloader, request.working_dir)
+            manifest.fetch()
+            if not manifest.is_valid():
+                return None
+            chain = manifest.delta_chain(manifest_id)
+            if chain is None:
+                _log.info(_('No delta chain from manifest %(m)s for repository %(r)s') %
+                          {'m': manifest_id, 'r': request.repo_id})
+                return None
+            delta_units = []
+            for delta in chain:
+                delta_units.extend(manifest.fetch_delta(delta))
+            base_URL = manifest.publishing_details[constants.BASE_URL]
+            inventory = DeltaInventory(base_URL, delta_units)
+            removed = inventory.removed_units()
+            if removed:
+                conduit = NodesConduit()
+                inventory.import_child_units(conduit.find_units(request.repo_id, removed))
+        except Exception:
+            _log.exception(request.repo_id)
+            return None
+        request.manifest_id = manifest.id
         return inventory
 
     def _reset_storage_path(self, unit):
@@ -27,6 +27,35 @@ class NodesConduit(object):
             id_list.append(unit_id)
         return UnitsIterator(associations, unit_ids)
 
+    @staticmethod
+    def find_units(repo_id, units):
+        """
+        Find units associated with a repository by type and unit key.
+        :param repo_id: The repository ID used to query the units.
+        :type repo_id: str
+        :param units: Units with the type_id and unit_key to find.
+        :type units: iterable
+        :return: unit iterator
+        :rtype: UnitsIterator
+        """
+        found = {}
+        for unit in units:
+            collection = type_units_collection(unit['type_id'])
+            document = collection.find_one(unit['unit_key'], {'_id': 1})
+            if document:
+                found[document['_id']] = unit['type_id']
+        unit_ids = {}
+        associations = {}
+        collection = RepoContentUnit.get_collection()
+        for page in paginate(found):
+            query = {'repo_id': repo_id, 'unit_id': {'$in': page}}
+            for association in collection.find(query):
+                unit_id = association['unit_id']
+                associations[unit_id] = association
+                id_list = unit_ids.setdefault(found[unit_id], [])
+                id_list.append(unit_id)
+        return UnitsIterator(associations, unit_ids)
+
 
 class UnitsIterator(object):
     """
@@ -41,9 +41,16 @@ PURGE_ORPHANS_KEYWORD = 'purge_orphans'
 
 MAX_DOWNLOAD_BANDWIDTH_KEYWORD = 'max_download_bandwidth'
 MAX_DOWNLOAD_CONCURRENCY_KEYWORD = 'max_download_concurrency'
+MAX_REPOSITORY_CONCURRENCY_KEYWORD = 'max_repository_concurrency'
 
 SKIP_CONTENT_UPDATE_KEYWORD = 'skip_content_update'
 
+TARBALL_CACHE_KEYWORD = 'tarball_cache'
+
+# the importer scratchpad records the parent manifest last applied
+APPLIED_MANIFEST_KEYWORD = 'applied_manifest'
+MANIFEST_ID_KEYWORD = 'manifest_id'
+
 
 # --- unit/publishing --------------------------------------------------------
 
@@ -70,6 +77,7 @@ STRATEGY_NOTE_KEY = '_node-update-strategy'
 # --- settings ---------------------------------------------------------------
 
 DEFAULT_DOWNLOAD_CONCURRENCY = 20
+DEFAULT_REPOSITORY_CONCURRENCY = 1
 
 
 # --- profiling --------------------------------------------------------------
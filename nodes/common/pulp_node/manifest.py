@@ -14,6 +14,8 @@ Provides classes for managing the content unit manifest.
 The manifest is a json encoded file that defines content units
 associated with repository.  The units themselves are stored in a separate
 json encoded file.  For performance reasons, the unit files are compressed.
+The manifest also lists a chain of deltas.  Each delta is a units file containing
+the units added, updated and removed between a prior manifest and the next one.
 """
 
 import os
@@ -49,6 +51,23 @@ UNITS_PATH = 'path'
 UNITS_TOTAL = 'total'
 UNITS_SIZE = 'size'
 
+DELTAS = 'deltas'
+DELTAS_DIR = 'deltas'
+DELTA_FROM = 'from'
+DELTA_TO = 'to'
+DELTA_PATH = 'path'
+DELTA_TOTAL = 'total'
+DELTA_SIZE = 'size'
+
+# the number of deltas kept in the chain
+MAX_DELTAS = 20
+
+# the change recorded for each unit in a delta
+ACTION = 'action'
+ADDED = 'added'
+UPDATED = 'updated'
+REMOVED = 'removed'
+
 
 # --- utils -----------------------------------------------------------------------------
 
@@ -90,6 +109,8 @@ class Manifest(object):
     :type total_units: int
     :param publishing_details: Details of how units have been published.
     :type publishing_details: dict
+    :ivar deltas: The chain of deltas leading to this manifest, oldest first.
+    :type deltas: list
     """
 
     def __init__(self, path, manifest_id=None):
@@ -104,6 +125,7 @@ class Manifest(object):
         self.version = MANIFEST_VERSION
         self.units = {UNITS_PATH: None, UNITS_TOTAL: 0, UNITS_SIZE: 0}
         self.publishing_details = {}
+        self.deltas = []
         if os.path.isdir(path):
             path = pathlib.join(path, MANIFEST_FILE_NAME)
         self.path = path
@@ -118,7 +140,8 @@ class Manifest(object):
             ID: self.id,
             VERSION: self.version,
             UNITS: self.units,
-            PUBLISHING_DETAILS: self.publishing_details
+            PUBLISHING_DETAILS: self.publishing_details,
+            DELTAS: self.deltas
         }
         with open(self.path, 'w+') as fp:
             json.dump(state, fp, indent=2)
@@ -138,6 +161,7 @@ class Manifest(object):
         self.version = d.get(VERSION, 0)
         self.units = d.get(UNITS, {UNITS_PATH: None, UNITS_TOTAL: 0, UNITS_SIZE: 0})
         self.publishing_details = d.get(PUBLISHING_DETAILS, {})
+        self.deltas = d.get(DELTAS, [])
 
     def get_units(self):
         """
@@ -164,6 +188,50 @@ class Manifest(object):
         self.units[UNITS_TOTAL] = unit_writer.total_units
         self.units[UNITS_SIZE] = unit_writer.bytes_written
 
+    def delta_published(self, manifest_id, unit_writer, path):
+        """
+        Add a delta from a prior manifest to this manifest to the end of the chain.
+        The oldest deltas are dropped from the chain to keep it at MAX_DELTAS.
+        :param manifest_id: The ID of the prior manifest.
+        :type manifest_id: str
+        :param unit_writer: The writer used to publish the delta.
+        :type unit_writer: UnitWriter
+        :param path: The path to the delta relative to the manifest.
+        :type path: str
+        """
+        delta = {
+            DELTA_FROM: manifest_id,
+            DELTA_TO: self.id,
+            DELTA_PATH: path,
+            DELTA_TOTAL: unit_writer.total_units,
+            DELTA_SIZE: unit_writer.bytes_written,
+        }
+        self.deltas.append(delta)
+        self.deltas = self.deltas[-MAX_DELTAS:]
+
+    def delta_chain(self, manifest_id):
+        """
+        Get the deltas leading from a prior manifest to this manifest.
+        :param manifest_id: The ID of the prior manifest.
+        :type manifest_id: str
+        :return: The deltas, oldest first, or None when the chain does not
+            lead from the prior manifest to this manifest.
+        :rtype: list
+        """
+        if manifest_id == self.id:
+            return []
+        chain = []
+        next_id = manifest_id
+        for delta in self.deltas:
+            if not chain and delta[DELTA_FROM] != manifest_id:
+                continue
+            if delta[DELTA_FROM] != next_id:
+                return None
+            chain.append(delta)
+            next_id = delta[DELTA_TO]
+        if chain and next_id == self.id:
+            return chain
+
     def published(self, details):
         """
         Update the publishing details.
@@ -264,14 +332,8 @@ class RemoteManifest(Manifest):
         :raise HTTPError: on URL errors.
         :raise ValueError: on json decoding errors
         """
-        listener = AggregatingEventListener()
         destination = os.path.join(os.path.dirname(self.path), '.' + MANIFEST_FILE_NAME)
-        request = DownloadRequest(self.url, destination)
-        self.downloader.event_listener = listener
-        self.downloader.download([request])
-        if listener.failed_reports:
-            report = listener.failed_reports[0]
-            raise ManifestDownloadError(self.url, report.error_msg)
+        self._download(self.url, destination)
         self.read(destination)
 
     def fetch_units(self):
@@ -284,6 +346,44 @@ class RemoteManifest(Manifest):
         base_url = self.url.rsplit('/', 1)[0]
         url = pathlib.join(base_url, UNITS_FILE_NAME)
         destination = pathlib.join(os.path.dirname(self.path), UNITS_FILE_NAME)
+        self._download(url, destination)
+
+    def fetch_delta(self, delta):
+        """
+        Fetch a delta listed in the manifest.
+        :param delta: A delta in the chain.
+        :type delta: dict
+        :return: An iterator used to read the units in the delta.
+        :rtype: iterable
+        :raise ManifestDownloadError: on downloading errors.
+        :raise HTTPError: on URL errors.
+        :raise IOError: on I/O errors.
+        """
+        base_url = self.url.rsplit('/', 1)[0]
+        url = pathlib.join(base_url, delta[DELTA_PATH])
+        destination = pathlib.join(os.path.dirname(self.path), delta[DELTA_PATH])
+        dir_path = os.path.dirname(destination)
+        if not os.path.isdir(dir_path):
+            os.makedirs(dir_path)
+        self._download(url, destination)
+        if os.path.getsize(destination) != delta[DELTA_SIZE]:
+            raise ManifestDownloadError(url, 'delta size does not match the manifest')
+        if not delta[DELTA_TOTAL]:
+            return []
+        path = destination[:-3]
+        unzip(destination, path)
+        os.unlink(destination)
+        return UnitIterator(path, delta[DELTA_TOTAL])
+
+    def _download(self, url, destination):
+        """
+        Download a file.
+        :param url: The URL to the file.
+        :type url: str
+        :param destination: The absolute path to where the file is downloaded.
+        :type destination: str
+        :raise ManifestDownloadError: on downloading errors.
+        """
         request = DownloadRequest(str(url), destination)
         listener = AggregatingEventListener()
         self.downloader.event_listener = listener
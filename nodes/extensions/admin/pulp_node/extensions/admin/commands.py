@@ -17,7 +17,7 @@ from pulp_node.extension import (missing_resources, node_activated, repository_e
                                  ensure_node_section)
 from pulp_node.extensions.admin import sync_schedules
 from pulp_node.extensions.admin.options import (NODE_ID_OPTION, MAX_BANDWIDTH_OPTION,
-                                                MAX_CONCURRENCY_OPTION)
+                                                MAX_CONCURRENCY_OPTION, MAX_REPOSITORIES_OPTION)
 from pulp_node.extensions.admin.rendering import ProgressTracker, UpdateRenderer
 
 
@@ -485,6 +485,7 @@ class NodeUpdateCommand(PollingCommand):
         super(NodeUpdateCommand, self).__init__(UPDATE_NAME, UPDATE_DESC, self.run, context)
         self.add_option(NODE_ID_OPTION)
         self.add_option(MAX_CONCURRENCY_OPTION)
+        self.add_option(MAX_REPOSITORIES_OPTION)
         self.add_option(MAX_BANDWIDTH_OPTION)
         self.tracker = ProgressTracker(self.context.prompt)
 
@@ -493,10 +494,12 @@ class NodeUpdateCommand(PollingCommand):
         node_id = kwargs[NODE_ID_OPTION.keyword]
         max_bandwidth = kwargs[MAX_BANDWIDTH_OPTION.keyword]
         max_concurrency = kwargs[MAX_CONCURRENCY_OPTION.keyword]
+        max_repositories = kwargs[MAX_REPOSITORIES_OPTION.keyword]
         units = [dict(type_id='node', unit_key=None)]
         options = {
             constants.MAX_DOWNLOAD_BANDWIDTH_KEYWORD: max_bandwidth,
             constants.MAX_DOWNLOAD_CONCURRENCY_KEYWORD: max_concurrency,
+            constants.MAX_REPOSITORY_CONCURRENCY_KEYWORD: max_repositories,
         }
 
         if not node_activated(self.context, node_id):
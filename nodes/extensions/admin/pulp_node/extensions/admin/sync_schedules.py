@@ -7,7 +7,7 @@ from pulp.client.commands.schedule import (
 from pulp_node import constants
 from pulp_node.error import CLI_DEPRECATION_WARNING
 from pulp_node.extensions.admin.options import (NODE_ID_OPTION, MAX_BANDWIDTH_OPTION,
-                                                MAX_CONCURRENCY_OPTION)
+                                                MAX_CONCURRENCY_OPTION, MAX_REPOSITORIES_OPTION)
 
 
 DESC_LIST = _('list scheduled sync operations')
@@ -38,6 +38,7 @@ class NodeCreateScheduleCommand(CreateScheduleCommand):
         self.add_option(NODE_ID_OPTION)
         self.add_option(MAX_BANDWIDTH_OPTION)
         self.add_option(MAX_CONCURRENCY_OPTION)
+        self.add_option(MAX_REPOSITORIES_OPTION)
 
     def run(self, **kwargs):
         self.context.prompt.render_warning_message(CLI_DEPRECATION_WARNING)
@@ -90,10 +91,12 @@ class NodeSyncScheduleStrategy(ScheduleStrategy):
         node_id = kwargs[NODE_ID_OPTION.keyword]
         max_bandwidth = kwargs[MAX_BANDWIDTH_OPTION.keyword]
         max_concurrency = kwargs[MAX_CONCURRENCY_OPTION.keyword]
+        max_repositories = kwargs[MAX_REPOSITORIES_OPTION.keyword]
         units = [dict(type_id='node', unit_key=None)]
         options = {
             constants.MAX_DOWNLOAD_BANDWIDTH_KEYWORD: max_bandwidth,
             constants.MAX_DOWNLOAD_CONCURRENCY_KEYWORD: max_concurrency,
+            constants.MAX_REPOSITORY_CONCURRENCY_KEYWORD: max_repositories,
         }
         return self.api.add_schedule(
             SYNC_OPERATION,
@@ -14,6 +14,7 @@ from pulp_node import constants
 from pulp_node import pathlib
 from pulp_node.conduit import NodesConduit
 from pulp_node.distributors.http.publisher import HttpPublisher
+from pulp_node.distributors.publisher import TarballCache
 from pulp_node.error import TASK_DEPRECATION_WARNING, NodeDeprecationWarning
 
 
@@ -111,6 +112,8 @@ class NodesHttpDistributor(Distributor):
             publisher.publish(units)
             publisher.commit()
         details = dict(unit_count=len(units))
+        if publisher.tarball_cache is not None:
+            details['tarball_cache'] = publisher.tarball_cache.stats()
         return conduit.build_success_report('succeeded', details)
 
     def publisher(self, repo, config):
@@ -128,7 +131,29 @@ class NodesHttpDistributor(Distributor):
         alias = section.get('alias')
         base_url = '://'.join((protocol, host))
         repo_publish_dir = self._get_publish_dir(repo.id, config)
-        return HttpPublisher(base_url, alias, repo.id, repo_publish_dir)
+        tarball_cache = self._tarball_cache(config)
+        return HttpPublisher(base_url, alias, repo.id, repo_publish_dir, tarball_cache)
+
+    def _tarball_cache(self, config):
+        """
+        Get the cache of the tarballs of units with multiple files.
+        By default, the cache is kept in a "tarballs" directory next to
+        the publishing directory so that tarballs can be linked.
+        :param config: plugin config
+        :type  config: pulp.plugins.config.PluginCallConfiguration
+        :return: The cache or None when disabled.
+        :rtype: pulp_node.distributors.publisher.TarballCache
+        """
+        section = config.get(constants.TARBALL_CACHE_KEYWORD) or {}
+        if not section.get('enabled', True):
+            return None
+        path = section.get('path')
+        if not path:
+            protocol = config.get(constants.PROTOCOL_KEYWORD)
+            url, publish_path = config.get(protocol).get('alias')
+            path = os.path.join(os.path.dirname(publish_path.rstrip('/')), 'tarballs')
+        max_size = int(section.get('max_size', TarballCache.DEFAULT_MAX_SIZE))
+        return TarballCache(path, max_size)
 
     def cancel_publish_repo(self):
         pass
@@ -24,7 +24,7 @@ class HttpPublisher(FilePublisher):
     :type alias: tuple(2)
     """
 
-    def __init__(self, base_url, alias, repo_id, publish_path):
+    def __init__(self, base_url, alias, repo_id, publish_path, tarball_cache=None):
         """
         :param base_url: The base URL.
         :type base_url: str
@@ -32,11 +32,13 @@ class HttpPublisher(FilePublisher):
         :type alias: tuple(2)
         :param repo_id: A repository ID.
         :type repo_id: str
+        :param tarball_cache: An optional cache of the tarballs of units with multiple files.
+        :type tarball_cache: pulp_node.distributors.publisher.TarballCache
         """
         self.base_url = base_url
         self.alias = alias
         self.repo_id = repo_id
-        FilePublisher.__init__(self, publish_path)
+        FilePublisher.__init__(self, publish_path, tarball_cache)
 
     def publish(self, units):
         """
@@ -9,16 +9,23 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import errno
+import hashlib
 import os
+import shutil
 import tarfile
 
 from uuid import uuid4
-from tempfile import mkdtemp
+from tempfile import mkdtemp, mkstemp
 from logging import getLogger
 
+from pulp.common.util import encode_unicode
+
 from pulp_node import constants
 from pulp_node import pathlib
-from pulp_node.manifest import Manifest, UnitWriter
+from pulp_node.manifest import (Manifest, UnitIterator, UnitWriter, unzip, MANIFEST_FILE_NAME,
+                                UNITS_TOTAL, DELTAS_DIR, DELTA_PATH, MAX_DELTAS,
+                                ACTION, ADDED, UPDATED, REMOVED)
 
 
 log = getLogger(__name__)
@@ -57,6 +64,170 @@ def tar_dir(dir_path, tar_path, bufsize=65535):
         tb.close()
 
 
+def unit_key(unit):
+    """
+    Get a key that identifies a unit in the units published in a manifest.
+    The key cannot be hashed when the unit_key has list or dict values.
+    :param unit: A content unit.
+    :type unit: dict
+    :return: The type_id and the sorted unit_key.
+    :rtype: tuple
+    """
+    return unit[constants.TYPE_ID], tuple(sorted(unit[constants.UNIT_KEY].items()))
+
+
+def link(path, destination):
+    """
+    Hard link a file, copying it when it cannot be linked.
+    :param path: The absolute path to a file.
+    :type path: str
+    :param destination: The absolute path to the link.
+    :type destination: str
+    """
+    try:
+        os.link(path, destination)
+    except OSError, e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        shutil.copyfile(path, destination)
+
+
+# --- tarball cache ------------------------------------------------
+
+
+class TarballCache(object):
+    """
+    A content addressed cache of the tarballs of units that have multiple files.
+    Each tarball is keyed by the unit ID, the storage path, and the path, size
+    and modification time of each file within the storage path.  Tarballs are
+    linked into the publishing directory so unchanged units are not archived
+    again when the repository is republished.  The least recently used tarballs
+    are evicted when the cache grows beyond its maximum size.
+    :ivar path: The absolute path to the cache directory.
+    :type path: str
+    :ivar max_size: The maximum number of bytes kept in the cache.
+    :type max_size: int
+    :ivar hits: The number of tarballs found in the cache.
+    :type hits: int
+    :ivar misses: The number of tarballs built and added to the cache.
+    :type misses: int
+    :ivar evictions: The number of tarballs evicted from the cache.
+    :type evictions: int
+    """
+
+    # 10 GiB
+    DEFAULT_MAX_SIZE = 10 * 1024 ** 3
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        """
+        :param path: The absolute path to the cache directory.  It must be on the same
+            file system as the publishing directory for the tarballs to be linked.
+        :type path: str
+        :param max_size: The maximum number of bytes kept in the cache.
+        :type max_size: int
+        """
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(unit_id, dir_path):
+        """
+        Get the cache key for a unit directory.
+        :param unit_id: A unit ID.
+        :type unit_id: str
+        :param dir_path: The absolute path to the unit directory.
+        :type dir_path: str
+        :return: The hex digest of the unit ID and the directory contents.
+        :rtype: str
+        """
+        digest = hashlib.sha256()
+        for value in (unit_id, dir_path):
+            digest.update(encode_unicode(value or ''))
+            digest.update('\0')
+        for root, dirs, files in os.walk(dir_path):
+            dirs.sort()
+            for name in sorted(dirs + files):
+                path = os.path.join(root, name)
+                st = os.lstat(path)
+                digest.update(encode_unicode(path[len(dir_path):]))
+                # mtime is hashed at full precision, and the inode and ctime are
+                # included so that files replaced within the same second are noticed
+                digest.update('\0%d\0%d\0%r\0%r\0' % (
+                    st.st_size, st.st_ino, st.st_mtime, st.st_ctime))
+        return digest.hexdigest()
+
+    def link(self, unit_id, dir_path, destination):
+        """
+        Link the tarball of a unit directory to the destination, building and
+        adding the tarball to the cache when not already cached.
+        :param unit_id: A unit ID.
+        :type unit_id: str
+        :param dir_path: The absolute path to the unit directory.
+        :type dir_path: str
+        :param destination: The absolute path to the published tarball.
+        :type destination: str
+        """
+        path = pathlib.join(self.path, self.key(unit_id, dir_path) + '.tar')
+        try:
+            link(path, destination)
+            # track recent use for eviction
+            os.utime(path, None)
+            self.hits += 1
+            return
+        except OSError, e:
+            # not cached or just evicted by another publish
+            if e.errno != errno.ENOENT:
+                raise
+        self.misses += 1
+        pathlib.mkdir(self.path)
+        fd, tmp_path = mkstemp(dir=self.path, prefix='.')
+        os.close(fd)
+        try:
+            tar_dir(dir_path, tmp_path)
+            os.rename(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        link(path, destination)
+        self.evict()
+
+    def evict(self):
+        """
+        Evict the least recently used tarballs until the cache is within its maximum size.
+        """
+        entries = []
+        size = 0
+        for name in os.listdir(self.path):
+            if not name.endswith('.tar'):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            size += st.st_size
+        entries.sort()
+        while size > self.max_size and entries:
+            mtime, entry_size, path = entries.pop(0)
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            size -= entry_size
+            self.evictions += 1
+
+    def stats(self):
+        """
+        :return: The hit, miss and eviction counters.
+        :rtype: dict
+        """
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions)
+
+
 # --- publisher ----------------------------------------------------
 
 
@@ -94,16 +265,21 @@ class FilePublisher(Publisher):
     :type tmp_dir: str
     :ivar staged: A flag indicating that publishing has been staged and needs commit.
     :type staged: bool
+    :ivar tarball_cache: An optional cache of the tarballs of units with multiple files.
+    :type tarball_cache: TarballCache
     """
 
-    def __init__(self, publish_dir):
+    def __init__(self, publish_dir, tarball_cache=None):
         """
         :param publish_dir: The publishing root directory for this repository
         :type publish_dir: str
+        :param tarball_cache: An optional cache of the tarballs of units with multiple files.
+        :type tarball_cache: TarballCache
         """
         self.publish_dir = publish_dir
         self.tmp_dir = None
         self.staged = False
+        self.tarball_cache = tarball_cache
 
     def publish(self, units):
         """
@@ -121,17 +297,152 @@ class FilePublisher(Publisher):
         pathlib.mkdir(parent_path)
         self.tmp_dir = mkdtemp(dir=parent_path)
 
-        with UnitWriter(self.tmp_dir) as writer:
-            for unit in units:
-                self.publish_unit(unit)
-                writer.add(unit)
         manifest_id = str(uuid4())
         manifest = Manifest(self.tmp_dir, manifest_id)
-        manifest.units_published(writer)
+        previous = self.previous_manifest()
+        published = None
+        if previous is not None:
+            published = self.published_units(previous)
+        delta_writer = None
+        delta_path = pathlib.join(DELTAS_DIR, manifest_id + '.json.gz')
+        if published is not None:
+            pathlib.mkdir(pathlib.join(self.tmp_dir, DELTAS_DIR))
+            delta_writer = UnitWriter(pathlib.join(self.tmp_dir, delta_path))
+
+        try:
+            with UnitWriter(self.tmp_dir) as writer:
+                for unit in units:
+                    self.publish_unit(unit)
+                    writer.add(unit)
+                    if delta_writer is not None and \
+                            not self.add_delta(delta_writer, published, unit):
+                        # only the full manifest can be published
+                        self.discard_delta(delta_writer)
+                        delta_writer = None
+            manifest.units_published(writer)
+
+            if delta_writer is not None:
+                with delta_writer:
+                    for type_id, key in published:
+                        delta_writer.add({constants.TYPE_ID: type_id,
+                                          constants.UNIT_KEY: dict(key),
+                                          ACTION: REMOVED})
+                manifest.deltas = self.link_deltas(previous)
+                manifest.delta_published(previous.id, delta_writer, delta_path)
+        except Exception:
+            if delta_writer is not None:
+                self.discard_delta(delta_writer)
+            raise
         manifest.write()
         self.staged = True
         return manifest.path
 
+    def previous_manifest(self):
+        """
+        Get the manifest committed by the previous publish.
+        :return: The manifest or None when there is no valid published manifest.
+        :rtype: Manifest
+        """
+        manifest = Manifest(pathlib.join(self.publish_dir, MANIFEST_FILE_NAME))
+        try:
+            manifest.read()
+        except IOError, e:
+            if e.errno != errno.ENOENT:
+                log.exception(self.publish_dir)
+            return None
+        except ValueError:
+            log.exception(self.publish_dir)
+            return None
+        if manifest.id and manifest.is_valid() and manifest.has_valid_units():
+            return manifest
+
+    def published_units(self, manifest):
+        """
+        Index the units published with a manifest.
+        :param manifest: A published manifest.
+        :type manifest: Manifest
+        :return: The last_updated of each unit keyed by unit_key() or
+            None when the units cannot be read or indexed.
+        :rtype: dict
+        """
+        published = {}
+        if not manifest.units[UNITS_TOTAL]:
+            return published
+        path = pathlib.join(self.tmp_dir, '.published_units.json')
+        try:
+            unzip(manifest.units_path(), path)
+            for unit, ref in UnitIterator(path, manifest.units[UNITS_TOTAL]):
+                published[unit_key(unit)] = unit.get(constants.LAST_UPDATED, 0)
+        except (IOError, ValueError):
+            log.exception(self.publish_dir)
+            return None
+        except TypeError:
+            # a unit_key has list or dict values
+            return None
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+        return published
+
+    def add_delta(self, writer, published, unit):
+        """
+        Add the unit to the delta when it has been added or updated since the
+        previous publish.  Units found are removed from the published index so
+        that only units that have been removed remain.
+        :param writer: The delta writer.
+        :type writer: UnitWriter
+        :param published: The last_updated of each previously published unit.
+        :type published: dict
+        :param unit: A content unit.
+        :type unit: dict
+        :return: False when the unit cannot be identified in a delta
+            because its unit_key has list or dict values.
+        :rtype: bool
+        """
+        key = unit_key(unit)
+        try:
+            found = key in published
+        except TypeError:
+            return False
+        if not found:
+            writer.add(dict(unit, **{ACTION: ADDED}))
+            return True
+        last_updated = published.pop(key)
+        if unit.get(constants.LAST_UPDATED, 0) > last_updated:
+            writer.add(dict(unit, **{ACTION: UPDATED}))
+        return True
+
+    def discard_delta(self, writer):
+        """
+        Close the delta writer and delete the partially written delta.
+        :param writer: The delta writer.
+        :type writer: UnitWriter
+        """
+        writer.close()
+        if os.path.exists(writer.path):
+            os.unlink(writer.path)
+
+    def link_deltas(self, manifest):
+        """
+        Link the most recent deltas published with the previous manifest
+        into the temporary publishing directory.
+        :param manifest: The previously published manifest.
+        :type manifest: Manifest
+        :return: The linked deltas, oldest first.
+        :rtype: list
+        """
+        linked = []
+        for delta in reversed(manifest.deltas[-(MAX_DELTAS - 1):]):
+            path = pathlib.join(self.publish_dir, delta[DELTA_PATH])
+            try:
+                os.link(path, pathlib.join(self.tmp_dir, delta[DELTA_PATH]))
+            except OSError:
+                # the chain cannot lead through a missing delta
+                log.exception(path)
+                break
+            linked.insert(0, delta)
+        return linked
+
     def publish_unit(self, unit):
         """
         Publish the file associated with the unit into the publish directory.
@@ -149,7 +460,10 @@ class FilePublisher(Publisher):
         relative_path = unit[constants.RELATIVE_PATH]
         published_path = pathlib.join(self.tmp_dir, relative_path)
         pathlib.mkdir(os.path.dirname(published_path))
-        tar_dir(storage_path, tar_path(published_path))
+        if self.tarball_cache is None:
+            tar_dir(storage_path, tar_path(published_path))
+        else:
+            self.tarball_cache.link(unit.get('unit_id'), storage_path, tar_path(published_path))
         unit[constants.TARBALL_PATH] = tar_path(relative_path)
 
     def commit(self):
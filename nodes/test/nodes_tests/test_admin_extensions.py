@@ -17,6 +17,7 @@ NODE_ID = 'test.redhat.com'
 REPOSITORY_ID = 'test_repository'
 MAX_BANDWIDTH = 12345
 MAX_CONCURRENCY = 54321
+MAX_REPOSITORIES = 4
 
 REPO_ENABLED_CHECK = 'pulp_node.extensions.admin.commands.repository_enabled'
 NODE_ACTIVATED_CHECK = 'pulp_node.extensions.admin.commands.node_activated'
@@ -428,7 +429,8 @@ class TestUpdateCommands(ClientTests):
         keywords = {
             commands.NODE_ID_OPTION.keyword: NODE_ID,
             commands.MAX_BANDWIDTH_OPTION.keyword: MAX_BANDWIDTH,
-            commands.MAX_CONCURRENCY_OPTION.keyword: MAX_CONCURRENCY
+            commands.MAX_CONCURRENCY_OPTION.keyword: MAX_CONCURRENCY,
+            commands.MAX_REPOSITORIES_OPTION.keyword: MAX_REPOSITORIES
         }
         command.run(**keywords)
         # Verify
@@ -436,10 +438,12 @@ class TestUpdateCommands(ClientTests):
         options = {
             constants.MAX_DOWNLOAD_BANDWIDTH_KEYWORD: MAX_BANDWIDTH,
             constants.MAX_DOWNLOAD_CONCURRENCY_KEYWORD: MAX_CONCURRENCY,
+            constants.MAX_REPOSITORY_CONCURRENCY_KEYWORD: MAX_REPOSITORIES,
         }
         self.assertTrue(commands.NODE_ID_OPTION in command.options)
         self.assertTrue(commands.MAX_BANDWIDTH_OPTION in command.options)
         self.assertTrue(commands.MAX_CONCURRENCY_OPTION in command.options)
+        self.assertTrue(commands.MAX_REPOSITORIES_OPTION in command.options)
         mock_update.assert_called_with(NODE_ID, units=units, options=options)
         mock_activated.assert_called_with(self.context, NODE_ID)
 
@@ -117,3 +117,18 @@ class QueryTests(ServerTests):
             self.assertEqual(unit_key['N'], n)
             self.assertEqual(u['storage_path'], create_storage_path(unit_id))
             n += 1
+
+    def test_find_units(self):
+        populate(5)
+        unit_key = dict(UNIT_METADATA)
+        unit_key['N'] = 6
+        missing_key = dict(UNIT_METADATA)
+        missing_key['N'] = 100
+        conduit = NodesConduit()
+        units = conduit.find_units(REPO_ID, [
+            dict(type_id=TYPE_B, unit_key=unit_key),
+            dict(type_id=TYPE_B, unit_key=missing_key)])
+        unit_list = list(units)
+        self.assertEqual(len(unit_list), 1)
+        self.assertEqual(unit_list[0]['unit_id'], create_unit_id(TYPE_B, 6))
+        self.assertEqual(unit_list[0]['unit_key']['N'], 6)
@@ -7,12 +7,13 @@ from pulp.client.commands.schedule import CreateScheduleCommand, ListScheduleCom
 from pulp_node import constants
 from pulp_node.extensions.admin import sync_schedules
 from pulp_node.extensions.admin.options import (NODE_ID_OPTION, MAX_BANDWIDTH_OPTION,
-                                                MAX_CONCURRENCY_OPTION)
+                                                MAX_CONCURRENCY_OPTION, MAX_REPOSITORIES_OPTION)
 
 
 NODE_ID = 'node-1'
 MAX_BANDWIDTH = 12345
 MAX_CONCURRENCY = 321
+MAX_REPOSITORIES = 4
 
 
 class CommandTests(unittest.TestCase):
@@ -34,6 +35,7 @@ class CommandTests(unittest.TestCase):
         self.assertTrue(NODE_ID_OPTION in command.options)
         self.assertTrue(MAX_BANDWIDTH_OPTION in command.options)
         self.assertTrue(MAX_CONCURRENCY_OPTION in command.options)
+        self.assertTrue(MAX_REPOSITORIES_OPTION in command.options)
         self.assertEqual(command.description, sync_schedules.DESC_CREATE)
         self.assertTrue(isinstance(command.strategy, sync_schedules.NodeSyncScheduleStrategy))
 
@@ -77,7 +79,8 @@ class NodeSyncScheduleStrategyTests(unittest.TestCase):
         kwargs = {
             NODE_ID_OPTION.keyword: NODE_ID,
             MAX_BANDWIDTH_OPTION.keyword: MAX_BANDWIDTH,
-            MAX_CONCURRENCY_OPTION.keyword: MAX_CONCURRENCY
+            MAX_CONCURRENCY_OPTION.keyword: MAX_CONCURRENCY,
+            MAX_REPOSITORIES_OPTION.keyword: MAX_REPOSITORIES
         }
         self.strategy.create_schedule(schedule, failure_threshold, enabled, kwargs)
 
@@ -86,6 +89,7 @@ class NodeSyncScheduleStrategyTests(unittest.TestCase):
         options = {
             constants.MAX_DOWNLOAD_BANDWIDTH_KEYWORD: MAX_BANDWIDTH,
             constants.MAX_DOWNLOAD_CONCURRENCY_KEYWORD: MAX_CONCURRENCY,
+            constants.MAX_REPOSITORY_CONCURRENCY_KEYWORD: MAX_REPOSITORIES,
         }
         self.api.add_schedule.assert_called_once_with(
             sync_schedules.SYNC_OPERATION,
@@ -1,3 +1,4 @@
+from threading import Condition, current_thread
 from unittest import TestCase
 
 from mock import Mock, patch
@@ -7,6 +8,7 @@ from pulp_node import constants, error
 from pulp_node.handlers import strategies
 from pulp_node.handlers.model import Repository
 from pulp_node.handlers.reports import HandlerProgress, RepositoryReport, SummaryReport
+from pulp_node.reports import RepositoryProgress
 
 
 class TestConduit:
@@ -214,3 +216,87 @@ class TestBase(TestCase):
         for name, strategy in strategies.STRATEGIES.items():
             self.assertEqual(strategies.find_strategy(name), strategy)
         self.assertRaises(strategies.StrategyUnsupported, strategies.find_strategy, '---')
+
+
+class TestConcurrentMerge(TestCase):
+
+    REPO_IDS = ['repo_%d' % n for n in range(6)]
+
+    def request(self, concurrency, cancel_on=0):
+        conduit = TestConduit(cancel_on)
+        options = {
+            constants.PARENT_SETTINGS: PARENT_SETTINGS,
+            constants.MAX_REPOSITORY_CONCURRENCY_KEYWORD: concurrency,
+        }
+        request = strategies.Request(
+            conduit=conduit,
+            progress=HandlerProgress(conduit),
+            summary=SummaryReport(),
+            bindings=[dict(repo_id=repo_id, details={}) for repo_id in self.REPO_IDS],
+            scope=constants.NODE_SCOPE,
+            options=options)
+        request.started()
+        return request
+
+    def test_repository_concurrency(self):
+        key = constants.MAX_REPOSITORY_CONCURRENCY_KEYWORD
+        self.assertEqual(strategies.repository_concurrency({}), 1)
+        self.assertEqual(strategies.repository_concurrency({key: None}), 1)
+        self.assertEqual(strategies.repository_concurrency({key: '4'}), 4)
+        self.assertEqual(strategies.repository_concurrency({key: -2}), 1)
+        self.assertEqual(strategies.repository_concurrency({key: 'x'}), 1)
+
+    @patch('pulp_node.handlers.model.Repository.add')
+    @patch('pulp_node.handlers.model.Repository.fetch', return_value=None)
+    def test_merge_repositories(self, *unused):
+        request = self.request(3)
+        condition = Condition()
+        running = []
+        threads = set()
+
+        def synchronize(request, repo_id):
+            # wait until all 3 threads are synchronizing a repository
+            with condition:
+                running.append(repo_id)
+                threads.add(current_thread().name)
+                condition.notify_all()
+                while len(running) < 3:
+                    condition.wait(5)
+            request.progress.find_report(repo_id).finished()
+
+        strategy = strategies.HandlerStrategy()
+        with patch.object(strategy, '_synchronize_repository', side_effect=synchronize):
+            strategy._merge_repositories(request)
+
+        self.assertEqual(sorted(running), self.REPO_IDS)
+        self.assertEqual(len(threads), 3)
+        self.assertEqual(len(request.summary.errors), 0)
+        for repo_id in self.REPO_IDS:
+            self.assertEqual(request.summary[repo_id].action, RepositoryReport.ADDED)
+        progress = request.progress.dict()['progress']
+        self.assertEqual([p['repo_id'] for p in progress], self.REPO_IDS)
+        self.assertTrue(all(p['state'] == RepositoryProgress.FINISHED for p in progress))
+
+    @patch('pulp_node.handlers.model.Repository.fetch', side_effect=ValueError())
+    def test_merge_repositories_exception(self, *unused):
+        request = self.request(2)
+        strategy = strategies.HandlerStrategy()
+        strategy._merge_repositories(request)
+        self.assertEqual(len(request.summary.errors), len(self.REPO_IDS))
+
+    @patch('pulp_node.handlers.model.Repository.fetch')
+    def test_merge_repositories_cancelled(self, mock_fetch):
+        request = self.request(3, cancel_on=1)
+        strategy = strategies.HandlerStrategy()
+        strategy._merge_repositories(request)
+        self.assertFalse(mock_fetch.called)
+        self.assertEqual(len(request.summary.errors), 0)
+        for repo_id in self.REPO_IDS:
+            self.assertEqual(request.summary[repo_id].action, RepositoryReport.CANCELLED)
+
+    @patch('pulp_node.handlers.strategies.Thread')
+    def test_merge_repositories_sequential(self, mock_thread):
+        request = self.request(1, cancel_on=1)
+        strategy = strategies.HandlerStrategy()
+        strategy._merge_repositories(request)
+        self.assertFalse(mock_thread.called)
@@ -5,13 +5,17 @@ from unittest import TestCase
 from uuid import uuid4
 
 from mock import Mock, patch
+from nectar.config import DownloaderConfig
+from nectar.downloaders.local import LocalFileDownloader
 
 from pulp.plugins.model import Unit
 from pulp.server.config import config as pulp_conf
 
-from pulp_node import constants, error
+from pulp_node.distributors.http.publisher import HttpPublisher
+
+from pulp_node import constants, error, manifest as _manifest
 from pulp_node.importers import strategies
-from pulp_node.importers.inventory import UnitInventory
+from pulp_node.importers.inventory import UnitInventory, DeltaInventory
 from pulp_node.importers.reports import SummaryReport, ProgressListener
 from pulp_node.reports import RepositoryProgress
 
@@ -29,6 +33,15 @@ class TestConduit:
     remove_unit = Mock()
     set_progress = Mock()
 
+    def __init__(self):
+        self.scratchpad = None
+
+    def get_scratchpad(self):
+        return self.scratchpad
+
+    def set_scratchpad(self, value):
+        self.scratchpad = value
+
 
 class CancelEvent(object):
 
@@ -261,3 +274,175 @@ class TestBase(TestCase):
         for name, strategy in strategies.STRATEGIES.items():
             self.assertEqual(strategies.find_strategy(name), strategy)
         self.assertRaises(strategies.StrategyUnsupported, strategies.find_strategy, '---')
+
+
+class TestDeltaInventory(TestCase):
+
+    def delta_units(self, *actions):
+        units = []
+        for n, action in actions:
+            unit = dict(type_id='T', unit_key={'n': n}, metadata={}, action=action)
+            units.append((unit, TestUnitRef(unit)))
+        return units
+
+    def test_listings(self):
+        delta_units = self.delta_units(
+            (1, _manifest.ADDED), (2, _manifest.UPDATED), (3, _manifest.REMOVED))
+        inventory = DeltaInventory(BASE_URL, delta_units)
+        inventory.import_child_units([dict(unit_id='3', type_id='T', unit_key={'n': 3})])
+        # Test
+        self.assertEqual([u['unit_key'] for u, r in inventory.units_on_parent_only()],
+                         [{'n': 1}])
+        self.assertEqual([u['unit_key'] for u, r in inventory.updated_units()], [{'n': 2}])
+        self.assertEqual([u['unit_id'] for u in inventory.units_on_child_only()], ['3'])
+        self.assertEqual([u['unit_key'] for u in inventory.removed_units()], [{'n': 3}])
+
+    def test_latest_change(self):
+        delta_units = self.delta_units(
+            (1, _manifest.ADDED), (1, _manifest.UPDATED),
+            (2, _manifest.ADDED), (2, _manifest.REMOVED),
+            (3, _manifest.REMOVED), (3, _manifest.ADDED))
+        inventory = DeltaInventory(BASE_URL, delta_units)
+        # Test
+        added = sorted(u['unit_key']['n'] for u, r in inventory.units_on_parent_only())
+        self.assertEqual(added, [1, 3])
+        self.assertEqual(inventory.updated_units(), [])
+        self.assertEqual([u['unit_key'] for u in inventory.removed_units()], [{'n': 2}])
+
+
+class TestDeltaSynchronization(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.publish_dir = os.path.join(self.tmp_dir, 'nodes/repos')
+        self.working_dir = os.path.join(self.tmp_dir, 'working_dir')
+        os.makedirs(self.working_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def publish(self, units):
+        repo_publish_dir = os.path.join(self.publish_dir, REPO_ID)
+        virtual_host = (self.publish_dir, self.publish_dir)
+        with HttpPublisher('file://', virtual_host, REPO_ID, repo_publish_dir) as p:
+            p.publish([dict(u) for u in units])
+            p.commit()
+        manifest = _manifest.Manifest(repo_publish_dir)
+        manifest.read()
+        return manifest
+
+    def request(self):
+        conduit = TestConduit()
+        url = 'file://%s' % os.path.join(self.publish_dir, REPO_ID, 'manifest.json')
+        request = strategies.Request(
+            CancelEvent(0),
+            conduit=conduit,
+            config={constants.MANIFEST_URL_KEYWORD: url},
+            downloader=LocalFileDownloader(DownloaderConfig()),
+            progress=RepositoryProgress(REPO_ID, ProgressListener(conduit)),
+            summary=SummaryReport(),
+            repo=TestRepo(REPO_ID, self.working_dir)
+        )
+        return request
+
+    def unit(self, n, last_updated=1):
+        return dict(unit_id=str(n), type_id='T', unit_key={'n': n}, metadata={},
+                    storage_path=None, last_updated=last_updated)
+
+    def test_applied_manifest(self):
+        request = self.request()
+        request.manifest_id = '123'
+        strategy = strategies.ImporterStrategy()
+        # Test
+        strategy._manifest_applied(request)
+        # Verify
+        self.assertEqual(strategy._applied_manifest(request), '123')
+        request.config[constants.STRATEGY_KEYWORD] = constants.MIRROR_STRATEGY
+        self.assertEqual(strategy._applied_manifest(request), None)
+
+    def test_applied_manifest_other_scratchpad(self):
+        request = self.request()
+        request.conduit.scratchpad = 'other'
+        strategy = strategies.ImporterStrategy()
+        # Test
+        self.assertEqual(strategy._applied_manifest(request), None)
+
+    @patch('pulp_node.importers.strategies.ImporterStrategy._synchronize')
+    def test_synchronize_records_manifest(self, mock_synchronize):
+        request = self.request()
+
+        def synchronize(request):
+            request.manifest_id = '123'
+
+        mock_synchronize.side_effect = synchronize
+        strategy = strategies.ImporterStrategy()
+        # Test
+        strategy.synchronize(request)
+        # Verify
+        self.assertEqual(strategy._applied_manifest(request), '123')
+
+    @patch('pulp_node.importers.strategies.ImporterStrategy._synchronize')
+    def test_synchronize_failed_not_recorded(self, mock_synchronize):
+        request = self.request()
+
+        def synchronize(request):
+            request.manifest_id = '123'
+            request.summary.errors.append(error.AddUnitError(REPO_ID))
+
+        mock_synchronize.side_effect = synchronize
+        strategy = strategies.ImporterStrategy()
+        # Test
+        strategy.synchronize(request)
+        # Verify
+        self.assertEqual(request.conduit.scratchpad, None)
+
+    @patch('pulp_node.conduit.NodesConduit.get_units')
+    @patch('pulp_node.conduit.NodesConduit.find_units')
+    def test_unit_inventory_delta(self, mock_find_units, mock_get_units):
+        first = self.publish([self.unit(1), self.unit(2), self.unit(3)])
+        second = self.publish([self.unit(1), self.unit(2, 2), self.unit(4)])
+        mock_find_units.return_value = [self.unit(3)]
+        request = self.request()
+        request.manifest_id = first.id
+        strategy = strategies.ImporterStrategy()
+        strategy._manifest_applied(request)
+        # Test
+        inventory = strategy._unit_inventory(request)
+        # Verify
+        self.assertTrue(isinstance(inventory, DeltaInventory))
+        self.assertEqual(request.manifest_id, second.id)
+        self.assertEqual([u['unit_key'] for u, r in inventory.units_on_parent_only()],
+                         [{'n': 4}])
+        self.assertEqual([u['unit_key'] for u, r in inventory.updated_units()], [{'n': 2}])
+        self.assertEqual([u['unit_id'] for u in inventory.units_on_child_only()], ['3'])
+        mock_find_units.assert_called_once_with(REPO_ID, inventory.removed_units())
+        self.assertFalse(mock_get_units.called)
+
+    @patch('pulp_node.conduit.NodesConduit.get_units', return_value=[])
+    def test_unit_inventory_chain_broken(self, *unused):
+        self.publish([self.unit(1)])
+        second = self.publish([self.unit(1), self.unit(2)])
+        request = self.request()
+        request.manifest_id = 'unknown'
+        strategy = strategies.ImporterStrategy()
+        strategy._manifest_applied(request)
+        # Test
+        inventory = strategy._unit_inventory(request)
+        # Verify
+        self.assertTrue(isinstance(inventory, UnitInventory))
+        self.assertEqual(request.manifest_id, second.id)
+        self.assertEqual(len(inventory.units_on_parent_only()), 2)
+
+    @patch('pulp_node.conduit.NodesConduit.get_units', return_value=[])
+    @patch('pulp_node.manifest.RemoteManifest.fetch_delta', side_effect=IOError())
+    def test_unit_inventory_delta_failed(self, *unused):
+        first = self.publish([self.unit(1)])
+        self.publish([self.unit(1), self.unit(2)])
+        request = self.request()
+        request.manifest_id = first.id
+        strategy = strategies.ImporterStrategy()
+        strategy._manifest_applied(request)
+        # Test
+        inventory = strategy._unit_inventory(request)
+        # Verify
+        self.assertTrue(isinstance(inventory, UnitInventory))
@@ -8,7 +8,7 @@ from unittest import TestCase
 from nectar.config import DownloaderConfig
 from nectar.downloaders.local import LocalFileDownloader
 
-from pulp_node import manifest
+from pulp_node import error, manifest
 
 
 class TestManifest(TestCase):
@@ -120,3 +120,91 @@ class TestManifest(TestCase):
             _unit = ref.fetch()
             self.assertEqual(unit, _unit)
         self.verify(units, units_in)
+
+    def test_delta_chain(self):
+        manifest_path = os.path.join(self.tmp_dir, manifest.MANIFEST_FILE_NAME)
+        m = manifest.Manifest(manifest_path, 'C')
+        m.deltas = [
+            {manifest.DELTA_FROM: 'A', manifest.DELTA_TO: 'B'},
+            {manifest.DELTA_FROM: 'B', manifest.DELTA_TO: 'C'},
+        ]
+        # Test
+        self.assertEqual(m.delta_chain('C'), [])
+        self.assertEqual(m.delta_chain('A'), m.deltas)
+        self.assertEqual(m.delta_chain('B'), m.deltas[1:])
+        self.assertEqual(m.delta_chain('Z'), None)
+        # broken
+        m.deltas[1][manifest.DELTA_FROM] = 'X'
+        self.assertEqual(m.delta_chain('A'), None)
+        # not leading to this manifest
+        m.id = 'D'
+        self.assertEqual(m.delta_chain('X'), None)
+
+    def test_delta_published(self):
+        manifest_path = os.path.join(self.tmp_dir, manifest.MANIFEST_FILE_NAME)
+        m = manifest.Manifest(manifest_path, 'B')
+        m.deltas = [{manifest.DELTA_FROM: str(n)} for n in range(manifest.MAX_DELTAS)]
+        writer = manifest.UnitWriter(os.path.join(self.tmp_dir, 'delta.json.gz'))
+        writer.add(dict(type_id='T', unit_key={}, action=manifest.ADDED))
+        writer.close()
+        # Test
+        m.delta_published('A', writer, 'deltas/B.json.gz')
+        m.write()
+        # Verify
+        m = manifest.Manifest(manifest_path)
+        m.read()
+        self.assertEqual(len(m.deltas), manifest.MAX_DELTAS)
+        self.assertEqual(m.deltas[-1], {
+            manifest.DELTA_FROM: 'A',
+            manifest.DELTA_TO: 'B',
+            manifest.DELTA_PATH: 'deltas/B.json.gz',
+            manifest.DELTA_TOTAL: 1,
+            manifest.DELTA_SIZE: writer.bytes_written})
+        self.assertEqual(m.deltas[0], {manifest.DELTA_FROM: '1'})
+
+    def test_fetch_delta(self):
+        # Setup
+        delta_dir = os.path.join(self.tmp_dir, manifest.DELTAS_DIR)
+        os.makedirs(delta_dir)
+        units = []
+        writer = manifest.UnitWriter(os.path.join(delta_dir, 'B.json.gz'))
+        for i in range(0, self.NUM_UNITS):
+            unit = dict(unit_id=i, type_id='T', unit_key={}, action=manifest.ADDED)
+            units.append(unit)
+            writer.add(unit)
+        writer.close()
+        manifest_path = os.path.join(self.tmp_dir, manifest.MANIFEST_FILE_NAME)
+        m = manifest.Manifest(manifest_path, 'B')
+        m.delta_published('A', writer, 'deltas/B.json.gz')
+        m.write()
+        working_dir = os.path.join(self.tmp_dir, 'working_dir')
+        os.makedirs(working_dir)
+        downloader = LocalFileDownloader(DownloaderConfig())
+        # Test
+        m = manifest.RemoteManifest('file://%s' % manifest_path, downloader, working_dir)
+        m.fetch()
+        units_in = []
+        for unit, ref in m.fetch_delta(m.delta_chain('A')[0]):
+            units_in.append(unit)
+            self.assertEqual(unit, ref.fetch())
+        # Verify
+        self.verify(units, units_in)
+
+    def test_fetch_delta_size_mismatch(self):
+        # Setup
+        delta_dir = os.path.join(self.tmp_dir, manifest.DELTAS_DIR)
+        os.makedirs(delta_dir)
+        writer = manifest.UnitWriter(os.path.join(delta_dir, 'B.json.gz'))
+        writer.close()
+        working_dir = os.path.join(self.tmp_dir, 'working_dir')
+        os.makedirs(working_dir)
+        downloader = LocalFileDownloader(DownloaderConfig())
+        url = 'file://%s' % os.path.join(self.tmp_dir, manifest.MANIFEST_FILE_NAME)
+        m = manifest.RemoteManifest(url, downloader, working_dir)
+        delta = {
+            manifest.DELTA_PATH: 'deltas/B.json.gz',
+            manifest.DELTA_TOTAL: 0,
+            manifest.DELTA_SIZE: writer.bytes_written + 1
+        }
+        # Test
+        self.assertRaises(error.ManifestDownloadError, m.fetch_delta, delta)
@@ -440,6 +440,32 @@ class TestDistributor(PluginTestBase):
         self.assertTrue(report[0])
         self.assertEqual(report[1], None)
 
+    def test_tarball_cache(self):
+        # Test
+        dist = NodesHttpDistributor()
+        cache = dist._tarball_cache(self.VALID_CONFIGURATION)
+        # Verify
+        self.assertEqual(cache.path, '/var/www/pulp/nodes/https/tarballs')
+        self.assertEqual(cache.max_size, cache.DEFAULT_MAX_SIZE)
+
+    def test_tarball_cache_configured(self):
+        # Test
+        conf = deepcopy(self.VALID_CONFIGURATION)
+        conf[constants.TARBALL_CACHE_KEYWORD] = {'path': '/tmp/tarballs', 'max_size': '100'}
+        dist = NodesHttpDistributor()
+        cache = dist._tarball_cache(conf)
+        # Verify
+        self.assertEqual(cache.path, '/tmp/tarballs')
+        self.assertEqual(cache.max_size, 100)
+
+    def test_tarball_cache_disabled(self):
+        # Test
+        conf = deepcopy(self.VALID_CONFIGURATION)
+        conf[constants.TARBALL_CACHE_KEYWORD] = {'enabled': False}
+        dist = NodesHttpDistributor()
+        # Verify
+        self.assertEqual(dist._tarball_cache(conf), None)
+
     def test_config_missing_protocol(self):
         # Test
         conf = deepcopy(self.VALID_CONFIGURATION)
@@ -9,7 +9,9 @@ from nectar.downloaders.local import LocalFileDownloader
 
 from pulp_node import constants, pathlib
 from pulp_node.distributors.http.publisher import HttpPublisher
-from pulp_node.manifest import RemoteManifest
+from pulp_node.distributors.publisher import TarballCache
+from pulp_node import manifest as _manifest
+from pulp_node.manifest import Manifest, RemoteManifest
 
 
 class TestHttp(TestCase):
@@ -136,3 +138,217 @@ class TestHttp(TestCase):
             p.publish(units)
         # verify
         self.assertFalse(os.path.exists(p.tmp_dir))
+
+    def publish(self, units):
+        repo_id = 'test_repo'
+        publish_dir = os.path.join(self.tmpdir, 'nodes/repos')
+        repo_publish_dir = os.path.join(publish_dir, repo_id)
+        virtual_host = (publish_dir, publish_dir)
+        with HttpPublisher('file://', virtual_host, repo_id, repo_publish_dir) as p:
+            p.publish([dict(u) for u in units])
+            p.commit()
+        manifest = Manifest(repo_publish_dir)
+        manifest.read()
+        return manifest
+
+    def read_delta(self, manifest, delta):
+        path = os.path.join(os.path.dirname(manifest.path), delta[_manifest.DELTA_PATH])
+        self.assertEqual(os.path.getsize(path), delta[_manifest.DELTA_SIZE])
+        unzipped = os.path.join(self.tmpdir, 'delta.json')
+        _manifest.unzip(path, unzipped)
+        return [u for u, r in _manifest.UnitIterator(unzipped, delta[_manifest.DELTA_TOTAL])]
+
+    def test_publish_delta(self):
+        # setup
+        units = self.populate()
+        for unit in units:
+            unit[constants.LAST_UPDATED] = 1
+        first = self.publish(units)
+        self.assertEqual(first.deltas, [])
+        # update units[1], remove units[2] and add a unit
+        units[1][constants.LAST_UPDATED] = 2
+        added = dict(type_id='unit', unit_key={'n': 3}, storage_path=None, last_updated=2)
+        units = units[:2] + [added]
+        # test
+        second = self.publish(units)
+        # verify
+        self.assertEqual(second.delta_chain(first.id), second.deltas)
+        self.assertEqual(len(second.deltas), 1)
+        delta_units = self.read_delta(second, second.deltas[0])
+        actions = sorted((u['unit_key']['n'], u[_manifest.ACTION]) for u in delta_units)
+        self.assertEqual(actions, [(1, _manifest.UPDATED),
+                                   (2, _manifest.REMOVED),
+                                   (3, _manifest.ADDED)])
+
+    def test_publish_delta_chain(self):
+        # setup
+        units = self.populate()
+        first = self.publish(units)
+        second = self.publish(units)
+        # test
+        third = self.publish(units[:1])
+        # verify
+        chain = third.delta_chain(first.id)
+        self.assertEqual([d[_manifest.DELTA_TO] for d in chain], [second.id, third.id])
+        self.assertEqual(self.read_delta(third, chain[0]), [])
+        self.assertEqual(len(self.read_delta(third, chain[1])), 2)
+
+    def test_publish_delta_chain_trimmed(self):
+        # setup
+        units = self.populate()
+        manifests = [self.publish(units) for n in range(_manifest.MAX_DELTAS + 2)]
+        # verify
+        last = manifests[-1]
+        self.assertEqual(len(last.deltas), _manifest.MAX_DELTAS)
+        self.assertEqual(last.delta_chain(manifests[0].id), None)
+        self.assertEqual(len(last.delta_chain(manifests[1].id)), _manifest.MAX_DELTAS)
+        deltas_dir = os.path.join(os.path.dirname(last.path), _manifest.DELTAS_DIR)
+        self.assertEqual(len(os.listdir(deltas_dir)), _manifest.MAX_DELTAS)
+
+    def test_publish_delta_unhashable_unit_key(self):
+        # setup
+        units = self.populate()
+        first = self.publish(units)
+        added = dict(type_id='unit', unit_key={'n': [3]}, storage_path=None)
+        # test
+        second = self.publish(units + [added])
+        third = self.publish(units + [added])
+        # verify
+        for manifest in (second, third):
+            self.assertEqual(manifest.deltas, [])
+            self.assertEqual(manifest.delta_chain(first.id), None)
+            self.assertEqual(manifest.units[_manifest.UNITS_TOTAL], 4)
+            deltas_dir = os.path.join(os.path.dirname(manifest.path), _manifest.DELTAS_DIR)
+            self.assertFalse(os.path.exists(deltas_dir) and os.listdir(deltas_dir))
+
+    def test_publish_delta_failed(self):
+        # setup
+        units = self.populate()
+        self.publish(units)
+        missing = dict(units[2], storage_path=os.path.join(self.unit_dir, 'missing'))
+        repo_id = 'test_repo'
+        publish_dir = os.path.join(self.tmpdir, 'nodes/repos')
+        p = HttpPublisher('file://', (publish_dir, publish_dir), repo_id,
+                          os.path.join(publish_dir, repo_id))
+        # test
+        self.assertRaises(OSError, p.publish, [dict(units[1]), missing])
+        # verify
+        deltas_dir = os.path.join(p.tmp_dir, _manifest.DELTAS_DIR)
+        self.assertEqual(os.listdir(deltas_dir), [])
+        p.unstage()
+
+    def test_publish_tarball_cache(self):
+        # setup
+        units = self.populate()
+        cache = TarballCache(os.path.join(self.tmpdir, 'nodes/tarballs'))
+        repo_id = 'test_repo'
+        publish_dir = os.path.join(self.tmpdir, 'nodes/repos')
+        repo_publish_dir = os.path.join(publish_dir, repo_id)
+        virtual_host = (publish_dir, publish_dir)
+        # test
+        for n in range(2):
+            with HttpPublisher('file://', virtual_host, repo_id, repo_publish_dir, cache) as p:
+                p.publish([dict(u) for u in units])
+                p.commit()
+        # verify
+        self.assertEqual(cache.stats(), dict(hits=1, misses=1, evictions=0))
+        path = os.path.join(repo_publish_dir, units[0]['relative_path'] + '.TGZ')
+        tb = tarfile.open(path)
+        try:
+            self.assertEqual(len(tb.getnames()), self.NUM_TARED_FILES)
+        finally:
+            tb.close()
+
+
+class TestTarballCache(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        self.unit_dir = os.path.join(self.tmpdir, 'unit')
+        os.makedirs(os.path.join(self.unit_dir, 'sub'))
+        for name in ('a', 'sub/b'):
+            with open(os.path.join(self.unit_dir, name), 'w') as fp:
+                fp.write(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_key(self):
+        key = TarballCache.key('u1', self.unit_dir)
+        self.assertEqual(key, TarballCache.key('u1', self.unit_dir))
+        self.assertNotEqual(key, TarballCache.key('u2', self.unit_dir))
+        # size changed
+        with open(os.path.join(self.unit_dir, 'sub/b'), 'a') as fp:
+            fp.write('more')
+        self.assertNotEqual(key, TarballCache.key('u1', self.unit_dir))
+
+    def test_key_mtime(self):
+        key = TarballCache.key('u1', self.unit_dir)
+        path = os.path.join(self.unit_dir, 'a')
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime - 10))
+        self.assertNotEqual(key, TarballCache.key('u1', self.unit_dir))
+
+    def test_key_mtime_subsecond(self):
+        path = os.path.join(self.unit_dir, 'a')
+        os.utime(path, (1000, 1000.25))
+        key = TarballCache.key('u1', self.unit_dir)
+        os.utime(path, (1000, 1000.75))
+        self.assertNotEqual(key, TarballCache.key('u1', self.unit_dir))
+
+    def test_key_replaced(self):
+        key = TarballCache.key('u1', self.unit_dir)
+        path = os.path.join(self.unit_dir, 'a')
+        st = os.stat(path)
+        replacement = os.path.join(self.tmpdir, 'a')
+        with open(replacement, 'w') as fp:
+            fp.write('A')
+        os.utime(replacement, (st.st_atime, st.st_mtime))
+        os.rename(replacement, path)
+        self.assertNotEqual(key, TarballCache.key('u1', self.unit_dir))
+
+    def test_link(self):
+        cache = TarballCache(self.cache_dir)
+        first = os.path.join(self.tmpdir, 'first.TGZ')
+        second = os.path.join(self.tmpdir, 'second.TGZ')
+        # test
+        cache.link('u1', self.unit_dir, first)
+        cache.link('u1', self.unit_dir, second)
+        # verify
+        self.assertEqual(cache.stats(), dict(hits=1, misses=1, evictions=0))
+        self.assertEqual(os.stat(first).st_ino, os.stat(second).st_ino)
+        tb = tarfile.open(second)
+        try:
+            self.assertEqual(sorted(tb.getnames()), ['a', 'sub', 'sub/b'])
+        finally:
+            tb.close()
+        self.assertEqual([n for n in os.listdir(self.cache_dir) if n.startswith('.')], [])
+
+    def test_evict(self):
+        cache = TarballCache(self.cache_dir, max_size=1)
+        destination = os.path.join(self.tmpdir, 'first.TGZ')
+        # test
+        cache.link('u1', self.unit_dir, destination)
+        # verify
+        self.assertEqual(cache.stats(), dict(hits=0, misses=1, evictions=1))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        # the published link remains
+        self.assertTrue(os.path.isfile(destination))
+
+    def test_evict_least_recently_used(self):
+        cache = TarballCache(self.cache_dir)
+        for unit_id in ('u1', 'u2', 'u3'):
+            cache.link(unit_id, self.unit_dir, os.path.join(self.tmpdir, unit_id))
+        paths = [os.path.join(self.cache_dir, TarballCache.key(unit_id, self.unit_dir) + '.tar')
+                 for unit_id in ('u1', 'u2', 'u3')]
+        for n, path in enumerate(paths):
+            os.utime(path, (n, n))
+        cache.max_size = os.path.getsize(paths[0]) * 2
+        # test
+        cache.evict()
+        # verify
+        self.assertEqual(cache.evictions, 1)
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[1]))
+        self.assertTrue(os.path.exists(paths[2]))
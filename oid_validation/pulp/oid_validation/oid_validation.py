@@ -11,14 +11,24 @@ The OID structure follows the Red Hat model. Download URLs are found at:
   1.3.6.1.4.1.2312.9.2.*.1.6
 
 The * represents the product ID and is not used as part of this calculation.
+
+Each process caches what the validation reads from disk, until the file it was read
+from is modified: the repo auth config, the protected repo listings (indexed by path
+in a trie) and the CA bundles. Parsed client certificates, and the verdicts reached
+for them, are kept in an LRU keyed by the certificate fingerprint.
 '''
 
+import hashlib
 import os
+import time
+from collections import OrderedDict
 from gettext import gettext as _
 from ConfigParser import NoOptionError, SafeConfigParser, NoSectionError
+from threading import Lock
 
 from rhsm import certificate
 
+from pulp.repoauth.file_cache import FileCache
 from pulp.repoauth.protected_repo_utils import ProtectedRepoUtils
 from pulp.repoauth.repo_cert_utils import RepoCertUtils
 
@@ -26,6 +36,16 @@ from pulp.repoauth.repo_cert_utils import RepoCertUtils
 # separate config file for repo auth purposes is used.
 CONFIG_FILENAME = '/etc/pulp/repo_auth.conf'
 
+# The number of client certificates, and their verdicts, cached by each process.
+CERTIFICATE_CACHE_SIZE = 1000
+
+# The number of entitlement verdicts cached for each client certificate.
+VERDICTS_PER_CERTIFICATE = 100
+
+# The number of seconds a verdict is reused. Certificate validation depends on the
+# time, so a verdict must not outlive a certificate or CA that has expired.
+VERDICT_TTL = 60
+
 
 def authenticate(environ, config=None):
     '''
@@ -62,9 +82,152 @@ def authenticate(environ, config=None):
 
 
 def _config():
-    config = SafeConfigParser()
-    config.read(CONFIG_FILENAME)
-    return config
+    def load():
+        config = SafeConfigParser()
+        config.read(CONFIG_FILENAME)
+        return config
+    return files.get('config', [CONFIG_FILENAME], load)
+
+
+class PathTrie(object):
+    """
+    Protected repo relative paths, indexed by path segment.
+
+    Relative paths are inconsistent in Pulp, and may have a leading / that is missing,
+    present or duplicated, so empty segments are ignored. A path matches a request
+    when its segments are found in sequence anywhere in the request path.
+    """
+
+    def __init__(self, listings):
+        """
+        :param listings: Mapping of relative path to repo ID.
+        :type  listings: dict
+        """
+        self.root = {}
+        for path, repo_id in listings.items():
+            node = self.root
+            for segment in self.segments(path):
+                node = node.setdefault(segment, {})
+            node[None] = repo_id
+
+    @staticmethod
+    def segments(path):
+        return [s for s in path.split('/') if s]
+
+    def find(self, path):
+        """
+        Find the repo protecting a request path.
+        The earliest, and then the longest, matching relative path is used.
+
+        :param path: A request path.
+        :type  path: str
+        :return: The repo ID, or None.
+        :rtype:  str
+        """
+        segments = self.segments(path)
+        for start in range(len(segments)):
+            node = self.root
+            repo_id = None
+            for segment in segments[start:]:
+                node = node.get(segment)
+                if node is None:
+                    break
+                repo_id = node.get(None, repo_id)
+            if repo_id is not None:
+                return repo_id
+
+
+class CertificateCache(object):
+    """
+    An LRU of client certificates keyed by fingerprint.
+    Each entry holds the parsed certificate and the verdicts reached for it.
+    """
+
+    def __init__(self, size=CERTIFICATE_CACHE_SIZE):
+        self.size = size
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(cert_pem):
+        return hashlib.sha256(cert_pem).hexdigest()
+
+    def certificate(self, cert_pem):
+        """
+        :param cert_pem: PEM encoded client certificate.
+        :type  cert_pem: str
+        :return: The parsed certificate.
+        :rtype:  rhsm.certificate2.Certificate
+        """
+        entry = self._entry(cert_pem)
+        if entry.certificate is None:
+            entry.certificate = certificate.create_from_pem(cert_pem)
+        return entry.certificate
+
+    def verdict(self, cert_pem, key, decide):
+        """
+        Get a cached verdict for a certificate, deciding it when it is not cached or expired.
+
+        :param cert_pem: PEM encoded client certificate.
+        :type  cert_pem: str
+        :param key: Identifies the question being decided.
+        :type  key: hashable
+        :param decide: Decides the verdict.
+        :type  decide: callable
+        :return: The verdict.
+        :rtype:  bool
+        """
+        entry = self._entry(cert_pem)
+        now = time.time()
+        cached = entry.verdicts.get(key)
+        if cached is not None and cached[1] > now:
+            self.hits += 1
+            return cached[0]
+        self.misses += 1
+        verdict = decide()
+        if len(entry.verdicts) >= VERDICTS_PER_CERTIFICATE:
+            entry.verdicts.clear()
+        entry.verdicts[key] = (verdict, now + VERDICT_TTL)
+        return verdict
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _entry(self, cert_pem):
+        fingerprint = self.fingerprint(cert_pem)
+        with self._lock:
+            entry = self._entries.pop(fingerprint, None)
+            if entry is None:
+                entry = _CertificateEntry()
+                while len(self._entries) >= self.size:
+                    self._entries.popitem(last=False)
+            self._entries[fingerprint] = entry
+            return entry
+
+
+class _CertificateEntry(object):
+
+    def __init__(self):
+        self.certificate = None
+        self.verdicts = {}
+
+
+# The caches used by all validators in the process.
+files = FileCache()
+certificates = CertificateCache()
+
+
+def clear_caches():
+    """
+    Clear the caches used by all validators in the process.
+    """
+    files.clear()
+    certificates.clear()
 
 
 class OidValidator:
@@ -94,8 +257,7 @@ class OidValidator:
         repo_bundle = self._matching_repo_bundle(dest, self.repo_url_prefixes)
         # Load the global repo auth cert bundle and check it's CA against the client cert
         # if it didn't already pass the individual auth check
-        global_bundle = self.repo_cert_utils.read_global_cert_bundle(log_func=log_func,
-                                                                     pieces=['ca'])
+        global_bundle = self._global_bundle(log_func)
         # If there were neither global nor repo auth credentials, auth passes.
         if global_bundle is None and repo_bundle is None:
             if self.repo_cert_utils.log_failed_cert_verbose:
@@ -112,8 +274,7 @@ class OidValidator:
                     return False
 
                 # Make sure the client cert is signed by the correct CA
-                is_valid = self.repo_cert_utils.validate_certificate_pem(
-                    cert_pem, repo_bundle['ca'], log_func=log_func)
+                is_valid = self._validate_certificate(cert_pem, repo_bundle['ca'], log_func)
                 if not is_valid:
                     log_func('Client certificate did not match the repo consumer CA certificate')
                     return False
@@ -129,14 +290,15 @@ class OidValidator:
                     return False
 
                 # Make sure the client cert is signed by the correct CA
-                is_valid = self.repo_cert_utils.validate_certificate_pem(
-                    cert_pem, global_bundle['ca'], log_func=log_func)
+                is_valid = self._validate_certificate(cert_pem, global_bundle['ca'], log_func)
                 if not is_valid:
                     log_func('Client certificate did not match the global repo auth CA certificate')
                     return False
 
         # If the credentials were specified for either case, apply the OID checks.
-        is_valid = self._check_extensions(cert_pem, dest, log_func, self.repo_url_prefixes)
+        is_valid = certificates.verdict(
+            cert_pem, ('path', dest, tuple(self.repo_url_prefixes)),
+            lambda: self._check_extensions(cert_pem, dest, log_func, self.repo_url_prefixes))
         if not is_valid:
             log_func("Client certificate failed extension check for destination: %s" % (dest))
         elif self.repo_cert_utils.log_failed_cert_verbose:
@@ -146,7 +308,7 @@ class OidValidator:
     def _matching_repo_bundle(self, dest, repo_url_prefixes):
 
         # Load the path -> repo ID mappings
-        prot_repos = self.protected_repo_utils.read_protected_repo_listings()
+        prot_repos = self._protected_repos()
 
         repo_id = None
         for prefix in repo_url_prefixes:
@@ -155,16 +317,9 @@ class OidValidator:
             #   Repo Portion: /my-repo/pulp/fedora-13/i386/repodata/repomd.xml
             repo_url = dest[dest.find(prefix) + len(prefix):]
 
-            # If the repo portion of the URL starts with any of the protected relative URLs,
+            # If the repo portion of the URL contains any of the protected relative URLs,
             # it is considered to be a request against that protected repo
-            for relative_repo_url in prot_repos.keys():
-
-                # Relative URL is inconsistent in Pulp, so a simple "startswith" tends to
-                # break. Changing this to a find helps remove issues where the leading /
-                # is missing, present, or duplicated.
-                if repo_url.find(relative_repo_url) != -1:
-                    repo_id = prot_repos[relative_repo_url]
-                    break
+            repo_id = prot_repos.find(repo_url)
 
             # break out of checking URLs once we find a matching repo id
             if repo_id:
@@ -173,9 +328,64 @@ class OidValidator:
         # if we did not find a repo, return None
         if not repo_id:
             return None
-        bundle = self.repo_cert_utils.read_consumer_cert_bundle(repo_id, ['ca'])
+        bundle = self._consumer_bundle(repo_id)
         return bundle
 
+    def _protected_repos(self):
+        """
+        :return: The protected repo listings, reloaded when the listings file is modified.
+        :rtype:  PathTrie
+        """
+        path = self.config.get('repos', 'protected_repo_listing_file')
+
+        def load():
+            return PathTrie(self.protected_repo_utils.read_protected_repo_listings())
+        return files.get(('listings', path), [path], load)
+
+    def _consumer_bundle(self, repo_id):
+        """
+        :param repo_id: A protected repo ID.
+        :type  repo_id: str
+        :return: The repo's CA bundle, reloaded when a bundle file is modified.
+        :rtype:  dict
+        """
+        paths = self.repo_cert_utils.consumer_cert_bundle_filenames(repo_id, ['ca']) or {}
+
+        def load():
+            return self.repo_cert_utils.read_consumer_cert_bundle(repo_id, ['ca'])
+        return files.get(('consumer', repo_id), paths.values(), load)
+
+    def _global_bundle(self, log_func):
+        """
+        :param log_func: function used for logging
+        :type  log_func: callable taking 1 argument of type basestring
+        :return: The global CA bundle, reloaded when a bundle file is modified.
+        :rtype:  dict
+        """
+        paths = self.repo_cert_utils.global_cert_bundle_filenames(['ca']) or {}
+
+        def load():
+            return self.repo_cert_utils.read_global_cert_bundle(log_func=log_func, pieces=['ca'])
+        return files.get('global', paths.values(), load)
+
+    def _validate_certificate(self, cert_pem, ca_pem, log_func):
+        """
+        Validate a client certificate against a CA, reusing the verdict cached for the pair.
+
+        :param cert_pem: PEM encoded client certificate
+        :type  cert_pem: str
+        :param ca_pem: PEM encoded CA certificates
+        :type  ca_pem: str
+        :param log_func: function used for logging
+        :type  log_func: callable taking 1 argument of type basestring
+        :return: True if the certificate was signed by the CA
+        :rtype:  bool
+        """
+        return certificates.verdict(
+            cert_pem, ('ca', ca_pem),
+            lambda: self.repo_cert_utils.validate_certificate_pem(
+                cert_pem, ca_pem, log_func=log_func))
+
     def _check_extensions(self, cert_pem, dest, log_func, repo_url_prefixes):
         """
         Checks the requested destination path against the entitlement cert.
@@ -191,7 +401,7 @@ class OidValidator:
         :return: True iff request is authorized, else False
         :rtype:  bool
         """
-        cert = certificate.create_from_pem(cert_pem)
+        cert = certificates.certificate(cert_pem)
 
         valid = False
         for prefix in repo_url_prefixes:
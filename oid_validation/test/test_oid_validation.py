@@ -17,6 +17,7 @@ from M2Crypto import X509
 import mock
 
 import pulp.oid_validation.oid_validation as oid_validation
+from pulp.repoauth.protected_repo_utils import ProtectedRepoListingFile, ProtectedRepoUtils
 from pulp.repoauth.repo_cert_utils import RepoCertUtils
 
 DATA_DIR = os.path.abspath(os.path.dirname(__file__)) + '/data'
@@ -89,6 +90,7 @@ class TestOidValidation(unittest.TestCase):
     def setUp(self):
         self.config = SafeConfigParser()
         self.config.read(CONFIG_FILENAME)
+        oid_validation.clear_caches()
 
     def print_debug(self):
         valid_ca = X509.load_cert_string(VALID_CA)
@@ -784,7 +786,127 @@ class TestOidValidation(unittest.TestCase):
         validator = oid_validation.OidValidator(self.config)
 
         for path in prefixed_paths:
-            validator._check_extensions(mock.Mock(), path, mock.Mock(), path_prefixes)
+            validator._check_extensions(E_FULL, path, mock.Mock(), path_prefixes)
 
         for call in mock_cert.check_path.call_args_list:
             self.assertEqual(unprefixed_path, call[0][0])
+
+    @mock.patch('pulp.oid_validation.oid_validation.OidValidator._check_extensions',
+                return_value=True)
+    @mock.patch('pulp.oid_validation.oid_validation.RepoCertUtils.validate_certificate_pem',
+                return_value=True)
+    def test_is_valid_cached(self, validate_certificate_pem, _check_extensions):
+        """
+        The listings, bundle and verdicts are reused until the files are modified.
+        """
+        self.clean()
+        self.addCleanup(self.clean)
+        self.config.set('main', 'verify_ssl', 'true')
+        ProtectedRepoUtils(self.config).add_protected_repo('/pulp/pulp/fedora-14/x86_64', 'repo-x')
+        repo_cert_utils = RepoCertUtils(self.config)
+        repo_cert_utils.write_consumer_cert_bundle('repo-x', {'ca': VALID_CA})
+        url = 'https://localhost/pulp/repos/repos/pulp/pulp/fedora-14/x86_64/repomd.xml'
+
+        with mock.patch('pulp.repoauth.protected_repo_utils.ProtectedRepoListingFile.load',
+                        autospec=True, side_effect=ProtectedRepoListingFile.load) as load:
+            for n in range(3):
+                self.assertTrue(oid_validation.authenticate(mock_environ(E_FULL, url),
+                                                            config=self.config))
+
+            self.assertEqual(load.call_count, 1)
+            self.assertEqual(validate_certificate_pem.call_count, 1)
+            self.assertEqual(_check_extensions.call_count, 1)
+
+            # a modified bundle is reloaded, and the certificate validated against it
+            ca_path = repo_cert_utils.consumer_cert_bundle_filenames('repo-x', ['ca'])['ca']
+            repo_cert_utils.write_consumer_cert_bundle('repo-x', {'ca': OTHER_CA})
+            os.utime(ca_path, (0, 0))
+            validate_certificate_pem.return_value = False
+
+            self.assertFalse(oid_validation.authenticate(mock_environ(E_FULL, url),
+                                                         config=self.config))
+            validate_certificate_pem.assert_called_with(E_FULL, OTHER_CA, log_func=mock.ANY)
+            self.assertEqual(load.call_count, 1)
+
+
+class TestPathTrie(unittest.TestCase):
+
+    def setUp(self):
+        self.trie = oid_validation.PathTrie({
+            '/pulp/fedora-14/x86_64': 'repo-x',
+            'pulp/fedora-14': 'repo-y',
+            '//pulp/fedora-13/x86_64/': 'repo-z',
+        })
+
+    def test_find(self):
+        self.assertEqual(self.trie.find('/pulp/fedora-13/x86_64/repodata/repomd.xml'), 'repo-z')
+        self.assertEqual(self.trie.find('pulp//fedora-14/i386/a.rpm'), 'repo-y')
+
+    def test_find_longest(self):
+        self.assertEqual(self.trie.find('/pulp/fedora-14/x86_64/a.rpm'), 'repo-x')
+
+    def test_find_within_path(self):
+        self.assertEqual(self.trie.find('/repos/pulp/fedora-14/x86_64/a.rpm'), 'repo-x')
+
+    def test_not_found(self):
+        self.assertEqual(self.trie.find('/pulp/fedora-1/x86_64/a.rpm'), None)
+        self.assertEqual(self.trie.find('/pulp'), None)
+        self.assertEqual(self.trie.find(''), None)
+
+
+class TestCertificateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = oid_validation.CertificateCache(size=2)
+
+    @mock.patch('pulp.oid_validation.oid_validation.certificate')
+    def test_certificate(self, mock_certificate):
+        cert = self.cache.certificate(E_FULL)
+
+        self.assertTrue(self.cache.certificate(E_FULL) is cert)
+        mock_certificate.create_from_pem.assert_called_once_with(E_FULL)
+
+    @mock.patch('pulp.oid_validation.oid_validation.certificate')
+    def test_certificate_evicted(self, mock_certificate):
+        self.cache.certificate(E_FULL)
+        self.cache.certificate(E_LIMITED)
+        self.cache.certificate(E_FULL)
+        self.cache.certificate(E_WILDCARD)
+        self.cache.certificate(E_FULL)
+
+        # E_FULL was used most recently when E_WILDCARD was added, so E_LIMITED was evicted
+        self.assertEqual(mock_certificate.create_from_pem.call_count, 3)
+        self.cache.certificate(E_LIMITED)
+        self.assertEqual(mock_certificate.create_from_pem.call_count, 4)
+
+    def test_verdict(self):
+        decide = mock.Mock(return_value=True)
+
+        self.assertTrue(self.cache.verdict(E_FULL, 'a', decide))
+        self.assertTrue(self.cache.verdict(E_FULL, 'a', decide))
+        self.assertEqual(decide.call_count, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        self.cache.verdict(E_FULL, 'b', decide)
+        self.cache.verdict(E_LIMITED, 'a', decide)
+        self.assertEqual(decide.call_count, 3)
+
+    @mock.patch('pulp.oid_validation.oid_validation.time')
+    def test_verdict_expired(self, mock_time):
+        decide = mock.Mock(return_value=True)
+        mock_time.time.return_value = 1000
+        self.cache.verdict(E_FULL, 'a', decide)
+
+        mock_time.time.return_value = 1000 + oid_validation.VERDICT_TTL
+        self.cache.verdict(E_FULL, 'a', decide)
+
+        self.assertEqual(decide.call_count, 2)
+
+    @mock.patch('pulp.oid_validation.oid_validation.VERDICTS_PER_CERTIFICATE', 2)
+    def test_verdicts_bounded(self):
+        decide = mock.Mock(return_value=True)
+        for key in ('a', 'b', 'c'):
+            self.cache.verdict(E_FULL, key, decide)
+
+        entry = self.cache._entries.values()[0]
+        self.assertEqual(entry.verdicts.keys(), ['c'])
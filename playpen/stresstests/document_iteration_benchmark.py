@@ -0,0 +1,85 @@
+#!/usr/bin/env python2
+"""
+Measures the time and memory taken to load repository content unit associations as
+mongoengine documents and as read-only records, in the process running it. No database is
+needed, the documents are built as pymongo would return them.
+
+Each mode keeps every loaded document, so the memory reported is the memory needed to hold
+them. Run each mode in its own process for comparable memory figures:
+
+ ./document_iteration_benchmark.py --mode documents --retry-per-instance
+ ./document_iteration_benchmark.py --mode documents
+ ./document_iteration_benchmark.py --mode records
+
+--retry-per-instance decorates every document as it is initialized, with unsafe_autoretry
+enabled, which is how documents were loaded before decoration was done once per class.
+"""
+
+import gc
+import optparse
+import os
+import sys
+import time
+
+from pulp.server import config
+from pulp.server.db import model
+from pulp.server.db.connection import UnsafeRetry
+from pulp.server.db.querysets import Record
+
+
+def raw_documents(count):
+    for n in xrange(count):
+        yield {'_id': n, 'repo_id': 'benchmark', 'unit_id': 'unit-%d' % n,
+               'unit_type_id': 'rpm', 'created': '2016-01-01T00:00:00Z',
+               'updated': '2016-01-01T00:00:00Z'}
+
+
+def resident_memory():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def load_documents(raw, retry_per_instance):
+    for son in raw:
+        document = model.RepositoryContentUnit._from_son(son)
+        if retry_per_instance:
+            UnsafeRetry.decorate_instance(instance=document, full_name=type(document))
+        yield document
+
+
+def load_records(raw):
+    field_names = model.RepositoryContentUnit._reverse_db_field_map
+    for son in raw:
+        yield Record(dict((field_names.get(k, k), v) for k, v in son.iteritems()))
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--mode', choices=['documents', 'records'], default='records',
+                      help='load documents or records')
+    parser.add_option('--count', type='int', default=1000000, help='number of documents')
+    parser.add_option('--retry-per-instance', action='store_true', default=False,
+                      help='decorate each document as it is initialized')
+    options, args = parser.parse_args()
+    config.config.set('database', 'unsafe_autoretry', str(options.retry_per_instance).lower())
+
+    gc.collect()
+    before = resident_memory()
+    started = time.time()
+    if options.mode == 'documents':
+        loaded = list(load_documents(raw_documents(options.count), options.retry_per_instance))
+    else:
+        loaded = list(load_records(raw_documents(options.count)))
+    duration = time.time() - started
+    memory = resident_memory() - before
+
+    per_million = 1000000.0 / len(loaded)
+    print 'mode:       %s%s' % (options.mode,
+                                ' (retry per instance)' if options.retry_per_instance else '')
+    print 'documents:  %d' % len(loaded)
+    print 'time:       %.2f sec per million' % (duration * per_million)
+    print 'memory:     %.1f MB per million' % (memory * per_million / 2 ** 20)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
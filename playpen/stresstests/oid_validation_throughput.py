@@ -0,0 +1,98 @@
+#!/usr/bin/env python2
+"""
+Measures the throughput of repo auth OID validation for clients mirroring a
+protected repository, in the process running it (outside of mod_wsgi).
+
+Every client requests every path in turn using the same certificate, as yum
+does when mirroring a repo. Run with --cold to clear the validation caches
+before each request, which measures the cost of validation without them:
+
+ ./oid_validation_throughput.py --cert client.pem --paths paths.txt --cold
+ ./oid_validation_throughput.py --cert client.pem --paths paths.txt
+
+The paths file has one request path on each line, e.g.:
+ /pulp/repos/repos/pulp/pulp/fedora-14/x86_64/repodata/repomd.xml
+"""
+
+import optparse
+import sys
+from threading import Thread
+import time
+
+from pulp.oid_validation import oid_validation
+
+
+class Errors(object):
+
+    def write(self, *unused):
+        pass
+
+
+class Client(Thread):
+
+    def __init__(self, cert_pem, paths, iterations, cold):
+        Thread.__init__(self)
+        self.cert_pem = cert_pem
+        self.paths = paths
+        self.iterations = iterations
+        self.cold = cold
+        self.requests = 0
+        self.denied = 0
+
+    def run(self):
+        for n in range(self.iterations):
+            for path in self.paths:
+                if self.cold:
+                    oid_validation.clear_caches()
+                environ = {
+                    'SSL_CLIENT_CERT': self.cert_pem,
+                    'REQUEST_URI': path,
+                    'wsgi.errors': Errors(),
+                }
+                if not oid_validation.authenticate(environ):
+                    self.denied += 1
+                self.requests += 1
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--config', default=oid_validation.CONFIG_FILENAME,
+                      help='repo auth configuration file')
+    parser.add_option('--cert', help='PEM encoded client certificate and key')
+    parser.add_option('--paths', help='file listing the request paths')
+    parser.add_option('--clients', type='int', default=4, help='concurrent clients')
+    parser.add_option('--iterations', type='int', default=10,
+                      help='number of times each client requests every path')
+    parser.add_option('--cold', action='store_true', default=False,
+                      help='clear the validation caches before each request')
+    options, args = parser.parse_args()
+    if not options.cert or not options.paths:
+        parser.error('--cert and --paths are required')
+    oid_validation.CONFIG_FILENAME = options.config
+
+    with open(options.cert) as f:
+        cert_pem = f.read()
+    with open(options.paths) as f:
+        paths = [line.strip() for line in f if line.strip()]
+
+    clients = [Client(cert_pem, paths, options.iterations, options.cold)
+               for n in range(options.clients)]
+    started = time.time()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    duration = time.time() - started
+
+    requests = sum(c.requests for c in clients)
+    denied = sum(c.denied for c in clients)
+    print 'caches:     %s' % ('cleared before each request' if options.cold else 'enabled')
+    print 'requests:   %d (%d denied)' % (requests, denied)
+    print 'duration:   %.2f sec' % duration
+    print 'throughput: %.1f requests/sec' % (requests / duration)
+    certificates = oid_validation.certificates
+    print 'verdicts:   %d cached, %d decided' % (certificates.hits, certificates.misses)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
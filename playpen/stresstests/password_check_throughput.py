@@ -0,0 +1,68 @@
+#!/usr/bin/env python2
+"""
+Measures the number of basic auth password checks per second made by the User model, in
+the process running it. No database is needed, the user is never saved.
+
+Run with --cold to forget the verified credentials before each check, which measures the
+cost of hashing the password, and with --reference to also measure the original HMAC loop:
+
+ ./password_check_throughput.py --cold --reference
+ ./password_check_throughput.py
+"""
+
+import optparse
+from hmac import HMAC
+import sys
+import time
+
+from pulp.server.auth import credentials
+from pulp.server.compat import digestmod
+from pulp.server.db import model
+
+
+def reference_pbkdf_sha256(password, salt, iterations):
+    result = password
+    for i in xrange(iterations):
+        result = HMAC(result, salt, digestmod).digest()
+    return result
+
+
+def measure(user, password, checks, cold):
+    started = time.time()
+    for n in xrange(checks):
+        if cold:
+            credentials.verified_credentials.clear()
+        if not user.check_password(password):
+            raise ValueError('password check failed')
+    return checks / (time.time() - started)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--checks', type='int', default=200, help='number of password checks')
+    parser.add_option('--ttl', type='float', default=30,
+                      help='seconds a verified password is remembered')
+    parser.add_option('--cold', action='store_true', default=False,
+                      help='forget the verified credentials before each check')
+    parser.add_option('--reference', action='store_true', default=False,
+                      help='also measure the original HMAC loop')
+    options, args = parser.parse_args()
+    credentials._ttl = lambda: options.ttl
+
+    password = 'benchmark-password'
+    user = model.User(login='benchmark')
+    user.set_password(password)
+
+    rate = measure(user, password, options.checks, options.cold)
+    print 'caches:      %s' % ('cleared before each check' if options.cold else 'enabled')
+    print 'checks:      %.1f per sec' % rate
+    if options.reference:
+        user._pbkdf_sha256 = reference_pbkdf_sha256
+        credentials.verified_credentials.clear()
+        print 'reference:   %.1f per sec' % measure(user, password, options.checks, True)
+    cache = credentials.verified_credentials
+    print 'verified:    %d cached, %d hashed' % (cache.hits, cache.misses)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
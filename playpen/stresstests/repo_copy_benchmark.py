@@ -0,0 +1,92 @@
+#!/usr/bin/env python2
+"""
+Compares the rate at which the units of a repository are copied into an empty repository, when
+the importer associates them one at a time and when Pulp copies the associations in bulk. A
+database is needed. The units are stored in a collection created for the benchmark, which is
+dropped when it completes, and the associations of the benchmark repositories are removed:
+
+ ./repo_copy_benchmark.py --units 100000
+"""
+
+import optparse
+import sys
+import time
+
+from mock import patch
+from mongoengine import StringField
+
+from pulp.server.controllers import repository as repo_controller
+from pulp.server.db import connection, model
+from pulp.server.db.model.criteria import UnitAssociationCriteria
+from pulp.server.managers.repo.unit_association import RepoUnitAssociationManager
+
+
+class BenchmarkUnit(model.ContentUnit):
+    name = StringField()
+    checksum = StringField()
+
+    unit_key_fields = ('name', 'checksum')
+    _content_type_id = StringField(default='benchmark_unit')
+
+    meta = {'collection': 'units_copy_benchmark',
+            'allow_inheritance': False}
+
+
+SOURCE_REPO_ID = 'copy-benchmark-source'
+DEST_REPO_ID = 'copy-benchmark-dest'
+
+
+def store(count):
+    units = []
+    for n in xrange(count):
+        unit = BenchmarkUnit(id='unit-%d' % n, name='package-%d' % n, checksum='%064x' % n)
+        unit._last_updated = 0
+        units.append(unit.to_mongo())
+    BenchmarkUnit._get_collection().insert_many(units)
+    repo_controller.associate_unit_ids(SOURCE_REPO_ID, 'benchmark_unit',
+                                       ['unit-%d' % n for n in xrange(count)])
+
+
+def copy_one_at_a_time(dest_repo):
+    for unit in BenchmarkUnit.objects():
+        repo_controller.associate_single_unit(dest_repo, unit)
+    repo_controller.rebuild_content_unit_counts(dest_repo)
+
+
+def copy_in_bulk(dest_repo):
+    RepoUnitAssociationManager._bulk_copy(model.Repository(repo_id=SOURCE_REPO_ID), dest_repo,
+                                          UnitAssociationCriteria())
+
+
+def measure(count, copy):
+    dest_repo = model.Repository(repo_id=DEST_REPO_ID)
+    started = time.time()
+    with patch.object(dest_repo, 'save'):
+        copy(dest_repo)
+    rate = count / (time.time() - started)
+    model.RepositoryContentUnit.objects(repo_id=DEST_REPO_ID).delete()
+    return rate
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--units', type='int', default=100000, help='number of units copied')
+    options, args = parser.parse_args()
+
+    connection.initialize()
+    BenchmarkUnit.drop_collection()
+    try:
+        with patch('pulp.server.managers.repo.unit_association.plugin_api.'
+                   'get_unit_model_by_id', return_value=BenchmarkUnit), \
+                patch('pulp.server.managers.repo.unit_association.units_controller.'
+                      'get_model_serializer_for_type', return_value=None):
+            store(options.units)
+            for name, copy in (('one at a time', copy_one_at_a_time), ('bulk', copy_in_bulk)):
+                print '%-15s %.1f units/sec' % (name + ':', measure(options.units, copy))
+    finally:
+        BenchmarkUnit.drop_collection()
+        model.RepositoryContentUnit.objects(repo_id__in=[SOURCE_REPO_ID, DEST_REPO_ID]).delete()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
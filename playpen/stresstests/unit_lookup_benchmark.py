@@ -0,0 +1,87 @@
+#!/usr/bin/env python2
+"""
+Compares the rate at which units are found by their unit key, using $or queries of the
+unit key fields and using $in queries of the unit key digest. A database is needed. The units
+are stored in a collection created for the benchmark, which is dropped when it completes.
+
+Half of the units looked up are stored, as when a sync finds which remote units already exist:
+
+ ./unit_lookup_benchmark.py --units 200000
+"""
+
+import optparse
+import sys
+import time
+
+from mock import patch
+from mongoengine import StringField
+
+from pulp.server.controllers import units as units_controller
+from pulp.server.db import connection, model
+
+
+class BenchmarkUnit(model.ContentUnit):
+    name = StringField()
+    epoch = StringField()
+    version = StringField()
+    release = StringField()
+    arch = StringField()
+    checksumtype = StringField()
+    checksum = StringField()
+
+    unit_key_fields = ('name', 'epoch', 'version', 'release', 'arch', 'checksumtype', 'checksum')
+    _content_type_id = StringField(default='benchmark_unit')
+
+    meta = {'collection': 'units_lookup_benchmark',
+            'allow_inheritance': False,
+            'indexes': [{'fields': unit_key_fields, 'unique': True}]}
+
+
+def build(n):
+    return BenchmarkUnit(name='package-%d' % (n // 10), epoch='0', version='1.%d' % (n % 10),
+                         release='1.el7', arch='x86_64', checksumtype='sha256',
+                         checksum='%064x' % n)
+
+
+def store(count):
+    collection = BenchmarkUnit._get_collection()
+    batch = []
+    for n in xrange(0, count * 2, 2):
+        unit = build(n)
+        unit._last_updated = 0
+        unit._unit_key_digest = unit.unit_key_stored_digest()
+        batch.append(unit.to_mongo())
+        if len(batch) == 1000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def measure(count, digests):
+    units = (build(n) for n in xrange(count))
+    started = time.time()
+    with patch.object(units_controller, '_digests_complete', return_value=digests):
+        found = sum(1 for unit in units_controller.find_units(units))
+    return found, count / (time.time() - started)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--units', type='int', default=200000, help='number of units looked up')
+    options, args = parser.parse_args()
+
+    connection.initialize()
+    BenchmarkUnit.drop_collection()
+    BenchmarkUnit.ensure_indexes()
+    try:
+        store(options.units // 2)
+        for name, digests in (('unit key $or', False), ('digest $in', True)):
+            found, rate = measure(options.units, digests)
+            print '%-14s %d found, %.1f units/sec' % (name + ':', found, rate)
+    finally:
+        BenchmarkUnit.drop_collection()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,10 +7,15 @@ doesn't care at all about repo authentication.
 
 from ConfigParser import SafeConfigParser
 
+from pulp.repoauth.file_cache import FileCache
+
 # This needs to be accessible on both Pulp and the CDS instances, so a
 # separate config file for repo auth purposes is used.
 CONFIG_FILENAME = '/etc/pulp/repo_auth.conf'
 
+# The config is read once per process and read again only when it is modified.
+_cache = FileCache()
+
 
 # -- framework------------------------------------------------------------------
 
@@ -30,6 +35,8 @@ def authenticate(environ):
 
 
 def _config():
-    config = SafeConfigParser()
-    config.read(CONFIG_FILENAME)
-    return config
+    def load():
+        config = SafeConfigParser()
+        config.read(CONFIG_FILENAME)
+        return config
+    return _cache.get('config', [CONFIG_FILENAME], load)
@@ -0,0 +1,64 @@
+'''
+Caches values loaded from files, such as the repo auth configuration, so that each
+process only reads and parses a file again after it has been modified.
+'''
+
+import os
+from threading import Lock
+
+
+class FileCache(object):
+    """
+    Values loaded from files, reused until one of the files is modified.
+    Values loaded while a file is missing are not cached.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._entries = {}
+
+    def get(self, key, paths, load):
+        """
+        Get a cached value, loading it when it is not cached or a file has been modified.
+
+        :param key: Identifies the value.
+        :type  key: hashable
+        :param paths: The files the value is loaded from.
+        :type  paths: list
+        :param load: Loads the value.
+        :type  load: callable
+        :return: The value.
+        """
+        stamp = self._stamp(paths)
+        if not stamp:
+            return load()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        value = load()
+        with self._lock:
+            self._entries[key] = (stamp, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _stamp(paths):
+        """
+        :param paths: Absolute paths to files.
+        :type  paths: list
+        :return: Identifies the current version of the files, or None if one is missing.
+                 An empty tuple is returned when there are no files.
+        :rtype:  tuple
+        """
+        stamp = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            stamp.append((path, st.st_ino, st.st_size, st.st_mtime))
+        return tuple(stamp)
@@ -1,11 +1,21 @@
+import time
 from ConfigParser import SafeConfigParser
 from pkg_resources import iter_entry_points
 
 from pulp.repoauth import auth_enabled_validation
+from pulp.repoauth.file_cache import FileCache
 
 AUTH_ENTRY_POINT = 'pulp_content_authenticators'
 CONFIG_FILENAME = '/etc/pulp/repo_auth.conf'
 
+# The environ key under which the decision, and the time taken, by each authenticator
+# that was invoked for the request is recorded as a list of (name, allowed, seconds).
+TIMING_KEY = 'pulp.repoauth.timing'
+
+# The authenticator chain is resolved once per process and resolved again only when
+# the config file is modified.
+_cache = FileCache()
+
 
 def allow_access(environ, host):
     """
@@ -28,29 +38,79 @@ def allow_access(environ, host):
     if auth_enabled_validation.authenticate(environ):
         return True
 
-    # find all of the authenticator methods we need to try
-    authenticators = {}
-    for ep in iter_entry_points(group=AUTH_ENTRY_POINT):
-        authenticators.update({ep.name: ep.load()})
+    chain = _cache.get('chain', [CONFIG_FILENAME], AuthenticatorChain)
+    return chain.allow_access(environ)
 
-    # load our list of disabled authenticators
-    disabled_authenticators = _get_disabled_authenticators()
 
-    # loop through authenticators. If any return False, kick the user out.
-    for auth_method in authenticators:
-        if auth_method in disabled_authenticators:
-            continue
-        if not authenticators[auth_method](environ):
-            return False
+class AuthenticatorChain(object):
+    """
+    The enabled authenticators, loaded from their entry points.
+
+    :ivar authenticators: List of (name, authenticator) tuples.
+    :type authenticators: list
+    :ivar log_timing: Log the decision, and the time taken, by each authenticator.
+    :type log_timing: bool
+    """
 
-    # if we get this far then the user is authorized
-    return True
+    def __init__(self):
+        config = _config()
+        disabled_authenticators = _get_disabled_authenticators(config)
+        try:
+            self.log_timing = config.getboolean('main', 'log_authenticator_timing')
+        except Exception:
+            self.log_timing = False
+
+        # find all of the authenticator methods we need to try
+        authenticators = {}
+        names = []
+        for ep in iter_entry_points(group=AUTH_ENTRY_POINT):
+            if ep.name in disabled_authenticators:
+                continue
+            if ep.name not in authenticators:
+                names.append(ep.name)
+            authenticators[ep.name] = ep.load()
+        self.authenticators = [(name, authenticators[name]) for name in names]
+
+    def allow_access(self, environ):
+        """
+        Invoke each authenticator, recording its decision and the time it took.
+
+        :param environ: environ passed in from mod_wsgi
+        :type  environ: dict of env vars
+        :return: True if every authenticator allows the request, otherwise False.
+        :rtype:  bool
+        """
+        timing = []
+        environ[TIMING_KEY] = timing
+
+        # loop through authenticators. If any return False, kick the user out.
+        for name, authenticator in self.authenticators:
+            started = time.time()
+            allowed = bool(authenticator(environ))
+            duration = time.time() - started
+            timing.append((name, allowed, duration))
+            if self.log_timing:
+                environ['wsgi.errors'].write(
+                    'Repo authenticator [%s] %s request [%s] in %.3f ms\n' % (
+                        name, 'allowed' if allowed else 'denied',
+                        environ.get('REQUEST_URI'), duration * 1000))
+            if not allowed:
+                return False
+
+        # if we get this far then the user is authorized
+        return True
 
 
-def _get_disabled_authenticators():
-    disabled_authenticators = []
+def _config():
     config = SafeConfigParser()
     config.read(CONFIG_FILENAME)
+    return config
+
+
+def _get_disabled_authenticators(config=None):
+    disabled_authenticators = []
+    if config is None:
+        config = _config()
 
     if config.has_option('main', 'disabled_authenticators'):
         disabled_authenticators = config.get('main', 'disabled_authenticators').split(',')
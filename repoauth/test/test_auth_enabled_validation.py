@@ -1,3 +1,5 @@
+import os
+import tempfile
 import mock
 import unittest
 
@@ -6,6 +8,9 @@ import pulp.repoauth.auth_enabled_validation as auth_enabled_validation
 
 class TestAuthEnabledValiation(unittest.TestCase):
 
+    def setUp(self):
+        auth_enabled_validation._cache.clear()
+
     @mock.patch("pulp.repoauth.auth_enabled_validation.SafeConfigParser")
     def test_config_read(self, mock_parser):
         mock_parser_instance = mock.Mock()
@@ -55,3 +60,20 @@ class TestAuthEnabledValiation(unittest.TestCase):
 
         logged_str = 'Repo authentication is not enabled. Skipping all checks.'
         environ["wsgi.errors"].write.assert_called_once_with(logged_str)
+
+    def test_config_cached(self):
+        fd, path = tempfile.mkstemp()
+        os.write(fd, '[main]\nenabled: true\n')
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+
+        with mock.patch('pulp.repoauth.auth_enabled_validation.CONFIG_FILENAME', path):
+            config = auth_enabled_validation._config()
+            self.assertTrue(auth_enabled_validation._config() is config)
+            self.assertTrue(config.getboolean('main', 'enabled'))
+
+            with open(path, 'w') as f:
+                f.write('[main]\nenabled: false\n')
+            os.utime(path, (0, 0))
+
+            self.assertFalse(auth_enabled_validation._config().getboolean('main', 'enabled'))
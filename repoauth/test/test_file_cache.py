@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+import mock
+
+from pulp.repoauth.file_cache import FileCache
+
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.unlink, self.path)
+        self.cache = FileCache()
+        self.load = mock.Mock(side_effect=lambda: object())
+
+    def test_cached(self):
+        value = self.cache.get('key', [self.path], self.load)
+
+        self.assertTrue(self.cache.get('key', [self.path], self.load) is value)
+        self.assertEqual(self.load.call_count, 1)
+
+    def test_modified(self):
+        value = self.cache.get('key', [self.path], self.load)
+        os.utime(self.path, (0, 0))
+
+        self.assertFalse(self.cache.get('key', [self.path], self.load) is value)
+        self.assertEqual(self.load.call_count, 2)
+
+    def test_missing(self):
+        paths = [self.path, self.path + '.missing']
+        self.cache.get('key', paths, self.load)
+        self.cache.get('key', paths, self.load)
+        self.cache.get('key', [], self.load)
+
+        self.assertEqual(self.load.call_count, 3)
+
+    def test_clear(self):
+        self.cache.get('key', [self.path], self.load)
+        self.cache.clear()
+        self.cache.get('key', [self.path], self.load)
+
+        self.assertEqual(self.load.call_count, 2)
@@ -1,6 +1,9 @@
+import os
+import tempfile
 import unittest
 import mock
 
+from pulp.repoauth import wsgi
 from pulp.repoauth.wsgi import allow_access, _get_disabled_authenticators
 
 
@@ -22,6 +25,7 @@ class TestWsgi(unittest.TestCase):
         entrypoint_two.load.return_value = self.auth_two
 
         self.entrypoint_list = [entrypoint_one, entrypoint_two]
+        wsgi._cache.clear()
 
     @mock.patch('pulp.repoauth.auth_enabled_validation.authenticate')
     def test_auth_disabled(self, auth_enabled):
@@ -43,7 +47,7 @@ class TestWsgi(unittest.TestCase):
         # NB: 'False' means that auth is enabled
         auth_enabled.return_value = False
 
-        environ = mock.Mock()
+        environ = {}
         iter_ep.return_value = self.entrypoint_list
 
         self.assertTrue(allow_access(environ, 'fake.host.name'))
@@ -59,7 +63,7 @@ class TestWsgi(unittest.TestCase):
         # NB: 'False' means that auth is enabled
         auth_enabled.return_value = False
 
-        environ = mock.Mock()
+        environ = {}
         self.auth_one.return_value = True
         self.auth_two.return_value = False
         iter_ep.return_value = self.entrypoint_list
@@ -74,7 +78,7 @@ class TestWsgi(unittest.TestCase):
         """
         # NB: 'False' means that auth is enabled
         auth_enabled.return_value = False
-        environ = mock.Mock()
+        environ = {}
 
         self.auth_one.return_value = False
         self.auth_two.return_value = False
@@ -93,7 +97,7 @@ class TestWsgi(unittest.TestCase):
         """
         # NB: 'False' means that auth is enabled
         auth_enabled.return_value = False
-        environ = mock.Mock()
+        environ = {}
 
         self.auth_one.return_value = True
         self.auth_two.return_value = True
@@ -110,7 +114,7 @@ class TestWsgi(unittest.TestCase):
         """
         # NB: 'False' means that auth is enabled
         auth_enabled.return_value = False
-        environ = mock.Mock()
+        environ = {}
 
         disabled_authenticators.return_value = ['auth_one', 'auth_two']
 
@@ -133,3 +137,97 @@ class TestWsgi(unittest.TestCase):
 
         mock_parser_instance.read.assert_called_once_with('/etc/pulp/repo_auth.conf')
         mock_parser_instance.has_option.assert_called_once_with('main', 'disabled_authenticators')
+
+
+class TestAuthenticatorChain(unittest.TestCase):
+
+    def setUp(self):
+        self.auth_one = mock.Mock(return_value=True)
+        entrypoint_one = mock.Mock()
+        entrypoint_one.name = 'auth_one'
+        entrypoint_one.load.return_value = self.auth_one
+
+        self.auth_two = mock.Mock(return_value=True)
+        entrypoint_two = mock.Mock()
+        entrypoint_two.name = 'auth_two'
+        entrypoint_two.load.return_value = self.auth_two
+
+        self.entrypoint_list = [entrypoint_one, entrypoint_two]
+        wsgi._cache.clear()
+
+        fd, self.config_path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.unlink, self.config_path)
+        self.write_config('[main]\n')
+        patcher = mock.patch('pulp.repoauth.wsgi.CONFIG_FILENAME', self.config_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_config(self, contents):
+        with open(self.config_path, 'w') as f:
+            f.write(contents)
+
+    @mock.patch('pulp.repoauth.auth_enabled_validation.authenticate', return_value=False)
+    @mock.patch('pulp.repoauth.wsgi.iter_entry_points')
+    def test_chain_cached(self, iter_ep, *unused):
+        """
+        Test that the entry points are only loaded again when the config is modified
+        """
+        iter_ep.return_value = self.entrypoint_list
+
+        self.assertTrue(allow_access({}, 'fake.host.name'))
+        self.assertTrue(allow_access({}, 'fake.host.name'))
+        self.assertEqual(iter_ep.call_count, 1)
+        self.assertEqual(self.auth_one.call_count, 2)
+
+        self.write_config('[main]\ndisabled_authenticators = auth_two\n')
+        os.utime(self.config_path, (0, 0))
+
+        self.assertTrue(allow_access({}, 'fake.host.name'))
+        self.assertEqual(iter_ep.call_count, 2)
+        self.assertEqual(self.auth_one.call_count, 3)
+        self.assertEqual(self.auth_two.call_count, 2)
+
+    @mock.patch('pulp.repoauth.wsgi.iter_entry_points')
+    def test_chain(self, iter_ep):
+        """
+        Test that disabled authenticators are left out of the chain, in entry point order
+        """
+        self.write_config('[main]\ndisabled_authenticators = auth_one\n')
+        iter_ep.return_value = self.entrypoint_list + self.entrypoint_list
+
+        chain = wsgi.AuthenticatorChain()
+
+        self.assertEqual(chain.authenticators, [('auth_two', self.auth_two)])
+        self.assertFalse(chain.log_timing)
+
+    @mock.patch('pulp.repoauth.wsgi.time')
+    @mock.patch('pulp.repoauth.wsgi.iter_entry_points')
+    def test_timing(self, iter_ep, mock_time):
+        """
+        Test that the decision, and time taken, by each authenticator is recorded
+        """
+        iter_ep.return_value = self.entrypoint_list
+        self.auth_two.return_value = False
+        mock_time.time.side_effect = [10, 10.5, 20, 20.25]
+        environ = {}
+
+        self.assertFalse(wsgi.AuthenticatorChain().allow_access(environ))
+
+        self.assertEqual(environ[wsgi.TIMING_KEY],
+                         [('auth_one', True, 0.5), ('auth_two', False, 0.25)])
+
+    @mock.patch('pulp.repoauth.wsgi.iter_entry_points')
+    def test_timing_logged(self, iter_ep):
+        """
+        Test that the timing is logged when configured to do so
+        """
+        self.write_config('[main]\nlog_authenticator_timing = true\n')
+        iter_ep.return_value = self.entrypoint_list[:1]
+        environ = {'REQUEST_URI': '/pulp/repos/a.rpm', 'wsgi.errors': mock.Mock()}
+
+        self.assertTrue(wsgi.AuthenticatorChain().allow_access(environ))
+
+        message = environ['wsgi.errors'].write.call_args[0][0]
+        self.assertTrue(message.startswith(
+            'Repo authenticator [auth_one] allowed request [/pulp/repos/a.rpm] in '))
@@ -1,9 +1,16 @@
 from pulp.server.managers import factory as managers
 
 
+# The number of added entries buffered before they are
+# written to the catalog in a single bulk operation.
+FLUSH_THRESHOLD = 1000
+
+
 class CatalogerConduit(object):
     """
     Provides access to pulp platform API.
+    Added entries are buffered and written to the catalog in bulk.  The buffer
+    is flushed when full, before entries are deleted and by flush().
     """
 
     def __init__(self, source_id, expires):
@@ -18,6 +25,7 @@ class CatalogerConduit(object):
         self.expires = expires
         self.added_count = 0
         self.deleted_count = 0
+        self._pending = []
 
     def add_entry(self, type_id, unit_key, url):
         """
@@ -29,9 +37,10 @@ class CatalogerConduit(object):
         :param url: The URL used to download content associated with the unit.
         :type url: str
         """
-        manager = managers.content_catalog_manager()
-        manager.add_entry(self.source_id, self.expires, type_id, unit_key, url)
+        self._pending.append((type_id, unit_key, url))
         self.added_count += 1
+        if len(self._pending) >= FLUSH_THRESHOLD:
+            self.flush()
 
     def delete_entry(self, type_id, unit_key):
         """
@@ -41,10 +50,21 @@ class CatalogerConduit(object):
         :param unit_key: The content unit key.
         :type unit_key: dict
         """
+        self.flush()
         manager = managers.content_catalog_manager()
         manager.delete_entry(self.source_id, type_id, unit_key)
         self.deleted_count += 1
 
+    def flush(self):
+        """
+        Write buffered entries to the content catalog.
+        """
+        if not self._pending:
+            return
+        manager = managers.content_catalog_manager()
+        manager.add_entries(self.source_id, self.expires, self._pending)
+        self._pending = []
+
     def reset(self):
         """
         Reset statistics.
@@ -96,6 +96,15 @@ class Importer(object):
         * types - List of all content type IDs that may be imported using this
                importer.
 
+        The following keys are optional:
+
+        * bulk_copy - If True, units copied into a repository from another
+               repository are associated by Pulp in bulk and import_units is not
+               called. Only set this if import_units does nothing but associate
+               the given units. Copies of unit types that are not defined by
+               mongoengine models, and copies that limit or skip units, are
+               always passed to import_units.
+
         This method call may be made multiple times during the course of a
         running Pulp server and thus should not be used for initialization
         purposes.
@@ -1,12 +1,15 @@
 from gettext import gettext as _
 from itertools import chain, imap
+import bisect
 import copy
 import itertools
+import json
 import logging
 import os
 import shutil
 import sys
 import tarfile
+import tempfile
 import time
 import traceback
 import uuid
@@ -20,9 +23,11 @@ from pulp.common.util import encode_unicode
 from pulp.plugins.util import manifest_writer, misc
 from pulp.plugins.util.nectar_config import importer_config_to_nectar_config
 from pulp.server.controllers import repository as repo_controller
+from pulp.server.db.metrics import DatabaseMetrics
 from pulp.server.db.model.criteria import Criteria, UnitAssociationCriteria
 from pulp.server.exceptions import PulpCodedTaskFailedException
 from pulp.server.controllers import units as units_controller
+from pulp.server.maintenance import publish as publish_maintenance
 from nectar import listener
 from nectar.downloaders.local import LocalFileDownloader
 from nectar.downloaders.threaded import HTTPThreadedDownloader
@@ -34,6 +39,9 @@ from pulp.server.util import copytree
 
 _logger = logging.getLogger(__name__)
 
+# the metrics of each step are logged here when profiling.log_step_metrics is enabled
+_metrics_logger = logging.getLogger(__name__ + '.metrics')
+
 
 def _post_order(step):
     """
@@ -48,6 +56,107 @@ def _post_order(step):
     yield step
 
 
+class StepMetrics(object):
+    """
+    The time and resources used by a step while it is processed.
+
+    :ivar wall_time: Seconds spent processing the step.
+    :type wall_time: float
+    :ivar cpu_time: CPU seconds used by the process while the step was processed.
+    :type cpu_time: float
+    :ivar items: The number of items processed.
+    :type items: int
+    :ivar latency_counts: The number of items processed within each latency bucket.
+    :type latency_counts: list of int
+    :ivar database: The database operations run by the step.
+    :type database: pulp.server.db.metrics.DatabaseMetrics
+    """
+
+    # upper bounds, in milliseconds, of the item latency buckets. The last bucket
+    # counts the items that took longer.
+    LATENCY_BUCKETS = (1, 10, 100, 1000, 10000)
+
+    def __init__(self):
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.items = 0
+        self.latency_counts = [0] * (len(self.LATENCY_BUCKETS) + 1)
+        self.database = DatabaseMetrics()
+        self.started = False
+        self._start = None
+
+    def start(self):
+        """
+        Start measuring. Database operations are counted for the calling thread only.
+        """
+        self.started = True
+        self._start = (time.time(), _cpu_time())
+        self.database.__enter__()
+
+    def stop(self):
+        """
+        Stop measuring and add the time spent since start() was called.
+        """
+        if self._start is None:
+            return
+        self.database.__exit__()
+        wall_time, cpu_time = self._elapsed()
+        self.wall_time += wall_time
+        self.cpu_time += cpu_time
+        self._start = None
+
+    def add_item(self, seconds):
+        """
+        Count an item processed by the step.
+
+        :param seconds: The number of seconds taken to process the item.
+        :type  seconds: float
+        """
+        self.items += 1
+        self.latency_counts[bisect.bisect_left(self.LATENCY_BUCKETS, seconds * 1000)] += 1
+
+    def _elapsed(self):
+        """
+        :return: The wall and CPU seconds since start() was called.
+        :rtype:  tuple
+        """
+        if self._start is None:
+            return 0.0, 0.0
+        return time.time() - self._start[0], _cpu_time() - self._start[1]
+
+    def to_dict(self):
+        """
+        :return: The metrics, including the time spent so far if the step is still being
+                 processed, in a form that can be stored in a progress report.
+        :rtype:  dict
+        """
+        wall_time, cpu_time = self._elapsed()
+        metrics = dict(wall_time=round(self.wall_time + wall_time, 6),
+                       cpu_time=round(self.cpu_time + cpu_time, 6),
+                       items=self.items,
+                       item_latency=dict(buckets=list(self.LATENCY_BUCKETS),
+                                         counts=list(self.latency_counts)))
+        metrics.update(self.database.to_dict())
+        return metrics
+
+
+def _step_metrics_enabled():
+    """
+    :return: True if the metrics of each step are measured.
+    :rtype:  bool
+    """
+    return pulp_config.getboolean('profiling', 'step_metrics')
+
+
+def _cpu_time():
+    """
+    :return: The user and system CPU seconds used by this process.
+    :rtype:  float
+    """
+    times = os.times()
+    return times[0] + times[1]
+
+
 class Step(object):
     """
     Base class for step processing. The only tie to the platform is an assumption of
@@ -109,6 +218,7 @@ class Step(object):
         self.non_halting_exceptions = non_halting_exceptions or []
         self.exceptions = []
         self.disable_reporting = disable_reporting
+        self.metrics = StepMetrics() if _step_metrics_enabled() else None
 
     def add_child(self, step):
         """
@@ -223,65 +333,72 @@ class Step(object):
 
         self.state = reporting_constants.STATE_RUNNING
 
+        if self.metrics is not None:
+            self.metrics.start()
         try:
             try:
-                self.total_units = self._get_total()
-                self.report_progress()
-                self.initialize()
-                self.report_progress()
-                item_iterator = self.get_iterator()
-                if item_iterator is not None:
-                    # We are using a generator and will call _process_block for each item
-                    for item in item_iterator:
-                        if self.canceled:
-                            break
-                        try:
-                            self._process_block(item=item)
-                        except Exception as e:
-                            raise_exception = True
-                            for exception in self.non_halting_exceptions:
-                                if isinstance(e, exception):
-                                    raise_exception = False
-                                    self._record_failure(e=e)
-                                    self.exceptions.append(e)
-                                    break
-                            if raise_exception:
-                                raise
-                        # Clean out the progress_details for the individual item
-                        self.progress_details = ""
-                    if self.exceptions:
-                        raise PulpCodedTaskFailedException(error_code=error_codes.PLP0032,
-                                                           task_id=self.status_conduit.task_id)
-                else:
-                    self._process_block()
-                self.progress_details = ""
-                # Double check & return if we have been canceled
-                if self.canceled:
-                    return
-            finally:
-                # Always call finalize to allow cleanup of file handles
-                try:
-                    self.finalize()
-                except Exception:
-                    _logger.exception(_('Finalizing failed'))
-            self.post_process()
-        except Exception as e:
-            tb = sys.exc_info()[2]
-            if not isinstance(e, PulpCodedTaskFailedException):
-                self._record_failure(e, tb)
-            parent = self
-            while parent:
-                parent.state = reporting_constants.STATE_FAILED
                 try:
-                    parent.on_error()
-                except Exception:
-                    # Eat exceptions from the error handler since we
-                    # still want to notify up the tree
-                    pass
-                parent = parent.parent
-            raise
+                    self.total_units = self._get_total()
+                    self.report_progress()
+                    self.initialize()
+                    self.report_progress()
+                    item_iterator = self.get_iterator()
+                    if item_iterator is not None:
+                        # We are using a generator and will call _process_block for each item
+                        for item in item_iterator:
+                            if self.canceled:
+                                break
+                            try:
+                                self._process_block(item=item)
+                            except Exception as e:
+                                raise_exception = True
+                                for exception in self.non_halting_exceptions:
+                                    if isinstance(e, exception):
+                                        raise_exception = False
+                                        self._record_failure(e=e)
+                                        self.exceptions.append(e)
+                                        break
+                                if raise_exception:
+                                    raise
+                            # Clean out the progress_details for the individual item
+                            self.progress_details = ""
+                        if self.exceptions:
+                            raise PulpCodedTaskFailedException(error_code=error_codes.PLP0032,
+                                                               task_id=self.status_conduit.task_id)
+                    else:
+                        self._process_block()
+                    self.progress_details = ""
+                    # Double check & return if we have been canceled
+                    if self.canceled:
+                        return
+                finally:
+                    # Always call finalize to allow cleanup of file handles
+                    try:
+                        self.finalize()
+                    except Exception:
+                        _logger.exception(_('Finalizing failed'))
+                self.post_process()
+            except Exception as e:
+                tb = sys.exc_info()[2]
+                if not isinstance(e, PulpCodedTaskFailedException):
+                    self._record_failure(e, tb)
+                parent = self
+                while parent:
+                    parent.state = reporting_constants.STATE_FAILED
+                    try:
+                        parent.on_error()
+                    except Exception:
+                        # Eat exceptions from the error handler since we
+                        # still want to notify up the tree
+                        pass
+                    parent = parent.parent
+                raise
 
-        self.state = reporting_constants.STATE_COMPLETE
+            self.state = reporting_constants.STATE_COMPLETE
+        finally:
+            if self.metrics is not None:
+                self.metrics.stop()
+                self._log_metrics()
 
     def on_error(self):
         """
@@ -289,6 +406,21 @@ class Step(object):
         """
         pass
 
+    def _log_metrics(self):
+        """
+        Emit the metrics of this step when profiling.log_step_metrics is enabled.
+        """
+        if not pulp_config.getboolean('profiling', 'log_step_metrics'):
+            return
+        try:
+            task_id = self.get_status_conduit().task_id
+        except AttributeError:
+            task_id = None
+        metrics = self.metrics.to_dict()
+        metrics.update(task_id=task_id, step_type=self.step_id, step_id=self.uuid,
+                       state=self.state)
+        _metrics_logger.info(json.dumps(metrics, sort_keys=True))
+
     def _process_block(self, item=None):
         """
         This is part of the workflow internals that should not be overridden unless you are sure of
@@ -296,11 +428,14 @@ class Step(object):
         not the place. See the class doc block for more info on where to put your code.
         """
         failures = self.progress_failures
+        started = time.time()
         # Need to keep backwards compatibility
         if item:
             self.process_main(item=item)
         else:
             self.process_main()
+        if self.metrics is not None:
+            self.metrics.add_item(time.time() - started)
         if failures == self.progress_failures and \
                 self.progress_successes + failures < self.get_total():
             self.progress_successes += 1
@@ -370,6 +505,8 @@ class Step(object):
             reporting_constants.PROGRESS_DESCRIPTION_KEY: self.description,
             reporting_constants.PROGRESS_DETAILS_KEY: self.progress_details
         }
+        if self.metrics is not None and self.metrics.started:
+            report[reporting_constants.PROGRESS_METRICS_KEY] = self.metrics.to_dict()
         if self.children:
             child_reports = []
             for step in self.children:
@@ -877,9 +1014,18 @@ class AtomicDirectoryPublishStep(PluginStep):
             link each file in the source directory to a file with the same name in the target
             directory
     :type only_publish_directory_contents: bool
+    :param stage_on_publish_fs: If true, the source directory has been created with
+            create_staging_dir() on the same filesystem as the master publish directory. The
+            source directory is then always renamed into place and previously published masters
+            are removed by a background task instead of during the publish.
+    :type stage_on_publish_fs: bool
     """
+
+    # Name of the directory inside the master publish directory that holds staged working trees
+    STAGING_DIR_NAME = '.staging'
+
     def __init__(self, source_dir, publish_locations, master_publish_dir, step_type=None,
-                 only_publish_directory_contents=False):
+                 only_publish_directory_contents=False, stage_on_publish_fs=False):
         step_type = step_type if step_type else reporting_constants.PUBLISH_STEP_DIRECTORY
         super(AtomicDirectoryPublishStep, self).__init__(step_type)
         self.context = None
@@ -887,6 +1033,23 @@ class AtomicDirectoryPublishStep(PluginStep):
         self.publish_locations = publish_locations
         self.master_publish_dir = master_publish_dir
         self.only_publish_directory_contents = only_publish_directory_contents
+        self.stage_on_publish_fs = stage_on_publish_fs
+
+    @classmethod
+    def create_staging_dir(cls, master_publish_dir):
+        """
+        Create a unique working directory on the same filesystem as the master publish directory.
+        A publish that builds its tree in this directory can be moved into place with a single
+        rename, no matter how large the tree is.
+
+        :param master_publish_dir: The directory that will contain the master_publish_directories
+        :type  master_publish_dir: str
+        :return: absolute path of the new staging directory
+        :rtype:  str
+        """
+        staging_root = os.path.join(master_publish_dir, cls.STAGING_DIR_NAME)
+        misc.mkdir(staging_root)
+        return tempfile.mkdtemp(dir=staging_root)
 
     def process_main(self, item=None):
         """
@@ -912,6 +1075,10 @@ class AtomicDirectoryPublishStep(PluginStep):
                 selinux.restorecon(timestamp_master_dir.encode('utf-8'), recursive=True)
         except OSError as e:
             if e.errno == errno.EXDEV:
+                if self.stage_on_publish_fs:
+                    _logger.warning(_('Staging directory %(src)s is not on the same filesystem '
+                                      'as %(dst)s; falling back to a full copy.') %
+                                    {'src': self.source_dir, 'dst': timestamp_master_dir})
                 copytree(self.source_dir, timestamp_master_dir, symlinks=True)
             else:
                 raise
@@ -953,7 +1120,28 @@ class AtomicDirectoryPublishStep(PluginStep):
                     os.rename(tmp_link_name, final_name)
 
         # Clear out any previously published masters
-        misc.clear_directory(self.master_publish_dir, skip_list=[self.parent.timestamp])
+        if self.stage_on_publish_fs:
+            self._queue_old_master_removal()
+        else:
+            misc.clear_directory(self.master_publish_dir, skip_list=[self.parent.timestamp])
+
+    def _queue_old_master_removal(self):
+        """
+        Queue a background task that removes the previously published masters and any staging
+        directories left behind by failed publishes. The list of directories is computed now, so
+        masters created by later publishes are never touched by the task.
+        """
+        skip_list = (self.parent.timestamp, self.STAGING_DIR_NAME)
+        old_paths = [os.path.join(self.master_publish_dir, entry)
+                     for entry in os.listdir(self.master_publish_dir) if entry not in skip_list]
+
+        staging_root = os.path.join(self.master_publish_dir, self.STAGING_DIR_NAME)
+        if os.path.isdir(staging_root):
+            old_paths.extend(os.path.join(staging_root, entry)
+                             for entry in os.listdir(staging_root))
+
+        if old_paths:
+            publish_maintenance.queue_remove_old_masters(old_paths)
 
 
 class SaveTarFilePublishStep(PublishStep):
@@ -1211,11 +1399,11 @@ class GetLocalUnitsStep(SaveUnitsStep):
     available_units attribute, but can be overridden in the constructor.
     """
 
-    def __init__(self, importer_type, unit_pagination_size=50, available_units=None, **kwargs):
+    def __init__(self, importer_type, unit_pagination_size=1000, available_units=None, **kwargs):
         """
         :param importer_type:        unique identifier for the type of importer
         :type  importer_type:        basestring
-        :param unit_pagination_size: How many units should be queried at one time (default 50)
+        :param unit_pagination_size: How many units should be queried at one time (default 1000)
         :type  importer_type:        int
         :param available_units:      An iterable of Units available for retrieval. This defaults to
                                      this step's parent's available_units attribute if not provided.
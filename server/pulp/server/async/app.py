@@ -101,8 +101,10 @@ class HeartbeatStep(bootsteps.StartStopStep):
         :type  worker: celery.worker.consumer.Consumer
         """
         name = consumer.hostname
-        # Update the worker record timestamp and handle logging new workers
-        worker_watcher.handle_worker_heartbeat(name)
+        # Update the worker record timestamp and handle logging new workers. The size of the pool
+        # is recorded so that the resource manager knows how many reservations the worker takes.
+        concurrency = getattr(consumer.pool, 'num_processes', None)
+        worker_watcher.handle_worker_heartbeat(name, concurrency)
 
         # If the worker is a resource manager, update the associated ResourceManagerLock timestamp
         if name.startswith(constants.RESOURCE_MANAGER_WORKER_NAME):
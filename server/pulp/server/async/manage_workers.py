@@ -21,7 +21,8 @@ EnvironmentFile=%(environment_file)s
 User=apache
 WorkingDirectory=/var/run/pulp/
 ExecStart=/usr/bin/celery worker -n reserved_resource_worker-%(num)s@%%%%h -A pulp.server.async.app\
-          -c 1 --events --umask 18 --pidfile=/var/run/pulp/reserved_resource_worker-%(num)s.pid\
+          -c %(worker_concurrency)s --events --umask 18\
+          --pidfile=/var/run/pulp/reserved_resource_worker-%(num)s.pid\
           %(max_tasks_argument)s
 KillSignal=SIGQUIT
 """
@@ -44,6 +45,22 @@ def _get_concurrency():
     return multiprocessing.cpu_count()
 
 
+def _get_worker_concurrency():
+    """
+    Process the _ENVIRONMENT_FILE to see if the user has specified the number of tasks each worker
+    may run at once. If they have, return that value. Otherwise, return 1.
+
+    :return: The concurrency of each worker
+    :rtype:  int
+    """
+    pipe = subprocess.Popen(". %s; echo $PULP_WORKER_CONCURRENCY" % _ENVIRONMENT_FILE,
+                            stdout=subprocess.PIPE, shell=True)
+    output = pipe.communicate()[0].strip()
+    if output:
+        return max(int(output), 1)
+    return 1
+
+
 def _get_max_tasks():
     """
     Process the _ENVIRONMENT_FILE to determine if celery worker process recycling is to be used
@@ -82,11 +99,13 @@ def _start_workers():
     start them.
     """
     concurrency = _get_concurrency()
+    worker_concurrency = _get_worker_concurrency()
     for i in range(concurrency):
         unit_filename = _UNIT_FILENAME_TEMPLATE % i
         unit_path = os.path.join(_SYSTEMD_UNIT_PATH, unit_filename)
         max_tasks_argument = _get_max_tasks()
         unit_contents = _WORKER_TEMPLATE % {'num': i, 'environment_file': _ENVIRONMENT_FILE,
+                                            'worker_concurrency': worker_concurrency,
                                             'max_tasks_argument': max_tasks_argument}
         if not os.path.exists(unit_path) or _get_file_contents(unit_path) != unit_contents:
             with open(unit_path, 'w') as unit_file:
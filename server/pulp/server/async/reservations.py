@@ -0,0 +1,481 @@
+"""
+The resource manager decides which worker runs each resource-reserving task. This module keeps
+the state needed to make that decision in memory so that it does not need to read every Worker
+and ReservedResource document for each decision. Tasks waiting for a worker are also kept in
+memory, and are dispatched when a reservation is released or a worker comes online rather than
+being sent back to the broker to poll for one. The waiting tasks are stored in the database too,
+so that they are not lost if the resource manager stops.
+
+The state is rebuilt from the database when the dispatcher is first used by a process (for
+example after a resource manager failover) and whenever it has not been rebuilt for
+REFRESH_INTERVAL seconds, which covers any events that were missed. The waiting tasks are
+restored from the database when the state is first built.
+"""
+from gettext import gettext as _
+import logging
+import threading
+import time
+
+from pulp.common.constants import (PULP_PROCESS_HEARTBEAT_INTERVAL, RESOURCE_MANAGER_WORKER_NAME,
+                                   SCHEDULER_WORKER_NAME)
+from pulp.server.async.celery_instance import celery
+from pulp.server.db.model import Worker, ReservedResource
+
+
+_logger = logging.getLogger(__name__)
+
+# The number of seconds the reservation table is trusted before it is rebuilt from the database.
+REFRESH_INTERVAL = PULP_PROCESS_HEARTBEAT_INTERVAL
+
+# Celery events that mean a task has finished running. A reserving task releases its reservation
+# before the worker sends the event.
+RELEASE_EVENTS = ('task-succeeded', 'task-failed', 'task-revoked')
+
+# The weight given to the newest sample when updating the moving average of task durations.
+SMOOTHING = 0.2
+
+
+def is_worker(worker_name):
+    """
+    Strip out workers that should never be assigned work. We need to check
+    via "startswith()" since we do not know which host the worker is running on.
+
+    :param worker_name: The name of a worker
+    :type  worker_name: basestring
+    :return:            True if the worker may be assigned work
+    :rtype:             bool
+    """
+    if worker_name.startswith(SCHEDULER_WORKER_NAME) or \
+       worker_name.startswith(RESOURCE_MANAGER_WORKER_NAME):
+        return False
+    return True
+
+
+def host_of(worker_name):
+    """
+    :param worker_name: The name of a worker, in the form of "worker_type@hostname"
+    :type  worker_name: basestring
+    :return:            The name of the host the worker runs on
+    :rtype:             basestring
+    """
+    return worker_name.split('@', 1)[-1]
+
+
+class ReservationTable(object):
+    """
+    An in-memory copy of the online workers and the resources reserved on them.
+
+    :ivar workers:      The number of resources that may be reserved at once keyed by the names of
+                        online workers that may be assigned work
+    :type workers:      dict
+    :ivar reservations: Tuples of (resource_id, worker_name) keyed by task ID
+    :type reservations: dict
+    :ivar started:      When each reservation made by this process was made, keyed by task ID
+    :type started:      dict
+    :ivar durations:    The moving average of seconds reservations were held keyed by worker name
+    :type durations:    dict
+    :ivar refreshed:    When the table was last rebuilt from the database
+    :type refreshed:    float
+    """
+
+    def __init__(self):
+        self.workers = {}
+        self.reservations = {}
+        self.started = {}
+        self.durations = {}
+        self.refreshed = 0
+
+    @property
+    def stale(self):
+        """
+        :return: True if the table has not been rebuilt within the REFRESH_INTERVAL
+        :rtype:  bool
+        """
+        return time.time() - self.refreshed > REFRESH_INTERVAL
+
+    def rebuild(self):
+        """
+        Rebuild the table from the Worker and ReservedResource documents.
+        """
+        self.workers = dict((w['name'], w['concurrency'] or 1) for w in Worker.objects.get_online()
+                            if is_worker(w['name']))
+        self.reservations = dict((r['task_id'], (r['resource_id'], r['worker_name']))
+                                 for r in ReservedResource.objects.all())
+        self.started = dict((task_id, started) for task_id, started in self.started.items()
+                            if task_id in self.reservations)
+        self.refreshed = time.time()
+
+    def worker_for(self, resource_id):
+        """
+        :param resource_id: The name of a resource
+        :type  resource_id: basestring
+        :return:            The name of the worker holding a reservation on the resource or None
+        :rtype:             basestring
+        """
+        for reserved_id, worker_name in self.reservations.itervalues():
+            if reserved_id == resource_id:
+                return worker_name
+
+    def capacity(self, worker_name):
+        """
+        :param worker_name: The name of a worker
+        :type  worker_name: basestring
+        :return:            The number of resources that may be reserved on the worker at once
+        :rtype:             int
+        """
+        return self.workers.get(worker_name, 1)
+
+    def available_worker(self):
+        """
+        Choose the least loaded online worker that can take another reservation. Workers are
+        compared by the share of their capacity in use, then by the share of the capacity of their
+        host in use, then by how long their current reservations are expected to be held based on
+        how long recent reservations were held.
+
+        :return: The name of the worker or None
+        :rtype:  basestring
+        """
+        resources = {}
+        for resource_id, worker_name in self.reservations.itervalues():
+            resources.setdefault(worker_name, set()).add(resource_id)
+        host_load = {}
+        host_capacity = {}
+        for worker_name, capacity in self.workers.iteritems():
+            host = host_of(worker_name)
+            host_load[host] = host_load.get(host, 0) + len(resources.get(worker_name, ()))
+            host_capacity[host] = host_capacity.get(host, 0) + capacity
+        candidates = []
+        for worker_name, capacity in self.workers.iteritems():
+            load = len(resources.get(worker_name, ()))
+            if load >= capacity:
+                continue
+            host = host_of(worker_name)
+            key = (float(load) / capacity,
+                   float(host_load[host]) / host_capacity[host],
+                   load * self.durations.get(worker_name, 0),
+                   worker_name)
+            candidates.append(key)
+        if candidates:
+            return min(candidates)[-1]
+
+    def add_worker(self, worker_name):
+        """
+        Add a worker. A worker that is not already known may take one reservation until the table
+        is rebuilt with its capacity.
+
+        :param worker_name: The name of the worker
+        :type  worker_name: basestring
+        """
+        self.workers.setdefault(worker_name, 1)
+
+    def reserve(self, task_id, resource_id, worker_name):
+        """
+        Record a reservation.
+
+        :param task_id:     The ID of the reserving task
+        :type  task_id:     basestring
+        :param resource_id: The name of the reserved resource
+        :type  resource_id: basestring
+        :param worker_name: The name of the worker the task is dispatched to
+        :type  worker_name: basestring
+        """
+        self.reservations[task_id] = (resource_id, worker_name)
+        self.started[task_id] = time.time()
+
+    def release(self, task_id):
+        """
+        Remove a reservation and update how long reservations on its worker are held.
+
+        :param task_id: The ID of the reserving task
+        :type  task_id: basestring
+        """
+        reservation = self.reservations.pop(task_id, None)
+        started = self.started.pop(task_id, None)
+        if reservation is None or started is None:
+            return
+        worker_name = reservation[1]
+        seconds = time.time() - started
+        current = self.durations.get(worker_name)
+        if current is None:
+            self.durations[worker_name] = seconds
+        else:
+            self.durations[worker_name] = current + SMOOTHING * (seconds - current)
+
+    def worker_offline(self, worker_name):
+        """
+        Remove a worker and its reservations.
+
+        :param worker_name: The name of the worker
+        :type  worker_name: basestring
+        """
+        self.workers.pop(worker_name, None)
+        self.durations.pop(worker_name, None)
+        for task_id, (_id, reserved_by) in self.reservations.items():
+            if reserved_by == worker_name:
+                del self.reservations[task_id]
+                self.started.pop(task_id, None)
+
+
+class ReservationDispatcher(object):
+    """
+    Assigns resource-reserving tasks to workers using a ReservationTable.
+
+    Tasks reserving a resource that is already reserved on a worker running one task at a time go
+    to that worker, where they are queued behind the reservation. Tasks reserving a resource that
+    is already reserved on a worker running several tasks at once would run alongside the
+    reservation there, so they wait for it to be released. Other tasks go to the least loaded
+    worker with capacity to spare.
+
+    Tasks that have to wait are parked, in the order they were submitted, and are dispatched as
+    soon as a reservation is released or a worker comes online. Tasks reserving the same resource
+    as a parked task are parked behind it so that tasks for a resource keep their order. Parked
+    tasks are stored before submit returns, and the restore function is called when the table is
+    first built to load the tasks parked by a previous process.
+
+    Submitted tasks provide the task_id and resource_id attributes, a park() method that stores
+    the waiting task, a dispatch(worker_name) method that sends the task to the worker once the
+    reservation is recorded in the table and deletes the stored task, and a forget() method that
+    deletes the stored task.
+
+    When a worker reports that a reserving task has finished, the on_release function is called
+    with the ID of the task before the reservation is removed from the table.
+
+    :ivar table:      The reservation table
+    :type table:      ReservationTable
+    :ivar parked:     The tasks waiting to be dispatched, in the order they were submitted
+    :type parked:     list
+    :ivar on_release: Called with the ID of each reserving task that has finished, or None
+    :type on_release: callable
+    :ivar restore:    Returns the stored waiting tasks, oldest first, or None
+    :type restore:    callable
+    """
+
+    def __init__(self, on_release=None, restore=None):
+        self.table = ReservationTable()
+        self.parked = []
+        self.on_release = on_release
+        self.restore = restore
+        self._restored = False
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def start(self):
+        """
+        Start the thread listening for events that release reservations or add workers.
+        """
+        if self._listener is None:
+            self._listener = EventListener(self)
+            self._listener.start()
+
+    def submit(self, task):
+        """
+        Dispatch a task to a worker, or park it until a worker is ready for it. A task that has
+        already been submitted, for example because its message was delivered again, is ignored.
+
+        :param task: The task
+        :type  task: object
+        :return:     True if the task has been dispatched, False if it is parked
+        :rtype:      bool
+        """
+        with self._lock:
+            self._refresh()
+            if task.task_id in self.table.reservations:
+                return True
+            if any(parked.task_id == task.task_id for parked in self.parked):
+                return False
+            self.parked.append(task)
+            self._dispatch_parked()
+            if task.task_id in self.table.reservations:
+                return True
+            try:
+                task.park()
+            except Exception:
+                self.parked.remove(task)
+                raise
+            return False
+
+    def released(self, task_id):
+        """
+        A task has finished. If it held a reservation, remove the reservation and dispatch the
+        parked tasks that can now run. Workers report every task that finishes, most of which
+        hold no reservation.
+
+        :param task_id: The ID of the task
+        :type  task_id: basestring
+        """
+        with self._lock:
+            if task_id not in self.table.reservations:
+                return
+        self._call_on_release(task_id)
+        with self._lock:
+            self.table.release(task_id)
+            self._dispatch_parked()
+
+    def worker_online(self, worker_name):
+        """
+        A worker has come online. Add it and dispatch the parked tasks that can now run.
+
+        :param worker_name: The name of the worker
+        :type  worker_name: basestring
+        """
+        if not is_worker(worker_name):
+            return
+        with self._lock:
+            self.table.add_worker(worker_name)
+            self._dispatch_parked()
+
+    def worker_offline(self, worker_name):
+        """
+        A worker has gone offline. Remove it and its reservations.
+
+        :param worker_name: The name of the worker
+        :type  worker_name: basestring
+        """
+        with self._lock:
+            self.table.worker_offline(worker_name)
+
+    def refresh(self):
+        """
+        Rebuild the table when it is stale and dispatch the parked tasks that can now run. This
+        is called periodically so that parked tasks are dispatched even when events were missed.
+        """
+        with self._lock:
+            if self.table.stale:
+                self._refresh()
+                self._dispatch_parked()
+
+    def _refresh(self):
+        """
+        Rebuild the table when it is stale, and restore the stored waiting tasks when it is first
+        built. Must be called with the lock held.
+        """
+        if not self.table.stale:
+            return
+        self.table.rebuild()
+        if self._restored or self.restore is None:
+            return
+        self._restored = True
+        parked = set(task.task_id for task in self.parked)
+        for task in self.restore():
+            if task.task_id in self.table.reservations:
+                # dispatched by the previous process
+                task.forget()
+            elif task.task_id not in parked:
+                self.parked.append(task)
+
+    def _dispatch_parked(self):
+        """
+        Dispatch the parked tasks that can run, in the order they were submitted. Must be called
+        with the lock held.
+        """
+        waiting = []
+        waiting_resources = set()
+        for task in self.parked:
+            worker_name = None
+            if task.resource_id not in waiting_resources:
+                worker_name = self.table.worker_for(task.resource_id)
+                if worker_name is not None:
+                    if self.table.capacity(worker_name) > 1:
+                        worker_name = None
+                else:
+                    worker_name = self.table.available_worker()
+            if worker_name is None:
+                waiting.append(task)
+                waiting_resources.add(task.resource_id)
+                continue
+            self.table.reserve(task.task_id, task.resource_id, worker_name)
+            try:
+                task.dispatch(worker_name)
+            except Exception:
+                _logger.exception(_('Failed to dispatch task %(id)s to %(worker)s') %
+                                  {'id': task.task_id, 'worker': worker_name})
+                self._call_on_release(task.task_id)
+                self.table.release(task.task_id)
+        self.parked = waiting
+
+    def _call_on_release(self, task_id):
+        """
+        Call on_release for a task, logging rather than raising any exception.
+
+        :param task_id: The ID of the task
+        :type  task_id: basestring
+        """
+        if self.on_release is None:
+            return
+        try:
+            self.on_release(task_id)
+        except Exception:
+            _logger.exception(_('Failed to clean up the reservation of task %(id)s') %
+                              {'id': task_id})
+
+
+class EventListener(threading.Thread):
+    """
+    A thread that passes the Celery events relevant to reservations to a ReservationDispatcher.
+    """
+
+    def __init__(self, dispatcher):
+        """
+        :param dispatcher: The dispatcher to notify
+        :type  dispatcher: ReservationDispatcher
+        """
+        super(EventListener, self).__init__(name='reservation-event-listener')
+        self.daemon = True
+        self.dispatcher = dispatcher
+
+    def run(self):
+        """
+        The thread entry point. Capture events until the connection fails, then reconnect.
+        """
+        handlers = {
+            'worker-online': self.worker_online,
+            'worker-offline': self.worker_offline,
+            'worker-heartbeat': self.heartbeat,
+        }
+        for event_type in RELEASE_EVENTS:
+            handlers[event_type] = self.released
+        while True:
+            try:
+                with celery.connection() as connection:
+                    receiver = celery.events.Receiver(connection, handlers=handlers)
+                    receiver.capture(limit=None, timeout=None, wakeup=False)
+            except Exception, e:
+                _logger.error(_('Reservation event listener failed: %(e)s') % {'e': e})
+            time.sleep(REFRESH_INTERVAL)
+
+    def released(self, event):
+        self.dispatcher.released(event['uuid'])
+
+    def worker_online(self, event):
+        self.dispatcher.worker_online(event['hostname'])
+
+    def worker_offline(self, event):
+        self.dispatcher.worker_offline(event['hostname'])
+
+    def heartbeat(self, event):
+        self.dispatcher.refresh()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher(on_release=None, restore=None):
+    """
+    Get the dispatcher for this process, creating and starting it on first use.
+
+    :param on_release: Called with the ID of each reserving task that has finished. Only used when
+                       the dispatcher is created.
+    :type  on_release: callable
+    :param restore:    Returns the stored waiting tasks, oldest first. Only used when the
+                       dispatcher is created.
+    :type  restore:    callable
+    :return: The dispatcher
+    :rtype:  ReservationDispatcher
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = ReservationDispatcher(on_release, restore)
+            _dispatcher.start()
+        return _dispatcher
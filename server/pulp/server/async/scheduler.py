@@ -144,6 +144,7 @@ class Scheduler(beat.Scheduler):
         """
         self._schedule = None
         self._loaded_from_db_count = 0
+        self._version = None
         self._first_lock_acq_check = True
 
         # Force the use of the Pulp celery_instance when this custom Scheduler is used.
@@ -269,6 +270,9 @@ class Scheduler(beat.Scheduler):
         update_timestamps = [0]
 
         _logger.debug(_('loading schedules from DB'))
+        # read the version first so that changes made while loading are picked up by the next
+        # call to update_schedule()
+        self._version = utils.get_version()
         ignored_db_count = 0
         self._loaded_from_db_count = 0
         for call in itertools.imap(ScheduledCall.from_db, utils.get_enabled()):
@@ -285,25 +289,64 @@ class Scheduler(beat.Scheduler):
 
         self._most_recent_timestamp = max(update_timestamps)
 
+    def update_schedule(self):
+        """
+        Apply the changes made to scheduled calls since the schedule was last loaded or updated.
+
+        The IDs of the calls added, updated and deleted since are recorded in the version
+        document. Only the added and updated calls are read from the database, and the deleted
+        calls are removed. The changes are found by ID rather than by timestamp, so a change made
+        by a process whose clock is behind is not missed. If more calls were changed or deleted
+        than the version document keeps, the whole schedule is loaded again with
+        setup_schedule().
+        """
+        version = utils.get_version()
+        deleted_count = version['deleted_count'] - self._version['deleted_count']
+        changed_count = version['changed_count'] - self._version['changed_count']
+        if deleted_count > len(version['deleted']) or changed_count > len(version['changed']):
+            _logger.debug(_('too many schedules changed, reloading all schedules'))
+            self.setup_schedule()
+            return
+
+        if deleted_count > 0:
+            for schedule_id in version['deleted'][-deleted_count:]:
+                if self._schedule.pop(schedule_id, None) is not None:
+                    self._loaded_from_db_count -= 1
+
+        update_timestamps = [self._most_recent_timestamp]
+        changed = []
+        if changed_count > 0:
+            changed = utils.get_by_ids(set(version['changed'][-changed_count:]))
+        for call in itertools.imap(ScheduledCall.from_db, changed):
+            update_timestamps.append(call.last_updated)
+            if call.enabled and call.remaining_runs != 0:
+                if call.id not in self._schedule:
+                    self._loaded_from_db_count += 1
+                self._schedule[call.id] = call.as_schedule_entry()
+            elif self._schedule.pop(call.id, None) is not None:
+                _logger.debug(_('removing disabled schedule: %(id)s') % {'id': call.id})
+                self._loaded_from_db_count -= 1
+
+        _logger.debug(_('%(count)d schedules loaded after update') %
+                      {'count': self._loaded_from_db_count})
+
+        self._most_recent_timestamp = max(update_timestamps)
+        self._version = version
+
     @property
     @UnsafeRetry.retry_decorator()
     def schedule_changed(self):
         """
-        Looks at the update timestamps in the database to determine if there
-        are new or modified schedules.
+        Compares the version of the scheduled calls in the database with the version loaded
+        to determine if there are new, modified or deleted schedules.
 
-        Indexing should make this very fast.
+        This is a single lookup by ID, no matter how many schedules exist.
 
-        :return:    True iff the set of enabled scheduled calls has changed
-                    in the database.
+        :return:    True iff the set of scheduled calls has changed in the database.
         :rtype:     bool
         """
-        if utils.get_enabled().count() != self._loaded_from_db_count:
-            logging.debug(_('number of enabled schedules has changed'))
-            return True
-
-        if utils.get_updated_since(self._most_recent_timestamp).count() > 0:
-            logging.debug(_('one or more enabled schedules has been updated'))
+        if utils.get_version()['version'] != self._version['version']:
+            logging.debug(_('one or more schedules has changed'))
             return True
 
         return False
@@ -320,7 +363,7 @@ class Scheduler(beat.Scheduler):
             return self.get_schedule()
 
         if self.schedule_changed:
-            self.setup_schedule()
+            self.update_schedule()
 
         return self._schedule
 
@@ -15,17 +15,19 @@ from bson import ObjectId
 from celery import task, Task as CeleryTask, current_task, __version__ as celery_version
 from celery.app import control, defaults
 from celery.result import AsyncResult
+from mongoengine import NotUniqueError, signals
 from mongoengine.queryset import DoesNotExist
 
 from pulp.common.constants import RESOURCE_MANAGER_WORKER_NAME, SCHEDULER_WORKER_NAME
 from pulp.common import constants, dateutils, tags
+from pulp.server.async import reservations
 from pulp.server.async.celery_instance import celery, RESOURCE_MANAGER_QUEUE, \
     DEDICATED_QUEUE_EXCHANGE
 from pulp.server.exceptions import PulpException, MissingResource, \
-    NoWorkers, PulpCodedException, error_codes
+    PulpCodedException, error_codes
 from pulp.server.config import config
 from pulp.server.db.model import Worker, ReservedResource, TaskStatus, \
-    ResourceManagerLock, CeleryBeatLock
+    ResourceManagerLock, CeleryBeatLock, WaitingReservation
 from pulp.server.managers.repo import _common as common_utils
 from pulp.server.managers import factory as managers
 from pulp.server.managers.schedule import utils
@@ -34,6 +36,12 @@ from pulp.server.managers.schedule import utils
 controller = control.Control(app=celery)
 _logger = logging.getLogger(__name__)
 
+# The number of task IDs revoked with each broadcast by cancel_group().
+CANCEL_BATCH_SIZE = 500
+
+# The message header marking a task that was dispatched with a resource reservation.
+RESERVED_RESOURCE_HEADER = 'pulp_reserved_resource'
+
 
 class PulpTask(CeleryTask):
     """
@@ -118,7 +126,13 @@ def _queue_reserved_task(name, task_id, resource_id, inner_args, inner_kwargs):
 
     The inner task is dispatched into a dedicated queue for a worker that is decided at dispatch
     time. The logic deciding which queue receives a task is controlled through the
-    find_worker function.
+    ReservationDispatcher in pulp.server.async.reservations. When no worker is ready for the
+    task, the dispatcher holds it and dispatches it once a worker is, so that the tasks behind it
+    can be dispatched in the meantime. The waiting task is stored as a WaitingReservation before
+    this task returns, so it is not lost if the resource manager stops.
+
+    The inner task deletes its reservation when it returns, see Task.after_return. The resource
+    manager frees the worker when the worker reports the task finished, see _release_reservation.
 
     :param name:          The name of the task to be called
     :type name:           basestring
@@ -133,99 +147,86 @@ def _queue_reserved_task(name, task_id, resource_id, inner_args, inner_kwargs):
 
     :return: None
     """
-    while True:
-        try:
-            worker = get_worker_for_reservation(resource_id)
-        except NoWorkers:
-            pass
-        else:
-            break
-
-        try:
-            worker = _get_unreserved_worker()
-        except NoWorkers:
-            pass
-        else:
-            break
+    dispatcher = reservations.get_dispatcher(on_release=_release_reservation,
+                                             restore=_ReservedTaskRequest.waiting)
+    dispatcher.submit(_ReservedTaskRequest(name, task_id, resource_id, inner_args, inner_kwargs))
 
-        # No worker is ready for this work, so we need to wait
-        time.sleep(0.25)
 
-    ReservedResource(task_id=task_id, worker_name=worker['name'], resource_id=resource_id).save()
-
-    inner_kwargs['routing_key'] = worker.name
-    inner_kwargs['exchange'] = DEDICATED_QUEUE_EXCHANGE
-    inner_kwargs['task_id'] = task_id
-
-    try:
-        celery.tasks[name].apply_async(*inner_args, **inner_kwargs)
-    finally:
-        _release_resource.apply_async((task_id, ), routing_key=worker.name,
-                                      exchange=DEDICATED_QUEUE_EXCHANGE)
-
-
-def _is_worker(worker_name):
+class _ReservedTaskRequest(object):
     """
-    Strip out workers that should never be assigned work. We need to check
-    via "startswith()" since we do not know which host the worker is running on.
+    A task waiting for the resource manager to reserve a resource for it, as submitted to the
+    ReservationDispatcher.
+
+    :ivar task_id:     The UUID of the inner task
+    :type task_id:     basestring
+    :ivar resource_id: The name of the resource the inner task reserves
+    :type resource_id: basestring
+    :ivar parked:      True if the task is stored as a WaitingReservation
+    :type parked:      bool
     """
 
-    if worker_name.startswith(SCHEDULER_WORKER_NAME) or \
-       worker_name.startswith(RESOURCE_MANAGER_QUEUE):
-        return False
-    return True
-
-
-def get_worker_for_reservation(resource_id):
-    """
-    Return the Worker instance that is associated with a reservation of type resource_id. If
-    there are no workers with that reservation_id type a pulp.server.exceptions.NoWorkers
-    exception is raised.
-
-    :param resource_id:    The name of the resource you wish to reserve for your task.
-
-    :raises NoWorkers:     If all workers have reserved_resource entries associated with them.
-
-    :type resource_id:     basestring
-    :returns:              The Worker instance that has a reserved_resource entry of type
-                           `resource_id` associated with it.
-    :rtype:                pulp.server.db.model.resources.Worker
-    """
-    reservation = ReservedResource.objects(resource_id=resource_id).first()
-    if reservation:
-        return Worker.objects(name=reservation['worker_name']).first()
-    else:
-        raise NoWorkers()
+    def __init__(self, name, task_id, resource_id, inner_args, inner_kwargs, parked=False):
+        self.name = name
+        self.task_id = task_id
+        self.resource_id = resource_id
+        self.inner_args = inner_args
+        self.inner_kwargs = inner_kwargs
+        self.parked = parked
 
+    @classmethod
+    def waiting(cls):
+        """
+        Load the tasks stored as waiting for a reservation.
 
-def _get_unreserved_worker():
-    """
-    Return the Worker instance that has no reserved_resource entries
-    associated with it. If there are no unreserved workers a
-    pulp.server.exceptions.NoWorkers exception is raised.
+        :return: The waiting tasks, oldest first
+        :rtype:  list
+        """
+        requests = []
+        for waiting in WaitingReservation.objects.order_by('queued'):
+            inner_args, inner_kwargs = bson_loads(waiting.arguments)
+            requests.append(cls(waiting.task_name, waiting.task_id, waiting.resource_id,
+                                inner_args, inner_kwargs, parked=True))
+        return requests
+
+    def park(self):
+        """
+        Store the task as waiting for a reservation.
+        """
+        WaitingReservation(task_id=self.task_id, task_name=self.name,
+                           resource_id=self.resource_id,
+                           arguments=bson_dumps([self.inner_args, self.inner_kwargs]),
+                           queued=time.time()).save()
+        self.parked = True
 
-    :raises NoWorkers: If all workers have reserved_resource entries associated with them.
+    def dispatch(self, worker_name):
+        """
+        Record the reservation, send the inner task to the worker's dedicated queue and forget
+        the stored waiting task.
 
-    :returns:          The Worker instance that has no reserved_resource
-                       entries associated with it.
-    :rtype:            pulp.server.db.model.resources.Worker
-    """
+        :param worker_name: The name of the worker
+        :type  worker_name: basestring
+        """
+        ReservedResource(task_id=self.task_id, worker_name=worker_name,
+                         resource_id=self.resource_id).save()
 
-    # Build a mapping of queue names to Worker objects
-    workers_dict = dict((worker['name'], worker) for worker in Worker.objects.get_online())
-    worker_names = workers_dict.keys()
-    reserved_names = [r['worker_name'] for r in ReservedResource.objects.all()]
+        inner_kwargs = dict(self.inner_kwargs)
+        inner_kwargs['routing_key'] = worker_name
+        inner_kwargs['exchange'] = DEDICATED_QUEUE_EXCHANGE
+        inner_kwargs['task_id'] = self.task_id
+        headers = dict(inner_kwargs.get('headers') or {})
+        headers[RESERVED_RESOURCE_HEADER] = self.resource_id
+        inner_kwargs['headers'] = headers
 
-    # Find an unreserved worker using set differences of the names, and filter
-    # out workers that should not be assigned work.
-    # NB: this is a little messy but set comprehensions are in python 2.7+
-    unreserved_workers = set(filter(_is_worker, worker_names)) - set(reserved_names)
+        celery.tasks[self.name].apply_async(*self.inner_args, **inner_kwargs)
+        self.forget()
 
-    try:
-        return workers_dict[unreserved_workers.pop()]
-    except KeyError:
-        # All workers are reserved
-        raise NoWorkers()
+    def forget(self):
+        """
+        Delete the stored waiting task, if there is one.
+        """
+        if self.parked:
+            WaitingReservation.objects(task_id=self.task_id).delete()
+            self.parked = False
 
 
 def _delete_worker(name, normal_shutdown=False):
@@ -273,20 +274,20 @@ def _delete_worker(name, normal_shutdown=False):
         cancel(task_status['task_id'])
 
 
-@task(base=PulpTask)
-def _release_resource(task_id):
+def _release_reservation(task_id):
     """
-    Do not queue this task yourself. It will be used automatically when your task is dispatched by
-    the _queue_reserved_task task.
+    Called by the resource manager when a worker reports that a resource-reserving task has
+    finished, failed or been revoked, so the task is no longer executing.
 
-    When a resource-reserving task is complete, this method releases the resource by removing the
-    ReservedResource object by UUID.
+    The task deletes its ReservedResource when it returns, which it cannot do when the process
+    running it was killed. The ReservedResource is deleted here in that case, and a task left
+    in the running state is marked as failed.
 
     :param task_id: The UUID of the task that requested the reservation
     :type  task_id: basestring
     """
     running_task_qs = TaskStatus.objects.filter(task_id=task_id, state=constants.CALL_RUNNING_STATE)
-    for running_task in running_task_qs:
+    for running_task in running_task_qs.only('task_id'):
         new_task = Task()
         exception = PulpCodedException(error_codes.PLP0049, task_id=task_id)
 
@@ -478,24 +479,25 @@ class Task(PulpTask, ReservedTaskMixin):
         This overrides PulpTask's __call__() method. We use this method
         for task state tracking of Pulp tasks.
         """
-        # Check task status and skip running the task if task state is 'canceled'.
-        try:
-            task_status = TaskStatus.objects.get(task_id=self.request.id)
-        except DoesNotExist:
-            task_status = None
-        if task_status and task_status['state'] == constants.CALL_CANCELED_STATE:
-            _logger.debug("Task cancel received for task-id : [%s]" % self.request.id)
-            return
-        # Update start_time and set the task state to 'running' for asynchronous tasks.
-        # Skip updating status for eagerly executed tasks, since we don't want to track
-        # synchronous tasks in our database.
+        # Update start_time and set the task state to 'running' for asynchronous tasks, unless
+        # the task state is 'canceled', in which case skip running the task. Skip updating status
+        # for eagerly executed tasks, since we don't want to track synchronous tasks in our
+        # database.
         if not self.request.called_directly:
             now = datetime.now(dateutils.utc_tz())
             start_time = dateutils.format_iso8601_datetime(now)
             # Using 'upsert' to avoid a possible race condition described in the apply_async method
-            # above.
-            TaskStatus.objects(task_id=self.request.id).update_one(
-                set__state=constants.CALL_RUNNING_STATE, set__start_time=start_time, upsert=True)
+            # above. When the task has been canceled the query does not match and the upsert
+            # conflicts with the unique task_id of the canceled task status, so the check and the
+            # update take a single round trip.
+            try:
+                TaskStatus.objects(
+                    task_id=self.request.id, state__ne=constants.CALL_CANCELED_STATE).modify(
+                        upsert=True, set__state=constants.CALL_RUNNING_STATE,
+                        set__start_time=start_time)
+            except NotUniqueError:
+                _logger.debug("Task cancel received for task-id : [%s]" % self.request.id)
+                return
         # Run the actual task
         _logger.debug("Running task : [%s]" % self.request.id)
 
@@ -526,19 +528,11 @@ class Task(PulpTask, ReservedTaskMixin):
         if not self.request.called_directly:
             now = datetime.now(dateutils.utc_tz())
             finish_time = dateutils.format_iso8601_datetime(now)
-            task_status = TaskStatus.objects.get(task_id=task_id)
-            task_status['finish_time'] = finish_time
-            task_status['result'] = retval
-
-            # Only set the state to finished if it's not already in a complete state. This is
-            # important for when the task has been canceled, so we don't move the task from canceled
-            # to finished.
-            if task_status['state'] not in constants.CALL_COMPLETE_STATES:
-                task_status['state'] = constants.CALL_FINISHED_STATE
+            update = {'set__finish_time': finish_time, 'set__result': retval}
             if isinstance(retval, TaskResult):
-                task_status['result'] = retval.return_value
+                update['set__result'] = retval.return_value
                 if retval.error:
-                    task_status['error'] = retval.error.to_dict()
+                    update['set__error'] = retval.error.to_dict()
                 if retval.spawned_tasks:
                     task_list = []
                     for spawned_task in retval.spawned_tasks:
@@ -546,12 +540,15 @@ class Task(PulpTask, ReservedTaskMixin):
                             task_list.append(spawned_task.task_id)
                         elif isinstance(spawned_task, dict):
                             task_list.append(spawned_task['task_id'])
-                    task_status['spawned_tasks'] = task_list
+                    update['add_to_set__spawned_tasks'] = task_list
             if isinstance(retval, AsyncResult):
-                task_status['spawned_tasks'] = [retval.task_id, ]
-                task_status['result'] = None
+                update['add_to_set__spawned_tasks'] = [retval.task_id, ]
+                update['set__result'] = None
 
-            task_status.save()
+            # Only set the state to finished if it's not already in a complete state. This is
+            # important for when the task has been canceled, so we don't move the task from canceled
+            # to finished.
+            _update_task_status(task_id, constants.CALL_FINISHED_STATE, **update)
             self._handle_cProfile(task_id)
             common_utils.delete_working_directory()
 
@@ -579,17 +576,32 @@ class Task(PulpTask, ReservedTaskMixin):
         if not self.request.called_directly:
             now = datetime.now(dateutils.utc_tz())
             finish_time = dateutils.format_iso8601_datetime(now)
-            task_status = TaskStatus.objects.get(task_id=task_id)
-            task_status['state'] = constants.CALL_ERROR_STATE
-            task_status['finish_time'] = finish_time
-            task_status['traceback'] = einfo.traceback
             if not isinstance(exc, PulpException):
                 exc = PulpException(str(exc))
-            task_status['error'] = exc.to_dict()
-            task_status.save()
+            _update_task_status(task_id, set__state=constants.CALL_ERROR_STATE,
+                                set__finish_time=finish_time, set__traceback=einfo.traceback,
+                                set__error=exc.to_dict())
             self._handle_cProfile(task_id)
             common_utils.delete_working_directory()
 
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        """
+        This overrides the handler run by the worker after the task returns, in the process that
+        ran it. It deletes the task's resource reservation for asynchronous tasks that were
+        dispatched with one, as marked by the RESERVED_RESOURCE_HEADER message header.
+
+        :param status:  The state of the task.
+        :param retval:  The return value of the task or the exception raised.
+        :param task_id: Unique id of the task.
+        :param args:    Original arguments for the task.
+        :param kwargs:  Original keyword arguments for the task.
+        :param einfo:   celery's ExceptionInfo instance, or None.
+        """
+        if self.request.called_directly:
+            return
+        if (self.request.headers or {}).get(RESERVED_RESOURCE_HEADER):
+            ReservedResource.objects(task_id=task_id).delete()
+
     def _handle_cProfile(self, task_id):
         """
         If cProfiling is enabled, stop the profiler and write out the data.
@@ -608,6 +620,32 @@ class Task(PulpTask, ReservedTaskMixin):
             self.pr.dump_stats("%s/%s" % (profile_directory, task_id))
 
 
+def _update_task_status(task_id, final_state=None, **update):
+    """
+    Update the task status of a finished task with a single targeted update rather than loading
+    and saving the whole document. A taskstatus message is sent for the updated task status as if
+    it had been saved.
+
+    :param task_id:     The ID of the task
+    :type  task_id:     basestring
+    :param final_state: A state to set only if the task is not already in a complete state
+    :type  final_state: basestring
+    :param update:      mongoengine update keyword arguments
+    :type  update:      dict
+    :return:            The updated task status or None if it does not exist
+    :rtype:             pulp.server.db.model.TaskStatus
+    """
+    task_status = None
+    if final_state is not None:
+        query_set = TaskStatus.objects(task_id=task_id, state__nin=constants.CALL_COMPLETE_STATES)
+        task_status = query_set.modify(new=True, set__state=final_state, **update)
+    if task_status is None:
+        task_status = TaskStatus.objects(task_id=task_id).modify(new=True, **update)
+    if task_status is not None:
+        signals.post_save.send(TaskStatus, document=task_status)
+    return task_status
+
+
 def cancel(task_id):
     """
     Cancel the task that is represented by the given task_id. This method cancels only the task
@@ -649,6 +687,55 @@ def cancel(task_id):
     _logger.info(msg)
 
 
+def cancel_group(group_id):
+    """
+    Cancel the incomplete tasks in the task group with the given group_id. This has the same effect
+    as calling cancel() for each task, but the tasks are revoked in batches of CANCEL_BATCH_SIZE and
+    their states are updated to 'canceled' with a single query.
+
+    :param group_id: The ID of the task group you wish to cancel
+    :type  group_id: basestring
+    :return: The IDs of the canceled tasks
+    :rtype:  list
+
+    :raises MissingResource: if the task group does not exist
+    """
+    if TaskStatus.objects(group_id=group_id).only('task_id').first() is None:
+        raise MissingResource(group_id)
+
+    task_statuses = TaskStatus.objects(group_id=group_id,
+                                       state__nin=constants.CALL_COMPLETE_STATES)
+    task_ids = []
+    revoked_ids = []
+    agent_manager = None
+    for task_status in task_statuses.only('task_id', 'worker_name', 'tags'):
+        task_ids.append(task_status['task_id'])
+        if task_status['worker_name'] == 'agent':
+            tag_dict = dict(
+                [
+                    tags.parse_resource_tag(t) for t in task_status['tags']
+                    if tags.is_resource_tag(t)
+                ])
+            agent_manager = agent_manager or managers.consumer_agent_manager()
+            consumer_id = tag_dict.get(tags.RESOURCE_CONSUMER_TYPE)
+            agent_manager.cancel_request(consumer_id, task_status['task_id'])
+        else:
+            revoked_ids.append(task_status['task_id'])
+
+    for i in range(0, len(revoked_ids), CANCEL_BATCH_SIZE):
+        controller.revoke(revoked_ids[i:i + CANCEL_BATCH_SIZE], terminate=True)
+
+    if task_ids:
+        TaskStatus._get_collection().update_many(
+            {'task_id': {'$in': task_ids}, 'state': {'$nin': constants.CALL_COMPLETE_STATES}},
+            {'$set': {'state': constants.CALL_CANCELED_STATE}})
+
+    msg = _('Canceled %(count)d tasks in task group: %(group_id)s.')
+    msg = msg % {'count': len(task_ids), 'group_id': group_id}
+    _logger.info(msg)
+    return task_ids
+
+
 def get_current_task_id():
     """"
     Get the current task id from celery. If this is called outside of a running
@@ -24,7 +24,7 @@ from pulp.server.db.model import Worker
 _logger = logging.getLogger(__name__)
 
 
-def handle_worker_heartbeat(worker_name):
+def handle_worker_heartbeat(worker_name, concurrency=None):
     """
     This is a generic function for updating worker heartbeat records.
 
@@ -33,6 +33,8 @@ def handle_worker_heartbeat(worker_name):
 
     :param worker_name: The hostname of the worker
     :type  worker_name: basestring
+    :param concurrency: The number of tasks the worker runs at once, or None if not known
+    :type  concurrency: int
     """
     existing_worker = Worker.objects(name=worker_name).first()
 
@@ -45,8 +47,13 @@ def handle_worker_heartbeat(worker_name):
                                                                          name=worker_name)
     _logger.debug(msg)
 
-    Worker.objects(name=worker_name).update_one(set__last_heartbeat=timestamp,
-                                                upsert=True)
+    if concurrency is None:
+        Worker.objects(name=worker_name).update_one(set__last_heartbeat=timestamp,
+                                                    upsert=True)
+    else:
+        Worker.objects(name=worker_name).update_one(set__last_heartbeat=timestamp,
+                                                    set__concurrency=concurrency,
+                                                    upsert=True)
 
 
 def handle_worker_offline(worker_name):
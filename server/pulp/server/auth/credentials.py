@@ -0,0 +1,143 @@
+"""
+A short-lived, memory-only record of the passwords that have been verified by this process.
+
+Checking a password hashes it thousands of times, which is most of the cost of authenticating a
+REST request with basic auth. Clients such as automation send the same credentials with every
+request, so a successful verification is remembered for a few seconds.
+
+Neither passwords nor password hashes are kept. Each verification is recorded by a digest of the
+login, the password and the stored password hash, keyed with a secret that is generated for each
+process and never leaves it. Changing a password changes the stored hash, so the verifications
+recorded by every process no longer match once the password has changed.
+"""
+from collections import OrderedDict
+from hashlib import sha256
+from hmac import HMAC
+from threading import RLock
+import os
+import time
+
+from pulp.server.config import config
+
+
+# The maximum number of verifications remembered.
+CACHE_SIZE = 1000
+
+
+class VerifiedCredentials(object):
+    """
+    Successful password verifications, remembered until they expire.
+
+    :ivar hits: The number of verifications answered from the cache.
+    :type hits: int
+    :ivar misses: The number of verifications not found in the cache.
+    :type misses: int
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        """
+        :param size: The maximum number of verifications remembered.
+        :type  size: int
+        """
+        self.size = size
+        self._secret = os.urandom(32)
+        self._mutex = RLock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, login, password, stored):
+        """
+        :param login: The login of the user.
+        :type  login: basestring
+        :param password: The plaintext password being verified.
+        :type  password: basestring
+        :param stored: The password hash stored for the user.
+        :type  stored: basestring
+        :return: The digest identifying the credentials.
+        :rtype:  str
+        """
+        parts = [_encode(login), _encode(password), _encode(stored)]
+        return HMAC(self._secret, '\0'.join(parts), sha256).digest()
+
+    def verified(self, key):
+        """
+        :param key: The digest identifying the credentials.
+        :type  key: str
+        :return: True if the credentials were verified and have not expired.
+        :rtype:  bool
+        """
+        now = time.time()
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return True
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False
+
+    def add(self, key, login):
+        """
+        Remember a successful verification.
+
+        :param key: The digest identifying the credentials.
+        :type  key: str
+        :param login: The login of the user.
+        :type  login: basestring
+        """
+        ttl = _ttl()
+        if ttl <= 0:
+            return
+        with self._mutex:
+            self._entries.pop(key, None)
+            self._entries[key] = (login, time.time() + ttl)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def forget(self, login):
+        """
+        Forget the verifications of a user's credentials.
+
+        :param login: The login of the user.
+        :type  login: basestring
+        """
+        with self._mutex:
+            for key, entry in self._entries.items():
+                if entry[0] == login:
+                    del self._entries[key]
+
+    def clear(self):
+        """
+        Forget every verification.
+        """
+        with self._mutex:
+            self._entries.clear()
+
+
+def _encode(value):
+    """
+    :param value: A string.
+    :type  value: basestring
+    :return: The string encoded as UTF-8.
+    :rtype:  str
+    """
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+
+def _ttl():
+    """
+    :return: The number of seconds a verification is remembered. 0 disables the cache.
+    :rtype:  float
+    """
+    try:
+        return config.getfloat('authentication', 'credential_cache_ttl')
+    except Exception:
+        return 0
+
+
+# The verifications are remembered for the life of the process.
+verified_credentials = VerifiedCredentials()
@@ -51,6 +51,7 @@ _default_values = {
     'authentication': {
         'rsa_key': '/etc/pki/pulp/rsa.key',
         'rsa_pub': '/etc/pki/pulp/rsa_pub.key',
+        'credential_cache_ttl': '30',
     },
     'consumer_history': {
         'lifetime': '180',  # in days
@@ -141,7 +142,9 @@ _default_values = {
     },
     'profiling': {
         'enabled': 'false',
-        'directory': '/var/lib/pulp/c_profiles'
+        'directory': '/var/lib/pulp/c_profiles',
+        'step_metrics': 'false',
+        'log_step_metrics': 'false'
     }
 }
 
@@ -7,6 +7,8 @@ from nectar.listener import DownloadEventListener
 from nectar.report import DownloadReport as NectarDownloadReport, DOWNLOAD_SUCCEEDED
 from nectar.request import DownloadRequest
 
+from pulp.plugins.util.misc import paginate
+from pulp.server.content.sources import health
 from pulp.server.content.sources.event import Started, Succeeded, Failed
 from pulp.server.content.sources.model import ContentSource, PrimarySource, \
     DownloadReport, DownloadDetails, RefreshReport
@@ -16,6 +18,11 @@ from pulp.server.managers import factory as managers
 log = getLogger(__name__)
 
 
+# The number of requests for which sources are resolved using
+# a single content catalog query.
+FIND_SOURCES_PAGE_SIZE = 500
+
+
 class DownloadFailed(Exception):
     """
     A serial download has failed.
@@ -33,6 +40,8 @@ class ContentContainer(object):
     :type sources: dict
     :ivar threaded: Use threaded download method (default:True).
     :type threaded: bool
+    :ivar health: Tracks the health of sources during and across batches.
+    :type health: pulp.server.content.sources.health.HealthMonitor
     """
 
     def __init__(self, path=None, threaded=True):
@@ -45,6 +54,7 @@ class ContentContainer(object):
         """
         self.sources = ContentSource.load_all(path)
         self.threaded = threaded
+        self.health = health.monitor
 
     def download(self, downloader, requests, listener=None):
         """
@@ -111,12 +121,15 @@ class ContentContainer(object):
 
 class NectarListener(DownloadEventListener):
 
-    def __init__(self, batch):
+    def __init__(self, batch, source_id=None):
         """
         :param batch: A download batch.
         :type batch: Threaded
+        :param source_id: The ID of the content source used by the downloader.
+        :type source_id: str
         """
         self.batch = batch
+        self.source_id = source_id
         self.total_succeeded = 0
         self.total_failed = 0
 
@@ -143,6 +156,7 @@ class NectarListener(DownloadEventListener):
         :type report: nectar.report.DownloadReport
         """
         self.total_succeeded += 1
+        self.batch.health.succeeded(self.source_id, report)
         request = report.data
         request.downloaded = True
         listener = self.batch.listener
@@ -161,6 +175,7 @@ class NectarListener(DownloadEventListener):
         :type report: nectar.report.DownloadReport
         """
         self.total_failed += 1
+        self.batch.health.failed(self.source_id, report)
         request = report.data
         request.errors.append(report.error_msg)
         listener = self.batch.listener
@@ -213,6 +228,42 @@ class Batch(object):
         """
         return self.container.sources
 
+    @property
+    def health(self):
+        """
+        The source health monitor.
+
+        :return: The source health monitor.
+        :rtype: pulp.server.content.sources.health.HealthMonitor
+        """
+        return self.container.health
+
+    def find_sources(self):
+        """
+        Find the content sources for each request in the batch.
+        The requests are read in pages and the content catalog entries for
+        all requests in a page are fetched using a single query.
+
+        :return: A generator of requests with sources found.
+        :rtype: generator
+        """
+        catalog = managers.content_catalog_manager()
+        for page in paginate(self.requests, FIND_SOURCES_PAGE_SIZE):
+            entries = catalog.find_by_locators([r.locator for r in page])
+            for request in page:
+                request.find_sources(
+                    self.primary, self.sources, entries.get(request.locator, []), self.health)
+                yield request
+
+    def report_health(self, report):
+        """
+        Add the health of the alternate sources to the download report.
+
+        :param report: The download report.
+        :type report: DownloadReport
+        """
+        report.health = self.health.dict(list(self.sources))
+
     def __call__(self):
         """
         Begin processing the batch of requests.
@@ -248,11 +299,12 @@ class Serial(Batch):
         """
         report = DownloadReport()
         report.total_sources = len(self.sources)
-        for request in self.requests:
+        for request in self.find_sources():
             event = Started(request)
             event(self.listener)
-            request.find_sources(self.primary, self.sources)
             for source, url in request.sources:
+                if not self.health.available(source):
+                    continue
                 details = report.downloads.setdefault(source.id, DownloadDetails())
                 try:
                     self._download(url, request.destination, source)
@@ -268,6 +320,7 @@ class Serial(Batch):
                 continue
             event = Failed(request)
             event(self.listener)
+        self.report_health(report)
         return report
 
     def _download(self, url, destination, source):
@@ -289,8 +342,10 @@ class Serial(Batch):
         report = downloader.download_one(request, events=True)
         if report.state == DOWNLOAD_SUCCEEDED:
             # All good
+            self.health.succeeded(source.id, report)
             return
         else:
+            self.health.failed(source.id, report)
             raise DownloadFailed(report.error_msg)
 
 
@@ -358,8 +413,9 @@ class Threaded(Batch):
         """
         Dispatch the specified request to the queue associated with the
         next content source that can satisfy the request.  The next source is
-        determined by the request itself.  If the list of available sources
-        is exhausted, the request is not dispatched.
+        determined by the request itself.  Sources that have become unavailable
+        (circuit-broken) since the request sources were found are skipped.
+        If the list of available sources is exhausted, the request is not dispatched.
 
         :param request: The request that has been stared.
         :type request: pulp.server.content.sources.model.Request
@@ -369,6 +425,8 @@ class Threaded(Batch):
         dispatched = False
         try:
             source, url = request.sources.next()
+            while not self.health.available(source):
+                source, url = request.sources.next()
             queue = self.find_queue(source)
             queue.put(Item(request, url))
             dispatched = True
@@ -403,7 +461,7 @@ class Threaded(Batch):
         :rtype: RequestQueue
         """
         queue = RequestQueue(source, self.primary.session)
-        queue.downloader.event_listener = NectarListener(self)
+        queue.downloader.event_listener = NectarListener(self, source.id)
         self.queues[source.id] = queue
         queue.start()
         return queue
@@ -425,8 +483,7 @@ class Threaded(Batch):
         report.total_sources = len(self.sources)
 
         try:
-            for request in self.requests:
-                request.find_sources(self.primary, self.sources)
+            for request in self.find_sources():
                 self.dispatch(request)
                 count += 1
         finally:
@@ -442,6 +499,7 @@ class Threaded(Batch):
             downloads = report.downloads.setdefault(source_id, DownloadDetails())
             downloads.total_succeeded += listener.total_succeeded
             downloads.total_failed += listener.total_failed
+        self.report_health(report)
         return report
 
 
@@ -28,6 +28,8 @@ are supported:
      The URL used to fetch info used to refresh the catalog.
  - paths <str>
      An optional list of URL relative paths.  Delimited by space or newline.
+ - refresh_concurrency <int>
+     Limit the number of URLs (paths) refreshed concurrently.
  - max_concurrent <int>
      Limit the number of concurrent downloads.
  - max_speed <int>
@@ -87,6 +89,7 @@ log = getLogger(__name__)
 DEFAULT = {
     constants.PRIORITY: '0',
     constants.EXPIRES: '24h',
+    constants.REFRESH_CONCURRENCY: '4',
     constants.MAX_CONCURRENT: '2',
     constants.SSL_VALIDATION: 'true'
 }
@@ -100,6 +103,7 @@ SCHEMA = [
         (constants.PRIORITY, OPTIONAL, NUMBER),
         (constants.EXPIRES, OPTIONAL, ANY),
         (constants.PATHS, OPTIONAL, ANY),
+        (constants.REFRESH_CONCURRENCY, OPTIONAL, NUMBER),
         (constants.MAX_CONCURRENT, OPTIONAL, NUMBER),
         (constants.MAX_SPEED, OPTIONAL, NUMBER),
         (constants.SSL_VALIDATION, OPTIONAL, BOOL),
@@ -0,0 +1,283 @@
+from logging import getLogger
+from threading import RLock
+from time import time
+
+from pulp.common.constants import PRIMARY_ID
+from pulp.server.content.sources.model import PrimarySource
+
+
+log = getLogger(__name__)
+
+
+# The number of consecutive failures after which a source is
+# circuit-broken (skipped) for the COOL_DOWN period.
+FAILURE_THRESHOLD = 5
+
+# The number of seconds a circuit-broken source is skipped.
+# After the cool down, the source is tried again and a single failure
+# will break the circuit again.
+COOL_DOWN = 300
+
+# A source with an error rate above this value is demoted and used
+# only after all healthy alternate sources.
+DEMOTION_ERROR_RATE = 0.5
+
+# The minimum number of downloads before the error rate is used.
+MIN_SAMPLES = 10
+
+# The weight given to the newest sample when updating the moving averages.
+SMOOTHING = 0.2
+
+CIRCUIT_OPENED = 'Source [%s] failed %d consecutive downloads, skipped for %d seconds.'
+
+
+class SourceHealth(object):
+    """
+    Download statistics for a single content source.
+    :ivar source_id: The content source ID.
+    :type source_id: str
+    :ivar total_succeeded: The total number of downloads that succeeded.
+    :type total_succeeded: int
+    :ivar total_failed: The total number of downloads that failed.
+    :type total_failed: int
+    :ivar consecutive_failures: The number of failures since the last success.
+    :type consecutive_failures: int
+    :ivar latency: The moving average of seconds taken by each download.
+    :type latency: float
+    :ivar throughput: The moving average of bytes downloaded per second.
+    :type throughput: float
+    :ivar suspended_until: The time until which the source is circuit-broken.
+    :type suspended_until: float
+    """
+
+    def __init__(self, source_id):
+        """
+        :param source_id: The content source ID.
+        :type source_id: str
+        """
+        self.source_id = source_id
+        self.total_succeeded = 0
+        self.total_failed = 0
+        self.consecutive_failures = 0
+        self.latency = None
+        self.throughput = None
+        self.suspended_until = 0
+
+    @property
+    def error_rate(self):
+        """
+        The ratio of failed downloads to all downloads.
+        :return: The error rate (0.0 - 1.0).
+        :rtype: float
+        """
+        total = self.total_succeeded + self.total_failed
+        if not total:
+            return 0.0
+        return float(self.total_failed) / total
+
+    @property
+    def demoted(self):
+        """
+        Get whether the source has failed too often to be preferred.
+        :return: True if demoted.
+        :rtype: bool
+        """
+        total = self.total_succeeded + self.total_failed
+        return total >= MIN_SAMPLES and self.error_rate > DEMOTION_ERROR_RATE
+
+    def available(self, now=None):
+        """
+        Get whether the source may be used.
+        :param now: The current time.
+        :type now: float
+        :return: False when circuit-broken.
+        :rtype: bool
+        """
+        now = now or time()
+        return now >= self.suspended_until
+
+    def succeeded(self, seconds, bytes_downloaded):
+        """
+        Record a successful download.
+        :param seconds: The duration of the download (or None).
+        :type seconds: float
+        :param bytes_downloaded: The number of bytes downloaded.
+        :type bytes_downloaded: int
+        """
+        self.total_succeeded += 1
+        self.consecutive_failures = 0
+        self.suspended_until = 0
+        if seconds is None:
+            return
+        self.latency = average(self.latency, seconds)
+        if seconds > 0:
+            self.throughput = average(self.throughput, bytes_downloaded / seconds)
+
+    def failed(self, seconds):
+        """
+        Record a failed download.
+        The circuit is broken after FAILURE_THRESHOLD consecutive failures.
+        :param seconds: The duration of the download (or None).
+        :type seconds: float
+        """
+        self.total_failed += 1
+        self.consecutive_failures += 1
+        if seconds is not None:
+            self.latency = average(self.latency, seconds)
+        if self.consecutive_failures >= FAILURE_THRESHOLD:
+            if self.available():
+                log.warn(CIRCUIT_OPENED, self.source_id, self.consecutive_failures, COOL_DOWN)
+            self.suspended_until = time() + COOL_DOWN
+
+    def dict(self):
+        """
+        Dictionary representation.
+        :return: A dictionary representation.
+        :rtype: dict
+        """
+        return dict(total_succeeded=self.total_succeeded,
+                    total_failed=self.total_failed,
+                    error_rate=self.error_rate,
+                    latency=self.latency,
+                    throughput=self.throughput,
+                    demoted=self.demoted,
+                    available=self.available())
+
+
+class HealthMonitor(object):
+    """
+    Tracks the health of content sources during and across download batches.
+    Used to order the sources used to satisfy a download request:
+     - Circuit-broken sources are skipped.
+     - Demoted sources are used after all healthy alternate sources.
+     - Sources with equal priority are ordered by throughput (fastest first).
+     - The primary source is always last.
+    :ivar sources: Dict of: SourceHealth keyed by source ID.
+    :type sources: dict
+    """
+
+    def __init__(self):
+        self._mutex = RLock()
+        self.sources = {}
+
+    def find(self, source_id):
+        """
+        Find the health of the specified source.
+        The health is created and added if not found.
+        :param source_id: A content source ID.
+        :type source_id: str
+        :return: The source health.
+        :rtype: SourceHealth
+        """
+        with self._mutex:
+            try:
+                return self.sources[source_id]
+            except KeyError:
+                health = SourceHealth(source_id)
+                self.sources[source_id] = health
+                return health
+
+    def available(self, source):
+        """
+        Get whether the source may be used.
+        The primary source is always available.
+        :param source: A content source.
+        :type source: pulp.server.content.sources.model.ContentSource
+        :return: True if available.
+        :rtype: bool
+        """
+        if isinstance(source, PrimarySource):
+            return True
+        with self._mutex:
+            health = self.sources.get(source.id)
+            return health is None or health.available()
+
+    def sort_key(self, source):
+        """
+        Get the key used to sort sources in the order they are to be used.
+        :param source: A content source.
+        :type source: pulp.server.content.sources.model.ContentSource
+        :return: The sort key.
+        :rtype: tuple
+        """
+        if isinstance(source, PrimarySource):
+            return 2, source.priority, 0
+        with self._mutex:
+            health = self.sources.get(source.id)
+            if health is None:
+                return 0, source.priority, 0
+            return int(health.demoted), source.priority, -(health.throughput or 0)
+
+    def succeeded(self, source_id, report):
+        """
+        Record a successful download.
+        The primary source is not tracked.
+        :param source_id: A content source ID.
+        :type source_id: str
+        :param report: A nectar download report.
+        :type report: nectar.report.DownloadReport
+        """
+        if source_id == PRIMARY_ID:
+            return
+        with self._mutex:
+            self.find(source_id).succeeded(duration(report), report.bytes_downloaded)
+
+    def failed(self, source_id, report):
+        """
+        Record a failed download.
+        The primary source is not tracked.
+        :param source_id: A content source ID.
+        :type source_id: str
+        :param report: A nectar download report.
+        :type report: nectar.report.DownloadReport
+        """
+        if source_id == PRIMARY_ID:
+            return
+        with self._mutex:
+            self.find(source_id).failed(duration(report))
+
+    def dict(self, source_ids=None):
+        """
+        Dictionary representation.
+        :param source_ids: An optional list of source IDs to include.
+        :type source_ids: list
+        :return: A dictionary representation keyed by source ID.
+        :rtype: dict
+        """
+        with self._mutex:
+            return dict([(k, v.dict()) for k, v in self.sources.items()
+                         if source_ids is None or k in source_ids])
+
+
+def average(current, sample):
+    """
+    Update an exponential moving average.
+    :param current: The current average (or None).
+    :type current: float
+    :param sample: The new sample.
+    :type sample: float
+    :return: The updated average.
+    :rtype: float
+    """
+    if current is None:
+        return float(sample)
+    return current + SMOOTHING * (sample - current)
+
+
+def duration(report):
+    """
+    Get the duration of a download.
+    :param report: A nectar download report.
+    :type report: nectar.report.DownloadReport
+    :return: The duration in seconds or None when not known.
+    :rtype: float
+    """
+    if report.start_time is None or report.finish_time is None:
+        return None
+    delta = report.finish_time - report.start_time
+    return delta.days * 86400 + delta.seconds + delta.microseconds / 1000000.0
+
+
+# Source health is kept for the life of the process so that what
+# is learned during one batch is used by the next.
+monitor = HealthMonitor()
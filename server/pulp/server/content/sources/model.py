@@ -14,6 +14,7 @@ import sys
 import os
 import re
 
+from multiprocessing.pool import ThreadPool
 from urlparse import urljoin
 from logging import getLogger
 from ConfigParser import ConfigParser
@@ -23,6 +24,7 @@ from pulp.plugins.conduits.cataloger import CatalogerConduit
 from pulp.plugins.loader import api as plugins
 from pulp.server.content.sources import constants
 from pulp.server.content.sources.descriptor import is_valid, to_seconds, DEFAULT
+from pulp.server.db.model.content import ContentCatalog
 from pulp.server.managers import factory as managers
 
 
@@ -35,6 +37,7 @@ PATHS_REGEX = re.compile(r'\s+')
 REFRESHING = 'Refreshing [%s] url:%s'
 REFRESH_SUCCEEDED = 'Refresh [%s] succeeded.  Added: %d, Deleted: %d'
 REFRESH_FAILED = 'Refresh [%s] url: %s, failed: %s'
+REFRESH_PURGED = 'Refresh [%s] purged: %d stale entries.'
 
 
 class Request(object):
@@ -81,7 +84,16 @@ class Request(object):
         self.errors = []
         self.data = None
 
-    def find_sources(self, primary, alternates):
+    @property
+    def locator(self):
+        """
+        The content catalog locator for the requested unit.
+        :return: The locator.  See: ContentCatalog.get_locator().
+        :rtype: str
+        """
+        return ContentCatalog.get_locator(self.type_id, self.unit_key)
+
+    def find_sources(self, primary, alternates, entries=None, health=None):
         """
         Find and set the list of content sources in the order they are to
         be used to satisfy the request.  The alternate sources are
@@ -90,17 +102,31 @@ class Request(object):
         :type primary: ContentSource
         :param alternates: A list of alternative sources.
         :type alternates: dict
+        :param entries: Catalog entries matching this request that have already
+            been fetched.  When None, the catalog is queried.
+        :type entries: list
+        :param health: An optional source health monitor.  When specified,
+            unavailable sources are skipped and the sources are ordered
+            using the monitor.
+        :type health: pulp.server.content.sources.health.HealthMonitor
         """
         resolved = [(primary, self.url)]
-        catalog = managers.content_catalog_manager()
-        for entry in catalog.find(self.type_id, self.unit_key):
+        if entries is None:
+            catalog = managers.content_catalog_manager()
+            entries = catalog.find(self.type_id, self.unit_key)
+        for entry in entries:
             source_id = entry[constants.SOURCE_ID]
             source = alternates.get(source_id)
             if source is None:
                 continue
+            if health is not None and not health.available(source):
+                continue
             url = entry[constants.URL]
             resolved.append((source, url))
-        resolved.sort()
+        if health is None:
+            resolved.sort()
+        else:
+            resolved.sort(key=lambda r: health.sort_key(r[0]))
         self.sources = iter(resolved)
 
 
@@ -234,6 +260,15 @@ class ContentSource(object):
         """
         return int(self.descriptor[constants.MAX_CONCURRENT])
 
+    @property
+    def refresh_concurrency(self):
+        """
+        Get the number of URLs refreshed concurrently specified in the source definition.
+        :return: The refresh concurrency.
+        :rtype: int
+        """
+        return int(self.descriptor[constants.REFRESH_CONCURRENCY])
+
     @property
     def urls(self):
         """
@@ -293,33 +328,63 @@ class ContentSource(object):
             downloader.session = session
         return downloader
 
-    def refresh(self):
+    def refresh(self, progress=None):
         """
         Refresh the content catalog using the cataloger plugin as
         defined by the "type" descriptor property.
-        :return: The list of refresh reports.
+        The URLs are refreshed concurrently, each using its own plugin and conduit.  When
+        all of the URLs have been refreshed successfully, entries not contributed
+        by this refresh are purged.
+        :param progress: An optional callable notified (in the calling thread)
+            with the RefreshReport of each URL as it is completed.
+        :type progress: callable
+        :return: The list of refresh reports (ordered by URL).
         :rtype: list of: RefreshReport
         """
         reports = []
-        conduit = self.get_conduit()
-        plugin = self.get_cataloger()
-        for url in self.urls:
-            conduit.reset()
-            report = RefreshReport(self.id, url)
-            log.info(REFRESHING, self.id, url)
-            try:
-                plugin.refresh(conduit, self.descriptor, url)
-                log.info(REFRESH_SUCCEEDED, self.id, conduit.added_count, conduit.deleted_count)
-                report.succeeded = True
-                report.added_count = conduit.added_count
-                report.deleted_count = conduit.deleted_count
-            except Exception, e:
-                log.error(REFRESH_FAILED, self.id, url, e)
-                report.errors.append(str(e))
-            finally:
+        urls = self.urls
+        started = ContentCatalog.get_expiration(self.expires)
+        pool = ThreadPool(max(1, min(self.refresh_concurrency, len(urls))))
+        try:
+            for report in pool.imap(self._refresh, urls):
                 reports.append(report)
+                if progress:
+                    progress(report)
+        finally:
+            pool.close()
+            pool.join()
+        if all(r.succeeded for r in reports):
+            manager = managers.content_catalog_manager()
+            purged = manager.purge_stale(self.id, started)
+            log.info(REFRESH_PURGED, self.id, purged)
         return reports
 
+    def _refresh(self, url):
+        """
+        Refresh the content catalog using the specified URL.
+        Each URL gets its own plugin instance and conduit because catalogers
+        are not required to be thread safe.
+        :param url: The URL to be refreshed.
+        :type url: str
+        :return: The refresh report.
+        :rtype: RefreshReport
+        """
+        plugin = self.get_cataloger()
+        conduit = self.get_conduit()
+        report = RefreshReport(self.id, url)
+        log.info(REFRESHING, self.id, url)
+        try:
+            plugin.refresh(conduit, self.descriptor, url)
+            conduit.flush()
+            log.info(REFRESH_SUCCEEDED, self.id, conduit.added_count, conduit.deleted_count)
+            report.succeeded = True
+            report.added_count = conduit.added_count
+            report.deleted_count = conduit.deleted_count
+        except Exception, e:
+            log.error(REFRESH_FAILED, self.id, url, e)
+            report.errors.append(str(e))
+        return report
+
     def dict(self):
         """
         Dictionary representation.
@@ -396,7 +461,7 @@ class PrimarySource(ContentSource):
         """
         return self._downloader
 
-    def refresh(self):
+    def refresh(self, progress=None):
         """
         Does not support refresh.
         """
@@ -432,20 +497,29 @@ class DownloadReport(object):
     :type total_sources: int
     :ivar downloads: Dict of: DownloadDetails keyed by source ID.
     :type downloads: dict
+    :ivar health: Dict of alternate source health statistics keyed by source ID.
+        See: pulp.server.content.sources.health.SourceHealth.
+    :type health: dict
     """
 
     def __init__(self):
         self.total_sources = 0
         self.downloads = {}
+        self.health = {}
 
-    def dict(self):
+    def dict(self, health=False):
         """
         Dictionary representation.
+        :param health: Include the source health statistics.
+        :type health: bool
         :return: A dictionary representation.
         :rtype: dict
         """
-        return dict(total_sources=self.total_sources,
-                    downloads=dict([(k, v.dict()) for k, v in self.downloads.items()]))
+        _dict = dict(total_sources=self.total_sources,
+                     downloads=dict([(k, v.dict()) for k, v in self.downloads.items()]))
+        if health:
+            _dict['health'] = self.health
+        return _dict
 
 
 class RefreshReport(object):
@@ -70,10 +70,23 @@ class ContentSourcesRefreshStep(Step):
         if item:
             self.progress_description = item.descriptor['name']
             self.progress_details = self.progress_description
-            report = item.refresh()[0]
-            if not report.succeeded:
-                raise PulpCodedTaskException(error_code=error_codes.PLP0031, id=report.source_id,
-                                             url=report.url)
+            reports = item.refresh(progress=self._refreshed)
+            for report in reports:
+                if not report.succeeded:
+                    raise PulpCodedTaskException(error_code=error_codes.PLP0031,
+                                                 id=report.source_id, url=report.url)
+
+    def _refreshed(self, report):
+        """
+        Report progress as each URL of the content source is refreshed.
+
+        :param report: The report of the refreshed URL.
+        :type  report: pulp.server.content.sources.model.RefreshReport
+        """
+        self.progress_details = _('%(name)s: %(url)s (added: %(added)d, deleted: %(deleted)d)') % {
+            'name': self.progress_description, 'url': report.url,
+            'added': report.added_count, 'deleted': report.deleted_count}
+        self.report_progress()
 
     def get_total(self):
         return len(self.sources)
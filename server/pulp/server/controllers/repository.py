@@ -15,6 +15,7 @@ from nectar.config import DownloaderConfig
 from nectar.request import DownloadRequest
 from nectar.downloaders.threaded import HTTPThreadedDownloader
 from nectar.listener import DownloadEventListener
+from pymongo import UpdateOne
 
 from pulp.common import dateutils, error_codes, tags
 from pulp.common.config import parse_bool, Unparsable
@@ -75,8 +76,8 @@ def get_associated_unit_ids(repo_id, unit_type, repo_content_unit_q=None):
     qs = model.RepositoryContentUnit.objects(q_obj=repo_content_unit_q,
                                              repo_id=repo_id,
                                              unit_type_id=unit_type)
-    for assoc in qs.only('unit_id').as_pymongo():
-        yield assoc['unit_id']
+    for assoc in qs.records('unit_id'):
+        yield assoc.unit_id
 
 
 def get_unit_model_querysets(repo_id, model_class, repo_content_unit_q=None):
@@ -334,6 +335,33 @@ def associate_single_unit(repository, unit):
         upsert=True)
 
 
+def associate_unit_ids(repo_id, unit_type_id, unit_ids):
+    """
+    Associate units of a single type to a repository with one bulk write. The time of the
+    association is updated for units already associated to the repository. The unit counts
+    of the repository are not updated.
+
+    :param repo_id: The ID of the repository to update.
+    :type repo_id: basestring
+    :param unit_type_id: The type of the units.
+    :type unit_type_id: basestring
+    :param unit_ids: The IDs of the units to associate to the repository.
+    :type unit_ids: list of basestring
+    :return: The number of units that were not associated to the repository before.
+    :rtype: int
+    """
+    if not unit_ids:
+        return 0
+    current_timestamp = dateutils.now_utc_timestamp()
+    formatted_datetime = dateutils.format_iso8601_utc_timestamp(current_timestamp)
+    update = {'$setOnInsert': {'created': formatted_datetime},
+              '$set': {'updated': formatted_datetime}}
+    requests = [UpdateOne({'repo_id': repo_id, 'unit_id': unit_id, 'unit_type_id': unit_type_id},
+                          update, upsert=True) for unit_id in unit_ids]
+    result = model.RepositoryContentUnit._get_collection().bulk_write(requests, ordered=False)
+    return result.upserted_count
+
+
 def disassociate_units(repository, unit_iterable):
     """
     Disassociate all units in the iterable from the repository.
@@ -1,3 +1,5 @@
+import itertools
+
 import mongoengine
 
 from pulp.plugins.loader import api as plugin_api
@@ -5,17 +7,81 @@ from pulp.plugins.types import database as types_db
 from pulp.plugins.util import misc
 
 
+# The number of units found with each query by the digest of their unit key.
+DIGEST_PAGINATION_SIZE = 1000
+
+
 def find_units(units, pagination_size=50):
     """
     Query for units matching the unit key fields of an iterable of ContentUnit objects.
 
     This requires that all the ContentUnit objects are of the same content type.
 
+    Units are found by the digest of their unit key, in pages of DIGEST_PAGINATION_SIZE, when
+    every stored unit of the type has a digest. Otherwise, or for units whose digest cannot be
+    computed, units are found by querying for their unit key fields.
+
     :param units: Iterable of content units with the unit key fields specified.
     :type units: iterable of pulp.server.db.model.ContentUnit
-    :param pagination_size: How large a page size to use when querying units.
+    :param pagination_size: How large a page size to use when querying units by unit key fields.
     :type pagination_size: int (default 50)
 
+    :returns: unit models that pulp already knows about.
+    :rtype: Generator of pulp.server.db.model.ContentUnit
+    """
+    units = iter(units)
+    try:
+        first = next(units)
+    except StopIteration:
+        return
+    # get the class from the first unit
+    model_class = first.__class__
+    units = itertools.chain([first], units)
+
+    if not _digests_complete(model_class):
+        for found_unit in _find_units_by_key(units, pagination_size):
+            yield found_unit
+        return
+
+    for units_group in misc.paginate(units, DIGEST_PAGINATION_SIZE):
+        digests = set()
+        undigested = []
+        for unit in units_group:
+            digest = unit.unit_key_stored_digest()
+            if digest is None:
+                undigested.append(unit)
+            else:
+                digests.add(digest)
+
+        if digests:
+            for found_unit in model_class.objects(_unit_key_digest__in=list(digests)):
+                yield found_unit
+        for found_unit in _find_units_by_key(undigested, pagination_size):
+            yield found_unit
+
+
+def _digests_complete(model_class):
+    """
+    Determine whether every stored unit of a type has the digest of its unit key.
+
+    :param model_class: a subclass of ContentUnit that defines a unit model
+    :type  model_class: pulp.server.db.model.ContentUnit
+    :return: True if units of the type can be found by the digest of their unit key.
+    :rtype:  bool
+    """
+    return model_class.objects(_unit_key_digest=None).only('id').first() is None
+
+
+def _find_units_by_key(units, pagination_size):
+    """
+    Query for units matching the unit key fields of an iterable of ContentUnit objects, by
+    building an $or query of their unit keys for each page of units.
+
+    :param units: Iterable of content units with the unit key fields specified.
+    :type units: iterable of pulp.server.db.model.ContentUnit
+    :param pagination_size: How large a page size to use when querying units.
+    :type pagination_size: int
+
     :returns: unit models that pulp already knows about.
     :rtype: Generator of pulp.server.db.model.ContentUnit
     """
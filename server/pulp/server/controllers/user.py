@@ -1,14 +1,19 @@
 from gettext import gettext as _
+from threading import RLock
+import logging
 
 from mongoengine import NotUniqueError, ValidationError
 
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.constants import SUPER_USER_ROLE
 from pulp.server.db import model
-from pulp.server.db.model.auth import Permission, Role
+from pulp.server.db.model.auth import Permission, PermissionVersion, Role
 from pulp.server.managers import factory as manager_factory
 
 
+_logger = logging.getLogger(__name__)
+
+
 def create_user(login, password=None, name=None, roles=None):
     """
     Creates a new Pulp user and adds it to specified to roles.
@@ -148,26 +153,179 @@ def is_authorized(resource, login, operation):
 
     :return: True if the user is authorized for the operation on the resource, False otherwise
     :rtype: bool
+
+    :raise MissingResource: if the user does not exist
     """
-    user = model.User.objects.get_or_404(login=login)
-    if user.is_superuser():
-        return True
-
-    permission_query_manager = manager_factory.permission_query_manager()
-
-    # User is authorized if they have access to the resource or any of the its base resources.
-    parts = [p for p in resource.split('/') if p]
-    while parts:
-        current_resource = '/%s/' % '/'.join(parts)
-        permission = permission_query_manager.find_by_resource(current_resource)
-        if permission is not None:
-            if operation in permission_query_manager.find_user_permission(permission, login):
+    return permission_table.find(login).is_authorized(resource, operation)
+
+
+class UserPermissions(object):
+    """
+    The effective permissions of a user, compiled into a trie of resource path segments.
+    Permissions granted through roles are granted to each user in the role, so they are
+    included with the permissions granted to the user directly.
+
+    :ivar superuser: True if the user is a super user.
+    :type superuser: bool
+    :ivar root: The trie. Each node maps a path segment to the node below it, and None to the
+                operations granted on the resource ending at the node.
+    :type root: dict
+    """
+
+    def __init__(self, superuser=False):
+        """
+        :param superuser: True if the user is a super user
+        :type  superuser: bool
+        """
+        self.superuser = superuser
+        self.root = {}
+
+    @staticmethod
+    def compile(login):
+        """
+        Load the permissions of a user.
+
+        :param login: login of the user
+        :type  login: str
+        :return: the user's permissions
+        :rtype:  UserPermissions
+
+        :raise MissingResource: if the user does not exist
+        """
+        user = model.User.objects.get_or_404(login=login)
+        permissions = UserPermissions(user.is_superuser())
+        if permissions.superuser:
+            return permissions
+
+        permission_query_manager = manager_factory.permission_query_manager()
+        for permission in Permission.get_collection().find({'users.username': login}):
+            operations = permission_query_manager.find_user_permission(permission, login)
+            permissions.grant(permission['resource'], operations)
+        return permissions
+
+    def grant(self, resource, operations):
+        """
+        Add the operations granted on a resource to the trie.
+
+        Only resources stored as "/" or as "/<segment>/.../<segment>/" are ever matched
+        against a requested resource, so other resources are left out.
+
+        :param resource: pulp resource url
+        :type  resource: str
+        :param operations: operations granted on the resource
+        :type  operations: list
+        """
+        parts = [p for p in resource.split('/') if p]
+        if resource != ('/%s/' % '/'.join(parts) if parts else '/'):
+            return
+        node = self.root
+        for part in parts:
+            node = node.setdefault(part, {})
+        node.setdefault(None, set()).update(operations)
+
+    def is_authorized(self, resource, operation):
+        """
+        A user is authorized if they have access to the resource or any of its base resources.
+
+        :param resource: pulp resource url
+        :type  resource: str
+        :param operation: operation to be performed on resource
+        :type  operation: int
+
+        :return: True if the user is authorized for the operation on the resource
+        :rtype: bool
+        """
+        if self.superuser:
+            return True
+        node = self.root
+        if operation in node.get(None, ()):
+            return True
+        for part in [p for p in resource.split('/') if p]:
+            node = node.get(part)
+            if node is None:
+                return False
+            if operation in node.get(None, ()):
                 return True
-        parts = parts[:-1]
+        return False
+
+
+class PermissionTable(object):
+    """
+    The compiled permissions of users, cached for the life of the process. Permissions are
+    compiled again only after permissions or users have changed, which is known by comparing
+    the version of the permissions with the one compiled. The cache statistics are logged
+    (at debug) each time a user's permissions are compiled.
+
+    :ivar hits: The number of lookups answered from the cache.
+    :type hits: int
+    :ivar misses: The number of lookups that compiled the user's permissions.
+    :type misses: int
+    """
 
-    permission = Permission.get_collection().find_one({'resource': '/'})
-    return (permission is not None and
-            operation in permission_query_manager.find_user_permission(permission, login))
+    def __init__(self):
+        self._mutex = RLock()
+        self._version = None
+        self._users = {}
+        self.hits = 0
+        self.misses = 0
+
+    def find(self, login):
+        """
+        Find the permissions of a user.
+
+        :param login: login of the user
+        :type  login: str
+        :return: the user's permissions
+        :rtype:  UserPermissions
+
+        :raise MissingResource: if the user does not exist
+        """
+        version = PermissionVersion.get()
+        with self._mutex:
+            if version != self._version:
+                self._users = {}
+                self._version = version
+            try:
+                permissions = self._users[login]
+                self.hits += 1
+                return permissions
+            except KeyError:
+                self.misses += 1
+        permissions = UserPermissions.compile(login)
+        with self._mutex:
+            if version == self._version:
+                self._users[login] = permissions
+        _logger.debug(_('Compiled permissions of {login}; {stats}').format(
+            login=login, stats=self.stats()))
+        return permissions
+
+    def invalidate(self):
+        """
+        Forget the cached permissions so they are compiled again by the next find.
+        """
+        with self._mutex:
+            self._version = None
+
+    def stats(self):
+        """
+        :return: The number of users cached, hits and misses.
+        :rtype:  dict
+        """
+        with self._mutex:
+            return dict(users=len(self._users), hits=self.hits, misses=self.misses)
+
+
+# The permissions are cached for the life of the process.
+permission_table = PermissionTable()
+
+
+def permissions_changed():
+    """
+    Invalidate the permissions cached by this process and, through the version of the
+    permissions, by every other process authorizing requests.
+    """
+    PermissionVersion.increment()
+    permission_table.invalidate()
 
 
 def find_users_belonging_to_role(role_id):
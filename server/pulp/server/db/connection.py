@@ -6,6 +6,7 @@ import logging
 import ssl
 import time
 from gettext import gettext as _
+from types import MethodType
 
 import mongoengine
 from pymongo.collection import Collection
@@ -16,6 +17,7 @@ from pulp.common import error_codes
 
 from pulp.server import config
 from pulp.server.compat import wraps
+from pulp.server.db import metrics
 from pulp.server.exceptions import PulpCodedException, PulpException
 
 import semantic_version
@@ -110,6 +112,9 @@ def initialize(name=None, seeds=None, max_pool_size=None, replica_set=None, max_
         mongo_retry_timeout_seconds_generator = itertools.chain([1, 2, 4, 8, 16],
                                                                 itertools.repeat(32))
 
+        # the listener only counts operations on connections made after it is registered
+        metrics.register()
+
         if seeds != '':
             if len(seeds_list) > 1 and not replica_set:
                 raise PulpCodedException(error_code=error_codes.PLP0041)
@@ -231,6 +236,38 @@ class UnsafeRetry(object):
                 except AttributeError:
                     pass
 
+    @classmethod
+    def decorate_class(cls, document_class, full_name):
+        """
+        Decorate the PyMongo methods of a document class, once. Decorating the class rather than
+        each of its instances keeps the cost of creating a document, and thus of loading many
+        documents from the database, to a minimum.
+
+        Only the instance methods defined by the class are decorated. Methods inherited from a
+        class that has already been decorated are not decorated again.
+
+        :param document_class: class that implements PyMongo methods.
+        :type  document_class: pulp.server.db.model.AutoRetryDocument
+        :param full_name: Collection of the class, used for logging
+        :type  full_name: str
+        """
+        if document_class.__dict__.get('_unsafe_retry_decorated'):
+            return
+
+        unsafe_autoretry = config.config.getboolean('database', 'unsafe_autoretry')
+        if unsafe_autoretry:
+            for m in cls._decorated_methods:
+                method = getattr(document_class, m, None)
+                if not isinstance(method, MethodType) or method.im_self is not None:
+                    # missing, or a class method which is not called on instances
+                    continue
+                if getattr(method, '_unsafe_retry', False):
+                    continue
+                retry = cls.retry_decorator(full_name)(method)
+                retry._unsafe_retry = True
+                setattr(document_class, m, retry)
+        document_class._unsafe_retry_decorated = True
+
     @staticmethod
     def retry_decorator(full_name=None):
         """
@@ -161,6 +161,7 @@ def ensure_database_indexes():
     model.RepositoryContentUnit.ensure_indexes()
     model.Repository.ensure_indexes()
     model.ReservedResource.ensure_indexes()
+    model.WaitingReservation.ensure_indexes()
     model.TaskStatus.ensure_indexes()
     model.Worker.ensure_indexes()
     model.CeleryBeatLock.ensure_indexes()
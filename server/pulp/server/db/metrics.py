@@ -0,0 +1,145 @@
+"""
+Counts the database operations, and the bytes sent and received, by the code running in a thread.
+
+The counts are collected by a pymongo command listener that is registered before the connection
+is made. Operations are only counted while a DatabaseMetrics object is being recorded by the
+thread that runs them. The sizes are measured by encoding each command and reply again, so
+counting should only be enabled while the operations are being measured.
+"""
+import logging
+import threading
+
+from bson import BSON
+
+try:
+    from pymongo.monitoring import CommandListener, register as _register_listener
+except ImportError:
+    # command monitoring was added in pymongo 3.1
+    CommandListener = object
+    _register_listener = None
+
+
+_logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class DatabaseMetrics(object):
+    """
+    Database operations counted while this object is recorded.
+
+    :ivar operations: The number of commands sent to the database.
+    :type operations: int
+    :ivar bytes_read: The number of bytes in the replies received from the database.
+    :type bytes_read: int
+    :ivar bytes_written: The number of bytes in the commands sent to the database.
+    :type bytes_written: int
+    """
+
+    def __init__(self):
+        self.operations = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def __enter__(self):
+        """
+        Start counting the operations run by this thread. Recording may be nested, in which case
+        operations are counted by every metrics being recorded, so the counts of the outer
+        metrics include those of the inner metrics.
+        """
+        stack = _stack()
+        stack.append(self)
+        return self
+
+    def __exit__(self, *unused):
+        """
+        Stop counting the operations run by this thread.
+        """
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+
+    def to_dict(self):
+        """
+        :return: The counts, keyed by name.
+        :rtype:  dict
+        """
+        return dict(db_operations=self.operations,
+                    db_bytes_read=self.bytes_read,
+                    db_bytes_written=self.bytes_written)
+
+
+def _stack():
+    """
+    :return: The metrics being recorded by this thread, innermost last.
+    :rtype:  list
+    """
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def _recording():
+    """
+    :return: The metrics being recorded by this thread, innermost last.
+    :rtype:  list
+    """
+    return getattr(_local, 'stack', None) or []
+
+
+def _size(document):
+    """
+    :param document: A command or a reply.
+    :type  document: dict
+    :return: The size of the document encoded as BSON, or 0 if it cannot be encoded.
+    :rtype:  int
+    """
+    try:
+        return len(BSON.encode(document))
+    except Exception:
+        return 0
+
+
+class CommandCounter(CommandListener):
+    """
+    A pymongo command listener that adds the commands run by a thread to the metrics it is
+    recording. pymongo calls the listener from the thread that runs the command.
+    """
+
+    def started(self, event):
+        recording = _recording()
+        if recording:
+            size = _size(event.command)
+            for metrics in recording:
+                metrics.operations += 1
+                metrics.bytes_written += size
+
+    def succeeded(self, event):
+        recording = _recording()
+        if recording:
+            size = _size(event.reply)
+            for metrics in recording:
+                metrics.bytes_read += size
+
+    def failed(self, event):
+        pass
+
+
+_counter = None
+
+
+def register():
+    """
+    Register the command listener. This must be called before the database connection is made,
+    and only registers the listener once.
+
+    :return: True if the listener is registered.
+    :rtype:  bool
+    """
+    global _counter
+    if _counter is None and _register_listener is not None:
+        _counter = CommandCounter()
+        _register_listener(_counter)
+    return _counter is not None
@@ -0,0 +1,61 @@
+"""
+This migration stores the digest of the unit key on every unit of the types defined by
+mongoengine models, so units can be found by the digest of their unit key. The digest is
+maintained when units are saved.
+"""
+import logging
+
+from pymongo import UpdateOne
+
+from pulp.plugins.loader.manager import PluginManager
+
+
+_logger = logging.getLogger(__name__)
+
+# The number of units updated with each bulk write.
+BATCH_SIZE = 1000
+
+
+def migrate(*args, **kwargs):
+    """
+    Perform the migration as described in this module's docblock.
+
+    :param args:   unused
+    :type  args:   list
+    :param kwargs: unused
+    :type  kwargs: dict
+    """
+    plugin_manager = PluginManager()
+    for unit_type, model_class in plugin_manager.unit_models.items():
+        digested = migrate_model(model_class)
+        _logger.info('Stored the unit key digest of %d %s units' % (digested, unit_type))
+
+
+def migrate_model(model_class):
+    """
+    Store the digest of the unit key on the units of a type that do not have one.
+
+    :param model_class: a subclass of ContentUnit that defines a unit model
+    :type  model_class: pulp.server.db.model.ContentUnit
+    :return: The number of units updated.
+    :rtype:  int
+    """
+    collection = model_class._get_collection()
+    db_fields = dict((name, model_class._fields[name].db_field)
+                     for name in model_class.unit_key_fields)
+    projection = dict((db_field, True) for db_field in db_fields.values())
+
+    digested = 0
+    requests = []
+    for unit in collection.find({'_unit_key_digest': {'$exists': False}}, projection):
+        unit_key = dict((name, unit.get(db_field)) for name, db_field in db_fields.items())
+        digest = model_class.digest_unit_key(unit_key)
+        requests.append(UpdateOne({'_id': unit['_id']}, {'$set': {'_unit_key_digest': digest}}))
+        if digest is not None:
+            digested += 1
+        if len(requests) >= BATCH_SIZE:
+            collection.bulk_write(requests, ordered=False)
+            requests = []
+    if requests:
+        collection.bulk_write(requests, ordered=False)
+    return digested
@@ -9,8 +9,9 @@ from gettext import gettext as _
 from hashlib import sha256
 from hmac import HMAC
 
-from mongoengine import (BooleanField, DictField, Document, DynamicField, IntField,
-                         ListField, StringField, UUIDField, ValidationError, QuerySetNoCache)
+from mongoengine import (BooleanField, DictField, Document, DynamicField, FloatField,
+                         IntField, ListField, StringField, UUIDField, ValidationError,
+                         QuerySetNoCache)
 from mongoengine import signals
 
 from pulp.common import constants, dateutils, error_codes
@@ -21,13 +22,15 @@ from pulp.server import exceptions
 from pulp.server.constants import LOCAL_STORAGE, SUPER_USER_ROLE
 from pulp.server.content.storage import FileStorage, SharedStorage
 from pulp.server.async.emit import send as send_taskstatus_message
+from pulp.server.auth.credentials import verified_credentials
 from pulp.server.db.connection import UnsafeRetry
 from pulp.server.compat import digestmod
 from pulp.server.db.fields import ISO8601StringField, UTCDateTimeField
 from pulp.server.db.model.reaper_base import ReaperMixin
 from pulp.server.db.model import base
-from pulp.server.db.querysets import (CriteriaQuerySet, RepoQuerySet, RepositoryContentUnitQuerySet,
-                                      WorkerQuerySet)
+from pulp.server.db.model.auth import PermissionVersion
+from pulp.server.db.querysets import (ContentUnitQuerySet, CriteriaQuerySet, RepoQuerySet,
+                                      RepositoryContentUnitQuerySet, WorkerQuerySet)
 from pulp.server.managers import factory
 from pulp.server.util import Singleton
 from pulp.server.webservices.views import serializers
@@ -40,6 +43,11 @@ SYSTEM_ID = '00000000-0000-0000-0000-000000000000'
 SYSTEM_LOGIN = u'SYSTEM'
 PASSWORD_ITERATIONS = 5000
 
+# The HMAC key pads applied by _pbkdf_sha256, as defined by RFC 2104.
+_HMAC_OUTER_PAD = ''.join(chr(x ^ 0x5C) for x in xrange(256))
+_HMAC_INNER_PAD = ''.join(chr(x ^ 0x36) for x in xrange(256))
+_HMAC_KEY_PADDING = chr(0) * (digestmod().block_size - digestmod().digest_size)
+
 
 class AutoRetryDocument(Document):
     """
@@ -51,10 +59,11 @@ class AutoRetryDocument(Document):
 
     def __init__(self, *args, **kwargs):
         """
-        Initialize a document and decorate the appropriate methods with the retry_decorator.
+        Initialize a document. The appropriate methods of its class are decorated with the
+        retry_decorator when the first document of the class is initialized.
         """
         super(AutoRetryDocument, self).__init__(*args, **kwargs)
-        UnsafeRetry.decorate_instance(instance=self, full_name=type(self))
+        UnsafeRetry.decorate_class(document_class=type(self), full_name=type(self))
 
     # QuerySetNoCache is used as the default QuerySet to ensure that all sub-classes
     # do not cache query results unless specifically requested by calling ``cache``.
@@ -392,6 +401,35 @@ class ReservedResource(AutoRetryDocument):
             'allow_inheritance': False}
 
 
+class WaitingReservation(AutoRetryDocument):
+    """
+    Instances of this class represent tasks that are waiting for the resource manager to reserve
+    a resource for them. They are kept so that the waiting tasks are not lost when the resource
+    manager stops.
+
+    :ivar task_id:     The uuid of the task waiting for the reservation
+    :type task_id:     mongoengine.StringField
+    :ivar task_name:   The name of the task
+    :type task_name:   mongoengine.StringField
+    :ivar resource_id: The name of the resource the task reserves
+    :type resource_id: mongoengine.StringField
+    :ivar arguments:   The positional and keyword arguments of the task, encoded as JSON
+    :type arguments:   mongoengine.StringField
+    :ivar queued:      The time at which the task started waiting, in seconds since the epoch
+    :type queued:      mongoengine.FloatField
+    """
+
+    task_id = StringField(db_field='_id', primary_key=True)
+    task_name = StringField(required=True)
+    resource_id = StringField(required=True)
+    arguments = StringField(required=True)
+    queued = FloatField(required=True)
+
+    meta = {'collection': 'waiting_reservations',
+            'indexes': ['queued'],
+            'allow_inheritance': False}
+
+
 class Worker(AutoRetryDocument):
     """
     Represents a worker.
@@ -402,9 +440,13 @@ class Worker(AutoRetryDocument):
     :type name:    mongoengine.StringField
     :ivar last_heartbeat:  A timestamp of the last heartbeat from the Worker
     :type last_heartbeat:  UTCDateTimeField
+    :ivar concurrency: The number of tasks the Worker runs at once, which is the number of
+                       resources that may be reserved on it at once
+    :type concurrency: mongoengine.IntField
     """
     name = StringField(primary_key=True)
     last_heartbeat = UTCDateTimeField()
+    concurrency = IntField(default=1)
 
     # For backward compatibility
     _ns = StringField(default='workers')
@@ -608,15 +650,20 @@ class ContentUnit(AutoRetryDocument):
     :type _last_updated: mongoengine.IntField
     :ivar _storage_path: The absolute path to associated content files.
     :type _storage_path: mongoengine.StringField
+    :ivar _unit_key_digest: The digest of the unit key, as stored, used to find units by key.
+    :type _unit_key_digest: mongoengine.StringField
     """
 
     id = StringField(primary_key=True, default=lambda: str(uuid.uuid4()))
     pulp_user_metadata = DictField()
     _last_updated = IntField(required=True)
     _storage_path = StringField()
+    _unit_key_digest = StringField()
 
     meta = {
         'abstract': True,
+        'indexes': ['_unit_key_digest'],
+        'queryset_class': ContentUnitQuerySet,
     }
 
     NAMED_TUPLE = _ContentUnitNamedTupleDescriptor()
@@ -707,6 +754,7 @@ class ContentUnit(AutoRetryDocument):
         :type document: ContentUnit
         """
         document._last_updated = dateutils.now_utc_timestamp()
+        document._unit_key_digest = document.unit_key_stored_digest()
 
     def get_repositories(self):
         """
@@ -795,6 +843,55 @@ class ContentUnit(AutoRetryDocument):
                 _hash.update(value)
         return _hash.hexdigest()
 
+    def unit_key_stored_digest(self):
+        """
+        The digest of the unit key as it is stored in the database, which is maintained on save
+        in the indexed _unit_key_digest field so units can be found by key with a single lookup.
+
+        :return: The hex digest, or None if a unit key value is of a type that is not supported.
+        :rtype:  str
+        """
+        return self.digest_unit_key(self.unit_key)
+
+    @classmethod
+    def digest_unit_key(cls, unit_key):
+        """
+        The digest of a unit key as it is stored in the database. Values are converted as they are
+        for queries, so a unit key matches the stored unit key of a unit when their digests are
+        equal. Numbers are digested as mongo compares them, so 1 and 1.0 have the same digest.
+
+        :param unit_key: The unit key values, keyed by field name.
+        :type  unit_key: dict
+        :return: The hex digest, or None if a value is of a type that is not supported.
+        :rtype:  str
+        """
+        _hash = sha256()
+        for key, value in sorted(unit_key.items()):
+            if value is not None:
+                try:
+                    value = cls._fields[key].to_mongo(value)
+                except (KeyError, TypeError, ValueError):
+                    return None
+            if value is None:
+                tag, text = 'n', ''
+            elif isinstance(value, bool):
+                tag, text = 'b', str(int(value))
+            elif isinstance(value, (int, long)):
+                tag, text = 'i', str(value)
+            elif isinstance(value, float):
+                if value.is_integer():
+                    tag, text = 'i', str(int(value))
+                else:
+                    tag, text = 'f', repr(value)
+            elif isinstance(value, basestring):
+                tag, text = 's', value.encode('utf-8') if isinstance(value, unicode) else value
+            else:
+                return None
+            # each part is prefixed with its length so that no two unit keys are encoded the same
+            for part in (key, tag + text):
+                _hash.update('%d:%s' % (len(part), part))
+        return _hash.hexdigest()
+
     def list_files(self):
         """
         List absolute paths to files associated with this unit.
@@ -1187,10 +1284,13 @@ class User(AutoRetryDocument):
         if plain_password is not None and not isinstance(plain_password, basestring):
             raise exceptions.InvalidValue('password')
         self.password = self._hash_password(plain_password)
+        verified_credentials.forget(self.login)
 
     def check_password(self, plain_password):
         """
         Checks a plaintext password against the hashed password stored on the User object.
+        Successful checks are remembered for a short time, so the password is not hashed again
+        for every request sent with the same credentials.
 
         :param plain_password: plaintext password to check against the stored hashed password
         :type  plain_password: str
@@ -1198,11 +1298,17 @@ class User(AutoRetryDocument):
         :return: True if password is correct, False otherwise
         :rtype:  bool
         """
+        key = verified_credentials.key(self.login, plain_password, self.password)
+        if verified_credentials.verified(key):
+            return True
         salt, hashed_password = self.password.split(",")
         salt = salt.decode("base64")
         hashed_password = hashed_password.decode("base64")
         pbkdbf = self._pbkdf_sha256(plain_password, salt, PASSWORD_ITERATIONS)
-        return hashed_password == pbkdbf
+        if hashed_password != pbkdbf:
+            return False
+        verified_credentials.add(key, self.login)
+        return True
 
     def _hash_password(self, plain_password):
         """
@@ -1247,11 +1353,45 @@ class User(AutoRetryDocument):
         :return: hashed password
         :rtype:  str
         """
-        result = password
-        for i in xrange(iterations):
-            result = HMAC(result, salt, digestmod).digest()  # use HMAC to apply the salt
+        if not iterations:
+            return password
+        result = HMAC(password, salt, digestmod).digest()  # use HMAC to apply the salt
+        # After the first iteration, the key is always a digest shorter than the block size,
+        # so the HMAC is computed directly to avoid the cost of creating HMAC objects.
+        for i in xrange(iterations - 1):
+            key = result + _HMAC_KEY_PADDING
+            inner = digestmod(key.translate(_HMAC_INNER_PAD) + salt).digest()
+            result = digestmod(key.translate(_HMAC_OUTER_PAD) + inner).digest()
         return result
 
+    @classmethod
+    def post_save(cls, sender, document, **kwargs):
+        """
+        Record a change to users on save, since the roles of a user decide its permissions.
+
+        :param sender: class of sender (unused)
+        :type  sender: class
+        :param document: mongoengine document
+        :type  document: mongoengine.Document
+        """
+        PermissionVersion.increment()
+
+    @classmethod
+    def post_delete(cls, sender, document, **kwargs):
+        """
+        Record a change to users on delete.
+
+        :param sender: class of sender (unused)
+        :type  sender: class
+        :param document: mongoengine document
+        :type  document: mongoengine.Document
+        """
+        PermissionVersion.increment()
+
+
+signals.post_save.connect(User.post_save, sender=User)
+signals.post_delete.connect(User.post_delete, sender=User)
+
 
 class Distributor(AutoRetryDocument):
     """
@@ -53,3 +53,36 @@ class Permission(Model):
 
         self.resource = resource
         self.users = users or []
+
+
+class PermissionVersion(Model):
+    """
+    A single document counting the changes made to permissions and users. Processes that
+    authorize requests cache the permissions of each user and only compile them again after
+    the version has changed.
+    """
+
+    collection_name = 'permission_version'
+    unique_indices = ()
+
+    # the ID of the only document in the collection
+    DOCUMENT_ID = 'permissions'
+
+    @classmethod
+    def increment(cls):
+        """
+        Record a change to permissions or users.
+        """
+        cls.get_collection().update({'_id': cls.DOCUMENT_ID}, {'$inc': {'version': 1}},
+                                    upsert=True)
+
+    @classmethod
+    def get(cls):
+        """
+        :return:    the number of changes made to permissions and users
+        :rtype:     int
+        """
+        version = cls.get_collection().find_one({'_id': cls.DOCUMENT_ID})
+        if version is None:
+            return 0
+        return version['version']
@@ -95,7 +95,7 @@ class ContentCatalog(Model):
     """
 
     collection_name = 'content_catalog'
-    search_indices = ('source_id', 'locator')
+    search_indices = ('source_id', 'locator', ('source_id', 'locator'), ('source_id', 'expiration'))
     unique_indices = ()
 
     @staticmethod
@@ -29,6 +29,60 @@ def timedelta_total_seconds(timedelta):
         (timedelta.seconds + timedelta.days * 24 * 3600) * 10 ** 6) / 10 ** 6
 
 
+class ScheduledCallVersion(Model):
+    """
+    A single document counting the changes made to scheduled calls. The scheduler compares the
+    version with the one it last loaded to find out whether any schedule has changed with one
+    lookup by ID. The IDs of the most recently added, updated and deleted scheduled calls are kept
+    in the document so the scheduler can apply those changes to its schedule without reloading it.
+    """
+
+    collection_name = 'scheduled_call_version'
+    unique_indices = ()
+
+    # the ID of the only document in the collection
+    DOCUMENT_ID = 'scheduled_calls'
+
+    # the number of deleted scheduled call IDs kept in the document
+    MAX_DELETED = 1000
+
+    # the number of added or updated scheduled call IDs kept in the document
+    MAX_CHANGED = 1000
+
+    @classmethod
+    def increment(cls, deleted_ids=None, changed_ids=None):
+        """
+        Record a change to scheduled calls.
+
+        :param deleted_ids: IDs of the scheduled calls deleted by the change
+        :type  deleted_ids: list
+        :param changed_ids: IDs of the scheduled calls added or updated by the change
+        :type  changed_ids: list
+        """
+        update = {'$inc': {'version': 1}}
+        if deleted_ids:
+            update['$inc']['deleted_count'] = len(deleted_ids)
+            update.setdefault('$push', {})['deleted'] = {'$each': list(deleted_ids),
+                                                         '$slice': -cls.MAX_DELETED}
+        if changed_ids:
+            update['$inc']['changed_count'] = len(changed_ids)
+            update.setdefault('$push', {})['changed'] = {'$each': list(changed_ids),
+                                                         '$slice': -cls.MAX_CHANGED}
+        cls.get_collection().update({'_id': cls.DOCUMENT_ID}, update, upsert=True)
+
+    @classmethod
+    def get(cls):
+        """
+        :return:    the version document, with keys "version", "deleted_count", "deleted",
+                    "changed_count" and "changed"
+        :rtype:     dict
+        """
+        version = {'version': 0, 'deleted_count': 0, 'deleted': [], 'changed_count': 0,
+                   'changed': []}
+        version.update(cls.get_collection().find_one({'_id': cls.DOCUMENT_ID}) or {})
+        return version
+
+
 class ScheduledCall(Model):
     """
     Serialized scheduled call request
@@ -273,6 +327,7 @@ class ScheduledCall(Model):
             as_dict = self.as_dict()
             del as_dict['_id']
             self.get_collection().update({'_id': ObjectId(self.id)}, as_dict)
+        ScheduledCallVersion.increment(changed_ids=[str(self.id)])
 
     def _calculate_times(self):
         """
@@ -399,6 +454,7 @@ class ScheduleEntry(beat.ScheduleEntry):
         if self._scheduled_call.remaining_runs == 0:
             _logger.info('disabling schedule with 0 remaining runs: %s' % self._scheduled_call.id)
             self._scheduled_call.enabled = False
+            self._scheduled_call.last_updated = time.time()
         self._scheduled_call.save()
         return self._scheduled_call.as_schedule_entry()
 
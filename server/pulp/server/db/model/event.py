@@ -27,3 +27,35 @@ class EventListener(Model):
         self.notifier_type_id = notifier_type_id
         self.notifier_config = notifier_config
         self.event_types = event_types
+
+
+class EventListenerVersion(Model):
+    """
+    A single document counting the changes made to event listeners. Processes that fire events
+    cache the listeners and only load them again after the version has changed.
+    """
+
+    collection_name = 'event_listener_version'
+    unique_indices = ()
+
+    # the ID of the only document in the collection
+    DOCUMENT_ID = 'event_listeners'
+
+    @classmethod
+    def increment(cls):
+        """
+        Record a change to event listeners.
+        """
+        cls.get_collection().update({'_id': cls.DOCUMENT_ID}, {'$inc': {'version': 1}},
+                                    upsert=True)
+
+    @classmethod
+    def get(cls):
+        """
+        :return:    the number of changes made to event listeners
+        :rtype:     int
+        """
+        version = cls.get_collection().find_one({'_id': cls.DOCUMENT_ID})
+        if version is None:
+            return 0
+        return version['version']
@@ -37,6 +37,85 @@ class QuerySetPreventCache(QuerySetNoCache):
                 ' cache method on ' + self.__class__.__name__)
         raise NotImplementedError(msg)
 
+    def records(self, *fields):
+        """
+        Iterate the matching documents as read-only records, for scans of many documents that
+        only read them. The documents are neither validated nor converted to their fields'
+        python types, the values are those returned by pymongo.
+
+        :param fields: The names of the fields to load. All fields are loaded when none are given.
+                       The id is always loaded.
+        :type  fields: list of basestring
+        :return: The documents.
+        :rtype:  generator of Record
+        """
+        query_set = self.only(*fields) if fields else self.clone()
+        field_names = query_set._document._reverse_db_field_map
+        for document in query_set._cursor:
+            document.pop('_cls', None)
+            yield Record(dict((field_names.get(k, k), v) for k, v in document.iteritems()))
+
+
+class Record(object):
+    """
+    A read-only document, as returned by pymongo, with its fields named as they are on the model.
+    The fields are accessed as attributes or as items.
+    """
+
+    __slots__ = ('_fields',)
+
+    def __init__(self, fields):
+        """
+        :param fields: The fields of the document, keyed by name.
+        :type  fields: dict
+        """
+        object.__setattr__(self, '_fields', fields)
+
+    def __getattr__(self, name):
+        if name == '_fields':
+            raise AttributeError(name)
+        try:
+            return self._fields[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(_('Records are read-only'))
+
+    def __delattr__(self, name):
+        raise AttributeError(_('Records are read-only'))
+
+    def __getitem__(self, name):
+        return self._fields[name]
+
+    def __contains__(self, name):
+        return name in self._fields
+
+    def __eq__(self, other):
+        return isinstance(other, Record) and self._fields == other._fields
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Record(%r)' % self._fields
+
+    def get(self, name, default=None):
+        """
+        :param name: The name of a field.
+        :type  name: basestring
+        :param default: The value returned when the field was not loaded.
+        :return: The value of the field.
+        """
+        return self._fields.get(name, default)
+
+    def to_dict(self):
+        """
+        :return: A copy of the fields, keyed by name.
+        :rtype:  dict
+        """
+        return dict(self._fields)
+
 
 class CriteriaQuerySet(QuerySetPreventCache):
     """
@@ -163,6 +242,12 @@ class RepoQuerySet(CriteriaQuerySet):
             raise pulp_exceptions.MissingResource(repository=repo_id)
 
 
+class ContentUnitQuerySet(QuerySetPreventCache):
+    """
+    Custom queryset for content units.
+    """
+
+
 class RepositoryContentUnitQuerySet(CriteriaQuerySet):
     """
     Custom queryset for repository content units.
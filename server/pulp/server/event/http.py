@@ -6,34 +6,61 @@ url
   Full URL to contact with the event data. A POST request will be made to this
   URL with the contents of the events in the body.
 
-Eventually this should be enhanced to support authentication credentials as well.
+username, password
+  Optional basic authentication credentials.
+
+batch_size
+  Optional maximum number of events posted in one request. When greater than 1,
+  events queued for the URL are posted together and the body is a JSON list of
+  events instead of a single event.
+
+Events are not posted by the thread firing them. They are queued and posted by
+a pool of threads that keep a connection open to each URL, and failed posts are
+retried with an increasing delay.
 """
 from gettext import gettext as _
+from Queue import Empty, Full, Queue
 import logging
+import os
 import threading
+import time
 
 from pulp.server.compat import json, json_util
 
-from requests import post
+from requests import RequestException, Session, post
 from requests.auth import HTTPBasicAuth
 
 
 TYPE_ID = 'http'
 
+# The maximum number of events waiting to be posted. Events fired while the
+# queue is full are dropped.
+QUEUE_SIZE = 1000
+
+# The number of threads posting events.
+POOL_SIZE = 4
+
+# The number of times a post is retried after a connection error or a server error.
+RETRIES = 3
+
+# The number of seconds before the first retry, doubled for each retry after it.
+BACKOFF = 1
+
+# The weight given to the newest sample when updating the average latency.
+SMOOTHING = 0.2
+
 _logger = logging.getLogger(__name__)
 
 
 def handle_event(notifier_config, event):
-    # fire the actual http push function off in a separate thread to keep
+    # queue the event to be posted by the pool of delivery threads to keep
     # pulp from blocking or deadlocking due to the tasking subsystem
     json_body = json.dumps(event.data(), default=json_util.default)
     _logger.info(json_body)
-    thread = threading.Thread(target=_send_post, args=[notifier_config, json_body])
-    thread.setDaemon(True)
-    thread.start()
+    dispatcher.put(notifier_config, json_body)
 
 
-def _send_post(notifier_config, json_body):
+def _send_post(notifier_config, json_body, session=None):
     """
     Sends a POST request with the given data to the configured notifier url.
 
@@ -43,6 +70,10 @@ def _send_post(notifier_config, json_body):
     :type notifier_config:  dict
     :param json_body:       The POST data that has been serialized to JSON.
     :param json_body:       dict
+    :param session:         An optional session used to reuse the connection to the url.
+    :type  session:         requests.Session
+    :return:                The response, or None if no url is configured.
+    :rtype:                 requests.Response
     """
     if 'url' not in notifier_config or not notifier_config['url']:
         _logger.error(_('HTTP notifier configured without a URL; cannot fire event'))
@@ -55,7 +86,257 @@ def _send_post(notifier_config, json_body):
     else:
         auth = None
 
-    response = post(url, data=json_body, auth=auth, headers={'Content-Type': 'application/json'})
+    send = session.post if session is not None else post
+    response = send(url, data=json_body, auth=auth, headers={'Content-Type': 'application/json'})
     if response.status_code != 200:
         _logger.error(_('Received HTTP {code} from HTTP notifier to {url}.').format(
             code=response.status_code, url=url))
+    return response
+
+
+def _endpoint(notifier_config):
+    """
+    Get the key identifying where, and how, events are posted.
+
+    :param notifier_config: The configuration for the HTTP notifier.
+    :type  notifier_config: dict
+    :return: The url, credentials and batch size.
+    :rtype:  tuple
+    """
+    return (notifier_config.get('url'),
+            notifier_config.get('username'),
+            notifier_config.get('password'),
+            _batch_size(notifier_config))
+
+
+def _batch_size(notifier_config):
+    """
+    :param notifier_config: The configuration for the HTTP notifier.
+    :type  notifier_config: dict
+    :return: The maximum number of events posted in one request.
+    :rtype:  int
+    """
+    try:
+        return max(int(notifier_config.get('batch_size', 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+class Delivery(object):
+    """
+    An event waiting to be posted.
+
+    :ivar notifier_config: The configuration for the HTTP notifier.
+    :type notifier_config: dict
+    :ivar json_body: The event serialized to JSON.
+    :type json_body: str
+    :ivar queued: The time the event was queued.
+    :type queued: float
+    """
+
+    def __init__(self, notifier_config, json_body):
+        self.notifier_config = notifier_config
+        self.json_body = json_body
+        self.queued = time.time()
+
+
+class Dispatcher(object):
+    """
+    Posts queued events using a pool of threads. Each thread keeps a session,
+    and thus a connection, to each endpoint it posts to.
+
+    The threads are started when the first event is queued in a process, which
+    is after celery has forked the worker processes.
+
+    :ivar delivered: The number of events posted.
+    :type delivered: int
+    :ivar failed: The number of events that could not be posted.
+    :type failed: int
+    :ivar retried: The number of posts that have been retried.
+    :type retried: int
+    :ivar dropped: The number of events dropped because the queue was full.
+    :type dropped: int
+    :ivar latency: The moving average of seconds between queuing and posting an event.
+    :type latency: float
+    :ivar max_latency: The most seconds taken between queuing and posting an event.
+    :type max_latency: float
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE, pool_size=POOL_SIZE):
+        """
+        :param queue_size: The maximum number of events waiting to be posted.
+        :type  queue_size: int
+        :param pool_size: The number of threads posting events.
+        :type  pool_size: int
+        """
+        self.queue_size = queue_size
+        self.pool_size = pool_size
+        self.queue = None
+        self._mutex = threading.RLock()
+        self._pid = None
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.latency = None
+        self.max_latency = 0
+
+    def put(self, notifier_config, json_body):
+        """
+        Queue an event to be posted. The event is dropped when the queue is full.
+
+        :param notifier_config: The configuration for the HTTP notifier.
+        :type  notifier_config: dict
+        :param json_body: The event serialized to JSON.
+        :type  json_body: str
+        """
+        self._start()
+        try:
+            self.queue.put_nowait(Delivery(notifier_config, json_body))
+        except Full:
+            with self._mutex:
+                self.dropped += 1
+            _logger.error(_('HTTP notifier queue is full; event to {url} dropped.').format(
+                url=notifier_config.get('url')))
+
+    def stats(self):
+        """
+        Delivery statistics.
+
+        :return: The backlog, counters and latency.
+        :rtype:  dict
+        """
+        with self._mutex:
+            return dict(backlog=self.queue.qsize() if self.queue is not None else 0,
+                        delivered=self.delivered,
+                        failed=self.failed,
+                        retried=self.retried,
+                        dropped=self.dropped,
+                        latency=self.latency,
+                        max_latency=self.max_latency)
+
+    def _start(self):
+        """
+        Start the pool of threads, once in each process.
+        """
+        with self._mutex:
+            if self._pid == os.getpid():
+                return
+            # neither the threads nor the events queued by a parent process
+            # are carried over to a forked child
+            self.queue = Queue(self.queue_size)
+            self._pid = os.getpid()
+            for n in range(self.pool_size):
+                thread = threading.Thread(target=self._run, name='http-notifier-%d' % n)
+                thread.setDaemon(True)
+                thread.start()
+
+    def _run(self):
+        """
+        The main loop of a delivery thread.
+        """
+        sessions = {}
+        while True:
+            deliveries = self._take()
+            for endpoint, batch in _group(deliveries):
+                session = sessions.get(endpoint)
+                if session is None:
+                    session = Session()
+                    sessions[endpoint] = session
+                try:
+                    self._deliver(session, batch)
+                except Exception:
+                    _logger.exception(_('Exception from HTTP notifier'))
+
+    def _take(self):
+        """
+        Wait for the next queued event, and take the events queued after it
+        up to its batch size without waiting.
+
+        :return: The events to post.
+        :rtype:  list
+        """
+        first = self.queue.get()
+        deliveries = [first]
+        while len(deliveries) < _batch_size(first.notifier_config):
+            try:
+                deliveries.append(self.queue.get_nowait())
+            except Empty:
+                break
+        return deliveries
+
+    def _deliver(self, session, batch):
+        """
+        Post events to their endpoint, retrying connection errors and server
+        errors with an increasing delay.
+
+        :param session: The session used to post to the endpoint.
+        :type  session: requests.Session
+        :param batch: The events to post in one request, all to the same endpoint.
+        :type  batch: list
+        """
+        notifier_config = batch[0].notifier_config
+        if len(batch) == 1 and _batch_size(notifier_config) == 1:
+            json_body = batch[0].json_body
+        else:
+            json_body = '[%s]' % ', '.join(d.json_body for d in batch)
+
+        for attempt in range(RETRIES + 1):
+            if attempt:
+                time.sleep(BACKOFF * 2 ** (attempt - 1))
+                with self._mutex:
+                    self.retried += 1
+            try:
+                response = _send_post(notifier_config, json_body, session)
+            except RequestException as e:
+                _logger.error(_('HTTP notifier to {url} failed: {error}').format(
+                    url=notifier_config.get('url'), error=e))
+                continue
+            if response is None or response.status_code < 500:
+                break
+        else:
+            response = None
+
+        delivered = response is not None and response.status_code == 200
+        now = time.time()
+        with self._mutex:
+            if not delivered:
+                self.failed += len(batch)
+                return
+            self.delivered += len(batch)
+            for delivery in batch:
+                latency = now - delivery.queued
+                self.max_latency = max(self.max_latency, latency)
+                if self.latency is None:
+                    self.latency = latency
+                else:
+                    self.latency += SMOOTHING * (latency - self.latency)
+        _logger.debug(_('Posted {count} event(s) to {url}; {stats}').format(
+            count=len(batch), url=notifier_config.get('url'), stats=self.stats()))
+
+
+def _group(deliveries):
+    """
+    Group events by endpoint, keeping the order in which they were queued and
+    splitting each group into batches no larger than the endpoint's batch size.
+
+    :param deliveries: Queued events.
+    :type  deliveries: list
+    :return: List of (endpoint, batch) tuples.
+    :rtype:  list
+    """
+    groups = []
+    batches = {}
+    for delivery in deliveries:
+        endpoint = _endpoint(delivery.notifier_config)
+        batch = batches.get(endpoint)
+        if batch is None or len(batch) >= endpoint[3]:
+            batch = []
+            batches[endpoint] = batch
+            groups.append((endpoint, batch))
+        batch.append(delivery)
+    return groups
+
+
+# Events are posted by a single dispatcher for the life of the process.
+dispatcher = Dispatcher()
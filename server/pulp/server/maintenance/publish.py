@@ -0,0 +1,45 @@
+from gettext import gettext as _
+import logging
+import os
+import shutil
+
+from celery import task
+
+from pulp.common.tags import action_tag
+from pulp.server.async.tasks import Task
+
+
+ACTION_REMOVE_OLD_MASTERS = 'remove_old_masters'
+
+_logger = logging.getLogger(__name__)
+
+
+def queue_remove_old_masters(paths):
+    """
+    Queue a task that removes master publish directories which are no longer referenced by any
+    published location.
+
+    :param paths: absolute paths of the directories to remove
+    :type  paths: list of str
+    :return: An AsyncResult instance as returned by Celery's apply_async
+    :rtype:  celery.result.AsyncResult
+    """
+    tags = [action_tag(ACTION_REMOVE_OLD_MASTERS)]
+    return remove_old_masters.apply_async((list(paths),), tags=tags)
+
+
+@task(base=Task)
+def remove_old_masters(paths):
+    """
+    Remove the given master publish directories. Paths that no longer exist are skipped so the
+    task can safely be run more than once for the same directories.
+
+    :param paths: absolute paths of the directories to remove
+    :type  paths: list of str
+    """
+    for path in paths:
+        if os.path.isdir(path) and not os.path.islink(path):
+            _logger.debug(_('Removing old master directory: %(path)s') % {'path': path})
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.lexists(path):
+            os.unlink(path)
@@ -11,7 +11,7 @@
 
 from logging import getLogger
 
-from pymongo import ASCENDING
+from pymongo import ASCENDING, UpdateOne
 
 from pulp.server.db.model.content import ContentCatalog
 
@@ -60,6 +60,33 @@ class ContentCatalogManager(object):
         entry = ContentCatalog(source_id, expires, type_id, unit_key, url)
         collection.insert(entry)
 
+    def add_entries(self, source_id, expires, entries):
+        """
+        Add entries to the content catalog using a single unordered bulk write.
+        Entries already in the catalog for the source are updated in place
+        rather than duplicated.
+        :param source_id: A content source ID.
+        :type source_id: str
+        :param expires: The entry expiration in seconds.
+        :type expires: int
+        :param entries: A list of: (type_id, unit_key, url).
+        :type entries: list
+        :return: The number of entries added or updated.
+        :rtype: int
+        """
+        if not entries:
+            return 0
+        requests = []
+        for type_id, unit_key, url in entries:
+            entry = ContentCatalog(source_id, expires, type_id, unit_key, url)
+            query = {'source_id': source_id, 'locator': entry['locator']}
+            inserted = dict(_id=entry.pop('_id'), id=entry.pop('id'))
+            update = {'$set': entry, '$setOnInsert': inserted}
+            requests.append(UpdateOne(query, update, upsert=True))
+        collection = ContentCatalog.get_collection()
+        result = collection.bulk_write(requests, ordered=False)
+        return result.upserted_count + result.matched_count
+
     def delete_entry(self, source_id, type_id, unit_key):
         """
         Delete an entry from the content catalog.
@@ -89,6 +116,24 @@ class ContentCatalogManager(object):
         result = collection.remove(query)
         return result['n']
 
+    def purge_stale(self, source_id, expiration):
+        """
+        Purge (delete) entries from the content catalog belonging to the
+        specified content source by ID that expire before the specified timestamp.
+        Used after a refresh to delete entries not contributed by the refresh
+        using a single ranged delete.
+        :param source_id: A content source ID.
+        :type source_id: str
+        :param expiration: An expiration UTC timestamp.
+        :type expiration: int
+        :return: The number of entries purged.
+        :rtype: int
+        """
+        collection = ContentCatalog.get_collection()
+        query = {'source_id': source_id, 'expiration': {'$lt': expiration}}
+        result = collection.remove(query)
+        return result['n']
+
     def purge_expired(self, grace_period=GRACE_PERIOD):
         """
         Purge (delete) expired entries from the content catalog belonging
@@ -137,16 +182,32 @@ class ContentCatalogManager(object):
         :return: A list of matching entries.
         :rtype: list
         """
-        collection = ContentCatalog.get_collection()
         locator = ContentCatalog.get_locator(type_id, unit_key)
+        return self.find_by_locators([locator]).get(locator, [])
+
+    def find_by_locators(self, locators):
+        """
+        Find entries in the content catalog matching any of the specified locators
+        using a single query.  As with find(), only the newest entry for each
+        source is included for each locator.
+        :param locators: A list of locators.  See: ContentCatalog.get_locator().
+        :type locators: list
+        :return: A dictionary of matching entries (list) keyed by locator.
+            Locators without matching entries are not included.
+        :rtype: dict
+        """
+        collection = ContentCatalog.get_collection()
         query = {
-            'locator': locator,
+            'locator': {'$in': list(set(locators))},
             'expiration': {'$gte': ContentCatalog.get_expiration(0)}
         }
         newest_by_source = {}
         for entry in collection.find(query, sort=[('_id', ASCENDING)]):
-            newest_by_source[entry['source_id']] = entry
-        return newest_by_source.values()
+            newest_by_source[(entry['locator'], entry['source_id'])] = entry
+        found = {}
+        for (locator, source_id), entry in newest_by_source.items():
+            found.setdefault(locator, []).append(entry)
+        return found
 
     def has_entries(self, source_id):
         """
@@ -71,13 +71,24 @@ class ContentUploadManager(object):
         file_path = ContentUploadManager._upload_file_path(upload_id)
 
         # Make sure the upload was initialized first and hasn't been deleted
-        if not os.path.exists(file_path):
-            raise MissingResource(upload_request=upload_id)
+        try:
+            fd = os.open(file_path, os.O_WRONLY)
+        except OSError, e:
+            if e.errno == ENOENT:
+                raise MissingResource(upload_request=upload_id)
+            raise
 
-        f = open(file_path, 'r+')
-        f.seek(offset)
-        f.write(data)
-        f.close()
+        # Segments may arrive in any order and concurrently. Each call writes
+        # through its own unbuffered descriptor at its own offset; writing past
+        # the end of the file leaves a hole that is filled by the segment that
+        # belongs there when it arrives.
+        try:
+            os.lseek(fd, offset, os.SEEK_SET)
+            written = 0
+            while written < len(data):
+                written += os.write(fd, buffer(data, written))
+        finally:
+            os.close(fd)
 
     def delete_upload(self, upload_id):
         """
@@ -6,10 +6,11 @@ import sys
 from bson.errors import InvalidId
 
 from pulp.server.compat import ObjectId
-from pulp.server.db.model.event import EventListener
+from pulp.server.db.model.event import EventListener, EventListenerVersion
 from pulp.server.event import notifiers
 from pulp.server.event.data import ALL_EVENT_TYPES
 from pulp.server.exceptions import InvalidValue, MissingResource
+from pulp.server.managers.event.fire import listener_table
 
 
 class EventListenerManager(object):
@@ -57,6 +58,7 @@ class EventListenerManager(object):
         el = EventListener(notifier_type_id, notifier_config, event_types)
         collection = EventListener.get_collection()
         created_id = collection.save(el)
+        _listeners_changed()
         created = collection.find_one(created_id)
 
         return created
@@ -103,6 +105,7 @@ class EventListenerManager(object):
         self.get(event_listener_id)  # check for MissingResource
 
         collection.remove({'_id': ObjectId(event_listener_id)})
+        _listeners_changed()
 
     def update(self, event_listener_id, notifier_config=None, event_types=None):
         """
@@ -153,6 +156,7 @@ class EventListenerManager(object):
 
         # Update the database
         collection.save(existing)
+        _listeners_changed()
 
         # Reload to return
         existing = collection.find_one({'_id': ObjectId(event_listener_id)})
@@ -170,6 +174,15 @@ class EventListenerManager(object):
         return listeners
 
 
+def _listeners_changed():
+    """
+    Invalidate the listeners cached by this process and, through the version of the event
+    listeners, by every other process firing events.
+    """
+    EventListenerVersion.increment()
+    listener_table.invalidate()
+
+
 def _validate_event_types(event_types):
     if not isinstance(event_types, (tuple, list)) or len(event_types) == 0:
         raise InvalidValue(['event_types'])
@@ -6,14 +6,63 @@ in a consistent event format for that type.
 """
 
 import logging
+from threading import RLock
 
-from pulp.server.db.model.event import EventListener
+from pulp.server.db.model.event import EventListener, EventListenerVersion
 from pulp.server.event import data as e, notifiers
 
 
 _logger = logging.getLogger(__name__)
 
 
+class ListenerTable(object):
+    """
+    The event listeners, cached and indexed by event type. The listeners are loaded again only
+    after the EventListenerManager has changed them, which is known by comparing the version
+    of the event listeners with the one loaded.
+    """
+
+    def __init__(self):
+        self._mutex = RLock()
+        self._version = None
+        self._listeners = []
+        self._by_type = {}
+
+    def find(self, event_type):
+        """
+        Find the listeners for an event type, including those listening for all events.
+
+        :param event_type: an event type
+        :type  event_type: str
+        :return: list of event listener SON documents
+        :rtype:  list
+        """
+        version = EventListenerVersion.get()
+        with self._mutex:
+            if version != self._version:
+                self._listeners = list(EventListener.get_collection().find())
+                self._by_type = {}
+                self._version = version
+            try:
+                return self._by_type[event_type]
+            except KeyError:
+                listeners = [l for l in self._listeners
+                             if event_type in l['event_types'] or '*' in l['event_types']]
+                self._by_type[event_type] = listeners
+                return listeners
+
+    def invalidate(self):
+        """
+        Forget the cached listeners so they are loaded again by the next find.
+        """
+        with self._mutex:
+            self._version = None
+
+
+# The listeners are cached for the life of the process.
+listener_table = ListenerTable()
+
+
 class EventFireManager(object):
 
     def fire_repo_sync_started(self, repo_id):
@@ -62,8 +111,7 @@ class EventFireManager(object):
         @type  event: pulp.server.event.data.Event
         """
         # Determine which listeners should be notified
-        listeners = list(EventListener.get_collection().find(
-            {'$or': ({'event_types': event.event_type}, {'event_types': '*'})}))
+        listeners = listener_table.find(event.event_type)
 
         # For each listener, retrieve the notifier and invoke it. Be sure that
         # an exception from a notifier is logged but does not interrupt the
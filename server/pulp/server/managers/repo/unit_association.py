@@ -11,9 +11,11 @@ import mongoengine
 import pymongo
 
 from pulp.common import error_codes
+from pulp.plugins.conduits.mixins import StatusMixin
 from pulp.plugins.conduits.unit_import import ImportUnitConduit
 from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api
+from pulp.plugins.util.misc import paginate
 from pulp.server.async.tasks import Task
 from pulp.server.controllers import repository as repo_controller
 from pulp.server.controllers import units as units_controller
@@ -37,6 +39,13 @@ SORT_DESCENDING = pymongo.DESCENDING
 
 _VALID_DIRECTIONS = (SORT_ASCENDING, SORT_DESCENDING)
 
+# Importers that set this key to True in their metadata let Pulp associate the units copied
+# into their repositories itself, instead of passing the units to import_units.
+BULK_COPY_KEYWORD = 'bulk_copy'
+
+# The number of source repository associations copied with each bulk write.
+BULK_COPY_PAGE_SIZE = 1000
+
 logger = logging.getLogger(__name__)
 
 
@@ -199,6 +208,12 @@ class RepoUnitAssociationManager(object):
         importer. It is the job of the importer to make the associate calls
         back into Pulp where applicable.
 
+        Importers that set the bulk copy key to True in their metadata are not
+        called. Pulp copies the associations of the matching units from the source
+        repository itself, see _bulk_copy. This is only done when every unit type
+        of the source repository is defined by a mongoengine model, and when the
+        criteria neither limits nor skips units.
+
         If criteria is None, the effect of this call is to copy the source
         repository's associations into the destination repository.
 
@@ -225,9 +240,9 @@ class RepoUnitAssociationManager(object):
         source_repo_importer = model.Importer.objects.get_or_404(repo_id=source_repo_id)
 
         # The docs are incorrect on the list_importer_types call; it actually
-        # returns a dict with the types under key "types" for some reason.
-        supported_type_ids = set(plugin_api.list_importer_types(
-            dest_repo_importer.importer_type_id)['types'])
+        # returns the importer's metadata, with the types under key "types".
+        importer_metadata = plugin_api.list_importer_types(dest_repo_importer.importer_type_id)
+        supported_type_ids = set(importer_metadata['types'])
 
         # Get the unit types from the repo source repo
         source_repo_unit_types = set(source_repo.content_unit_counts.keys())
@@ -239,6 +254,9 @@ class RepoUnitAssociationManager(object):
         transfer_units = None
         # if all source types have been converted to mongo - search via new style
         if source_repo_unit_types.issubset(set(plugin_api.list_unit_models())):
+            if importer_metadata.get(BULK_COPY_KEYWORD, False) and \
+                    criteria.limit is None and criteria.skip is None:
+                return RepoUnitAssociationManager._bulk_copy(source_repo, dest_repo, criteria)
             transfer_units = RepoUnitAssociationManager._units_from_criteria(source_repo, criteria)
         else:
             # else, search via old style
@@ -290,6 +308,78 @@ class RepoUnitAssociationManager(object):
             logger.exception(msg % msg_dict)
             raise (e, None, sys.exc_info()[2])
 
+    @staticmethod
+    def _bulk_copy(source_repo, dest_repo, criteria):
+        """
+        Copy the associations of the units matching a criteria from one repository to another,
+        without passing the units to the destination repository's importer. The associations
+        are read from the source repository in pages, the units of each page that match the
+        criteria's unit filters are associated to the destination repository with one bulk
+        write per type, and the unit counts of the destination repository are rebuilt once
+        at the end. The progress is reported on the current task under the bulk copy key.
+
+        Every unit type of the source repository must be defined by a mongoengine model.
+
+        :param source_repo: repository the associations are copied from
+        :type  source_repo: pulp.server.db.model.Repository
+        :param dest_repo:   repository the associations are copied to
+        :type  dest_repo:   pulp.server.db.model.Repository
+        :param criteria:    criteria object to use for the search parameters
+        :type  criteria:    pulp.server.db.model.criteria.UnitAssociationCriteria
+
+        :return:    dict with key 'units_successful' whose value is a list of the type IDs
+                    and unit keys of the copied units
+        :rtype:     dict
+        """
+        association_q = mongoengine.Q(__raw__=criteria.association_spec)
+        if criteria.type_ids:
+            association_q &= mongoengine.Q(unit_type_id__in=criteria.type_ids)
+        associations = model.RepositoryContentUnit.objects(q_obj=association_q,
+                                                           repo_id=source_repo.repo_id)
+
+        progress = StatusMixin(BULK_COPY_KEYWORD, exceptions.PulpExecutionException)
+        report = {'state': 'in_progress', 'units_total': associations.count(),
+                  'units_processed': 0, 'units_added': 0}
+        progress.set_progress(report)
+
+        unit_specs = {}
+        copied_units = []
+        for page in paginate(associations.records('unit_type_id', 'unit_id'),
+                             BULK_COPY_PAGE_SIZE):
+            unit_ids = {}
+            for association in page:
+                unit_ids.setdefault(association.unit_type_id, []).append(association.unit_id)
+
+            for unit_type_id, ids in unit_ids.items():
+                model_class = plugin_api.get_unit_model_by_id(unit_type_id)
+                if unit_type_id not in unit_specs:
+                    unit_specs[unit_type_id] = criteria.unit_spec
+                    serializer = units_controller.get_model_serializer_for_type(unit_type_id)
+                    if serializer:
+                        unit_specs[unit_type_id] = serializer.translate_filters(
+                            serializer.model, criteria.unit_spec)
+                units = model_class.objects(q_obj=mongoengine.Q(__raw__=unit_specs[unit_type_id]),
+                                            id__in=ids)
+
+                matched_ids = []
+                for unit in units.records(*model_class.unit_key_fields):
+                    matched_ids.append(unit.id)
+                    unit_key = dict((f, unit.get(f)) for f in model_class.unit_key_fields)
+                    copied_units.append({'type_id': unit_type_id, 'unit_key': unit_key})
+                report['units_added'] += repo_controller.associate_unit_ids(
+                    dest_repo.repo_id, unit_type_id, matched_ids)
+
+            report['units_processed'] += len(page)
+            progress.set_progress(report)
+
+        repo_controller.rebuild_content_unit_counts(dest_repo)
+        if copied_units:
+            repo_controller.update_last_unit_added(dest_repo.repo_id)
+
+        report['state'] = 'complete'
+        progress.set_progress(report)
+        return {'units_successful': copied_units}
+
     def unassociate_unit_by_id(self, repo_id, unit_type_id, unit_id, notify_plugins=True):
         """
         Removes the association between a repo and the given unit. Only the
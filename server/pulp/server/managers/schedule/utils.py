@@ -14,7 +14,7 @@ import isodate
 from pulp.common import dateutils
 from pulp.server import exceptions
 from pulp.server.db.model.criteria import Criteria
-from pulp.server.db.model.dispatch import ScheduledCall
+from pulp.server.db.model.dispatch import ScheduledCall, ScheduledCallVersion
 
 
 SCHEDULE_OPTIONS_FIELDS = ('failure_threshold', 'last_run', 'enabled')
@@ -87,6 +87,34 @@ def get_updated_since(seconds):
     return ScheduledCall.get_collection().query(criteria)
 
 
+def get_by_ids(schedule_ids):
+    """
+    Get schedules, whether enabled or not, by their IDs.
+
+    :param schedule_ids: unique IDs of schedules
+    :type  schedule_ids: list
+
+    :return:    pymongo cursor of ScheduledCall database objects
+    :rtype:     pymongo.cursor.Cursor
+    """
+    criteria = Criteria(filters={'_id': {'$in': [ObjectId(i) for i in schedule_ids]}})
+    return ScheduledCall.get_collection().query(criteria)
+
+
+def get_version():
+    """
+    Get the version of the scheduled calls, which changes whenever a schedule is added, updated
+    or deleted.
+
+    :return:    dictionary with the "version", the "deleted_count" of scheduled calls deleted
+                so far, the IDs of the most recently "deleted" scheduled calls, the
+                "changed_count" of scheduled calls added or updated so far and the IDs of the
+                most recently "changed" scheduled calls
+    :rtype:     dict
+    """
+    return ScheduledCallVersion.get()
+
+
 def delete(schedule_id):
     """
     Deletes the schedule with unique ID schedule_id
@@ -106,6 +134,7 @@ def delete(schedule_id):
         query=spec, remove=True)
     if schedule is None:
         raise exceptions.MissingResource(schedule_id=schedule_id)
+    ScheduledCallVersion.increment(deleted_ids=[str(schedule['_id'])])
 
 
 def delete_by_resource(resource):
@@ -115,7 +144,11 @@ def delete_by_resource(resource):
     :param resource:    string indicating a unique resource
     :type  resource:    basestring
     """
-    ScheduledCall.get_collection().remove({'resource': resource})
+    collection = ScheduledCall.get_collection()
+    deleted_ids = [str(call['_id']) for call in collection.find({'resource': resource}, ['_id'])]
+    collection.remove({'resource': resource})
+    if deleted_ids:
+        ScheduledCallVersion.increment(deleted_ids=deleted_ids)
 
 
 def update(schedule_id, delta):
@@ -161,6 +194,7 @@ def update(schedule_id, delta):
         query=spec, update={'$set': delta}, new=True)
     if schedule is None:
         raise exceptions.MissingResource(schedule_id=schedule_id)
+    ScheduledCallVersion.increment(changed_ids=[str(schedule_id)])
     return ScheduledCall.from_db(schedule)
 
 
@@ -181,6 +215,7 @@ def reset_failure_count(schedule_id):
         'last_updated': time.time(),
     }}
     ScheduledCall.get_collection().update(spec=spec, document=delta)
+    ScheduledCallVersion.increment(changed_ids=[schedule_id])
 
 
 def increment_failure_count(schedule_id):
@@ -202,6 +237,7 @@ def increment_failure_count(schedule_id):
     schedule = ScheduledCall.get_collection().find_and_modify(
         query=spec, update=delta, new=True)
     if schedule:
+        ScheduledCallVersion.increment(changed_ids=[schedule_id])
         scheduled_call = ScheduledCall.from_db(schedule)
         if scheduled_call.failure_threshold is None or not scheduled_call.enabled:
             return
@@ -214,6 +250,7 @@ def increment_failure_count(schedule_id):
                 'last_updated': time.time(),
             }}
             ScheduledCall.get_collection().update(spec, delta)
+            ScheduledCallVersion.increment(changed_ids=[schedule_id])
 
 
 def validate_keys(options, valid_keys, all_required=False):
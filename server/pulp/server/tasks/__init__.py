@@ -5,5 +5,6 @@ of this Python package.
 """
 import pulp.server.db.reaper  # noqa
 import pulp.server.maintenance.monthly  # noqa
+import pulp.server.maintenance.publish  # noqa
 import pulp.server.controllers.content  # noqa
 import pulp.server.controllers.repository  # noqa
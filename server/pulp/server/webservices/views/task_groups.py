@@ -37,7 +37,7 @@ class TaskGroupView(View):
     @auth_required(authorization.DELETE)
     def delete(self, request, group_id):
         """
-        Dispatch tasks.cancel to delete tasks in a single task_group.
+        Cancel the incomplete tasks in a single task_group.
 
         :param request: WSGI request object
         :type  request: django.core.handlers.wsgi.WSGIRequest
@@ -48,12 +48,7 @@ class TaskGroupView(View):
         :rtype:  django.http.HttpResponse
         :raises MissingResource: if group id is not found
         """
-        raw_tasks = TaskStatus.objects.only('task_id').filter(group_id=group_id)
-        if not raw_tasks:
-            raise MissingResource
-
-        for task in raw_tasks:
-            tasks.cancel(task.task_id)
+        tasks.cancel_group(group_id)
         return generate_json_response(None)
 
 
@@ -75,10 +70,11 @@ class TaskGroupSummaryView(View):
         :return: Response containing a serialized dict of the task group summary
         :rtype : django.http.HttpResponse
         """
-        tasks = TaskStatus.objects(group_id=group_id)
-        task_group_total = tasks.count()
-
-        summary = {'total': task_group_total}
-        for state in CALL_STATES:
-            summary[state] = tasks.filter(state=state).count()
+        summary = dict((state, 0) for state in CALL_STATES)
+        summary['total'] = 0
+        counts = TaskStatus.objects(group_id=group_id).aggregate(
+            {'$group': {'_id': '$state', 'count': {'$sum': 1}}})
+        for count in counts:
+            summary[count['_id']] = count['count']
+            summary['total'] += count['count']
         return generate_json_response_with_pulp_encoder(summary)
@@ -3,17 +3,19 @@ This module contains views related to Pulp's task system models.
 """
 from datetime import datetime
 
+from bson import ObjectId
 from django.views.generic import View
 from django.http import HttpResponse
+import isodate
 from mongoengine.queryset import DoesNotExist
 
-from pulp.common import error_codes
+from pulp.common import dateutils, error_codes
 from pulp.common.constants import CALL_CANCELED_STATE, CALL_COMPLETE_STATES
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.async import tasks
 from pulp.server.auth import authorization
 from pulp.server.db.model import Worker, TaskStatus
-from pulp.server.exceptions import MissingResource
+from pulp.server.exceptions import InvalidValue, MissingResource
 from pulp.server.webservices.views import search
 from pulp.server.webservices.views.decorators import auth_required
 from pulp.server.webservices.views.serializers import dispatch as serial_dispatch
@@ -24,6 +26,13 @@ from pulp.server.webservices.views.util import (generate_json_response,
 # This constant set is used for deleting the completed tasks from the collection.
 VALID_STATES = set(filter(lambda state: state != CALL_CANCELED_STATE, CALL_COMPLETE_STATES))
 
+# The task fields that may be requested with the "fields" parameter when listing tasks.
+TASK_FIELDS = ('worker_name', 'tags', 'state', 'error', 'spawned_tasks', 'progress_report',
+               'task_type', 'start_time', 'finish_time', 'result', 'exception', 'traceback')
+
+# The fields included in each task listed with the "fields" parameter besides those requested.
+IDENTITY_FIELDS = ('_href', '_id', 'id', 'task_id')
+
 
 def task_serializer(task):
     """
@@ -58,20 +67,74 @@ class TaskCollectionView(View):
     def get(self, request):
         """
         Return a response containing a list of all tasks or a response containing
-        a list of tasks filtered by the optional GET parameter 'tags'.
+        a list of tasks filtered by the optional GET parameters 'tag', 'state', 'created_after'
+        and 'created_before'.
+
+        Tasks are paged when the optional GET parameters 'limit' or 'cursor' are given. Paged
+        tasks are ordered by creation and the cursor is the 'id' of the last task of the
+        previous page. The optional GET parameter 'fields' limits the fields of each task to
+        those listed and the fields identifying the task.
 
         :param request: WSGI request object
         :type  request: django.core.handlers.wsgi.WSGIRequest
 
         :return: Response containing a serialized list of dicts, one for each task
         :rtype:  django.http.HttpResponse
+        :raises InvalidValue: if any of the parameters are invalid
         """
         tags = request.GET.getlist('tag')
+        states = request.GET.getlist('state')
+        created_after = request.GET.get('created_after')
+        created_before = request.GET.get('created_before')
+        limit = request.GET.get('limit')
+        cursor = request.GET.get('cursor')
+        fields = [field for value in request.GET.getlist('fields')
+                  for field in value.split(',') if field]
+
+        invalid_values = []
+        query = {'group_id': None}
         if tags:
-            raw_tasks = TaskStatus.objects(tags__all=tags, group_id=None)
+            query['tags__all'] = tags
+        if states:
+            query['state__in'] = states
+        for name, operator, value in (('created_after', 'id__gte', created_after),
+                                      ('created_before', 'id__lt', created_before)):
+            if value is None:
+                continue
+            try:
+                query[operator] = ObjectId.from_datetime(dateutils.parse_iso8601_datetime(value))
+            except (ValueError, isodate.ISO8601Error):
+                invalid_values.append(name)
+        if cursor is not None:
+            if ObjectId.is_valid(cursor):
+                query['id__gt'] = ObjectId(cursor)
+            else:
+                invalid_values.append('cursor')
+        if limit is not None:
+            try:
+                limit = int(limit)
+                if limit < 1:
+                    invalid_values.append('limit')
+            except ValueError:
+                invalid_values.append('limit')
+        if any(field not in TASK_FIELDS for field in fields):
+            invalid_values.append('fields')
+        if invalid_values:
+            raise InvalidValue(invalid_values)
+
+        raw_tasks = TaskStatus.objects(**query)
+        if limit is not None or cursor is not None:
+            raw_tasks = raw_tasks.order_by('id')
+        if limit is not None:
+            raw_tasks = raw_tasks.limit(limit)
+        if fields:
+            raw_tasks = raw_tasks.only('task_id', *fields)
+            keep = set(IDENTITY_FIELDS).union(fields)
+            serialized_task_statuses = [
+                dict((k, v) for k, v in task_serializer(task).iteritems() if k in keep)
+                for task in raw_tasks]
         else:
-            raw_tasks = TaskStatus.objects(group_id=None)
-        serialized_task_statuses = [task_serializer(task) for task in raw_tasks]
+            serialized_task_statuses = [task_serializer(task) for task in raw_tasks]
         return generate_json_response_with_pulp_encoder(serialized_task_statuses)
 
     @auth_required(authorization.DELETE)
@@ -1,6 +1,7 @@
 from uuid import uuid4
 
 from ... import base
+from pulp.plugins.conduits import cataloger
 from pulp.plugins.conduits.cataloger import CatalogerConduit
 from pulp.server.db.model.content import ContentCatalog
 
@@ -39,6 +40,8 @@ class TestCatalogerConduit(base.PulpServerTests):
         for unit_key, url in units:
             conduit.add_entry(TYPE_ID, unit_key, url)
         collection = ContentCatalog.get_collection()
+        self.assertEqual(collection.find().count(), 0)
+        conduit.flush()
         self.assertEqual(conduit.source_id, SOURCE_ID)
         self.assertEqual(conduit.expires, EXPIRES)
         self.assertEqual(len(units), collection.find().count())
@@ -71,6 +74,31 @@ class TestCatalogerConduit(base.PulpServerTests):
         entry = collection.find_one({'locator': locator})
         self.assertTrue(entry is None)
 
+    def test_add_flushed_when_full(self):
+        units = self.units(0, cataloger.FLUSH_THRESHOLD + 1)
+        conduit = CatalogerConduit(SOURCE_ID, EXPIRES)
+        for unit_key, url in units:
+            conduit.add_entry(TYPE_ID, unit_key, url)
+        collection = ContentCatalog.get_collection()
+        self.assertEqual(collection.find().count(), cataloger.FLUSH_THRESHOLD)
+        conduit.flush()
+        self.assertEqual(collection.find().count(), len(units))
+
+    def test_add_existing(self):
+        units = self.units(0, 10)
+        conduit = CatalogerConduit(SOURCE_ID, EXPIRES)
+        for unit_key, url in units:
+            conduit.add_entry(TYPE_ID, unit_key, url)
+        conduit.flush()
+        for unit_key, url in units:
+            conduit.add_entry(TYPE_ID, unit_key, url + '/updated')
+        conduit.flush()
+        collection = ContentCatalog.get_collection()
+        self.assertEqual(collection.find().count(), len(units))
+        for entry in collection.find():
+            self.assertTrue(entry['url'].endswith('/updated'))
+            self.assertEqual(entry['id'], str(entry['_id']))
+
     def test_reset(self):
         conduit = CatalogerConduit(SOURCE_ID, EXPIRES)
         conduit.added_count = 10
@@ -1,4 +1,5 @@
 import contextlib
+import json
 import os
 import shutil
 import sys
@@ -219,6 +220,136 @@ class TestStepProcessBlock(unittest.TestCase):
         # make sure progress does not get incremented beyond the total
         self.assertEqual(step.progress_successes, 1)
 
+    def test_counts_item(self):
+        step = publish_step.Step('foo_step', disable_reporting=True)
+        step.metrics = publish_step.StepMetrics()
+
+        step._process_block()
+
+        self.assertEqual(step.metrics.items, 1)
+        self.assertEqual(step.metrics.latency_counts[0], 1)
+
+
+class TestStepMetrics(unittest.TestCase):
+
+    def test_add_item(self):
+        metrics = publish_step.StepMetrics()
+
+        for seconds in (0.0005, 0.001, 0.05, 0.5, 0.5, 5, 50):
+            metrics.add_item(seconds)
+
+        self.assertEqual(metrics.items, 7)
+        self.assertEqual(metrics.latency_counts, [2, 0, 1, 2, 1, 1])
+
+    @patch('pulp.plugins.util.publish_step._cpu_time')
+    @patch('pulp.plugins.util.publish_step.time')
+    def test_start_stop(self, mock_time, mock_cpu_time):
+        metrics = publish_step.StepMetrics()
+        mock_time.time.side_effect = [10.0, 12.5, 20.0, 21.0]
+        mock_cpu_time.side_effect = [1.0, 2.0, 3.0, 3.5]
+
+        metrics.start()
+        metrics.stop()
+        metrics.start()
+        metrics.stop()
+
+        self.assertTrue(metrics.started)
+        self.assertEqual(metrics.wall_time, 3.5)
+        self.assertEqual(metrics.cpu_time, 1.5)
+
+    def test_stop_not_started(self):
+        metrics = publish_step.StepMetrics()
+
+        metrics.stop()
+
+        self.assertEqual(metrics.wall_time, 0.0)
+        self.assertFalse(metrics.started)
+
+    def test_to_dict(self):
+        metrics = publish_step.StepMetrics()
+        metrics.add_item(0.05)
+        metrics.database.operations = 3
+
+        report = metrics.to_dict()
+
+        self.assertEqual(report['items'], 1)
+        self.assertEqual(report['item_latency'],
+                         {'buckets': [1, 10, 100, 1000, 10000], 'counts': [0, 0, 1, 0, 0, 0]})
+        self.assertEqual(report['db_operations'], 3)
+        self.assertEqual(report['db_bytes_read'], 0)
+        self.assertEqual(report['db_bytes_written'], 0)
+        self.assertEqual(report['wall_time'], 0.0)
+        self.assertEqual(report['cpu_time'], 0.0)
+
+
+class TestStepProcessMetrics(unittest.TestCase):
+
+    @patch('pulp.plugins.util.publish_step._step_metrics_enabled', return_value=True)
+    def test_process(self, *unused):
+        step = publish_step.Step('foo_step', disable_reporting=True)
+        step.get_iterator = Mock(return_value=['a', 'b'])
+        step.get_total = Mock(return_value=2)
+
+        step.process()
+
+        report = step.get_progress_report()[0]
+        self.assertEqual(report[reporting_constants.PROGRESS_METRICS_KEY]['items'], 2)
+        self.assertEqual(sum(report[reporting_constants.PROGRESS_METRICS_KEY]
+                             ['item_latency']['counts']), 2)
+
+    @patch('pulp.plugins.util.publish_step._step_metrics_enabled', return_value=True)
+    def test_process_failed(self, *unused):
+        step = publish_step.Step('foo_step', disable_reporting=True)
+        step.process_main = Mock(side_effect=ValueError)
+
+        self.assertRaises(ValueError, step.process)
+
+        self.assertTrue(step.metrics.started)
+        self.assertTrue(step.metrics._start is None)
+
+    @patch('pulp.plugins.util.publish_step._step_metrics_enabled', return_value=True)
+    def test_not_started(self, *unused):
+        step = publish_step.Step('foo_step')
+
+        report = step.get_progress_report()[0]
+
+        self.assertFalse(reporting_constants.PROGRESS_METRICS_KEY in report)
+
+    @patch('pulp.plugins.util.publish_step._step_metrics_enabled', return_value=False)
+    def test_disabled(self, *unused):
+        step = publish_step.Step('foo_step', disable_reporting=True)
+
+        step.process()
+
+        self.assertTrue(step.metrics is None)
+        self.assertFalse(reporting_constants.PROGRESS_METRICS_KEY in
+                         step.get_progress_report()[0])
+
+    @patch('pulp.plugins.util.publish_step._metrics_logger')
+    @patch('pulp.plugins.util.publish_step.pulp_config')
+    def test_log_metrics(self, mock_config, mock_logger):
+        mock_config.getboolean.return_value = True
+        step = publish_step.Step('foo_step', status_conduit=Mock(task_id='123'),
+                                 disable_reporting=True)
+
+        step.process()
+
+        mock_config.getboolean.assert_any_call('profiling', 'log_step_metrics')
+        logged = json.loads(mock_logger.info.call_args[0][0])
+        self.assertEqual(logged['task_id'], '123')
+        self.assertEqual(logged['step_type'], 'foo_step')
+        self.assertEqual(logged['items'], 1)
+
+    @patch('pulp.plugins.util.publish_step._metrics_logger')
+    @patch('pulp.plugins.util.publish_step.pulp_config')
+    def test_log_metrics_disabled(self, mock_config, mock_logger):
+        mock_config.getboolean.side_effect = lambda section, key: key == 'step_metrics'
+        step = publish_step.Step('foo_step', disable_reporting=True)
+
+        step.process()
+
+        self.assertFalse(mock_logger.info.called)
+
 
 class PluginStepTests(PluginBase):
     """
@@ -757,6 +888,37 @@ class TestAtomicDirectoryPublishStep(unittest.TestCase):
         self.assertTrue(os.path.exists(existing_file))
         self.assertEquals(1, len(os.listdir(master_dir)))
 
+    def test_create_staging_dir(self):
+        master_dir = os.path.join(self.working_directory, 'master')
+
+        staging_dir = publish_step.AtomicDirectoryPublishStep.create_staging_dir(master_dir)
+
+        self.assertTrue(os.path.isdir(staging_dir))
+        self.assertEquals(os.path.dirname(staging_dir), os.path.join(master_dir, '.staging'))
+
+    @patch('pulp.plugins.util.publish_step.publish_maintenance.queue_remove_old_masters')
+    @patch('pulp.plugins.util.publish_step.copytree')
+    @patch('selinux.restorecon')
+    def test_process_main_stage_on_publish_fs(self, restorecon, copytree, queue_remove):
+        master_dir = os.path.join(self.working_directory, 'master')
+        publish_dir = os.path.join(self.working_directory, 'publish', 'bar')
+        stale_staging_dir = publish_step.AtomicDirectoryPublishStep.create_staging_dir(master_dir)
+        source_dir = publish_step.AtomicDirectoryPublishStep.create_staging_dir(master_dir)
+        step = publish_step.AtomicDirectoryPublishStep(source_dir, [('/', publish_dir)], master_dir,
+                                                       stage_on_publish_fs=True)
+        step.parent = Mock(timestamp=str(time.time()))
+
+        touch(os.path.join(source_dir, 'foo', 'bar.html'))
+        old_dir = os.path.join(master_dir, 'foo')
+        os.makedirs(old_dir)
+        step.process_main()
+
+        self.assertFalse(copytree.called)
+        self.assertTrue(os.path.exists(os.path.join(publish_dir, 'foo', 'bar.html')))
+        # old masters are left for the background task to remove
+        self.assertTrue(os.path.exists(old_dir))
+        queue_remove.assert_called_once_with([old_dir, stale_staging_dir])
+
 
 class TestSaveTarFilePublishStep(unittest.TestCase):
     def setUp(self):
@@ -1121,7 +1283,7 @@ class TestGetLocalUnitsStep(unittest.TestCase):
 
         self.step.process_main()
 
-        mock_paginate.assert_called_once_with(self.step.parent.available_units, 50)
+        mock_paginate.assert_called_once_with(self.step.parent.available_units, 1000)
 
     def test_saves_unit(self, mock_find_units, mock_associate):
         """
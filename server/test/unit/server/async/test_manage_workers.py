@@ -79,6 +79,41 @@ class TestGetConcurrency(unittest.TestCase):
         self.assertEqual(cpu_count.call_count, 0)
 
 
+class TestGetWorkerConcurrency(unittest.TestCase):
+    """
+    Test the _get_worker_concurrency() function.
+    """
+    @mock.patch('pulp.server.async.manage_workers.subprocess.Popen')
+    def test_worker_concurrency_not_set(self, Popen):
+        """
+        Test for the case where PULP_WORKER_CONCURRENCY is not set in /etc/default/pulp_workers.
+        """
+        Popen.return_value.communicate.return_value = ('\n',)
+
+        self.assertEqual(manage_workers._get_worker_concurrency(), 1)
+        Popen.assert_called_once_with(
+            '. %s; echo $PULP_WORKER_CONCURRENCY' % manage_workers._ENVIRONMENT_FILE,
+            stdout=subprocess.PIPE, shell=True)
+
+    @mock.patch('pulp.server.async.manage_workers.subprocess.Popen')
+    def test_worker_concurrency_set(self, Popen):
+        """
+        Test for the case where PULP_WORKER_CONCURRENCY is set in /etc/default/pulp_workers.
+        """
+        Popen.return_value.communicate.return_value = ('4\n',)
+
+        self.assertEqual(manage_workers._get_worker_concurrency(), 4)
+
+    @mock.patch('pulp.server.async.manage_workers.subprocess.Popen')
+    def test_worker_concurrency_below_one(self, Popen):
+        """
+        Test that each worker runs at least one task at a time.
+        """
+        Popen.return_value.communicate.return_value = ('0\n',)
+
+        self.assertEqual(manage_workers._get_worker_concurrency(), 1)
+
+
 class TestGetFileContents(unittest.TestCase):
     """
     Test the _get_file_contents() function.
@@ -174,6 +209,8 @@ class TestStartWorkers(unittest.TestCase):
     Test the _start_workers() function. For simplicity, these tests all set concurrency to 1.
     """
 
+    @mock.patch('pulp.server.async.manage_workers._get_worker_concurrency',
+                mock.MagicMock(return_value=1))
     @mock.patch('pulp.server.async.manage_workers._get_max_tasks', mock.MagicMock(return_value=''))
     @mock.patch('pulp.server.async.manage_workers._get_concurrency', mock.MagicMock(return_value=1))
     @mock.patch('pulp.server.async.manage_workers.os.path.exists',
@@ -196,6 +233,7 @@ class TestStartWorkers(unittest.TestCase):
         Popen.return_value.communicate.return_value = pipe_output
         expected_read_data = manage_workers._WORKER_TEMPLATE % {
             'num': 0, 'environment_file': manage_workers._ENVIRONMENT_FILE,
+            'worker_concurrency': 1,
             'max_tasks_argument': ''}
 
         with mock.patch('__builtin__.open', autospec=True) as mock_open:
@@ -232,6 +270,8 @@ class TestStartWorkers(unittest.TestCase):
         # Make sure the exit code was passed on
         exit.assert_called_once_with(42)
 
+    @mock.patch('pulp.server.async.manage_workers._get_worker_concurrency',
+                mock.MagicMock(return_value=1))
     @mock.patch('pulp.server.async.manage_workers._get_max_tasks', mock.MagicMock(return_value=''))
     @mock.patch('pulp.server.async.manage_workers._get_concurrency', mock.MagicMock(return_value=1))
     @mock.patch('pulp.server.async.manage_workers.os.path.exists',
@@ -249,6 +289,7 @@ class TestStartWorkers(unittest.TestCase):
         Popen.return_value.communicate.return_value = pipe_output
         expected_read_data = manage_workers._WORKER_TEMPLATE % {
             'num': 0, 'environment_file': manage_workers._ENVIRONMENT_FILE,
+            'worker_concurrency': 1,
             'max_tasks_argument': ''}
 
         with mock.patch('__builtin__.open', autospec=True) as mock_open:
@@ -280,6 +321,8 @@ class TestStartWorkers(unittest.TestCase):
         self.assertEqual(stdout.write.mock_calls[0][1][0], pipe_output[0])
         self.assertEqual(stdout.write.mock_calls[1][1][0], '\n')
 
+    @mock.patch('pulp.server.async.manage_workers._get_worker_concurrency',
+                mock.MagicMock(return_value=1))
     @mock.patch('pulp.server.async.manage_workers._get_max_tasks', mock.MagicMock(return_value=''))
     @mock.patch('pulp.server.async.manage_workers._get_concurrency', mock.MagicMock(return_value=1))
     @mock.patch('pulp.server.async.manage_workers.os.path.exists',
@@ -311,6 +354,7 @@ class TestStartWorkers(unittest.TestCase):
         expected_path = os.path.join(manage_workers._SYSTEMD_UNIT_PATH, unit_filename)
         expected_file_contents = manage_workers._WORKER_TEMPLATE % {
             'num': 0, 'environment_file': manage_workers._ENVIRONMENT_FILE,
+            'worker_concurrency': 1,
             'max_tasks_argument': ''}
         self.assertEqual(mock_open.call_count, 2)
         # Let's inspect the read call
@@ -341,6 +385,8 @@ class TestStartWorkers(unittest.TestCase):
         self.assertEqual(stdout.write.mock_calls[0][1][0], pipe_output[0])
         self.assertEqual(stdout.write.mock_calls[1][1][0], '\n')
 
+    @mock.patch('pulp.server.async.manage_workers._get_worker_concurrency',
+                mock.MagicMock(return_value=1))
     @mock.patch('pulp.server.async.manage_workers._get_max_tasks', mock.MagicMock(return_value=''))
     @mock.patch('pulp.server.async.manage_workers._get_concurrency', mock.MagicMock(return_value=1))
     # Setting this return value to False will simulate the file not existing
@@ -369,6 +415,7 @@ class TestStartWorkers(unittest.TestCase):
         expected_path = os.path.join(manage_workers._SYSTEMD_UNIT_PATH, unit_filename)
         expected_file_contents = manage_workers._WORKER_TEMPLATE % {
             'num': 0, 'environment_file': manage_workers._ENVIRONMENT_FILE,
+            'worker_concurrency': 1,
             'max_tasks_argument': ''}
         # Now, let's inspect the write call
         mock_open.assert_called_once_with(expected_path, 'w')
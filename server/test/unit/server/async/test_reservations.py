@@ -0,0 +1,387 @@
+"""
+This module contains tests for the pulp.server.async.reservations module.
+"""
+import time
+import unittest
+
+import mock
+
+from pulp.common.constants import RESOURCE_MANAGER_WORKER_NAME, SCHEDULER_WORKER_NAME
+from pulp.server.async import reservations
+
+
+MODULE = 'pulp.server.async.reservations.'
+
+
+def fresh_table(workers=(), reservations_=None):
+    table = reservations.ReservationTable()
+    if not isinstance(workers, dict):
+        workers = dict((worker_name, 1) for worker_name in workers)
+    table.workers = dict(workers)
+    table.reservations = dict(reservations_ or {})
+    table.refreshed = time.time() + 3600
+    return table
+
+
+def request(task_id, resource_id):
+    return mock.Mock(task_id=task_id, resource_id=resource_id)
+
+
+class TestIsWorker(unittest.TestCase):
+
+    def test_is_worker(self):
+        self.assertTrue(reservations.is_worker('reserved_resource_worker-0@host'))
+
+    def test_scheduler(self):
+        self.assertFalse(reservations.is_worker(SCHEDULER_WORKER_NAME + '@host'))
+
+    def test_resource_manager(self):
+        self.assertFalse(reservations.is_worker(RESOURCE_MANAGER_WORKER_NAME + '@host'))
+
+
+class TestHostOf(unittest.TestCase):
+
+    def test_host_of(self):
+        self.assertEqual(reservations.host_of('reserved_resource_worker-0@host'), 'host')
+
+    def test_no_host(self):
+        self.assertEqual(reservations.host_of('w1'), 'w1')
+
+
+class TestReservationTable(unittest.TestCase):
+
+    @mock.patch(MODULE + 'ReservedResource')
+    @mock.patch(MODULE + 'Worker')
+    def test_rebuild(self, worker, reserved_resource):
+        worker.objects.get_online.return_value = [
+            {'name': 'w1@host', 'concurrency': 4}, {'name': 'w2@host', 'concurrency': None},
+            {'name': SCHEDULER_WORKER_NAME + '@host', 'concurrency': 1}]
+        reserved_resource.objects.all.return_value = [
+            {'task_id': 't1', 'resource_id': 'r1', 'worker_name': 'w1@host'}]
+        table = reservations.ReservationTable()
+        table.started = {'t1': 1.0, 't2': 2.0}
+
+        table.rebuild()
+
+        self.assertEqual(table.workers, {'w1@host': 4, 'w2@host': 1})
+        self.assertEqual(table.reservations, {'t1': ('r1', 'w1@host')})
+        self.assertEqual(table.started, {'t1': 1.0})
+        self.assertFalse(table.stale)
+
+    def test_stale(self):
+        table = reservations.ReservationTable()
+        self.assertTrue(table.stale)
+
+    def test_worker_for(self):
+        table = fresh_table(['w1', 'w2'], {'t1': ('r1', 'w1')})
+        self.assertEqual(table.worker_for('r1'), 'w1')
+        self.assertEqual(table.worker_for('r2'), None)
+
+    def test_capacity(self):
+        table = fresh_table({'w1': 4})
+        self.assertEqual(table.capacity('w1'), 4)
+        self.assertEqual(table.capacity('w2'), 1)
+
+    def test_available_worker(self):
+        table = fresh_table(['w1', 'w2'], {'t1': ('r1', 'w1')})
+        self.assertEqual(table.available_worker(), 'w2')
+        table.reserve('t2', 'r2', 'w2')
+        self.assertEqual(table.available_worker(), None)
+        table.release('t1')
+        self.assertEqual(table.available_worker(), 'w1')
+
+    def test_available_worker_capacity(self):
+        table = fresh_table({'w1': 2, 'w2': 4}, {'t1': ('r1', 'w1'), 't2': ('r2', 'w2')})
+        # w2 has a quarter of its capacity in use and w1 half of it
+        self.assertEqual(table.available_worker(), 'w2')
+        table.reserve('t3', 'r3', 'w1')
+        table.reserve('t4', 'r4', 'w2')
+        table.reserve('t5', 'r5', 'w2')
+        table.reserve('t6', 'r6', 'w2')
+        self.assertEqual(table.available_worker(), None)
+
+    def test_available_worker_same_resource(self):
+        # reservations of the same resource take one unit of capacity
+        table = fresh_table({'w1': 2}, {'t1': ('r1', 'w1'), 't2': ('r1', 'w1')})
+        self.assertEqual(table.available_worker(), 'w1')
+
+    def test_available_worker_host(self):
+        table = fresh_table({'w1@a': 2, 'w2@a': 2, 'w1@b': 2}, {'t1': ('r1', 'w1@a')})
+        self.assertEqual(table.available_worker(), 'w1@b')
+
+    def test_available_worker_duration(self):
+        table = fresh_table({'w1': 2, 'w2': 2}, {'t1': ('r1', 'w1'), 't2': ('r2', 'w2')})
+        table.durations = {'w1': 600.0, 'w2': 5.0}
+        self.assertEqual(table.available_worker(), 'w2')
+
+    def test_add_worker(self):
+        table = fresh_table({'w1': 4})
+        table.add_worker('w1')
+        table.add_worker('w2')
+        self.assertEqual(table.workers, {'w1': 4, 'w2': 1})
+
+    @mock.patch(MODULE + 'time.time')
+    def test_release_duration(self, mock_time):
+        table = fresh_table(['w1'])
+        mock_time.return_value = 100.0
+        table.reserve('t1', 'r1', 'w1')
+        mock_time.return_value = 110.0
+        table.release('t1')
+        self.assertEqual(table.durations, {'w1': 10.0})
+        table.reserve('t2', 'r1', 'w1')
+        mock_time.return_value = 130.0
+        table.release('t2')
+        self.assertEqual(table.durations, {'w1': 10.0 + reservations.SMOOTHING * 10.0})
+        self.assertEqual(table.started, {})
+
+    def test_release_not_started(self):
+        table = fresh_table(['w1'], {'t1': ('r1', 'w1')})
+        table.release('t1')
+        self.assertEqual(table.reservations, {})
+        self.assertEqual(table.durations, {})
+
+    def test_worker_offline(self):
+        table = fresh_table(['w1', 'w2'], {'t2': ('r2', 'w2')})
+        table.reserve('t1', 'r1', 'w1')
+        table.durations = {'w1': 1.0, 'w2': 2.0}
+        table.worker_offline('w1')
+        self.assertEqual(table.workers, {'w2': 1})
+        self.assertEqual(table.reservations, {'t2': ('r2', 'w2')})
+        self.assertEqual(table.started, {})
+        self.assertEqual(table.durations, {'w2': 2.0})
+
+
+class TestReservationDispatcher(unittest.TestCase):
+
+    def dispatcher(self, workers=(), reservations_=None):
+        dispatcher = reservations.ReservationDispatcher()
+        dispatcher.table = fresh_table(workers, reservations_)
+        return dispatcher
+
+    def test_submit_reserved_resource(self):
+        dispatcher = self.dispatcher(['w1', 'w2'], {'t1': ('r1', 'w1'), 't2': ('r2', 'w2')})
+        task = request('t3', 'r1')
+        self.assertTrue(dispatcher.submit(task))
+        task.dispatch.assert_called_once_with('w1')
+        self.assertEqual(dispatcher.table.reservations['t3'], ('r1', 'w1'))
+        self.assertEqual(dispatcher.parked, [])
+
+    def test_submit_reserved_resource_concurrent_worker(self):
+        # the task would run alongside the reservation so it waits for the release
+        dispatcher = self.dispatcher({'w1': 2}, {'t1': ('r1', 'w1')})
+        task = request('t2', 'r1')
+        self.assertFalse(dispatcher.submit(task))
+        self.assertEqual(dispatcher.parked, [task])
+        dispatcher.released('t1')
+        task.dispatch.assert_called_once_with('w1')
+        self.assertEqual(dispatcher.parked, [])
+
+    def test_submit_concurrent_worker(self):
+        dispatcher = self.dispatcher({'w1': 2}, {'t1': ('r1', 'w1')})
+        self.assertTrue(dispatcher.submit(request('t2', 'r2')))
+
+    def test_submit_while_parked_waiting_for_release(self):
+        # a parked task waiting for its resource does not hold back tasks for other resources
+        dispatcher = self.dispatcher({'w1': 2, 'w2': 1}, {'t1': ('r1', 'w1')})
+        parked = request('t2', 'r1')
+        dispatcher.parked = [parked]
+        task = request('t3', 'r3')
+        self.assertTrue(dispatcher.submit(task))
+        task.dispatch.assert_called_once_with('w2')
+        self.assertEqual(dispatcher.parked, [parked])
+
+    def test_submit_unreserved_worker(self):
+        dispatcher = self.dispatcher(['w1', 'w2'], {'t1': ('r1', 'w1')})
+        task = request('t2', 'r2')
+        self.assertTrue(dispatcher.submit(task))
+        task.dispatch.assert_called_once_with('w2')
+
+    def test_submit_parked(self):
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1')})
+        task = request('t2', 'r2')
+        self.assertFalse(dispatcher.submit(task))
+        self.assertEqual(dispatcher.parked, [task])
+        self.assertFalse(task.dispatch.called)
+        task.park.assert_called_once_with()
+
+    def test_submit_park_fails(self):
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1')})
+        task = request('t2', 'r2')
+        task.park.side_effect = ValueError()
+        self.assertRaises(ValueError, dispatcher.submit, task)
+        self.assertEqual(dispatcher.parked, [])
+
+    def test_submit_behind_parked_resource(self):
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1')})
+        parked = request('t2', 'r2')
+        dispatcher.parked = [parked]
+        task = request('t3', 'r2')
+        self.assertFalse(dispatcher.submit(task))
+        self.assertEqual(dispatcher.parked, [parked, task])
+        dispatcher.released('t1')
+        parked.dispatch.assert_called_once_with('w1')
+        task.dispatch.assert_called_once_with('w1')
+
+    def test_submit_parked_first(self):
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1')})
+        parked = request('t2', 'r2')
+        dispatcher.parked = [parked]
+        dispatcher.table.release('t1')
+        # a new task does not take the worker the parked task is waiting for
+        task = request('t3', 'r3')
+        self.assertFalse(dispatcher.submit(task))
+        parked.dispatch.assert_called_once_with('w1')
+        self.assertEqual(dispatcher.parked, [task])
+
+    def test_submit_while_parked_reserved_resource(self):
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1')})
+        dispatcher.parked = [request('t2', 'r2')]
+        self.assertTrue(dispatcher.submit(request('t3', 'r1')))
+
+    def test_submit_again(self):
+        # a message delivered again does not dispatch the task twice
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1')})
+        self.assertTrue(dispatcher.submit(request('t1', 'r1')))
+        task = request('t2', 'r2')
+        dispatcher.parked = [task]
+        self.assertFalse(dispatcher.submit(request('t2', 'r2')))
+        self.assertEqual(dispatcher.parked, [task])
+        self.assertEqual(dispatcher.table.reservations, {'t1': ('r1', 'w1')})
+
+    def test_submit_dispatch_fails(self):
+        dispatcher = self.dispatcher(['w1'])
+        dispatcher.on_release = mock.Mock()
+        task = request('t1', 'r1')
+        task.dispatch.side_effect = ValueError()
+        with mock.patch(MODULE + '_logger'):
+            self.assertFalse(dispatcher.submit(task))
+        dispatcher.on_release.assert_called_once_with('t1')
+        self.assertEqual(dispatcher.table.reservations, {})
+        self.assertEqual(dispatcher.parked, [])
+
+    def test_parked_dispatched_on_worker_online(self):
+        dispatcher = self.dispatcher([])
+        task = request('t1', 'r1')
+        self.assertFalse(dispatcher.submit(task))
+        dispatcher.worker_online('w1')
+        task.dispatch.assert_called_once_with('w1')
+        self.assertEqual(dispatcher.parked, [])
+
+    @mock.patch(MODULE + 'ReservedResource')
+    @mock.patch(MODULE + 'Worker')
+    def test_submit_rebuilds_stale_table(self, worker, reserved_resource):
+        worker.objects.get_online.return_value = [{'name': 'w1', 'concurrency': 1}]
+        reserved_resource.objects.all.return_value = []
+        dispatcher = reservations.ReservationDispatcher()
+        self.assertTrue(dispatcher.submit(request('t1', 'r1')))
+        dispatcher.submit(request('t2', 'r1'))
+        worker.objects.get_online.assert_called_once_with()
+
+    @mock.patch(MODULE + 'ReservedResource')
+    @mock.patch(MODULE + 'Worker')
+    def test_refresh(self, worker, reserved_resource):
+        worker.objects.get_online.return_value = [{'name': 'w1', 'concurrency': 1}]
+        reserved_resource.objects.all.return_value = []
+        dispatcher = self.dispatcher([])
+        task = request('t1', 'r1')
+        dispatcher.parked = [task]
+        dispatcher.refresh()
+        self.assertFalse(worker.objects.get_online.called)
+        dispatcher.table.refreshed = 0
+        dispatcher.refresh()
+        task.dispatch.assert_called_once_with('w1')
+
+    @mock.patch(MODULE + 'ReservedResource')
+    @mock.patch(MODULE + 'Worker')
+    def test_restore(self, worker, reserved_resource):
+        worker.objects.get_online.return_value = [{'name': 'w1', 'concurrency': 1}]
+        reserved_resource.objects.all.return_value = [
+            {'task_id': 't1', 'resource_id': 'r1', 'worker_name': 'w1'}]
+        dispatched, waiting = request('t1', 'r1'), request('t2', 'r2')
+        restore = mock.Mock(return_value=[dispatched, waiting])
+        dispatcher = reservations.ReservationDispatcher(restore=restore)
+        task = request('t3', 'r3')
+        # the restored task waits ahead of the new one
+        self.assertFalse(dispatcher.submit(task))
+        self.assertEqual(dispatcher.parked, [waiting, task])
+        dispatched.forget.assert_called_once_with()
+        self.assertFalse(waiting.park.called)
+        # a message for a restored task delivered again is ignored
+        self.assertFalse(dispatcher.submit(request('t2', 'r2')))
+        self.assertEqual(dispatcher.parked, [waiting, task])
+        dispatcher.released('t1')
+        waiting.dispatch.assert_called_once_with('w1')
+        self.assertEqual(dispatcher.parked, [task])
+        # the tasks are only restored once
+        dispatcher.table.refreshed = 0
+        dispatcher.refresh()
+        restore.assert_called_once_with()
+
+    def test_released(self):
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1'), 't2': ('r2', 'w1')})
+        dispatcher.on_release = mock.Mock()
+        dispatcher.released('t1')
+        dispatcher.on_release.assert_called_once_with('t1')
+        self.assertEqual(dispatcher.table.reservations, {'t2': ('r2', 'w1')})
+
+    def test_released_not_reserved(self):
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1')})
+        dispatcher.on_release = mock.Mock()
+        dispatcher.released('t2')
+        self.assertFalse(dispatcher.on_release.called)
+        self.assertEqual(dispatcher.table.reservations, {'t1': ('r1', 'w1')})
+
+    def test_released_on_release_fails(self):
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1')})
+        dispatcher.on_release = mock.Mock(side_effect=ValueError())
+        with mock.patch(MODULE + '_logger'):
+            dispatcher.released('t1')
+        self.assertEqual(dispatcher.table.reservations, {})
+
+    def test_worker_online_not_worker(self):
+        dispatcher = self.dispatcher()
+        dispatcher.worker_online(SCHEDULER_WORKER_NAME + '@host')
+        self.assertEqual(dispatcher.table.workers, {})
+
+    def test_worker_offline(self):
+        dispatcher = self.dispatcher(['w1'], {'t1': ('r1', 'w1')})
+        dispatcher.worker_offline('w1')
+        self.assertEqual(dispatcher.table.workers, {})
+        self.assertEqual(dispatcher.table.reservations, {})
+
+    @mock.patch(MODULE + 'EventListener')
+    def test_start(self, listener):
+        dispatcher = reservations.ReservationDispatcher()
+        dispatcher.start()
+        dispatcher.start()
+        listener.assert_called_once_with(dispatcher)
+        listener.return_value.start.assert_called_once_with()
+
+
+class TestEventListener(unittest.TestCase):
+
+    def test_handlers(self):
+        dispatcher = mock.Mock()
+        listener = reservations.EventListener(dispatcher)
+        self.assertTrue(listener.daemon)
+        listener.released({'uuid': 't1'})
+        listener.worker_online({'hostname': 'w1'})
+        listener.worker_offline({'hostname': 'w2'})
+        listener.heartbeat({'hostname': 'w3'})
+        dispatcher.released.assert_called_once_with('t1')
+        dispatcher.worker_online.assert_called_once_with('w1')
+        dispatcher.worker_offline.assert_called_once_with('w2')
+        dispatcher.refresh.assert_called_once_with()
+
+
+class TestGetDispatcher(unittest.TestCase):
+
+    @mock.patch(MODULE + '_dispatcher', None)
+    @mock.patch(MODULE + 'ReservationDispatcher')
+    def test_get_dispatcher(self, dispatcher_class):
+        on_release, restore = mock.Mock(), mock.Mock()
+        dispatcher = reservations.get_dispatcher(on_release, restore)
+        self.assertEqual(dispatcher, dispatcher_class.return_value)
+        self.assertEqual(reservations.get_dispatcher(), dispatcher)
+        dispatcher_class.assert_called_once_with(on_release, restore)
+        dispatcher.start.assert_called_once_with()
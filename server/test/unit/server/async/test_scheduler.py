@@ -16,6 +16,11 @@ from pulp.server.managers.factory import initialize
 initialize()
 
 
+def version(number, deleted_count=10, deleted=(), changed_count=10, changed=()):
+    return {'version': number, 'deleted_count': deleted_count, 'deleted': list(deleted),
+            'changed_count': changed_count, 'changed': list(changed)}
+
+
 class TestSchedulerInit(unittest.TestCase):
 
     @mock.patch.object(scheduler.Scheduler, 'setup_schedule', new=mock.MagicMock())
@@ -157,6 +162,8 @@ class TestSchedulerTick(unittest.TestCase):
 class TestSchedulerSetupSchedule(unittest.TestCase):
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch('pulp.server.managers.schedule.utils.get_version',
+                new=mock.Mock(return_value=version(1)))
     @mock.patch.object(scheduler.Scheduler, '_mongo_initialized', new=False)
     @mock.patch('itertools.imap')
     @mock.patch('pulp.server.async.scheduler.db_connection')
@@ -169,6 +176,8 @@ class TestSchedulerSetupSchedule(unittest.TestCase):
         self.assertTrue(scheduler.Scheduler._mongo_initialized)
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch('pulp.server.managers.schedule.utils.get_version',
+                new=mock.Mock(return_value=version(1)))
     @mock.patch.object(scheduler.Scheduler, '_mongo_initialized', new=True)
     @mock.patch('itertools.imap')
     @mock.patch('pulp.server.async.scheduler.db_connection')
@@ -181,6 +190,8 @@ class TestSchedulerSetupSchedule(unittest.TestCase):
         self.assertTrue(scheduler.Scheduler._mongo_initialized)
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch('pulp.server.managers.schedule.utils.get_version',
+                new=mock.Mock(return_value=version(1)))
     @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled', return_value=[])
     def test_loads_app_schedules(self, mock_get_enabled):
@@ -194,6 +205,8 @@ class TestSchedulerSetupSchedule(unittest.TestCase):
             self.assertTrue(isinstance(sched_instance._schedule.get(key), ScheduleEntry))
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch('pulp.server.managers.schedule.utils.get_version',
+                new=mock.Mock(return_value=version(1)))
     @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
     def test_loads_db_schedules(self, mock_get_enabled):
@@ -219,49 +232,137 @@ class TestSchedulerScheduleChanged(unittest.TestCase):
     @mock.patch('threading.Thread', new=mock.MagicMock())
     @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
-    @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_count_changed(self, mock_updated_since, mock_get_enabled):
+    @mock.patch('pulp.server.managers.schedule.utils.get_version')
+    def test_version_changed(self, mock_get_version, mock_get_enabled):
         """
-        This test ensures that if the number of enabled schedules changes, the schedule_changed
-        property returns True.
+        This test ensures that if the version of the scheduled calls changes, the
+        schedule_changed property returns True.
         """
-        mock_updated_since.return_value.count.return_value = 0
+        mock_get_version.return_value = version(4, deleted_count=0, changed_count=0)
         mock_get_enabled.return_value = SCHEDULES
         sched_instance = scheduler.Scheduler()
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        mock_get_enabled.return_value.count.return_value = sched_instance._loaded_from_db_count + 1
+        mock_get_version.return_value = version(5, deleted_count=0, changed_count=0)
 
         self.assertTrue(sched_instance.schedule_changed is True)
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
     @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
-    @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_new_updated(self, mock_updated_since, mock_get_enabled):
+    @mock.patch('pulp.server.managers.schedule.utils.get_version')
+    def test_no_changes(self, mock_get_version, mock_get_enabled):
+        mock_get_version.return_value = version(4, deleted_count=0, changed_count=0)
         mock_get_enabled.return_value = SCHEDULES
         sched_instance = scheduler.Scheduler()
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        mock_get_enabled.return_value.count.return_value = sched_instance._loaded_from_db_count
-        mock_updated_since.return_value.count.return_value = 1
+        self.assertTrue(sched_instance.schedule_changed is False)
+        # the enabled schedules are not queried again
+        self.assertEqual(mock_get_enabled.call_count, 1)
 
-        self.assertTrue(sched_instance.schedule_changed is True)
 
-    @mock.patch('threading.Thread', new=mock.MagicMock())
-    @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
-    @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
-    @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_no_changes(self, mock_updated_since, mock_get_enabled):
-        mock_updated_since.return_value.count.return_value = 0
+@mock.patch('threading.Thread', new=mock.MagicMock())
+@mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
+@mock.patch('pulp.server.managers.schedule.utils.get_by_ids')
+@mock.patch('pulp.server.managers.schedule.utils.get_enabled')
+@mock.patch('pulp.server.managers.schedule.utils.get_version')
+class TestSchedulerUpdateSchedule(unittest.TestCase):
+
+    def _scheduler(self, mock_get_version, mock_get_enabled):
+        mock_get_version.return_value = version(1)
         mock_get_enabled.return_value = SCHEDULES
         sched_instance = scheduler.Scheduler()
+        mock_get_enabled.reset_mock()
+        return sched_instance
+
+    def test_added_and_updated(self, mock_get_version, mock_get_enabled, mock_get_by_ids):
+        sched_instance = self._scheduler(mock_get_version, mock_get_enabled)
+        new_schedule = dict(SCHEDULES[0], _id=u'529f4bd93de3a31d0ec77341',
+                            last_updated=1387218600.0)
+        # updated by a process whose clock is behind
+        updated_schedule = dict(SCHEDULES[1], last_updated=1387218500.0)
+        mock_get_by_ids.return_value = [new_schedule, updated_schedule]
+        # the oldest ID was changed before the schedule was loaded
+        mock_get_version.return_value = version(
+            3, changed_count=12, changed=[u'529f4bd93de3a31d0ec77338', u'529f4bd93de3a31d0ec77341',
+                                          u'529f4bd93de3a31d0ec77339'])
+
+        sched_instance.update_schedule()
+
+        mock_get_by_ids.assert_called_once_with(
+            set([u'529f4bd93de3a31d0ec77341', u'529f4bd93de3a31d0ec77339']))
+        self.assertFalse(mock_get_enabled.called)
+        self.assertTrue('529f4bd93de3a31d0ec77341' in sched_instance._schedule)
+        self.assertTrue('529f4bd93de3a31d0ec77339' in sched_instance._schedule)
+        self.assertEqual(sched_instance._loaded_from_db_count, 3)
+        self.assertEqual(sched_instance._most_recent_timestamp, 1387218600.0)
+        self.assertEqual(sched_instance._version['version'], 3)
+
+    def test_disabled(self, mock_get_version, mock_get_enabled, mock_get_by_ids):
+        sched_instance = self._scheduler(mock_get_version, mock_get_enabled)
+        mock_get_by_ids.return_value = [dict(SCHEDULES[0], enabled=False,
+                                             last_updated=1387218600.0)]
+        mock_get_version.return_value = version(2, changed_count=11,
+                                                changed=[u'529f4bd93de3a31d0ec77338'])
+
+        sched_instance.update_schedule()
+
+        self.assertTrue('529f4bd93de3a31d0ec77338' not in sched_instance._schedule)
+        self.assertEqual(sched_instance._loaded_from_db_count, 1)
+
+    def test_no_remaining_runs(self, mock_get_version, mock_get_enabled, mock_get_by_ids):
+        sched_instance = self._scheduler(mock_get_version, mock_get_enabled)
+        mock_get_by_ids.return_value = [dict(SCHEDULES[1], remaining_runs=0,
+                                             last_updated=1387218600.0)]
+        mock_get_version.return_value = version(2, changed_count=11,
+                                                changed=[u'529f4bd93de3a31d0ec77339'])
+
+        sched_instance.update_schedule()
+
+        self.assertTrue('529f4bd93de3a31d0ec77339' not in sched_instance._schedule)
+        self.assertEqual(sched_instance._loaded_from_db_count, 1)
+
+    def test_deleted(self, mock_get_version, mock_get_enabled, mock_get_by_ids):
+        sched_instance = self._scheduler(mock_get_version, mock_get_enabled)
+        # the oldest ID was deleted before the schedule was loaded
+        mock_get_version.return_value = version(
+            2, deleted_count=11,
+            deleted=[u'529f4bd93de3a31d0ec77339', u'529f4bd93de3a31d0ec77338'])
+
+        sched_instance.update_schedule()
+
+        self.assertFalse(mock_get_by_ids.called)
+        self.assertTrue('529f4bd93de3a31d0ec77338' not in sched_instance._schedule)
+        self.assertTrue('529f4bd93de3a31d0ec77339' in sched_instance._schedule)
+        self.assertEqual(sched_instance._loaded_from_db_count, 1)
+        self.assertEqual(sched_instance._version['deleted_count'], 11)
+
+    def test_deleted_not_retained(self, mock_get_version, mock_get_enabled, mock_get_by_ids):
+        """
+        When more calls were deleted than the version document keeps, the schedule is reloaded.
+        """
+        sched_instance = self._scheduler(mock_get_version, mock_get_enabled)
+        mock_get_version.return_value = version(5, deleted_count=13,
+                                                deleted=[u'529f4bd93de3a31d0ec77338'])
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        # -1 because there is an ignored schedule that has 0 remaining runs
-        mock_get_enabled.return_value.count.return_value = len(SCHEDULES) - 1
+        sched_instance.update_schedule()
 
-        self.assertTrue(sched_instance.schedule_changed is False)
+        mock_get_enabled.assert_called_once_with()
+        self.assertFalse(mock_get_by_ids.called)
+        self.assertEqual(sched_instance._version['deleted_count'], 13)
+
+    def test_changed_not_retained(self, mock_get_version, mock_get_enabled, mock_get_by_ids):
+        """
+        When more calls were changed than the version document keeps, the schedule is reloaded.
+        """
+        sched_instance = self._scheduler(mock_get_version, mock_get_enabled)
+        mock_get_version.return_value = version(5, changed_count=13,
+                                                changed=[u'529f4bd93de3a31d0ec77338'])
+
+        sched_instance.update_schedule()
+
+        mock_get_enabled.assert_called_once_with()
+        self.assertFalse(mock_get_by_ids.called)
+        self.assertEqual(sched_instance._version['changed_count'], 13)
 
 
 class TestSchedulerSchedule(unittest.TestCase):
@@ -279,15 +380,17 @@ class TestSchedulerSchedule(unittest.TestCase):
         mock_get_schedule.assert_called_once_with()
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch.object(scheduler.Scheduler, 'update_schedule')
     @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
     @mock.patch.object(scheduler.Scheduler, 'schedule_changed', new=True)
-    def test_schedule_changed(self, mock_setup_schedule):
+    def test_schedule_changed(self, mock_setup_schedule, mock_update_schedule):
         sched_instance = scheduler.Scheduler()
+        sched_instance._schedule = {}
 
         sched_instance.schedule
 
-        # make sure it called the setup_schedule() method
-        mock_setup_schedule.assert_called_once_with()
+        # make sure it applied the changes instead of reloading the schedule
+        mock_update_schedule.assert_called_once_with()
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
     @mock.patch.object(scheduler.Scheduler, 'schedule_changed', return_value=False)
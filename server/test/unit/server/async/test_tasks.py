@@ -1,7 +1,6 @@
 """
 This module contains tests for the pulp.server.async.tasks module.
 """
-from datetime import datetime
 import signal
 import unittest
 import uuid
@@ -15,14 +14,15 @@ from mongoengine import ValidationError
 
 from ...base import PulpServerTests, ResourceReservationTests
 from pulp.common import dateutils
-from pulp.common.constants import (CALL_CANCELED_STATE, CALL_FINISHED_STATE,
-                                   SCHEDULER_WORKER_NAME, RESOURCE_MANAGER_WORKER_NAME)
+from pulp.common.constants import (CALL_CANCELED_STATE, CALL_FINISHED_STATE, CALL_RUNNING_STATE,
+                                   CALL_WAITING_STATE)
 from pulp.common.tags import action_tag, resource_tag, RESOURCE_CONSUMER_TYPE
 from pulp.devel.unit.util import compare_dict
 from pulp.server.async import app, tasks
-from pulp.server.db.model import Worker, TaskStatus
+from pulp.server.db.model import TaskStatus
 from pulp.server.db.reaper import queue_reap_expired_documents
-from pulp.server.exceptions import NoWorkers, PulpException, PulpCodedException
+from pulp.server.exceptions import (MissingResource, PulpException, PulpCodedException,
+                                    error_codes)
 from pulp.server.maintenance.monthly import queue_monthly_maintenance
 
 
@@ -35,15 +35,32 @@ WORKER_3 = 'worker-3'
 class TestQueueReservedTask(ResourceReservationTests):
 
     def setUp(self):
-        self.patch_a = mock.patch('pulp.server.async.tasks.get_worker_for_reservation')
-        self.mock_get_worker_for_reservation = self.patch_a.start()
+        self.patch_a = mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+        self.mock_get_dispatcher = self.patch_a.start()
+        self.mock_dispatcher = self.mock_get_dispatcher.return_value
 
-        self.patch_b = mock.patch('pulp.server.async.tasks._get_unreserved_worker')
-        self.mock_get_unreserved_worker = self.patch_b.start()
+        super(TestQueueReservedTask, self).setUp()
+
+    def tearDown(self):
+        self.patch_a.stop()
+        super(TestQueueReservedTask, self).tearDown()
 
-        self.patch_c = mock.patch('pulp.server.async.tasks.time', autospec=True)
-        self.mock_time = self.patch_c.start()
+    def test_submits_request(self):
+        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
+        self.mock_get_dispatcher.assert_called_once_with(
+            on_release=tasks._release_reservation, restore=tasks._ReservedTaskRequest.waiting)
+        request = self.mock_dispatcher.submit.call_args[0][0]
+        self.assertEqual(request.name, 'task_name')
+        self.assertEqual(request.task_id, 'my_task_id')
+        self.assertEqual(request.resource_id, 'my_resource_id')
+        self.assertEqual(request.inner_args, [1, 2])
+        self.assertEqual(request.inner_kwargs, {'a': 2})
+        self.assertFalse(self.mock_dispatcher.released.called)
+
+
+class TestReservedTaskRequest(ResourceReservationTests):
 
+    def setUp(self):
         self.patch_d = mock.patch('pulp.server.async.tasks.ReservedResource', autospec=True)
         self.mock_reserved_resource = self.patch_d.start()
 
@@ -51,83 +68,74 @@ class TestQueueReservedTask(ResourceReservationTests):
         self.mock_celery = self.patch_e.start()
         self.mock_celery.tasks = {'task_name': mock.Mock()}
 
-        self.patch_f = mock.patch('pulp.server.async.tasks._release_resource', autospec=True)
-        self.mock__release_resource = self.patch_f.start()
+        self.patch_f = mock.patch('pulp.server.async.tasks.WaitingReservation', autospec=True)
+        self.mock_waiting = self.patch_f.start()
 
-        super(TestQueueReservedTask, self).setUp()
+        self.request = tasks._ReservedTaskRequest('task_name', 'my_task_id', 'my_resource_id',
+                                                  [1, 2], {'a': 2})
+
+        super(TestReservedTaskRequest, self).setUp()
 
     def tearDown(self):
-        self.patch_a.stop()
-        self.patch_b.stop()
-        self.patch_c.stop()
         self.patch_d.stop()
         self.patch_e.stop()
         self.patch_f.stop()
-        super(TestQueueReservedTask, self).tearDown()
+        super(TestReservedTaskRequest, self).tearDown()
 
-    def test_creates_and_saves_reserved_resource(self):
-        self.mock_get_worker_for_reservation.return_value = Worker(
-            name='worker1', last_heartbeat=datetime.utcnow())
-        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
+    def test_dispatch_creates_and_saves_reserved_resource(self):
+        self.request.dispatch('worker1')
         self.mock_reserved_resource.assert_called_once_with(task_id='my_task_id',
                                                             worker_name='worker1',
                                                             resource_id='my_resource_id')
         self.mock_reserved_resource.return_value.save.assert_called_once_with()
 
-    def test_dispatches_inner_task(self):
-        self.mock_get_worker_for_reservation.return_value = Worker(
-            name='worker1', last_heartbeat=datetime.utcnow())
-        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
+    def test_dispatch_inner_task(self):
+        self.request.dispatch('worker1')
         apply_async = self.mock_celery.tasks['task_name'].apply_async
-        apply_async.assert_called_once_with(1, 2, a=2, routing_key='worker1', task_id='my_task_id',
-                                            exchange='C.dq')
-
-    def test_dispatches__release_resource(self):
-        self.mock_get_worker_for_reservation.return_value = Worker(
-            name='worker1', last_heartbeat=datetime.utcnow())
-        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
-        self.mock__release_resource.apply_async.assert_called_once_with(('my_task_id',),
-                                                                        routing_key='worker1',
-                                                                        exchange='C.dq')
-
-    def test_get_worker_for_reservation_breaks_out_of_loop(self):
-        self.mock_get_worker_for_reservation.return_value = Worker(
-            name='worker1', last_heartbeat=datetime.utcnow())
-        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
-        self.assertTrue(not self.mock_get_unreserved_worker.called)
-        self.assertTrue(not self.mock_time.sleep.called)
-
-    def test_get_unreserved_worker_breaks_out_of_loop(self):
-        self.mock_get_worker_for_reservation.side_effect = NoWorkers()
-        self.mock_get_unreserved_worker.return_value = Worker(name='worker1',
-                                                              last_heartbeat=datetime.utcnow())
-        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
-        self.assertTrue(not self.mock_time.sleep.called)
-
-    def test_loops_and_sleeps_waiting_for_available_worker(self):
-        self.mock_get_worker_for_reservation.side_effect = NoWorkers()
-        self.mock_get_unreserved_worker.side_effect = NoWorkers()
-
-        class BreakOutException(Exception):
-            pass
-
-        def side_effect(*args):
-            def second_call(*args):
-                raise BreakOutException()
-            self.mock_time.sleep.side_effect = second_call
-            return None
-
-        self.mock_time.sleep.side_effect = side_effect
-
-        try:
-            tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2],
-                                       {'a': 2})
-        except BreakOutException:
-            pass
-        else:
-            self.fail('_queue_reserved_task should have raised a BreakOutException')
-
-        self.mock_time.sleep.assert_has_calls([mock.call(0.25), mock.call(0.25)])
+        apply_async.assert_called_once_with(
+            1, 2, a=2, routing_key='worker1', task_id='my_task_id', exchange='C.dq',
+            headers={tasks.RESERVED_RESOURCE_HEADER: 'my_resource_id'})
+        self.assertEqual(self.request.inner_kwargs, {'a': 2})
+
+    def test_dispatch_keeps_headers(self):
+        self.request.inner_kwargs['headers'] = {'h': 1}
+        self.request.dispatch('worker1')
+        apply_async = self.mock_celery.tasks['task_name'].apply_async
+        self.assertEqual(apply_async.call_args[1]['headers'],
+                         {'h': 1, tasks.RESERVED_RESOURCE_HEADER: 'my_resource_id'})
+        self.assertEqual(self.request.inner_kwargs['headers'], {'h': 1})
+
+    def test_dispatch_not_parked(self):
+        self.request.dispatch('worker1')
+        self.assertFalse(self.mock_waiting.objects.called)
+
+    def test_dispatch_parked(self):
+        self.request.parked = True
+        self.request.dispatch('worker1')
+        self.mock_waiting.objects.assert_called_once_with(task_id='my_task_id')
+        self.mock_waiting.objects.return_value.delete.assert_called_once_with()
+        self.assertFalse(self.request.parked)
+
+    @mock.patch('pulp.server.async.tasks.time')
+    def test_park(self, mock_time):
+        self.request.park()
+        self.mock_waiting.assert_called_once_with(
+            task_id='my_task_id', task_name='task_name', resource_id='my_resource_id',
+            arguments=tasks.bson_dumps([[1, 2], {'a': 2}]), queued=mock_time.time.return_value)
+        self.mock_waiting.return_value.save.assert_called_once_with()
+        self.assertTrue(self.request.parked)
+
+    def test_waiting(self):
+        self.mock_waiting.objects.order_by.return_value = [mock.Mock(
+            task_name='task_name', task_id='my_task_id', resource_id='my_resource_id',
+            arguments=tasks.bson_dumps([[1, 2], {'a': 2}]))]
+        requests = tasks._ReservedTaskRequest.waiting()
+        self.mock_waiting.objects.order_by.assert_called_once_with('queued')
+        self.assertEqual(len(requests), 1)
+        self.assertEqual((requests[0].name, requests[0].task_id, requests[0].resource_id),
+                         ('task_name', 'my_task_id', 'my_resource_id'))
+        self.assertEqual((requests[0].inner_args, requests[0].inner_kwargs), ([1, 2], {'a': 2}))
+        self.assertTrue(requests[0].parked)
 
 
 class TestDeleteWorker(ResourceReservationTests):
@@ -214,50 +222,59 @@ class TestDeleteWorker(ResourceReservationTests):
         self.mock_cancel.assert_has_calls([mock.call(mock_task_id_a), mock.call(mock_task_id_b)])
 
 
-class TestReleaseResource(unittest.TestCase):
+@mock.patch('pulp.server.async.tasks.Task')
+@mock.patch('pulp.server.async.tasks.TaskStatus')
+@mock.patch('pulp.server.async.tasks.ReservedResource')
+class TestReleaseReservation(unittest.TestCase):
 
-    def setUp(self):
-        self.patch_a = mock.patch('pulp.server.async.tasks.ReservedResource', autospec=True)
-        self.mock_reserved_resource = self.patch_a.start()
+    def test_deletes_reserved_resource(self, mock_reserved_resource, mock_task_status, mock_task):
+        tasks._release_reservation('my_task_id')
+        mock_reserved_resource.objects.assert_called_once_with(task_id='my_task_id')
+        mock_reserved_resource.objects.return_value.delete.assert_called_once_with()
 
-        self.patch_b = mock.patch('pulp.server.async.tasks.TaskStatus', autospec=True)
-        self.mock_task_status = self.patch_b.start()
+    def test_finds_running_task_by_uuid(self, mock_reserved_resource, mock_task_status,
+                                        mock_task):
+        tasks._release_reservation('my_task_id')
+        mock_task_status.objects.filter.assert_called_once_with(task_id='my_task_id',
+                                                                state=CALL_RUNNING_STATE)
+        self.assertFalse(mock_task.return_value.on_failure.called)
 
-        self.patch_c = mock.patch('pulp.server.async.tasks.Task', autospec=True)
-        self.mock_task = self.patch_c.start()
+    def test_calls_on_failure_handler_if_task_id_is_not_final(self, mock_reserved_resource,
+                                                              mock_task_status, mock_task):
+        mock_task_status.objects.filter.return_value.only.return_value = [mock.Mock()]
+        tasks._release_reservation('my_task_id')
+        on_failure = mock_task.return_value.on_failure
+        self.assertEqual(on_failure.call_count, 1)
+        self.assertEqual(on_failure.call_args[0][0].error_code, error_codes.PLP0049)
+        self.assertEqual(on_failure.call_args[0][1], 'my_task_id')
 
-        self.patch_d = mock.patch('pulp.server.async.tasks.constants', autospec=True)
-        self.mock_constants = self.patch_d.start()
 
-        super(TestReleaseResource, self).setUp()
+class TestTaskAfterReturn(unittest.TestCase):
 
-    def tearDown(self):
-        self.patch_a.stop()
-        self.patch_b.stop()
-        self.patch_c.stop()
-        self.patch_d.stop()
-        super(TestReleaseResource, self).tearDown()
-
-    def test_deletes_reserved_resource(self):
-        mock_task_id = mock.Mock()
-        tasks._release_resource(mock_task_id)
-        self.mock_reserved_resource.objects.assert_called_once_with(task_id=mock_task_id)
-        self.mock_reserved_resource.objects.return_value.delete.assert_called_once_with()
-
-    def test_finds_running_task_by_uuid(self):
-        mock_task_id = mock.Mock()
-        tasks._release_resource(mock_task_id)
-        filter_obj = self.mock_task_status.objects.filter
-        filter_obj.assert_called_once_with(task_id=mock_task_id,
-                                           state=self.mock_constants.CALL_RUNNING_STATE)
-
-    def test_calls_on_failure_handler_if_task_id_is_not_final(self):
-        self.mock_task_status.objects.filter.return_value = [mock.Mock()]
-        mock_task = mock.Mock()
-        self.mock_task.return_value = mock_task
-        mock_task_id = mock.Mock()
-        tasks._release_resource(mock_task_id)
-        self.assertTrue(mock_task.on_failure.called)
+    @mock.patch('pulp.server.async.tasks.ReservedResource')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_deletes_reserved_resource(self, mock_request, mock_reserved_resource):
+        mock_request.called_directly = False
+        mock_request.headers = {tasks.RESERVED_RESOURCE_HEADER: 'my_resource_id'}
+        tasks.Task().after_return('SUCCESS', None, 'my_task_id', [], {}, None)
+        mock_reserved_resource.objects.assert_called_once_with(task_id='my_task_id')
+        mock_reserved_resource.objects.return_value.delete.assert_called_once_with()
+
+    @mock.patch('pulp.server.async.tasks.ReservedResource')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_not_reserved(self, mock_request, mock_reserved_resource):
+        mock_request.called_directly = False
+        for headers in (None, {}, {'other': 1}):
+            mock_request.headers = headers
+            tasks.Task().after_return('SUCCESS', None, 'my_task_id', [], {}, None)
+        self.assertFalse(mock_reserved_resource.objects.called)
+
+    @mock.patch('pulp.server.async.tasks.ReservedResource')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_called_directly(self, mock_request, mock_reserved_resource):
+        mock_request.called_directly = True
+        tasks.Task().after_return('SUCCESS', None, 'my_task_id', [], {}, None)
+        self.assertFalse(mock_reserved_resource.objects.called)
 
 
 class TestTaskResult(unittest.TestCase):
@@ -434,6 +451,33 @@ class TestTaskOnSuccessHandler(ResourceReservationTests):
         dateutils.parse_iso8601_datetime(new_task_status['finish_time'])
         self.assertEqual(new_task_status['spawned_tasks'], ['foo-id'])
 
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_spawned_tasks_appended(self, mock_request):
+        retval = tasks.TaskResult(spawned_tasks=[{'task_id': 'foo-id'}, {'task_id': 'bar-id'}])
+        task_id = str(uuid.uuid4())
+        mock_request.called_directly = False
+        TaskStatus(task_id, spawned_tasks=['foo-id']).save()
+
+        task = tasks.Task()
+        task.on_success(retval, task_id, [], {})
+
+        new_task_status = TaskStatus.objects(task_id=task_id).first()
+        self.assertEqual(new_task_status['spawned_tasks'], ['foo-id', 'bar-id'])
+
+    @mock.patch('pulp.server.async.tasks.signals')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_sends_task_status_message(self, mock_request, mock_signals):
+        task_id = str(uuid.uuid4())
+        mock_request.called_directly = False
+        TaskStatus(task_id).save()
+
+        task = tasks.Task()
+        task.on_success('random_return_value', task_id, [], {})
+
+        mock_signals.post_save.send.assert_called_once_with(TaskStatus, document=mock.ANY)
+        document = mock_signals.post_save.send.call_args[1]['document']
+        self.assertEqual(document['state'], 'finished')
+
     @mock.patch('pulp.server.async.tasks.Task.request')
     def test_with_canceled_task(self, mock_request):
         retval = 'random_return_value'
@@ -572,6 +616,57 @@ class TestTaskOnFailureHandler(ResourceReservationTests):
         self.assertFalse(mock_increment_failure.called)
 
 
+class TestTaskCall(ResourceReservationTests):
+
+    @mock.patch('pulp.server.async.tasks.PulpTask.__call__')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_sets_running(self, mock_request, mock_call):
+        task_id = str(uuid.uuid4())
+        mock_request.called_directly = False
+        mock_request.id = task_id
+        TaskStatus(task_id).save()
+
+        task = tasks.Task()
+        result = task(1, a=2)
+
+        self.assertTrue(result is mock_call.return_value)
+        mock_call.assert_called_once_with(1, a=2)
+        task_status = TaskStatus.objects(task_id=task_id).first()
+        self.assertEqual(task_status['state'], 'running')
+        dateutils.parse_iso8601_datetime(task_status['start_time'])
+
+    @mock.patch('pulp.server.async.tasks.PulpTask.__call__')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_creates_missing_task_status(self, mock_request, mock_call):
+        task_id = str(uuid.uuid4())
+        mock_request.called_directly = False
+        mock_request.id = task_id
+
+        task = tasks.Task()
+        task()
+
+        self.assertTrue(mock_call.called)
+        task_status = TaskStatus.objects(task_id=task_id).first()
+        self.assertEqual(task_status['state'], 'running')
+
+    @mock.patch('pulp.server.async.tasks.PulpTask.__call__')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_canceled_task_not_run(self, mock_request, mock_call):
+        task_id = str(uuid.uuid4())
+        mock_request.called_directly = False
+        mock_request.id = task_id
+        TaskStatus(task_id, state=CALL_CANCELED_STATE).save()
+
+        task = tasks.Task()
+        result = task()
+
+        self.assertEqual(result, None)
+        self.assertFalse(mock_call.called)
+        self.assertEqual(TaskStatus.objects(task_id=task_id).count(), 1)
+        task_status = TaskStatus.objects(task_id=task_id).first()
+        self.assertEqual(task_status['state'], CALL_CANCELED_STATE)
+
+
 class TestTaskApplyAsync(ResourceReservationTests):
 
     @mock.patch('celery.Task.apply_async')
@@ -821,6 +916,70 @@ class TestCancel(PulpServerTests):
         self.assertEqual(task_status['state'], CALL_CANCELED_STATE)
 
 
+class TestCancelGroup(PulpServerTests):
+    """
+    Test the tasks.cancel_group() function.
+    """
+    def setUp(self):
+        PulpServerTests.setUp(self)
+        TaskStatus.objects().delete()
+        self.group_id = uuid.uuid4()
+
+    def tearDown(self):
+        PulpServerTests.tearDown(self)
+        TaskStatus.objects().delete()
+
+    @mock.patch('pulp.server.async.tasks.CANCEL_BATCH_SIZE', 2)
+    @mock.patch('pulp.server.async.tasks.controller.revoke', autospec=True)
+    @mock.patch('pulp.server.async.tasks._logger', autospec=True)
+    def test_cancel_group(self, _logger, revoke):
+        for task_id in ('t1', 't2', 't3'):
+            TaskStatus(task_id, 'test_worker', group_id=self.group_id).save()
+        TaskStatus('t4', 'test_worker', group_id=self.group_id, state=CALL_FINISHED_STATE).save()
+        TaskStatus('t5', 'test_worker').save()
+
+        canceled = tasks.cancel_group(str(self.group_id))
+
+        self.assertEqual(sorted(canceled), ['t1', 't2', 't3'])
+        # the tasks are revoked in batches of CANCEL_BATCH_SIZE
+        self.assertEqual(revoke.call_count, 2)
+        revoked = [task_id for call in revoke.mock_calls for task_id in call[1][0]]
+        self.assertEqual(sorted(revoked), ['t1', 't2', 't3'])
+        states = dict((t['task_id'], t['state']) for t in TaskStatus.objects())
+        self.assertEqual(states, {'t1': CALL_CANCELED_STATE, 't2': CALL_CANCELED_STATE,
+                                  't3': CALL_CANCELED_STATE, 't4': CALL_FINISHED_STATE,
+                                  't5': CALL_WAITING_STATE})
+
+    @mock.patch('pulp.server.async.tasks.controller.revoke', autospec=True)
+    @mock.patch('pulp.server.managers.consumer.agent.AgentManager.cancel_request', autospec=True)
+    @mock.patch('pulp.server.async.tasks._logger', autospec=True)
+    def test_cancel_group_agent(self, logger, cancel, revoke):
+        consumer_id = '18d'
+        tags = [
+            action_tag('UNUSED'),
+            resource_tag(RESOURCE_CONSUMER_TYPE, consumer_id)
+        ]
+        TaskStatus('t1', tags=tags, worker_name='agent', group_id=self.group_id).save()
+
+        tasks.cancel_group(str(self.group_id))
+
+        cancel.assert_called_once_with(mock.ANY, consumer_id, 't1')
+        self.assertFalse(revoke.called)
+        task_status = TaskStatus.objects(task_id='t1').first()
+        self.assertEqual(task_status['state'], CALL_CANCELED_STATE)
+
+    @mock.patch('pulp.server.async.tasks.controller.revoke', autospec=True)
+    @mock.patch('pulp.server.async.tasks._logger', autospec=True)
+    def test_cancel_group_finished(self, _logger, revoke):
+        TaskStatus('t1', 'test_worker', group_id=self.group_id, state=CALL_FINISHED_STATE).save()
+
+        self.assertEqual(tasks.cancel_group(str(self.group_id)), [])
+        self.assertFalse(revoke.called)
+
+    def test_cancel_group_missing(self):
+        self.assertRaises(MissingResource, tasks.cancel_group, str(self.group_id))
+
+
 class TestRegisterSigtermHandler(unittest.TestCase):
     """
     Test the register_sigterm_handler() decorator.
@@ -950,98 +1109,6 @@ class TestScheduledTasks(unittest.TestCase):
         mock_monthly_apply_async.assert_called_once_with(tags=[action_tag('monthly')])
 
 
-class TestGetWorkerForReservation(ResourceReservationTests):
-
-    @mock.patch('pulp.server.async.tasks.Worker.objects')
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_existing_reservation_correctly_found(self, mock_reserved_resource,
-                                                  mock_worker_objects):
-        get_objects = mock_reserved_resource.objects
-        tasks.get_worker_for_reservation('resource1')
-        get_objects.assert_called_once_with(resource_id='resource1')
-        get_objects.return_value.first.assert_called_once_with()
-
-    @mock.patch('pulp.server.async.tasks.Worker.objects')
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_correct_worker_returned(self, mock_reserved_resource, mock_worker_objects):
-        find_one = mock_reserved_resource.objects.return_value.first
-        find_one.return_value = {'worker_name': 'worker1'}
-        mock_worker_objects.return_value.first.return_value = find_one.return_value
-        result = tasks.get_worker_for_reservation('resource1')
-        self.assertTrue(result is find_one.return_value)
-
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_no_workers_raised_if_no_reservations(self, mock_reserved_resource):
-        find_one = mock_reserved_resource.objects.return_value.first
-        find_one.return_value = False
-        try:
-            tasks.get_worker_for_reservation('resource1')
-        except NoWorkers:
-            pass
-        else:
-            self.fail("NoWorkers() Exception should have been raised.")
-
-
-class TestGetUnreservedWorker(ResourceReservationTests):
-
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_reserved_resources_queried_correctly(self, mock_reserved_resource):
-        find = mock_reserved_resource.objects.all
-        find.return_value = [{'worker_name': 'a'}, {'worker_name': 'b'}]
-        try:
-            tasks._get_unreserved_worker()
-        except NoWorkers:
-            pass
-        else:
-            self.fail("NoWorkers() Exception should have been raised.")
-        find.assert_called_once_with()
-
-    @mock.patch('pulp.server.async.tasks.Worker.objects')
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_worker_returned_when_one_worker_is_not_reserved(self, mock_reserved_resource,
-                                                             mock_worker_objects):
-        get_online = mock_worker_objects.get_online
-        get_online.return_value = [{'name': 'a'}, {'name': 'b'}]
-        mock_reserved_resource.objects.all.return_value = [{'worker_name': 'a'}]
-        result = tasks._get_unreserved_worker()
-        self.assertEqual(result, {'name': 'b'})
-
-    @mock.patch('pulp.server.async.tasks.Worker.objects')
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_no_workers_raised_when_all_workers_reserved(self, mock_reserved_resource, mock_worker):
-        mock_worker.objects.return_value = [{'name': 'a'}, {'name': 'b'}]
-        find = mock_reserved_resource.objects
-        find.return_value = [{'worker_name': 'a'}, {'worker_name': 'b'}]
-        try:
-            tasks._get_unreserved_worker()
-        except NoWorkers:
-            pass
-        else:
-            self.fail("NoWorkers() Exception should have been raised.")
-
-    @mock.patch('pulp.server.async.tasks.Worker.objects')
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_no_workers_raised_when_there_are_no_workers(self, mock_reserved_resource, mock_worker):
-        mock_worker.objects.return_value = []
-        find = mock_reserved_resource.objects
-        find.return_value = [{'worker_name': 'a'}, {'worker_name': 'b'}]
-        try:
-            tasks._get_unreserved_worker()
-        except NoWorkers:
-            pass
-        else:
-            self.fail("NoWorkers() Exception should have been raised.")
-
-    def test_is_worker(self):
-        self.assertTrue(tasks._is_worker("a_worker@some.hostname"))
-
-    def test_is_not_worker_is_scheduler(self):
-        self.assertEquals(tasks._is_worker(SCHEDULER_WORKER_NAME + "@some.hostname"), False)
-
-    def test_is_not_worker_is_resource_mgr(self):
-        self.assertEquals(tasks._is_worker(RESOURCE_MANAGER_WORKER_NAME + "@some.hostname"), False)
-
-
 class TestPulpTask(unittest.TestCase):
 
     def test_check_task_type(self):
@@ -33,6 +33,18 @@ class TestHandleWorkerHeartbeat(unittest.TestCase):
         mock_worker.objects.return_value.update_one.\
             assert_called_once_with(set__last_heartbeat=mock_datetime.utcnow(), upsert=True)
 
+    @mock.patch('pulp.server.async.worker_watcher.datetime')
+    @mock.patch('pulp.server.async.worker_watcher._logger')
+    @mock.patch('pulp.server.async.worker_watcher.Worker')
+    def test_handle_worker_heartbeat_concurrency(self, mock_worker, mock_logger, mock_datetime):
+        """
+        Ensure that the concurrency of the worker is recorded when it is known.
+        """
+        worker_watcher.handle_worker_heartbeat('fake-worker', 4)
+        mock_worker.objects.return_value.update_one.\
+            assert_called_once_with(set__last_heartbeat=mock_datetime.utcnow(),
+                                    set__concurrency=4, upsert=True)
+
 
 class TestHandleWorkerOffline(unittest.TestCase):
     @mock.patch('pulp.server.async.worker_watcher._delete_worker')
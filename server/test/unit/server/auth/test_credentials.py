@@ -0,0 +1,91 @@
+import unittest
+
+from mock import patch
+
+from pulp.server.auth import credentials
+
+
+@patch('pulp.server.auth.credentials._ttl', return_value=30)
+class TestVerifiedCredentials(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = credentials.VerifiedCredentials(size=2)
+
+    def test_key(self, mock_ttl):
+        key = self.cache.key('admin', 'secret', 'salt,hash')
+
+        self.assertEqual(key, self.cache.key(u'admin', u'secret', 'salt,hash'))
+        self.assertNotEqual(key, self.cache.key('admin', 'secret', 'salt,other'))
+        self.assertNotEqual(key, self.cache.key('admin', 'other', 'salt,hash'))
+        self.assertNotEqual(key, credentials.VerifiedCredentials().key(
+            'admin', 'secret', 'salt,hash'))
+        self.assertFalse('secret' in key)
+
+    def test_key_unicode(self, mock_ttl):
+        key = self.cache.key(u'admin', u'p\xe4ssword', 'salt,hash')
+
+        self.assertEqual(key, self.cache.key('admin', 'p\xc3\xa4ssword', 'salt,hash'))
+
+    def test_verified(self, mock_ttl):
+        key = self.cache.key('admin', 'secret', 'salt,hash')
+
+        self.assertFalse(self.cache.verified(key))
+        self.cache.add(key, 'admin')
+        self.assertTrue(self.cache.verified(key))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    @patch('pulp.server.auth.credentials.time')
+    def test_expired(self, mock_time, mock_ttl):
+        mock_time.time.return_value = 100
+        self.cache.add('key', 'admin')
+
+        mock_time.time.return_value = 129
+        self.assertTrue(self.cache.verified('key'))
+        mock_time.time.return_value = 130
+        self.assertFalse(self.cache.verified('key'))
+        self.assertEqual(len(self.cache._entries), 0)
+
+    def test_disabled(self, mock_ttl):
+        mock_ttl.return_value = 0
+        self.cache.add('key', 'admin')
+
+        self.assertFalse(self.cache.verified('key'))
+
+    def test_size(self, mock_ttl):
+        self.cache.add('key1', 'admin')
+        self.cache.add('key2', 'admin')
+        self.cache.add('key3', 'admin')
+
+        self.assertEqual(self.cache._entries.keys(), ['key2', 'key3'])
+
+    def test_forget(self, mock_ttl):
+        self.cache.add('key1', 'admin')
+        self.cache.add('key2', 'other')
+
+        self.cache.forget('admin')
+
+        self.assertFalse(self.cache.verified('key1'))
+        self.assertTrue(self.cache.verified('key2'))
+
+    def test_clear(self, mock_ttl):
+        self.cache.add('key1', 'admin')
+
+        self.cache.clear()
+
+        self.assertFalse(self.cache.verified('key1'))
+
+
+class TestTTL(unittest.TestCase):
+
+    @patch('pulp.server.auth.credentials.config')
+    def test_ttl(self, mock_config):
+        mock_config.getfloat.return_value = 10.0
+
+        self.assertEqual(credentials._ttl(), 10.0)
+        mock_config.getfloat.assert_called_once_with('authentication', 'credential_cache_ttl')
+
+    @patch('pulp.server.auth.credentials.config')
+    def test_ttl_invalid(self, mock_config):
+        mock_config.getfloat.side_effect = ValueError()
+
+        self.assertEqual(credentials._ttl(), 0)
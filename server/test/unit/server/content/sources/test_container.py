@@ -224,10 +224,11 @@ class TestNectarListener(TestCase):
         report.data = Mock()
 
         # test
-        listener = NectarListener(batch)
+        listener = NectarListener(batch, 's-1')
         listener.download_succeeded(report)
 
         # validation
+        batch.health.succeeded.assert_called_once_with('s-1', report)
         batch.in_progress.decrement.assert_called_with()
         event.assert_called_once_with(report.data)
         event.return_value.assert_called_once_with(batch.listener)
@@ -245,10 +246,11 @@ class TestNectarListener(TestCase):
         report.error_msg = 'something bad happened'
 
         # test
-        listener = NectarListener(batch)
+        listener = NectarListener(batch, 's-1')
         listener.download_failed(report)
 
         # validation)
+        batch.health.failed.assert_called_once_with('s-1', report)
         self.assertFalse(event.called)
         self.assertFalse(batch.in_progress.decrement.called)
         self.assertEqual(len(report.data.errors), 1)
@@ -295,6 +297,44 @@ class TestBatch(TestCase):
         self.assertEqual(batch.listener, listener)
         self.assertRaises(NotImplementedError, batch)
 
+    @patch(MODULE + '.FIND_SOURCES_PAGE_SIZE', 2)
+    @patch(MODULE + '.managers')
+    def test_find_sources(self, managers):
+        primary = Mock()
+        container = Mock()
+        requests = [Mock(locator='l-%d' % n) for n in range(3)]
+        entries = {'l-0': [Mock()], 'l-2': [Mock(), Mock()]}
+        catalog = managers.content_catalog_manager.return_value
+        catalog.find_by_locators.side_effect = lambda locators: entries
+
+        # test
+        batch = Batch(primary, container, iter(requests), None)
+        found = list(batch.find_sources())
+
+        # validation
+        self.assertEqual(found, requests)
+        self.assertEqual(
+            catalog.find_by_locators.call_args_list,
+            [call(['l-0', 'l-1']), call(['l-2'])])
+        requests[0].find_sources.assert_called_once_with(
+            primary, container.sources, entries['l-0'], container.health)
+        requests[1].find_sources.assert_called_once_with(
+            primary, container.sources, [], container.health)
+        requests[2].find_sources.assert_called_once_with(
+            primary, container.sources, entries['l-2'], container.health)
+
+    def test_report_health(self):
+        container = Mock(sources={'s-1': Mock(), 's-2': Mock()})
+        report = DownloadReport()
+
+        # test
+        batch = Batch(Mock(), container, [], None)
+        batch.report_health(report)
+
+        # validation
+        self.assertEqual(sorted(container.health.dict.call_args[0][0]), ['s-1', 's-2'])
+        self.assertEqual(report.health, container.health.dict.return_value)
+
 
 class TestSerial(TestCase):
 
@@ -313,10 +353,12 @@ class TestSerial(TestCase):
         self.assertEqual(batch.requests, requests)
         self.assertEqual(batch.listener, listener)
 
+    @patch(MODULE + '.managers')
     @patch(MODULE + '.Started')
     @patch(MODULE + '.Succeeded')
     @patch(MODULE + '.Serial._download')
-    def test_download_succeeded(self, download, succeeded, started):
+    def test_download_succeeded(self, download, succeeded, started, managers):
+        managers.content_catalog_manager.return_value.find_by_locators.return_value = {}
         primary = Mock()
         sources = [
             Mock(id=1, url='u1'),
@@ -341,7 +383,7 @@ class TestSerial(TestCase):
         self.assertEqual(started.call_args_list, [call(r) for r in requests])
         self.assertEqual(started.return_value.call_count, len(requests))
         for r in requests:
-            r.find_sources.assert_called_once_with(primary, sources)
+            r.find_sources.assert_called_once_with(primary, sources, [], container.health)
         self.assertEqual(
             download.call_args_list,
             [call(r.sources[0][1], r.destination, r.sources[0][0]) for r in requests])
@@ -356,10 +398,12 @@ class TestSerial(TestCase):
         self.assertEqual(details.total_succeeded, 1)
         self.assertEqual(details.total_failed, 0)
 
+    @patch(MODULE + '.managers')
     @patch(MODULE + '.Started')
     @patch(MODULE + '.Failed')
     @patch(MODULE + '.Serial._download')
-    def test_download_failed(self, download, failed, started):
+    def test_download_failed(self, download, failed, started, managers):
+        managers.content_catalog_manager.return_value.find_by_locators.return_value = {}
         download.side_effect = DownloadFailed()
         primary = Mock()
         sources = [
@@ -385,7 +429,7 @@ class TestSerial(TestCase):
         self.assertEqual(started.call_args_list, [call(r) for r in requests])
         self.assertEqual(started.return_value.call_count, len(requests))
         for r in requests:
-            r.find_sources.assert_called_once_with(primary, sources)
+            r.find_sources.assert_called_once_with(primary, sources, [], container.health)
         download_calls = []
         for r in requests:
             for s, u in r.sources:
@@ -411,14 +455,17 @@ class TestSerial(TestCase):
         source.get_downloader.return_value = downloader
         primary = Mock()
 
+        container = Mock()
+
         # test
-        serial = Serial(primary, None, None, None)
+        serial = Serial(primary, container, None, None)
         serial._download(url, destination, source)
 
         # validation
         source.get_downloader.assert_called_once_with(primary.session)
         request.assert_called_once_with(url, destination)
         downloader.download_one.assert_called_once_with(request.return_value, events=True)
+        container.health.succeeded.assert_called_once_with(source.id, report)
 
     @patch(MODULE + '.DownloadRequest')
     def test__download_failed(self, request):
@@ -431,14 +478,17 @@ class TestSerial(TestCase):
         source.get_downloader.return_value = downloader
         primary = Mock()
 
+        container = Mock()
+
         # test
-        serial = Serial(primary, None, None, None)
+        serial = Serial(primary, container, None, None)
         self.assertRaises(DownloadFailed, serial._download, url, destination, source)
 
         # validation
         source.get_downloader.assert_called_once_with(primary.session)
         request.assert_called_once_with(url, destination)
         downloader.download_one.assert_called_once_with(request.return_value, events=True)
+        container.health.failed.assert_called_once_with(source.id, report)
 
 
 class TestThreaded(TestCase):
@@ -474,7 +524,7 @@ class TestThreaded(TestCase):
         fake_request.sources = iter(sources)
         fake_find.return_value = fake_queue
         # test
-        batch = Threaded(None, None, None, None)
+        batch = Threaded(None, Mock(), None, None)
         dispatched = batch.dispatch(fake_request)
 
         # validation
@@ -503,6 +553,27 @@ class TestThreaded(TestCase):
         self.assertFalse(fake_queue.put.called)
         self.assertFalse(fake_find.called)
 
+    @patch(MODULE + '.RLock', Mock())
+    @patch(MODULE + '.Tracker.decrement')
+    @patch(MODULE + '.Item')
+    @patch(MODULE + '.Threaded.find_queue')
+    def test_dispatch_skip_unavailable(self, fake_find, fake_item, fake_decrement):
+        fake_request = Mock()
+        sources = [(Mock(), 'http://1'), (Mock(), 'http://2')]
+        fake_request.sources = iter(sources)
+        container = Mock()
+        container.health.available.side_effect = [False, True]
+
+        # test
+        batch = Threaded(None, container, None, None)
+        dispatched = batch.dispatch(fake_request)
+
+        # validation
+        fake_find.assert_called_once_with(sources[1][0])
+        fake_item.assert_called_once_with(fake_request, sources[1][1])
+        self.assertTrue(dispatched)
+        self.assertFalse(fake_decrement.called)
+
     @patch(MODULE + '.RLock')
     @patch(MODULE + '.Threaded._add_queue')
     def test_find_queue(self, fake_add, fake_lock):
@@ -553,15 +624,17 @@ class TestThreaded(TestCase):
 
         # validation
         fake_queue.assert_called_with(fake_source, fake_primary.session)
-        fake_listener.assert_called_with(batch)
+        fake_listener.assert_called_with(batch, fake_source.id)
         fake_queue().start.assert_called_with()
         self.assertEqual(fake_queue().downloader.event_listener, fake_listener())
         self.assertEqual(batch.queues[fake_source.id], fake_queue())
         self.assertEqual(queue, fake_queue())
 
+    @patch(MODULE + '.managers')
     @patch(MODULE + '.Tracker.wait')
     @patch(MODULE + '.Threaded.dispatch')
-    def test_download(self, fake_dispatch, fake_wait):
+    def test_download(self, fake_dispatch, fake_wait, managers):
+        managers.content_catalog_manager.return_value.find_by_locators.return_value = {}
         primary = Mock()
         sources = [Mock(), Mock()]
         container = Mock(sources=sources)
@@ -586,7 +659,7 @@ class TestThreaded(TestCase):
         # validation
         # initial dispatch
         for request in requests:
-            request.find_sources.assert_called_with(primary, sources)
+            request.find_sources.assert_called_with(primary, sources, [], container.health)
         calls = fake_dispatch.call_args_list
         self.assertEqual(len(calls), len(requests))
         for i, request in enumerate(requests):
@@ -606,9 +679,11 @@ class TestThreaded(TestCase):
         self.assertEqual(report.downloads['source-2'].total_succeeded, 200)
         self.assertEqual(report.downloads['source-2'].total_failed, 10)
 
+    @patch(MODULE + '.managers')
     @patch(MODULE + '.Tracker.wait')
     @patch(MODULE + '.Threaded.dispatch')
-    def test_download_nothing(self, fake_dispatch, fake_wait):
+    def test_download_nothing(self, fake_dispatch, fake_wait, managers):
+        managers.content_catalog_manager.return_value.find_by_locators.return_value = {}
         primary = Mock()
         container = Mock(sources=[])
         requests = []
@@ -626,9 +701,11 @@ class TestThreaded(TestCase):
         self.assertEqual(len(report.downloads), 0)
         fake_wait.assert_called_once_with(0)
 
+    @patch(MODULE + '.managers')
     @patch(MODULE + '.Tracker.wait')
     @patch(MODULE + '.Threaded.dispatch')
-    def test_download_with_exception(self, fake_dispatch, fake_wait):
+    def test_download_with_exception(self, fake_dispatch, fake_wait, managers):
+        managers.content_catalog_manager.return_value.find_by_locators.return_value = {}
         primary = Mock()
         fake_dispatch.side_effect = ValueError()
         sources = [Mock(), Mock()]
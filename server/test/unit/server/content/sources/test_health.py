@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from mock import patch, Mock
+
+from pulp.common.constants import PRIMARY_ID
+from pulp.server.content.sources import health
+from pulp.server.content.sources.health import SourceHealth, HealthMonitor
+from pulp.server.content.sources.model import ContentSource, PrimarySource
+from pulp.server.content.sources import constants
+
+
+MODULE = 'pulp.server.content.sources.health'
+
+
+def source(source_id, priority):
+    return ContentSource(source_id, {constants.PRIORITY: str(priority)})
+
+
+def report(seconds=None, bytes_downloaded=0):
+    start = datetime(2016, 1, 1)
+    finish = None
+    if seconds is not None:
+        finish = start + timedelta(seconds=seconds)
+    return Mock(start_time=start, finish_time=finish, bytes_downloaded=bytes_downloaded)
+
+
+class TestSourceHealth(TestCase):
+
+    def test_init(self):
+        stats = SourceHealth('s-1')
+        self.assertEqual(stats.source_id, 's-1')
+        self.assertEqual(stats.error_rate, 0.0)
+        self.assertFalse(stats.demoted)
+        self.assertTrue(stats.available())
+
+    def test_succeeded(self):
+        stats = SourceHealth('s-1')
+
+        # test
+        stats.succeeded(2.0, 1000)
+        stats.succeeded(None, 0)
+
+        # validation
+        self.assertEqual(stats.total_succeeded, 2)
+        self.assertEqual(stats.latency, 2.0)
+        self.assertEqual(stats.throughput, 500.0)
+
+    def test_averages(self):
+        stats = SourceHealth('s-1')
+
+        # test
+        stats.succeeded(1.0, 100)
+        stats.succeeded(2.0, 400)
+
+        # validation
+        self.assertAlmostEqual(stats.latency, 1.0 + health.SMOOTHING)
+        self.assertAlmostEqual(stats.throughput, 100.0 + health.SMOOTHING * 100)
+
+    def test_demoted(self):
+        stats = SourceHealth('s-1')
+        for n in range(health.MIN_SAMPLES - 1):
+            stats.total_failed += 1
+
+        # validation
+        self.assertFalse(stats.demoted)
+        stats.total_failed += 1
+        self.assertTrue(stats.demoted)
+        self.assertEqual(stats.error_rate, 1.0)
+
+    @patch(MODULE + '.time')
+    def test_circuit_broken(self, fake_time):
+        fake_time.return_value = 1000
+        stats = SourceHealth('s-1')
+
+        # test
+        for n in range(health.FAILURE_THRESHOLD - 1):
+            stats.failed(1.0)
+        self.assertTrue(stats.available())
+        stats.failed(None)
+
+        # validation
+        self.assertFalse(stats.available())
+        self.assertTrue(stats.available(1000 + health.COOL_DOWN))
+        stats.succeeded(1.0, 10)
+        self.assertTrue(stats.available())
+        self.assertEqual(stats.consecutive_failures, 0)
+
+    def test_dict(self):
+        stats = SourceHealth('s-1')
+        stats.succeeded(1.0, 10)
+        expected = {
+            'total_succeeded': 1,
+            'total_failed': 0,
+            'error_rate': 0.0,
+            'latency': 1.0,
+            'throughput': 10.0,
+            'demoted': False,
+            'available': True,
+        }
+        self.assertEqual(stats.dict(), expected)
+
+
+class TestHealthMonitor(TestCase):
+
+    def test_find(self):
+        monitor = HealthMonitor()
+        stats = monitor.find('s-1')
+        self.assertTrue(isinstance(stats, SourceHealth))
+        self.assertTrue(monitor.find('s-1') is stats)
+
+    def test_record(self):
+        monitor = HealthMonitor()
+
+        # test
+        monitor.succeeded('s-1', report(2, 100))
+        monitor.failed('s-1', report())
+        monitor.succeeded(PRIMARY_ID, report(2, 100))
+        monitor.failed(PRIMARY_ID, report())
+
+        # validation
+        self.assertEqual(monitor.sources.keys(), ['s-1'])
+        stats = monitor.sources['s-1']
+        self.assertEqual(stats.total_succeeded, 1)
+        self.assertEqual(stats.total_failed, 1)
+        self.assertEqual(stats.throughput, 50.0)
+
+    def test_available(self):
+        monitor = HealthMonitor()
+        stats = monitor.find('s-1')
+        stats.suspended_until = float('inf')
+
+        # validation
+        self.assertFalse(monitor.available(source('s-1', 0)))
+        self.assertTrue(monitor.available(source('s-2', 0)))
+        self.assertTrue(monitor.available(PrimarySource(None)))
+
+    def test_sort(self):
+        monitor = HealthMonitor()
+        slow = source('slow', 1)
+        fast = source('fast', 1)
+        unknown = source('unknown', 2)
+        demoted = source('demoted', 0)
+        primary = PrimarySource(None)
+        monitor.find('slow').succeeded(1.0, 10)
+        monitor.find('fast').succeeded(1.0, 1000)
+        monitor.find('demoted').total_failed = health.MIN_SAMPLES
+
+        # test
+        ordered = sorted([primary, demoted, unknown, slow, fast], key=monitor.sort_key)
+
+        # validation
+        self.assertEqual(ordered, [fast, slow, unknown, demoted, primary])
+
+    def test_dict(self):
+        monitor = HealthMonitor()
+        monitor.find('s-1')
+        monitor.find('s-2')
+        self.assertEqual(sorted(monitor.dict().keys()), ['s-1', 's-2'])
+        self.assertEqual(monitor.dict(['s-2', 's-3']).keys(), ['s-2'])
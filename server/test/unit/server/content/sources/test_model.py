@@ -2,7 +2,7 @@ import os
 import sys
 from unittest import TestCase
 
-from mock import patch, Mock
+from mock import patch, Mock, ANY
 
 from pulp.common.constants import PRIMARY_ID
 from pulp.plugins.conduits.cataloger import CatalogerConduit
@@ -147,6 +147,57 @@ class TestRequest(TestCase):
         self.assertEqual(request.sources[4][0].id, primary.id)
         self.assertEqual(request.sources[4][1], url)
 
+    @patch('pulp.server.content.sources.model.managers.content_catalog_manager')
+    def test_find_sources_with_entries(self, fake_manager):
+        url = 'http://redhat.com/repository'
+        primary = PrimarySource(None)
+        alternatives = dict([(s, ContentSource(s, d)) for s, d in DESCRIPTOR])
+
+        # test
+
+        request = Request(TYPE_ID, 1, url, '/tmp/123')
+        request.find_sources(primary, alternatives, CATALOG[2:4])
+
+        # validation
+
+        self.assertFalse(fake_manager.called)
+        request.sources = list(request.sources)
+        self.assertEqual(len(request.sources), 3)
+        self.assertEqual(request.sources[0][1], CATALOG[2][constants.URL])
+        self.assertEqual(request.sources[1][1], CATALOG[3][constants.URL])
+        self.assertEqual(request.sources[2][0].id, primary.id)
+
+    def test_find_sources_with_health(self):
+        url = 'http://redhat.com/repository'
+        primary = PrimarySource(None)
+        alternatives = dict([(s, ContentSource(s, d)) for s, d in DESCRIPTOR])
+        health = Mock()
+        health.available.side_effect = lambda s: s.id != 's-3'
+        health.sort_key.side_effect = lambda s: -s.priority
+
+        # test
+
+        request = Request(TYPE_ID, 1, url, '/tmp/123')
+        request.find_sources(primary, alternatives, CATALOG, health)
+
+        # validation
+
+        request.sources = list(request.sources)
+        self.assertEqual(len(request.sources), 3)
+        self.assertEqual(request.sources[0][0].id, primary.id)
+        self.assertEqual(request.sources[1][0].id, 's-1')
+        self.assertEqual(request.sources[2][0].id, 's-1')
+
+    @patch('pulp.server.content.sources.model.ContentCatalog.get_locator')
+    def test_locator(self, fake_get_locator):
+        unit_key = {'name': 'A'}
+        request = Request(TYPE_ID, unit_key, '', '')
+
+        # test and validation
+
+        self.assertEqual(request.locator, fake_get_locator.return_value)
+        fake_get_locator.assert_called_once_with(TYPE_ID, unit_key)
+
     def test_next_source(self):
         sources = [1, 2, 3]
         request = Request('', {}, '', '')
@@ -395,46 +446,62 @@ class TestContentSource(TestCase):
         self.assertEqual(downloader, fake_downloader)
         self.assertEqual(downloader.session, session)
 
+    @patch('pulp.server.content.sources.model.managers.content_catalog_manager')
     @patch('pulp.server.content.sources.model.ContentSource.urls')
-    def test_refresh(self, fake_urls):
+    def test_refresh(self, fake_urls, fake_manager):
         url = 'http://xyz.com'
-        urls = ['url-1', 'url-2']
+        urls = ['url-1', 'url-2', 'url-3']
         fake_urls.__get__ = Mock(return_value=urls)
 
-        conduit = Mock()
-        cataloger = Mock()
-        cataloger.refresh.side_effect = FakeRefresh()
-
-        source = ContentSource('s-1', {constants.BASE_URL: url})
-        source.get_conduit = Mock(return_value=conduit)
-        source.get_cataloger = Mock(return_value=cataloger)
+        def refresh(conduit, descriptor, _url):
+            n = urls.index(_url) + 1
+            conduit.added_count = n * 10
+            conduit.deleted_count = n
+
+        conduits = [Mock(), Mock(), Mock()]
+        catalogers = [Mock(), Mock(), Mock()]
+        for cataloger in catalogers:
+            cataloger.refresh.side_effect = refresh
+        progress = Mock()
+
+        descriptor = {
+            constants.BASE_URL: url,
+            constants.EXPIRES: '1h',
+            constants.REFRESH_CONCURRENCY: '2'
+        }
+        source = ContentSource('s-1', descriptor)
+        source.get_conduit = Mock(side_effect=conduits)
+        source.get_cataloger = Mock(side_effect=catalogers)
 
         # test
 
-        report = source.refresh()
+        report = source.refresh(progress=progress)
 
         # validation
 
-        self.assertEqual(conduit.reset.call_count, len(urls))
-        self.assertEqual(cataloger.refresh.call_count, len(urls))
+        self.assertEqual(source.get_cataloger.call_count, len(urls))
+        for cataloger in catalogers:
+            self.assertEqual(cataloger.refresh.call_count, 1)
+        for conduit in conduits:
+            conduit.flush.assert_called_once_with()
 
-        n = 0
-        added = 10
-        deleted = 1
-        for _url in source.urls:
-            cataloger.refresh.assert_any(conduit, source.descriptor, _url)
+        refreshed = sorted(c.refresh.call_args[0][2] for c in catalogers)
+        self.assertEqual(refreshed, urls)
+        self.assertEqual(progress.call_count, len(urls))
+        for n, _url in enumerate(urls):
             self.assertEqual(report[n].source_id, source.id)
             self.assertEqual(report[n].url, _url)
             self.assertTrue(report[n].succeeded)
             self.assertEqual(report[n].errors, [])
-            self.assertEqual(report[n].added_count, added)
-            self.assertEqual(report[n].deleted_count, deleted)
-            added += 10
-            deleted += 1
-            n += 1
+            self.assertEqual(report[n].added_count, (n + 1) * 10)
+            self.assertEqual(report[n].deleted_count, n + 1)
+            self.assertEqual(progress.call_args_list[n][0][0], report[n])
+
+        fake_manager.return_value.purge_stale.assert_called_once_with(source.id, ANY)
 
+    @patch('pulp.server.content.sources.model.managers.content_catalog_manager')
     @patch('pulp.server.content.sources.model.ContentSource.urls')
-    def test_refresh_raised(self, fake_urls):
+    def test_refresh_raised(self, fake_urls, fake_manager):
         url = 'http://xyz.com'
         urls = ['url-1', 'url-2']
         fake_urls.__get__ = Mock(return_value=urls)
@@ -443,7 +510,12 @@ class TestContentSource(TestCase):
         cataloger = Mock()
         cataloger.refresh.side_effect = ValueError('just failed')
 
-        source = ContentSource('s-1', {constants.BASE_URL: url})
+        descriptor = {
+            constants.BASE_URL: url,
+            constants.EXPIRES: '1h',
+            constants.REFRESH_CONCURRENCY: '2'
+        }
+        source = ContentSource('s-1', descriptor)
         source.get_conduit = Mock(return_value=conduit)
         source.get_cataloger = Mock(return_value=cataloger)
 
@@ -453,12 +525,13 @@ class TestContentSource(TestCase):
 
         # validation
 
-        self.assertEqual(conduit.reset.call_count, len(urls))
+        self.assertEqual(source.get_conduit.call_count, len(urls))
         self.assertEqual(cataloger.refresh.call_count, len(urls))
+        self.assertFalse(conduit.flush.called)
 
         n = 0
         for _url in source.urls:
-            cataloger.refresh.assert_any(conduit, source.descriptor, _url)
+            cataloger.refresh.assert_any_call(conduit, source.descriptor, _url)
             self.assertEqual(report[n].source_id, source.id)
             self.assertEqual(report[n].url, _url)
             self.assertFalse(report[n].succeeded)
@@ -467,6 +540,12 @@ class TestContentSource(TestCase):
             self.assertEqual(report[n].deleted_count, 0)
             n += 1
 
+        self.assertFalse(fake_manager.return_value.purge_stale.called)
+
+    def test_refresh_concurrency(self):
+        source = ContentSource('s-1', {constants.REFRESH_CONCURRENCY: '8'})
+        self.assertEqual(source.refresh_concurrency, 8)
+
     def test_dict(self):
         descriptor = {'A': 1, 'B': 2}
 
@@ -580,6 +659,11 @@ class TestDownloadReport(TestCase):
         }
         self.assertEqual(report.dict(), expected)
 
+    def test_dict_health(self):
+        report = DownloadReport()
+        report.health['s1'] = {'failures': 1}
+        self.assertEqual(report.dict(health=True)['health'], {'s1': {'failures': 1}})
+
 
 class TestRefreshReport(TestCase):
 
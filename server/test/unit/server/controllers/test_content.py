@@ -98,6 +98,36 @@ class TestContentSourcesRefreshStep(TestCase):
         self.assertEquals(step.progress_successes, 0)
         self.assertEqual(step.progress_failures, 1)
 
+    @patch('pulp.server.content.sources.model.ContentSource.load_all')
+    def test_process_with_failed_url(self, mock_load):
+        successful_report = Mock(succeeded=True, url='url-1')
+        unsuccessful_report = Mock(succeeded=False, url='url-2')
+
+        sources = {
+            'A': Mock(id='A', dict=Mock(return_value={'A': 1}), descriptor={'name': 'A'},
+                      refresh=Mock(return_value=[successful_report, unsuccessful_report])),
+        }
+
+        mock_load.return_value = sources
+        conduit = content_controller.ContentSourcesConduit('task_id')
+        step = content_controller.ContentSourcesRefreshStep(conduit)
+        self.assertRaises(PulpCodedTaskFailedException, step.process)
+        self.assertEqual(step.progress_failures, 1)
+
+    @patch('pulp.server.content.sources.model.ContentSource.load_all')
+    def test_refreshed(self, mock_load):
+        mock_load.return_value = {}
+        conduit = content_controller.ContentSourcesConduit('task_id')
+        step = content_controller.ContentSourcesRefreshStep(conduit)
+        step.progress_description = 'A'
+        step.report_progress = Mock()
+        report = Mock(url='url-1', added_count=10, deleted_count=2)
+
+        step._refreshed(report)
+
+        self.assertEqual(step.progress_details, 'A: url-1 (added: 10, deleted: 2)')
+        step.report_progress.assert_called_once_with()
+
 
 class TestContentSourcesConduit(TestCase):
 
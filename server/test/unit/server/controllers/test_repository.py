@@ -5,6 +5,7 @@ from bson.objectid import InvalidId
 from mock import call, Mock, MagicMock, patch
 import mock
 import mongoengine
+from pymongo import UpdateOne
 
 from pulp.common import dateutils, error_codes
 from pulp.common.compat import unittest
@@ -13,6 +14,7 @@ from pulp.plugins.model import PublishReport
 from pulp.server.controllers import repository as repo_controller
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.db import model
+from pulp.server.db.querysets import Record
 
 
 MODULE = 'pulp.server.controllers.repository.'
@@ -33,26 +35,27 @@ class DemoModel(model.ContentUnit):
 class TestGetAssociatedUnitIDs(unittest.TestCase):
     def setUp(self):
         self.associations = [
-            dict(repo_id='repo1', unit_id='a', unit_type_id='demo_model'),
-            dict(repo_id='repo1', unit_id='b', unit_type_id='demo_model'),
+            Record(dict(repo_id='repo1', unit_id='a', unit_type_id='demo_model')),
+            Record(dict(repo_id='repo1', unit_id='b', unit_type_id='demo_model')),
         ]
 
     def test_returns_ids(self, mock_objects):
-        mock_objects.return_value.only.return_value.as_pymongo.return_value = self.associations
+        mock_objects.return_value.records.return_value = self.associations
 
         ret = list(repo_controller.get_associated_unit_ids('repo1', 'demo_model'))
 
         self.assertEqual(ret, ['a', 'b'])
+        mock_objects.return_value.records.assert_called_once_with('unit_id')
 
     def test_returns_generator(self, mock_objects):
-        mock_objects.return_value.only.return_value.as_pymongo.return_value = self.associations
+        mock_objects.return_value.records.return_value = self.associations
 
         ret = repo_controller.get_associated_unit_ids('repo1', 'demo_model')
 
         self.assertTrue(inspect.isgenerator(ret))
 
     def test_uses_q(self, mock_objects):
-        mock_objects.return_value.only.return_value.as_pymongo.return_value = self.associations
+        mock_objects.return_value.records.return_value = self.associations
         q = mongoengine.Q(foo='bar')
 
         list(repo_controller.get_associated_unit_ids('repo1', 'demo_model', q))
@@ -360,6 +363,38 @@ class AssociateSingleUnitTests(unittest.TestCase):
             upsert=True)
 
 
+class AssociateUnitIdsTests(unittest.TestCase):
+
+    @patch('pulp.server.controllers.repository.model.RepositoryContentUnit._get_collection')
+    @patch('pulp.server.controllers.repository.dateutils.format_iso8601_utc_timestamp')
+    def test_unit_association(self, mock_get_timestamp, mock_get_collection):
+        """
+        Test that the units are associated with one bulk write of upserts.
+        """
+        mock_get_timestamp.return_value = 'foo_tstamp'
+        collection = mock_get_collection.return_value
+        collection.bulk_write.return_value.upserted_count = 1
+
+        added = repo_controller.associate_unit_ids('foo', 'demo_model', ['bar', 'baz'])
+
+        self.assertEqual(added, 1)
+        update = {'$setOnInsert': {'created': 'foo_tstamp'}, '$set': {'updated': 'foo_tstamp'}}
+        collection.bulk_write.assert_called_once_with([
+            UpdateOne({'repo_id': 'foo', 'unit_id': 'bar', 'unit_type_id': 'demo_model'},
+                      update, upsert=True),
+            UpdateOne({'repo_id': 'foo', 'unit_id': 'baz', 'unit_type_id': 'demo_model'},
+                      update, upsert=True),
+        ], ordered=False)
+
+    @patch('pulp.server.controllers.repository.model.RepositoryContentUnit._get_collection')
+    def test_no_units(self, mock_get_collection):
+        """
+        Test that nothing is written when there are no units.
+        """
+        self.assertEqual(repo_controller.associate_unit_ids('foo', 'demo_model', []), 0)
+        self.assertFalse(mock_get_collection.called)
+
+
 class TestDisassociateUnits(unittest.TestCase):
     @patch('pulp.server.controllers.repository.update_last_unit_removed')
     @patch('pulp.server.controllers.repository.model.RepositoryContentUnit.objects')
@@ -1,4 +1,5 @@
 from mock import MagicMock, patch
+import mock
 import mongoengine
 
 from pulp.common.compat import unittest
@@ -26,13 +27,20 @@ class DemoModelWithSerializer(model.ContentUnit):
     SERIALIZER = DemoModelSerializer
 
 
+@patch('pulp.server.controllers.units._digests_complete', return_value=False)
 class FindUnitsTests(unittest.TestCase):
 
+    def setUp(self):
+        DemoModel.objects.reset_mock()
+        DemoModel.objects.side_effect = None
+        DemoModel.objects.return_value = []
+
     @patch('pulp.server.controllers.units.misc.paginate')
-    def test_paginate(self, mock_paginate):
+    def test_paginate(self, mock_paginate, mock_complete):
         """
         ensure that paginate is used
         """
+        mock_paginate.return_value = []
         model_1 = DemoModel(key_field='a')
         model_2 = DemoModel(key_field='B')
         units_iterable = (model_1, model_2)
@@ -40,9 +48,11 @@ class FindUnitsTests(unittest.TestCase):
         # turn into list so the generator will be evaluated
         list(units_controller.find_units(units_iterable))
 
-        mock_paginate.assert_called_once_with(units_iterable, 50)
+        self.assertEqual(mock_paginate.call_count, 1)
+        self.assertEqual(list(mock_paginate.call_args[0][0]), [model_1, model_2])
+        self.assertEqual(mock_paginate.call_args[0][1], 50)
 
-    def test_query(self):
+    def test_query(self, mock_complete):
         """
         Test that the mongo query generated is the one we expect
         """
@@ -55,8 +65,9 @@ class FindUnitsTests(unittest.TestCase):
         query_dict = DemoModel.objects.call_args[0][0].to_query(DemoModel)
         expected_result = {'$or': [{'key_field': u'a'}, {'key_field': u'B'}]}
         self.assertDictEqual(query_dict, expected_result)
+        mock_complete.assert_called_once_with(DemoModel)
 
-    def test_results(self):
+    def test_results(self, mock_complete):
         """
         Test that the mongo query generated is the one we expect
         """
@@ -70,6 +81,77 @@ class FindUnitsTests(unittest.TestCase):
         result = list(units_controller.find_units(units_iterable))
         self.assertEqual(result, [model_2_defined])
 
+    def test_no_units(self, mock_complete):
+        """
+        Test that nothing is queried when there are no units.
+        """
+        self.assertEqual(list(units_controller.find_units(iter([]))), [])
+        self.assertFalse(mock_complete.called)
+        self.assertFalse(DemoModel.objects.called)
+
+    def test_query_by_digest(self, mock_complete):
+        """
+        Test that units are found by the digest of their unit key when every unit has one.
+        """
+        mock_complete.return_value = True
+        model_1 = DemoModel(key_field='a')
+        model_2 = DemoModel(key_field='B')
+        model_2_defined = DemoModel(key_field='B', id='foo')
+        DemoModel.objects.return_value = [model_2_defined]
+
+        result = list(units_controller.find_units(iter([model_1, model_2, model_2])))
+
+        self.assertEqual(result, [model_2_defined])
+        DemoModel.objects.assert_called_once_with(_unit_key_digest__in=mock.ANY)
+        digests = DemoModel.objects.call_args[1]['_unit_key_digest__in']
+        self.assertEqual(sorted(digests), sorted([model_1.unit_key_stored_digest(),
+                                                  model_2.unit_key_stored_digest()]))
+
+    @patch('pulp.server.controllers.units.DIGEST_PAGINATION_SIZE', 2)
+    def test_query_by_digest_pages(self, mock_complete):
+        """
+        Test that units are found by digest in pages.
+        """
+        mock_complete.return_value = True
+        units = [DemoModel(key_field=str(n)) for n in range(5)]
+
+        list(units_controller.find_units(units))
+
+        self.assertEqual(DemoModel.objects.call_count, 3)
+
+    def test_query_undigested(self, mock_complete):
+        """
+        Test that units whose digest cannot be computed are found by their unit key fields.
+        """
+        mock_complete.return_value = True
+        model_1 = DemoModel(key_field='a')
+        model_2 = DemoModel(key_field='B')
+
+        with patch.object(DemoModel, 'unit_key_stored_digest', side_effect=['digest', None]):
+            list(units_controller.find_units([model_1, model_2]))
+
+        self.assertEqual(DemoModel.objects.call_count, 2)
+        self.assertEqual(DemoModel.objects.call_args_list[0], mock.call(
+            _unit_key_digest__in=['digest']))
+        query_dict = DemoModel.objects.call_args_list[1][0][0].to_query(DemoModel)
+        self.assertDictEqual(query_dict, {'key_field': u'B'})
+
+
+class DigestsCompleteTests(unittest.TestCase):
+
+    def test_complete(self):
+        mock_model = MagicMock()
+        mock_model.objects.return_value.only.return_value.first.return_value = None
+
+        self.assertTrue(units_controller._digests_complete(mock_model))
+        mock_model.objects.assert_called_once_with(_unit_key_digest=None)
+        mock_model.objects.return_value.only.assert_called_once_with('id')
+
+    def test_incomplete(self):
+        mock_model = MagicMock()
+
+        self.assertFalse(units_controller._digests_complete(mock_model))
+
 
 @patch('pulp.plugins.loader.api.get_unit_model_by_id', spec_set=True)
 @patch('pulp.plugins.types.database.type_definition', spec_set=True)
@@ -4,6 +4,7 @@ from mongoengine import NotUniqueError, ValidationError
 from pulp.common.compat import unittest
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.controllers import user as user_controller
+from pulp.server.managers.auth.permission.query import PermissionQueryManager
 
 import logging
 log = logging.getLogger(__name__)
@@ -169,86 +170,152 @@ class TestIsLastSuperUser(unittest.TestCase):
         self.assertTrue(user_controller.is_last_super_user('test'))
 
 
-@mock.patch('pulp.server.controllers.user.manager_factory')
+@mock.patch('pulp.server.controllers.user.manager_factory.permission_query_manager',
+            PermissionQueryManager)
+@mock.patch('pulp.server.controllers.user.PermissionVersion')
+@mock.patch('pulp.server.controllers.user.Permission.get_collection')
 @mock.patch('pulp.server.controllers.user.model.User')
 class TestIsAuthorized(unittest.TestCase):
     """
     Tests for determining whether a user is authorized to view a resource.
     """
 
-    def test_super_user(self, mock_model, mock_f):
+    def setUp(self):
+        patcher = mock.patch('pulp.server.controllers.user.permission_table',
+                             user_controller.PermissionTable())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def permissions(self, mock_perm_collection, *resources):
+        """
+        Simulate the permissions granting 'op' to test-user on the given resources.
+        """
+        mock_perm_collection.return_value.find.return_value = [
+            {'resource': r, 'users': [{'username': 'test-user', 'permissions': ['op']}]}
+            for r in resources]
+
+    def test_super_user(self, mock_model, mock_perm_collection, mock_version):
         """
         Ensure that super users have access to everything.
         """
         m_user = mock_model.objects.get_or_404.return_value
         m_user.is_superuser.return_value = True
-        self.assertTrue(m_user.is_superuser('some_resource', 'superuser', 'op'))
+        self.assertTrue(user_controller.is_authorized('/some/resource/', 'superuser', 'op'))
+        self.assertFalse(mock_perm_collection.called)
 
-    def test_explicit_access(self, mock_model, mock_f):
+    def test_missing_user(self, mock_model, mock_perm_collection, mock_version):
+        """
+        Ensure that a missing user is reported, and not cached.
+        """
+        mock_model.objects.get_or_404.side_effect = pulp_exceptions.MissingResource('user')
+        for i in range(2):
+            self.assertRaises(pulp_exceptions.MissingResource, user_controller.is_authorized,
+                              '/some/resource/', 'nobody', 'op')
+        self.assertEqual(mock_model.objects.get_or_404.call_count, 2)
+
+    def test_explicit_access(self, mock_model, mock_perm_collection, mock_version):
         """
         Ensure that a user with access to a resource url is authorized for it.
         """
         m_user = mock_model.objects.get_or_404.return_value
         m_user.is_superuser.return_value = False
-        mock_pqm = mock_f.permission_query_manager.return_value
-        mock_pqm.find_by_resource.return_value = '/mock/resource/'
-        mock_pqm.find_user_permission.return_value = ['op']
+        self.permissions(mock_perm_collection, '/mock/resource/')
 
-        self.assertTrue(user_controller.is_authorized('/mock/resource/', 'testuser', 'op'))
-        mock_pqm.find_by_resource.assert_called_once_with('/mock/resource/')
-        mock_pqm.find_user_permission.assert_called_once_with('/mock/resource/', 'testuser')
+        self.assertTrue(user_controller.is_authorized('/mock/resource/', 'test-user', 'op'))
+        self.assertTrue(user_controller.is_authorized('mock//resource', 'test-user', 'op'))
+        self.assertFalse(user_controller.is_authorized('/mock/resource/', 'test-user', 'other'))
+        mock_perm_collection.return_value.find.assert_called_once_with(
+            {'users.username': 'test-user'})
 
-    def test_subdomain_access(self, mock_model, mock_f):
+    def test_subdomain_access(self, mock_model, mock_perm_collection, mock_version):
         """
         Ensure that a user with access to the subdomain of a url has access to the url.
         """
-
-        def base_only(permission, login):
-            """
-            Simulate permission over a subdomain, but nothing else.
-            """
-            if permission == '/mock/':
-                return ['op']
-            else:
-                return []
-
         m_user = mock_model.objects.get_or_404.return_value
         m_user.is_superuser.return_value = False
-        mock_pqm = mock_f.permission_query_manager.return_value
-        mock_pqm.find_by_resource.side_effect = lambda x: x
-        mock_pqm.find_user_permission.side_effect = base_only
+        self.permissions(mock_perm_collection, '/mock/')
 
         self.assertTrue(user_controller.is_authorized('/mock/resource/', 'test-user', 'op'))
         self.assertTrue(user_controller.is_authorized('/mock/other_resource/', 'test-user', 'op'))
         self.assertFalse(user_controller.is_authorized('/other/', 'test-user', 'op'))
         self.assertFalse(user_controller.is_authorized('/', 'test-user', 'op'))
 
-    @mock.patch('pulp.server.controllers.user.Permission.get_collection')
-    def test_root_access(self, mock_perm_collection, mock_model, mock_f):
+    def test_root_access(self, mock_model, mock_perm_collection, mock_version):
         """
         Ensure that a user that has access to the root domain '/' has access to everything.
         """
-
-        def root_only(permission, login):
-            """
-            Simulate permission over root domain, but nothing else.
-            """
-            if permission == '/':
-                return ['op']
-            else:
-                return []
-
         m_user = mock_model.objects.get_or_404.return_value
         m_user.is_superuser.return_value = False
-        mock_pqm = mock_f.permission_query_manager.return_value
-        mock_pqm.find_by_resource.side_effect = lambda x: x
-        mock_pqm.find_user_permission.side_effect = root_only
-        mock_perm_collection.return_value.find_one.return_value = '/'
+        self.permissions(mock_perm_collection, '/')
 
         self.assertTrue(user_controller.is_authorized('/mock/resource/', 'test-user', 'op'))
         self.assertTrue(user_controller.is_authorized('/mock/other_resource/', 'test-user', 'op'))
         self.assertTrue(user_controller.is_authorized('/', 'test-user', 'op'))
 
+    def test_unmatched_resource(self, mock_model, mock_perm_collection, mock_version):
+        """
+        Ensure that permissions on resources that are not stored as "/<path>/" are ignored,
+        as they are never found by resource.
+        """
+        m_user = mock_model.objects.get_or_404.return_value
+        m_user.is_superuser.return_value = False
+        self.permissions(mock_perm_collection, '/mock/resource', '//', 'mock/')
+
+        self.assertFalse(user_controller.is_authorized('/mock/resource/', 'test-user', 'op'))
+
+    def test_cached(self, mock_model, mock_perm_collection, mock_version):
+        """
+        Ensure that permissions are compiled again only after the version has changed.
+        """
+        m_user = mock_model.objects.get_or_404.return_value
+        m_user.is_superuser.return_value = False
+        self.permissions(mock_perm_collection, '/mock/')
+        mock_version.get.return_value = 1
+
+        self.assertTrue(user_controller.is_authorized('/mock/resource/', 'test-user', 'op'))
+        self.assertTrue(user_controller.is_authorized('/mock/other/', 'test-user', 'op'))
+        self.assertEqual(mock_model.objects.get_or_404.call_count, 1)
+        self.assertEqual(user_controller.permission_table.stats(),
+                         dict(users=1, hits=1, misses=1))
+
+        mock_version.get.return_value = 2
+        self.permissions(mock_perm_collection)
+
+        self.assertFalse(user_controller.is_authorized('/mock/resource/', 'test-user', 'op'))
+        self.assertEqual(mock_model.objects.get_or_404.call_count, 2)
+
+    def test_permissions_changed(self, mock_model, mock_perm_collection, mock_version):
+        """
+        Ensure that a change made by this process is seen by the next lookup.
+        """
+        m_user = mock_model.objects.get_or_404.return_value
+        m_user.is_superuser.return_value = False
+        mock_version.get.return_value = 1
+        user_controller.is_authorized('/mock/', 'test-user', 'op')
+
+        user_controller.permissions_changed()
+        user_controller.is_authorized('/mock/', 'test-user', 'op')
+
+        mock_version.increment.assert_called_once_with()
+        self.assertEqual(mock_model.objects.get_or_404.call_count, 2)
+
+    @mock.patch('pulp.server.controllers.user._logger')
+    def test_stats_logged(self, mock_logger, mock_model, mock_perm_collection, mock_version):
+        """
+        Ensure that the cache statistics are logged when permissions are compiled.
+        """
+        m_user = mock_model.objects.get_or_404.return_value
+        m_user.is_superuser.return_value = False
+        mock_version.get.return_value = 1
+
+        user_controller.is_authorized('/mock/', 'test-user', 'op')
+        user_controller.is_authorized('/mock/', 'test-user', 'op')
+
+        self.assertEqual(mock_logger.debug.call_count, 1)
+        message = mock_logger.debug.call_args[0][0]
+        self.assertTrue('test-user' in message)
+        self.assertTrue(str(dict(users=1, hits=0, misses=1)) in message)
+
 
 @mock.patch('pulp.server.controllers.user.Role.get_collection')
 class TestFindUsersBelongingToRole(unittest.TestCase):
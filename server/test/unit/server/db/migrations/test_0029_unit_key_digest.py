@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from mock import Mock, patch
+from mongoengine import IntField, StringField
+from pymongo import UpdateOne
+
+from pulp.server.db import model
+from pulp.server.db.migrate.models import MigrationModule
+
+MIGRATION = 'pulp.server.db.migrations.0029_unit_key_digest'
+
+
+class DigestUnit(model.ContentUnit):
+    name = StringField()
+    version = IntField(db_field='v')
+    unit_key_fields = ('name', 'version')
+    _content_type_id = StringField(default='digest_unit')
+
+
+class TestMigration(TestCase):
+    """
+    Test the migration.
+    """
+
+    def setUp(self):
+        self.module = MigrationModule(MIGRATION)._module
+
+    @patch('.'.join((MIGRATION, 'PluginManager')))
+    def test_migrate(self, m_plugin_manager):
+        """
+        Test that every unit model is migrated.
+        """
+        model_1 = Mock()
+        model_2 = Mock()
+        m_plugin_manager.return_value.unit_models = {'one': model_1, 'two': model_2}
+
+        with patch.object(self.module, 'migrate_model', return_value=1) as m_migrate_model:
+            self.module.migrate()
+
+        self.assertEqual(sorted(c[0][0] for c in m_migrate_model.call_args_list),
+                         sorted([model_1, model_2]))
+
+    @patch.object(DigestUnit, '_get_collection')
+    def test_migrate_model(self, m_get_collection):
+        """
+        Test that the digest of the unit key is stored on units without one.
+        """
+        collection = m_get_collection.return_value
+        collection.find.return_value = [
+            {'_id': 'a', 'name': u'zoo', 'v': 1},
+            {'_id': 'b', 'name': u'zoo', 'v': [1]},
+        ]
+
+        digested = self.module.migrate_model(DigestUnit)
+
+        self.assertEqual(digested, 1)
+        collection.find.assert_called_once_with(
+            {'_unit_key_digest': {'$exists': False}}, {'name': True, 'v': True})
+        expected = DigestUnit(name='zoo', version=1).unit_key_stored_digest()
+        collection.bulk_write.assert_called_once_with([
+            UpdateOne({'_id': 'a'}, {'$set': {'_unit_key_digest': expected}}),
+            UpdateOne({'_id': 'b'}, {'$set': {'_unit_key_digest': None}}),
+        ], ordered=False)
+
+    @patch('.'.join((MIGRATION, 'BATCH_SIZE')), 2)
+    @patch.object(DigestUnit, '_get_collection')
+    def test_migrate_model_batches(self, m_get_collection):
+        """
+        Test that units are updated in batches.
+        """
+        collection = m_get_collection.return_value
+        collection.find.return_value = [{'_id': n, 'name': u'zoo', 'v': n} for n in range(5)]
+
+        digested = self.module.migrate_model(DigestUnit)
+
+        self.assertEqual(digested, 5)
+        self.assertEqual([len(c[0][0]) for c in collection.bulk_write.call_args_list], [2, 2, 1])
@@ -20,7 +20,7 @@ from pulp.common import constants, dateutils
 from pulp.server.db import model
 from pulp.server.db.model import TaskStatus
 from pulp.server.db.model.criteria import Criteria
-from pulp.server.db.model.dispatch import ScheduledCall, ScheduleEntry
+from pulp.server.db.model.dispatch import ScheduledCall, ScheduledCallVersion, ScheduleEntry
 from pulp.server.managers.factory import initialize
 
 
@@ -665,9 +665,10 @@ class TestScheduledCallForDisplay(unittest.TestCase):
         self.assertEqual(result['schedule'], as_dict['iso_schedule'])
 
 
+@mock.patch('pulp.server.db.model.dispatch.ScheduledCallVersion')
 @mock.patch('pulp.server.db.model.base.Model.get_collection')
 class TestScheduledCallSave(unittest.TestCase):
-    def test_existing(self, mock_get_collection):
+    def test_existing(self, mock_get_collection, mock_version):
         mock_update = mock_get_collection.return_value.update
         fake_id = bson.ObjectId()
         call = ScheduledCall('PT1M', 'pulp.tasks.dosomething', id=fake_id,
@@ -678,8 +679,9 @@ class TestScheduledCallSave(unittest.TestCase):
         expected = call.as_dict()
         del expected['_id']
         mock_update.assert_called_once_with({'_id': fake_id}, expected)
+        mock_version.increment.assert_called_once_with(changed_ids=[str(fake_id)])
 
-    def test_new(self, mock_get_collection):
+    def test_new(self, mock_get_collection, mock_version):
         mock_insert = mock_get_collection.return_value.insert
         call = ScheduledCall('PT1M', 'pulp.tasks.dosomething', principal=mock.MagicMock())
 
@@ -689,6 +691,63 @@ class TestScheduledCallSave(unittest.TestCase):
         expected['_id'] = bson.ObjectId(expected['_id'])
         mock_insert.assert_called_once_with(expected)
         self.assertFalse(call._new)
+        mock_version.increment.assert_called_once_with(changed_ids=[call.id])
+
+
+@mock.patch.object(ScheduledCallVersion, 'get_collection')
+class TestScheduledCallVersion(unittest.TestCase):
+    def test_increment(self, mock_get_collection):
+        ScheduledCallVersion.increment()
+
+        mock_get_collection.return_value.update.assert_called_once_with(
+            {'_id': 'scheduled_calls'}, {'$inc': {'version': 1}}, upsert=True)
+
+    def test_increment_deleted(self, mock_get_collection):
+        ScheduledCallVersion.increment(deleted_ids=['a', 'b'])
+
+        mock_get_collection.return_value.update.assert_called_once_with(
+            {'_id': 'scheduled_calls'},
+            {'$inc': {'version': 1, 'deleted_count': 2},
+             '$push': {'deleted': {'$each': ['a', 'b'],
+                                   '$slice': -ScheduledCallVersion.MAX_DELETED}}},
+            upsert=True)
+
+    def test_increment_changed(self, mock_get_collection):
+        ScheduledCallVersion.increment(changed_ids=['a'])
+
+        mock_get_collection.return_value.update.assert_called_once_with(
+            {'_id': 'scheduled_calls'},
+            {'$inc': {'version': 1, 'changed_count': 1},
+             '$push': {'changed': {'$each': ['a'],
+                                   '$slice': -ScheduledCallVersion.MAX_CHANGED}}},
+            upsert=True)
+
+    def test_increment_deleted_and_changed(self, mock_get_collection):
+        ScheduledCallVersion.increment(deleted_ids=['a'], changed_ids=['b'])
+
+        update = mock_get_collection.return_value.update.call_args[0][1]
+        self.assertEqual(update['$inc'], {'version': 1, 'deleted_count': 1, 'changed_count': 1})
+        self.assertEqual(sorted(update['$push']), ['changed', 'deleted'])
+
+    def test_get(self, mock_get_collection):
+        mock_get_collection.return_value.find_one.return_value = {
+            '_id': 'scheduled_calls', 'version': 3}
+
+        ret = ScheduledCallVersion.get()
+
+        self.assertEqual(ret['version'], 3)
+        self.assertEqual(ret['deleted_count'], 0)
+        self.assertEqual(ret['deleted'], [])
+        self.assertEqual(ret['changed_count'], 0)
+        self.assertEqual(ret['changed'], [])
+
+    def test_get_missing(self, mock_get_collection):
+        mock_get_collection.return_value.find_one.return_value = None
+
+        ret = ScheduledCallVersion.get()
+
+        self.assertEqual(ret, {'version': 0, 'deleted_count': 0, 'deleted': [],
+                               'changed_count': 0, 'changed': []})
 
 
 class TestScheduledCallCalculateTimes(unittest.TestCase):
@@ -919,6 +978,7 @@ class TestScheduleEntryNextInstance(unittest.TestCase):
 
     def test_disables_for_remaining_runs(self, mock_save):
         self.call.remaining_runs = 1
+        self.call.last_updated = 0
         # just verify that we have the correct starting state
         self.assertTrue(self.call.enabled)
 
@@ -926,6 +986,8 @@ class TestScheduleEntryNextInstance(unittest.TestCase):
 
         # call should have been disabled because the remaining_runs hit 0
         self.assertFalse(self.call.enabled)
+        # and marked as updated so the scheduler removes it
+        self.assertTrue(time.time() - self.call.last_updated < 1)
 
     def test_calls_save(self, mock_save):
         next(self.entry)
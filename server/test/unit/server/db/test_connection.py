@@ -879,6 +879,62 @@ class TestUnsafeRetry(unittest.TestCase):
         self.assertTrue(m_instance.two is m_retry.return_value.return_value)
         self.assertRaises(AttributeError, getattr, m_instance, 'one')
 
+    def test_decorate_class_retry_off(self, m_config):
+        """
+        Methods should not be wrapped if the feature has not been turned on.
+        """
+        class Doc(object):
+            def one(self):
+                return 1
+
+        m_config.getboolean.return_value = False
+        connection.UnsafeRetry.decorate_class(Doc, 'test_collection')
+        self.assertFalse(getattr(Doc.one, '_unsafe_retry', False))
+        self.assertTrue(Doc._unsafe_retry_decorated)
+
+    def test_decorate_class_retry_on(self, m_config):
+        """
+        Instance methods should be wrapped once, and class methods left alone.
+        """
+        class Doc(object):
+            def one(self):
+                return self
+
+            @classmethod
+            def two(cls):
+                return cls
+
+        m_config.getboolean.return_value = True
+        connection.UnsafeRetry.decorate_class(Doc, 'test_collection')
+        connection.UnsafeRetry.decorate_class(Doc, 'test_collection')
+
+        doc = Doc()
+        self.assertTrue(Doc.one._unsafe_retry)
+        self.assertTrue(doc.one() is doc)
+        self.assertFalse(hasattr(Doc.two, '_unsafe_retry'))
+        self.assertTrue(Doc.two() is Doc)
+        self.assertEqual(m_config.getboolean.call_count, 1)
+
+    def test_decorate_class_inherited(self, m_config):
+        """
+        Methods inherited from a decorated class should not be wrapped again.
+        """
+        class Doc(object):
+            def one(self):
+                return self
+
+        class SubDoc(Doc):
+            pass
+
+        m_config.getboolean.return_value = True
+        connection.UnsafeRetry.decorate_class(Doc, 'test_collection')
+        decorated = Doc.__dict__['one']
+        connection.UnsafeRetry.decorate_class(SubDoc, 'test_collection')
+
+        self.assertFalse('one' in SubDoc.__dict__)
+        self.assertTrue(SubDoc.one.im_func is decorated)
+        self.assertTrue(SubDoc._unsafe_retry_decorated)
+
     @patch('pulp.server.db.connection._logger')
     def test_retry_decorator(self, m_logger, m_config):
         """
@@ -0,0 +1,108 @@
+import threading
+import unittest
+
+from bson import BSON
+from mock import Mock, patch
+
+from pulp.server.db import metrics
+
+
+class TestDatabaseMetrics(unittest.TestCase):
+
+    def test_to_dict(self):
+        m = metrics.DatabaseMetrics()
+        m.operations, m.bytes_read, m.bytes_written = 1, 2, 3
+
+        self.assertEqual(m.to_dict(),
+                         dict(db_operations=1, db_bytes_read=2, db_bytes_written=3))
+
+    def test_recording(self):
+        m = metrics.DatabaseMetrics()
+
+        self.assertEqual(metrics._recording(), [])
+        with m:
+            self.assertEqual(metrics._recording(), [m])
+        self.assertEqual(metrics._recording(), [])
+
+    def test_nested(self):
+        outer = metrics.DatabaseMetrics()
+        inner = metrics.DatabaseMetrics()
+
+        with outer:
+            with inner:
+                self.assertEqual(metrics._recording(), [outer, inner])
+            self.assertEqual(metrics._recording(), [outer])
+
+    def test_other_thread(self):
+        m = metrics.DatabaseMetrics()
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(metrics._recording()))
+
+        with m:
+            thread.start()
+            thread.join()
+
+        self.assertEqual(seen, [[]])
+
+
+class TestCommandCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.counter = metrics.CommandCounter()
+        self.command = {'find': 'units', 'filter': {'id': 'abc'}}
+        self.reply = {'ok': 1, 'cursor': {'firstBatch': [{'id': 'abc'}]}}
+
+    def test_counts(self):
+        m = metrics.DatabaseMetrics()
+
+        with m:
+            self.counter.started(Mock(command=self.command))
+            self.counter.succeeded(Mock(reply=self.reply))
+            self.counter.failed(Mock())
+
+        self.assertEqual(m.operations, 1)
+        self.assertEqual(m.bytes_written, len(BSON.encode(self.command)))
+        self.assertEqual(m.bytes_read, len(BSON.encode(self.reply)))
+
+    def test_counts_nested(self):
+        # the outer metrics include the operations counted by the inner metrics
+        outer = metrics.DatabaseMetrics()
+        inner = metrics.DatabaseMetrics()
+
+        with outer:
+            self.counter.started(Mock(command=self.command))
+            with inner:
+                self.counter.started(Mock(command=self.command))
+                self.counter.succeeded(Mock(reply=self.reply))
+
+        self.assertEqual(inner.operations, 1)
+        self.assertEqual(outer.operations, 2)
+        self.assertEqual(outer.bytes_written, 2 * len(BSON.encode(self.command)))
+        self.assertEqual(outer.bytes_read, inner.bytes_read)
+
+    def test_not_recording(self):
+        # nothing is counted, or encoded, when the thread is not recording
+        with patch('pulp.server.db.metrics._size') as mock_size:
+            self.counter.started(Mock(command=self.command))
+            self.counter.succeeded(Mock(reply=self.reply))
+
+        self.assertFalse(mock_size.called)
+
+    def test_size_invalid(self):
+        self.assertEqual(metrics._size(object()), 0)
+
+
+class TestRegister(unittest.TestCase):
+
+    @patch('pulp.server.db.metrics._counter', None)
+    @patch('pulp.server.db.metrics._register_listener')
+    def test_register_once(self, mock_register):
+        self.assertTrue(metrics.register())
+        self.assertTrue(metrics.register())
+
+        mock_register.assert_called_once_with(metrics._counter)
+
+    @patch('pulp.server.db.metrics._counter', None)
+    @patch('pulp.server.db.metrics._register_listener', None)
+    def test_register_unsupported(self):
+        self.assertFalse(metrics.register())
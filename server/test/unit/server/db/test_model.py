@@ -4,6 +4,7 @@
 Tests for the pulp.server.db.model module.
 """
 from hashlib import sha256
+from hmac import HMAC
 from mock import patch, Mock, call
 import os
 import shutil
@@ -11,7 +12,7 @@ import stat
 import tempfile
 
 from mongoengine import (ValidationError, BooleanField, DateTimeField, DictField,
-                         Document, IntField, ListField, StringField, QuerySetNoCache)
+                         Document, FloatField, IntField, ListField, StringField, QuerySetNoCache)
 
 from pulp.common import dateutils
 from pulp.common.compat import unittest
@@ -22,7 +23,7 @@ from pulp.server import constants, exceptions
 from pulp.server.exceptions import PulpCodedException
 from pulp.server.db import model
 from pulp.server.db.fields import ISO8601StringField
-from pulp.server.db.querysets import CriteriaQuerySet, WorkerQuerySet
+from pulp.server.db.querysets import ContentUnitQuerySet, CriteriaQuerySet, WorkerQuerySet
 from pulp.server.webservices.views import serializers
 
 
@@ -39,8 +40,8 @@ class TestAutoRetryDocument(unittest.TestCase):
         class MockDoc(model.AutoRetryDocument):
             pass
 
-        doc = MockDoc()
-        m_retry.decorate_instance.assert_called_once_with(instance=doc, full_name=type(doc))
+        MockDoc()
+        m_retry.decorate_class.assert_called_once_with(document_class=MockDoc, full_name=MockDoc)
 
     def test_abstact(self):
         """
@@ -158,6 +159,9 @@ class TestContentUnit(unittest.TestCase):
     def test_meta_abstract(self):
         self.assertEquals(model.ContentUnit._meta['abstract'], True)
 
+    def test_meta_queryset(self):
+        self.assertEquals(ContentUnitHelper._meta['queryset_class'], ContentUnitQuerySet)
+
     @patch('pulp.server.db.model.signals')
     def test_attach_signals(self, mock_signals):
         ContentUnitHelper.attach_signals()
@@ -180,6 +184,46 @@ class TestContentUnit(unittest.TestCase):
 
         # make sure the last updated time has been updated
         self.assertEquals(helper._last_updated, 'foo')
+        self.assertEquals(helper._unit_key_digest, helper.unit_key_stored_digest())
+
+    def test_unit_key_stored_digest(self):
+        unit = ContentUnitHelper(apple='red', pear='yellow', age=21)
+
+        digest = unit.unit_key_stored_digest()
+
+        self.assertEqual(len(digest), 64)
+        self.assertEqual(digest, ContentUnitHelper(apple=u'red', pear='yellow',
+                                                   age=21).unit_key_stored_digest())
+        self.assertEqual(digest, ContentUnitHelper.digest_unit_key(
+            {'apple': 'red', 'pear': 'yellow', 'age': 21.0}))
+        self.assertEqual(digest, ContentUnitHelper.digest_unit_key(
+            {'apple': 'red', 'pear': 'yellow', 'age': '21'}))
+        self.assertNotEqual(digest, ContentUnitHelper(apple='red', pear='yellow',
+                                                      age=22).unit_key_stored_digest())
+        self.assertNotEqual(digest, ContentUnitHelper(apple='redy', pear='ellow',
+                                                      age=21).unit_key_stored_digest())
+
+    def test_digest_unit_key_none(self):
+        missing = ContentUnitHelper.digest_unit_key({'apple': None, 'pear': 'p', 'age': 1})
+        empty = ContentUnitHelper.digest_unit_key({'apple': '', 'pear': 'p', 'age': 1})
+        none = ContentUnitHelper.digest_unit_key({'apple': 'None', 'pear': 'p', 'age': 1})
+
+        self.assertEqual(len(set([missing, empty, none])), 3)
+
+    def test_digest_unit_key_unicode(self):
+        digest = ContentUnitHelper.digest_unit_key({'apple': u'\xe4pfel', 'pear': 'p', 'age': 1})
+
+        self.assertEqual(digest, ContentUnitHelper.digest_unit_key(
+            {'apple': '\xc3\xa4pfel', 'pear': 'p', 'age': 1}))
+
+    def test_digest_unit_key_unsupported(self):
+        self.assertTrue(ContentUnitHelper.digest_unit_key(
+            {'apple': 'a', 'pear': 'p', 'age': [1]}) is None)
+        self.assertTrue(ContentUnitHelper.digest_unit_key(
+            {'apple': 'a', 'pear': 'p', 'age': 1, 'other': 1}) is None)
+
+    def test_unit_key_digest_index(self):
+        self.assertTrue('_unit_key_digest' in ContentUnitHelper._meta['indexes'])
 
     @patch('pulp.server.db.model.Repository.objects')
     @patch('pulp.server.db.model.RepositoryContentUnit.objects')
@@ -675,6 +719,32 @@ class TestReservedResource(unittest.TestCase):
         self.assertEqual(model.ReservedResource._meta['allow_inheritance'], False)
 
 
+class TestWaitingReservation(unittest.TestCase):
+    """
+    Test WaitingReservation model
+    """
+
+    def test_model_superclass(self):
+        sample_model = model.WaitingReservation()
+        self.assertTrue(isinstance(sample_model, Document))
+
+    def test_attributes(self):
+        self.assertTrue(isinstance(model.WaitingReservation.task_id, StringField))
+        self.assertTrue(model.WaitingReservation.task_id.primary_key)
+        self.assertEqual(model.WaitingReservation.task_id.db_field, '_id')
+
+        self.assertTrue(isinstance(model.WaitingReservation.task_name, StringField))
+        self.assertTrue(isinstance(model.WaitingReservation.resource_id, StringField))
+        self.assertTrue(isinstance(model.WaitingReservation.arguments, StringField))
+        self.assertTrue(isinstance(model.WaitingReservation.queued, FloatField))
+
+    def test_indexes(self):
+        self.assertEqual(model.WaitingReservation._meta['indexes'], ['queued'])
+
+    def test_meta_collection(self):
+        self.assertEqual(model.WaitingReservation._meta['collection'], 'waiting_reservations')
+
+
 class TestWorkerModel(unittest.TestCase):
     """
     Test the Worker Model
@@ -1514,6 +1584,45 @@ class TestUserAuth(unittest.TestCase):
         self.assertTrue(hashed is mock_hmac.return_value.digest.return_value)
         mock_hmac.assert_called_once_with('password', 'salt', mock_digest)
 
+    def test_pbkdf_sha256_iterations(self):
+        """
+        Test that every iteration applies the salt with HMAC, using the previous digest as key.
+        """
+        expected = 'password'
+        for i in range(3):
+            expected = HMAC(expected, 'salt', sha256).digest()
+
+        self.assertEqual(self.user._pbkdf_sha256('password', 'salt', 3), expected)
+        self.assertEqual(self.user._pbkdf_sha256('password', 'salt', 0), 'password')
+
+    @patch('pulp.server.db.model.verified_credentials')
+    def test_check_password_verified(self, mock_verified):
+        """
+        Test that the password is not hashed when the credentials were recently verified.
+        """
+        mock_verified.verified.return_value = True
+
+        with patch.object(self.user, '_pbkdf_sha256') as mock_sha:
+            self.assertTrue(self.user.check_password('mock_password'))
+
+        self.assertFalse(mock_sha.called)
+        mock_verified.key.assert_called_once_with('test', 'mock_password', 'some password')
+        mock_verified.verified.assert_called_once_with(mock_verified.key.return_value)
+
+    @patch('pulp.server.db.model.verified_credentials')
+    def test_check_password_remembered(self, mock_verified):
+        """
+        Test that only successful checks are remembered.
+        """
+        mock_verified.verified.return_value = False
+        self.user.set_password('mock_password')
+        mock_verified.forget.assert_called_once_with('test')
+
+        self.assertFalse(self.user.check_password('wrong_password'))
+        self.assertFalse(mock_verified.add.called)
+        self.assertTrue(self.user.check_password('mock_password'))
+        mock_verified.add.assert_called_once_with(mock_verified.key.return_value, 'test')
+
     def test_is_superuser(self):
         """
         Test determining if the user is a super user.
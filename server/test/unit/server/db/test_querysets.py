@@ -1,6 +1,6 @@
 import unittest
 
-from mongoengine import Document
+from mongoengine import Document, StringField
 from mongoengine.queryset import DoesNotExist
 import mock
 
@@ -13,6 +13,74 @@ class MockDocument(Document):
     meta = {'queryset_class': querysets.CriteriaQuerySet}
 
 
+class RecordDocument(Document):
+    """Fake Mongoengine document with a field stored under another name"""
+    name = StringField(db_field='n')
+    other = StringField()
+    meta = {'queryset_class': querysets.CriteriaQuerySet, 'allow_inheritance': True}
+
+
+@mock.patch('mongoengine.queryset.base.BaseQuerySet._cursor', new_callable=mock.PropertyMock)
+class TestRecords(unittest.TestCase):
+    """
+    Tests for iterating documents as read-only records.
+    """
+
+    def setUp(self):
+        self.qs = querysets.CriteriaQuerySet(RecordDocument, mock.MagicMock())
+
+    def test_records(self, mock_cursor):
+        mock_cursor.return_value = [{'_id': 1, 'n': 'a', 'other': 'b', '_cls': 'RecordDocument'}]
+
+        records = list(self.qs.records())
+
+        self.assertEqual(records, [querysets.Record({'id': 1, 'name': 'a', 'other': 'b'})])
+        self.assertEqual(records[0].name, 'a')
+        self.assertEqual(records[0]['other'], 'b')
+
+    def test_records_fields(self, mock_cursor):
+        mock_cursor.return_value = [{'_id': 1, 'n': 'a'}]
+        with mock.patch.object(self.qs, 'only', wraps=self.qs.only) as mock_only:
+            records = list(self.qs.records('name'))
+
+        mock_only.assert_called_once_with('name')
+        self.assertEqual(records[0].to_dict(), {'id': 1, 'name': 'a'})
+
+    def test_records_generator(self, mock_cursor):
+        records = self.qs.records()
+
+        self.assertFalse(mock_cursor.called)
+        self.assertEqual(list(records), [])
+
+
+class TestRecord(unittest.TestCase):
+    """
+    Tests for read-only records.
+    """
+
+    def setUp(self):
+        self.record = querysets.Record({'id': 1, 'name': 'a'})
+
+    def test_access(self):
+        self.assertEqual(self.record.id, 1)
+        self.assertEqual(self.record['name'], 'a')
+        self.assertEqual(self.record.get('other', 'default'), 'default')
+        self.assertTrue('name' in self.record)
+        self.assertRaises(AttributeError, getattr, self.record, 'other')
+        self.assertRaises(KeyError, lambda: self.record['other'])
+
+    def test_read_only(self):
+        self.assertRaises(AttributeError, setattr, self.record, 'name', 'b')
+        self.assertRaises(AttributeError, delattr, self.record, 'name')
+        self.record.to_dict()['name'] = 'b'
+        self.assertEqual(self.record.name, 'a')
+
+    def test_equality(self):
+        self.assertEqual(self.record, querysets.Record({'id': 1, 'name': 'a'}))
+        self.assertNotEqual(self.record, querysets.Record({'id': 2, 'name': 'a'}))
+        self.assertNotEqual(self.record, {'id': 1, 'name': 'a'})
+
+
 class TestCriteriaQuerySet(unittest.TestCase):
     """
     Tests for custom querysets that search with Criteria objects.
@@ -124,3 +192,14 @@ class TestReqoQuerySet(unittest.TestCase):
         qs.get = mock_get
         self.assertRaises(pulp_exceptions.MissingResource, qs.get_repo_or_missing_resource, 'repo')
         mock_get.assert_called_once_with(repo_id='repo')
+
+
+class TestContentUnitQuerySet(unittest.TestCase):
+    """
+    Tests for the content unit custom query set.
+    """
+
+    def test_cache_not_implemented(self):
+        """Assert that calling `cache` results in an exception."""
+        qs = querysets.ContentUnitQuerySet(mock.MagicMock(), mock.MagicMock())
+        self.assertRaises(NotImplementedError, qs.cache)
@@ -1,6 +1,7 @@
 import unittest
 
 import mock
+from requests import ConnectionError
 
 from pulp.server.event import http
 from pulp.server.event.data import Event
@@ -12,8 +13,8 @@ class TestHTTPNotifierTests(unittest.TestCase):
 
     @mock.patch(MODULE_PATH + 'json')
     @mock.patch(MODULE_PATH + 'json_util')
-    @mock.patch(MODULE_PATH + 'threading.Thread')
-    def test_handle_event(self, mock_thread, mock_jutil, mock_json):
+    @mock.patch(MODULE_PATH + 'dispatcher')
+    def test_handle_event(self, mock_dispatcher, mock_jutil, mock_json):
         # Setup
         notifier_config = {'key': 'value'}
         mock_event = mock.Mock(spec=Event)
@@ -22,10 +23,21 @@ class TestHTTPNotifierTests(unittest.TestCase):
         # Test
         http.handle_event(notifier_config, mock_event)
         mock_json.dumps.assert_called_once_with(event_data, default=mock_jutil.default)
-        mock_thread.assert_called_once_with(
-            target=http._send_post,
-            args=[notifier_config, mock_json.dumps.return_value]
+        mock_dispatcher.put.assert_called_once_with(notifier_config,
+                                                    mock_json.dumps.return_value)
+
+    def test_send_post_session(self):
+        notifier_config = {'url': 'https://localhost/api/'}
+        session = mock.Mock()
+
+        response = http._send_post(notifier_config, '{}', session)
+        session.post.assert_called_once_with(
+            'https://localhost/api/',
+            data='{}',
+            headers={'Content-Type': 'application/json'},
+            auth=None,
         )
+        self.assertTrue(response is session.post.return_value)
 
     @mock.patch(MODULE_PATH + 'post')
     def test_send_post_no_auth(self, mock_post):
@@ -91,3 +103,133 @@ class TestHTTPNotifierTests(unittest.TestCase):
             auth=mock_basic_auth.return_value,
         )
         mock_log.error.assert_called_once_with(expected_log)
+
+
+class TestBatchSize(unittest.TestCase):
+
+    def test_default(self):
+        self.assertEqual(http._batch_size({}), 1)
+
+    def test_configured(self):
+        self.assertEqual(http._batch_size({'batch_size': '10'}), 10)
+
+    def test_invalid(self):
+        self.assertEqual(http._batch_size({'batch_size': 'many'}), 1)
+        self.assertEqual(http._batch_size({'batch_size': -2}), 1)
+
+
+class TestGroup(unittest.TestCase):
+
+    def test_group(self):
+        a = {'url': 'http://a/', 'batch_size': 2}
+        b = {'url': 'http://b/'}
+        deliveries = [http.Delivery(a, '1'), http.Delivery(b, '2'), http.Delivery(a, '3'),
+                      http.Delivery(a, '4'), http.Delivery(b, '5')]
+
+        groups = http._group(deliveries)
+
+        self.assertEqual([(e[0], [d.json_body for d in batch]) for e, batch in groups],
+                         [('http://a/', ['1', '3']), ('http://b/', ['2']),
+                          ('http://a/', ['4']), ('http://b/', ['5'])])
+
+
+class TestDispatcher(unittest.TestCase):
+
+    @mock.patch(MODULE_PATH + 'threading.Thread')
+    def test_put_starts_pool_once(self, mock_thread):
+        dispatcher = http.Dispatcher(pool_size=3)
+
+        dispatcher.put({'url': 'http://a/'}, '1')
+        dispatcher.put({'url': 'http://a/'}, '2')
+
+        self.assertEqual(mock_thread.call_count, 3)
+        self.assertEqual(dispatcher.queue.qsize(), 2)
+        self.assertEqual(dispatcher.stats()['backlog'], 2)
+
+    @mock.patch(MODULE_PATH + '_logger')
+    @mock.patch(MODULE_PATH + 'threading.Thread')
+    def test_put_full(self, mock_thread, mock_log):
+        dispatcher = http.Dispatcher(queue_size=1)
+
+        dispatcher.put({'url': 'http://a/'}, '1')
+        dispatcher.put({'url': 'http://a/'}, '2')
+
+        self.assertEqual(dispatcher.stats()['dropped'], 1)
+        self.assertEqual(mock_log.error.call_count, 1)
+
+    @mock.patch(MODULE_PATH + 'threading.Thread')
+    def test_take_batch(self, mock_thread):
+        dispatcher = http.Dispatcher()
+        for n in range(5):
+            dispatcher.put({'url': 'http://a/', 'batch_size': 3}, str(n))
+
+        deliveries = dispatcher._take()
+
+        self.assertEqual([d.json_body for d in deliveries], ['0', '1', '2'])
+
+    @mock.patch(MODULE_PATH + '_send_post')
+    def test_deliver(self, mock_send_post):
+        mock_send_post.return_value.status_code = 200
+        dispatcher = http.Dispatcher()
+        config = {'url': 'http://a/'}
+        session = mock.Mock()
+
+        dispatcher._deliver(session, [http.Delivery(config, '{"a": 1}')])
+
+        mock_send_post.assert_called_once_with(config, '{"a": 1}', session)
+        stats = dispatcher.stats()
+        self.assertEqual(stats['delivered'], 1)
+        self.assertTrue(stats['latency'] is not None)
+
+    @mock.patch(MODULE_PATH + '_send_post')
+    def test_deliver_batch(self, mock_send_post):
+        mock_send_post.return_value.status_code = 200
+        dispatcher = http.Dispatcher()
+        config = {'url': 'http://a/', 'batch_size': 5}
+        session = mock.Mock()
+
+        dispatcher._deliver(session, [http.Delivery(config, '{"a": 1}'),
+                                      http.Delivery(config, '{"b": 2}')])
+
+        mock_send_post.assert_called_once_with(config, '[{"a": 1}, {"b": 2}]', session)
+        self.assertEqual(dispatcher.stats()['delivered'], 2)
+
+    @mock.patch(MODULE_PATH + 'time.sleep')
+    @mock.patch(MODULE_PATH + '_logger')
+    @mock.patch(MODULE_PATH + '_send_post')
+    def test_deliver_retry(self, mock_send_post, mock_log, mock_sleep):
+        ok = mock.Mock(status_code=200)
+        mock_send_post.side_effect = [ConnectionError(), mock.Mock(status_code=503), ok]
+        dispatcher = http.Dispatcher()
+
+        dispatcher._deliver(mock.Mock(), [http.Delivery({'url': 'http://a/'}, '{}')])
+
+        self.assertEqual(mock_send_post.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list, [mock.call(1), mock.call(2)])
+        stats = dispatcher.stats()
+        self.assertEqual(stats['retried'], 2)
+        self.assertEqual(stats['delivered'], 1)
+
+    @mock.patch(MODULE_PATH + 'time.sleep')
+    @mock.patch(MODULE_PATH + '_logger')
+    @mock.patch(MODULE_PATH + '_send_post')
+    def test_deliver_client_error_not_retried(self, mock_send_post, mock_log, mock_sleep):
+        mock_send_post.return_value.status_code = 404
+        dispatcher = http.Dispatcher()
+
+        dispatcher._deliver(mock.Mock(), [http.Delivery({'url': 'http://a/'}, '{}')])
+
+        self.assertEqual(mock_send_post.call_count, 1)
+        self.assertEqual(dispatcher.stats()['failed'], 1)
+
+    @mock.patch(MODULE_PATH + 'time.sleep')
+    @mock.patch(MODULE_PATH + '_logger')
+    @mock.patch(MODULE_PATH + '_send_post')
+    def test_deliver_gives_up(self, mock_send_post, mock_log, mock_sleep):
+        mock_send_post.side_effect = ConnectionError()
+        dispatcher = http.Dispatcher()
+
+        dispatcher._deliver(mock.Mock(), [http.Delivery({'url': 'http://a/'}, '{}')])
+
+        self.assertEqual(mock_send_post.call_count, http.RETRIES + 1)
+        self.assertEqual(dispatcher.stats()['failed'], 1)
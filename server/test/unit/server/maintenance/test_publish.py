@@ -0,0 +1,48 @@
+"""
+This test module contains tests for the pulp.server.maintenance.publish module.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from pulp.devel.unit.util import touch
+from pulp.server.maintenance import publish
+
+
+class TestQueueRemoveOldMasters(unittest.TestCase):
+    """
+    Test the queue_remove_old_masters() function.
+    """
+    @mock.patch('pulp.server.maintenance.publish.remove_old_masters.apply_async')
+    def test_queue(self, apply_async):
+        result = publish.queue_remove_old_masters(('/a', '/b'))
+
+        apply_async.assert_called_once_with((['/a', '/b'],),
+                                            tags=['pulp:action:remove_old_masters'])
+        self.assertTrue(result is apply_async.return_value)
+
+
+class TestRemoveOldMasters(unittest.TestCase):
+    """
+    Test the remove_old_masters() task.
+    """
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_remove(self):
+        old_dir = os.path.join(self.working_dir, 'old')
+        touch(os.path.join(old_dir, 'foo', 'bar.html'))
+        old_link = os.path.join(self.working_dir, 'link')
+        os.symlink(old_dir, old_link)
+        kept_dir = os.path.join(self.working_dir, 'kept')
+        os.makedirs(kept_dir)
+
+        publish.remove_old_masters([old_link, old_dir, os.path.join(self.working_dir, 'missing')])
+
+        self.assertEqual(os.listdir(self.working_dir), ['kept'])
@@ -62,6 +62,29 @@ class TestCatalogManager(PulpServerTests):
             self.assertEqual(entry['unit_key'], unit_key)
             self.assertEqual(entry['url'], url)
 
+    def test_add_entries(self):
+        units = self.units(0, 10)
+        manager = ContentCatalogManager()
+        entries = [(TYPE_ID, unit_key, url) for unit_key, url in units]
+        added = manager.add_entries(SOURCE_ID, EXPIRATION, entries)
+        self.assertEqual(added, len(units))
+        added = manager.add_entries(SOURCE_ID, EXPIRATION, entries)
+        self.assertEqual(added, len(units))
+        collection = ContentCatalog.get_collection()
+        self.assertEqual(len(units), collection.find().count())
+        for unit_key, url in units:
+            locator = ContentCatalog.get_locator(TYPE_ID, unit_key)
+            entry = collection.find_one({'locator': locator})
+            self.assertEqual(entry['source_id'], SOURCE_ID)
+            self.assertEqual(entry['type_id'], TYPE_ID)
+            self.assertEqual(entry['unit_key'], unit_key)
+            self.assertEqual(entry['url'], url)
+            self.assertEqual(entry['id'], str(entry['_id']))
+
+    def test_add_entries_empty(self):
+        manager = ContentCatalogManager()
+        self.assertEqual(manager.add_entries(SOURCE_ID, EXPIRATION, []), 0)
+
     def test_delete(self):
         units = self.units(0, 10)
         manager = ContentCatalogManager()
@@ -134,6 +157,23 @@ class TestCatalogManager(PulpServerTests):
         self.assertEqual(collection.find({'source_id': source_a}).count(), 10)
         self.assertEqual(collection.find({'source_id': source_b}).count(), 0)
 
+    def test_purge_stale(self):
+        source_a = 'A'
+        source_b = 'B'
+        manager = ContentCatalogManager()
+        for unit_key, url in self.units(0, 10):
+            manager.add_entry(source_a, -1, TYPE_ID, unit_key, url)
+        for unit_key, url in self.units(10, 10):
+            manager.add_entry(source_a, EXPIRATION, TYPE_ID, unit_key, url)
+        for unit_key, url in self.units(0, 10):
+            manager.add_entry(source_b, -1, TYPE_ID, unit_key, url)
+        collection = ContentCatalog.get_collection()
+        self.assertEqual(30, collection.find().count())
+        purged = manager.purge_stale(source_a, ContentCatalog.get_expiration(0))
+        self.assertEqual(purged, 10)
+        self.assertEqual(collection.find({'source_id': source_a}).count(), 10)
+        self.assertEqual(collection.find({'source_id': source_b}).count(), 10)
+
     def test_purge_orphans(self):
         source_a = 'A'
         source_b = 'B'
@@ -171,6 +211,25 @@ class TestCatalogManager(PulpServerTests):
             self.assertEqual(entry['unit_key'], unit_key)
             self.assertEqual(entry['url'], url)
 
+    def test_find_by_locators(self):
+        units = self.units(0, 10)
+        manager = ContentCatalogManager()
+        for unit_key, url in units:
+            manager.add_entry(SOURCE_ID, EXPIRATION, TYPE_ID, unit_key, url)
+        # newer entry for the first unit from the same source
+        manager.add_entry(SOURCE_ID, EXPIRATION, TYPE_ID, units[0][0], 'file://redhat.com/new')
+        locators = [ContentCatalog.get_locator(TYPE_ID, k) for k, u in units[0:3]]
+        locators.append(ContentCatalog.get_locator(TYPE_ID, {'name': 'missing'}))
+        found = manager.find_by_locators(locators)
+        self.assertEqual(len(found), 3)
+        self.assertEqual(len(found[locators[0]]), 1)
+        self.assertEqual(found[locators[0]][0]['url'], 'file://redhat.com/new')
+        for locator, (unit_key, url) in zip(locators[1:3], units[1:3]):
+            entries = found[locator]
+            self.assertEqual(len(entries), 1)
+            self.assertEqual(entries[0]['unit_key'], unit_key)
+            self.assertEqual(entries[0]['url'], url)
+
     def test_expired(self):
         units = self.units(0, 10)
         manager = ContentCatalogManager()
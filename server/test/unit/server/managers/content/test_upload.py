@@ -55,6 +55,19 @@ class ContentUploadManagerTests(base.PulpServerTests):
         written = self.upload_manager.read_upload(upload_id)
         self.assertEqual(written, ''.join(write_us))
 
+    def test_save_data_out_of_order(self):
+
+        # Test
+        upload_id = self.upload_manager.initialize_upload()
+
+        write_us = [(7, 'hij'), (3, 'defg'), (0, 'abc')]
+        for offset, w in write_us:
+            self.upload_manager.save_data(upload_id, offset, w)
+
+        # Verify
+        written = self.upload_manager.read_upload(upload_id)
+        self.assertEqual(written, 'abcdefghij')
+
     def test_save_data_rpm(self):
 
         # Setup
@@ -32,6 +32,16 @@ class EventListenerManagerTests(base.PulpServerTests):
         all_event_listeners = list(EventListener.get_collection().find())
         self.assertEqual(1, len(all_event_listeners))
 
+    @mock.patch('pulp.server.managers.event.crud.listener_table')
+    @mock.patch('pulp.server.managers.event.crud.EventListenerVersion')
+    def test_create_invalidates_listeners(self, mock_version, mock_table):
+        created = self.manager.create(http.TYPE_ID, None, [event_data.TYPE_REPO_SYNC_STARTED])
+        self.manager.update(created['_id'], event_types=[event_data.TYPE_REPO_SYNC_FINISHED])
+        self.manager.delete(created['_id'])
+
+        self.assertEqual(mock_version.increment.call_count, 3)
+        self.assertEqual(mock_table.invalidate.call_count, 3)
+
     def test_create_invalid_event_type(self):
         # Test
         try:
@@ -1,9 +1,12 @@
+import unittest
+
 import mock
 
 from .... import base
 from pulp.server.db.model.event import EventListener
 from pulp.server.event import data as event_data, notifiers
 from pulp.server.managers import factory as manager_factory
+from pulp.server.managers.event import fire
 
 
 class EventFireManagerTests(base.PulpServerTests):
@@ -18,6 +21,7 @@ class EventFireManagerTests(base.PulpServerTests):
         super(EventFireManagerTests, self).tearDown()
 
         EventListener.get_collection().remove()
+        fire.listener_table.invalidate()
         notifiers.reset()
 
     def test_do_fire(self):
@@ -141,3 +145,57 @@ class EventFireManagerTests(base.PulpServerTests):
 
         self.assertEqual(event.event_type, event_data.TYPE_REPO_SYNC_FINISHED)
         self.assertEqual(event.payload, result)
+
+
+@mock.patch('pulp.server.managers.event.fire.EventListener')
+@mock.patch('pulp.server.managers.event.fire.EventListenerVersion')
+class TestListenerTable(unittest.TestCase):
+
+    LISTENERS = [
+        {'notifier_type_id': 'http', 'event_types': [event_data.TYPE_REPO_SYNC_STARTED]},
+        {'notifier_type_id': 'email', 'event_types': ['*']},
+        {'notifier_type_id': 'amqp', 'event_types': [event_data.TYPE_REPO_SYNC_FINISHED]},
+    ]
+
+    def test_find(self, mock_version, mock_listener):
+        mock_version.get.return_value = 1
+        mock_listener.get_collection.return_value.find.return_value = self.LISTENERS
+        table = fire.ListenerTable()
+
+        listeners = table.find(event_data.TYPE_REPO_SYNC_STARTED)
+
+        self.assertEqual(listeners, self.LISTENERS[:2])
+
+    def test_cached(self, mock_version, mock_listener):
+        mock_version.get.return_value = 1
+        mock_listener.get_collection.return_value.find.return_value = self.LISTENERS
+        table = fire.ListenerTable()
+
+        table.find(event_data.TYPE_REPO_SYNC_STARTED)
+        listeners = table.find(event_data.TYPE_REPO_SYNC_FINISHED)
+
+        self.assertEqual(listeners, self.LISTENERS[1:])
+        self.assertEqual(mock_listener.get_collection.return_value.find.call_count, 1)
+
+    def test_version_changed(self, mock_version, mock_listener):
+        mock_version.get.return_value = 1
+        mock_listener.get_collection.return_value.find.return_value = self.LISTENERS
+        table = fire.ListenerTable()
+        table.find(event_data.TYPE_REPO_SYNC_STARTED)
+
+        mock_version.get.return_value = 2
+        mock_listener.get_collection.return_value.find.return_value = []
+        listeners = table.find(event_data.TYPE_REPO_SYNC_STARTED)
+
+        self.assertEqual(listeners, [])
+
+    def test_invalidate(self, mock_version, mock_listener):
+        mock_version.get.return_value = 1
+        mock_listener.get_collection.return_value.find.return_value = self.LISTENERS
+        table = fire.ListenerTable()
+        table.find(event_data.TYPE_REPO_SYNC_STARTED)
+
+        table.invalidate()
+        table.find(event_data.TYPE_REPO_SYNC_STARTED)
+
+        self.assertEqual(mock_listener.get_collection.return_value.find.call_count, 2)
@@ -8,6 +8,7 @@ from pulp.server.controllers import importer as importer_controller
 from pulp.server.db import model as me_model
 from pulp.server.db.model.criteria import UnitAssociationCriteria
 from pulp.server.db.model.repository import RepoContentUnit
+from pulp.server.db.querysets import Record
 import pulp.server.exceptions as exceptions
 import pulp.server.managers.content.cud as content_cud_manager
 import pulp.server.managers.factory as manager_factory
@@ -59,6 +60,177 @@ class TestUnitsFromCriteria(unittest.TestCase):
         self.assertTrue(found)
 
 
+@mock.patch('pulp.server.managers.repo.unit_association.StatusMixin')
+@mock.patch('pulp.server.managers.repo.unit_association.repo_controller')
+@mock.patch('pulp.server.managers.repo.unit_association.units_controller')
+@mock.patch('pulp.server.managers.repo.unit_association.plugin_api')
+@mock.patch('pulp.server.managers.repo.unit_association.model.RepositoryContentUnit')
+class TestBulkCopy(unittest.TestCase):
+    def setUp(self):
+        super(TestBulkCopy, self).setUp()
+        self.manager = association_manager.RepoUnitAssociationManager()
+        self.source_repo = me_model.Repository(repo_id='source-repo')
+        self.dest_repo = me_model.Repository(repo_id='dest-repo')
+        self.associations = [Record({'unit_type_id': 'type-1', 'unit_id': 'a'}),
+                             Record({'unit_type_id': 'type-1', 'unit_id': 'b'}),
+                             Record({'unit_type_id': 'type-2', 'unit_id': 'c'})]
+        self.units = {'type-1': [Record({'id': 'a', 'key_1': 'one'})],
+                      'type-2': [Record({'id': 'c', 'key_1': 'three'})]}
+
+    def set_up_models(self, m_rcu, m_plugin_api, m_units_controller):
+        m_rcu.objects.return_value.count.return_value = len(self.associations)
+        m_rcu.objects.return_value.records.return_value = iter(self.associations)
+        m_units_controller.get_model_serializer_for_type.return_value = None
+
+        self.models = {}
+        for unit_type_id, units in self.units.items():
+            model_class = mock.MagicMock(unit_key_fields=('key_1',))
+            model_class.objects.return_value.records.return_value = units
+            self.models[unit_type_id] = model_class
+        m_plugin_api.get_unit_model_by_id.side_effect = self.models.get
+
+    def test_copy(self, m_rcu, m_plugin_api, m_units_controller, m_repo_controller, m_status):
+        """
+        Test that the units matching the criteria are associated to the destination repository,
+        that the counts are rebuilt once, and that the progress is reported.
+        """
+        self.set_up_models(m_rcu, m_plugin_api, m_units_controller)
+        m_repo_controller.associate_unit_ids.return_value = 1
+        reports = []
+        m_status.return_value.set_progress.side_effect = lambda r: reports.append(dict(r))
+        criteria = UnitAssociationCriteria(type_ids=['type-1', 'type-2'],
+                                           unit_filters={'key_1': {'$ne': 'two'}})
+
+        ret = self.manager._bulk_copy(self.source_repo, self.dest_repo, criteria)
+
+        self.assertEqual(ret, {'units_successful': [
+            {'type_id': 'type-1', 'unit_key': {'key_1': 'one'}},
+            {'type_id': 'type-2', 'unit_key': {'key_1': 'three'}}]})
+        self.assertEqual(m_rcu.objects.call_args[1]['repo_id'], 'source-repo')
+        m_rcu.objects.return_value.records.assert_called_once_with('unit_type_id', 'unit_id')
+        for model_class in self.models.values():
+            unit_q = model_class.objects.call_args[1]['q_obj']
+            self.assertEqual(unit_q.query, {'__raw__': {'key_1': {'$ne': 'two'}}})
+        self.assertEqual(sorted(c[0] for c in m_repo_controller.associate_unit_ids.call_args_list),
+                         [('dest-repo', 'type-1', ['a']), ('dest-repo', 'type-2', ['c'])])
+        m_repo_controller.rebuild_content_unit_counts.assert_called_once_with(self.dest_repo)
+        m_repo_controller.update_last_unit_added.assert_called_once_with('dest-repo')
+        m_status.assert_called_once_with(association_manager.BULK_COPY_KEYWORD,
+                                         exceptions.PulpExecutionException)
+        self.assertEqual(reports, [
+            {'state': 'in_progress', 'units_total': 3, 'units_processed': 0, 'units_added': 0},
+            {'state': 'in_progress', 'units_total': 3, 'units_processed': 3, 'units_added': 2},
+            {'state': 'complete', 'units_total': 3, 'units_processed': 3, 'units_added': 2}])
+
+    @mock.patch('pulp.server.managers.repo.unit_association.BULK_COPY_PAGE_SIZE', 2)
+    def test_copy_pages(self, m_rcu, m_plugin_api, m_units_controller, m_repo_controller,
+                        m_status):
+        """
+        Test that the associations are copied a page at a time.
+        """
+        self.set_up_models(m_rcu, m_plugin_api, m_units_controller)
+        m_repo_controller.associate_unit_ids.return_value = 0
+        reports = []
+        m_status.return_value.set_progress.side_effect = lambda r: reports.append(dict(r))
+
+        self.manager._bulk_copy(self.source_repo, self.dest_repo, UnitAssociationCriteria())
+
+        self.assertEqual([r['units_processed'] for r in reports], [0, 2, 3, 3])
+        self.assertEqual(m_repo_controller.associate_unit_ids.call_count, 2)
+        m_repo_controller.rebuild_content_unit_counts.assert_called_once_with(self.dest_repo)
+
+    def test_copy_nothing(self, m_rcu, m_plugin_api, m_units_controller, m_repo_controller,
+                          m_status):
+        """
+        Test that the last unit added is not updated when no units match the criteria.
+        """
+        self.associations = []
+        self.set_up_models(m_rcu, m_plugin_api, m_units_controller)
+
+        ret = self.manager._bulk_copy(self.source_repo, self.dest_repo, UnitAssociationCriteria())
+
+        self.assertEqual(ret, {'units_successful': []})
+        self.assertFalse(m_repo_controller.associate_unit_ids.called)
+        m_repo_controller.rebuild_content_unit_counts.assert_called_once_with(self.dest_repo)
+        self.assertFalse(m_repo_controller.update_last_unit_added.called)
+
+    def test_translates_unit_filters(self, m_rcu, m_plugin_api, m_units_controller,
+                                     m_repo_controller, m_status):
+        """
+        Test that the unit filters are translated by the serializer of each unit type.
+        """
+        self.set_up_models(m_rcu, m_plugin_api, m_units_controller)
+        serializer = mock.MagicMock()
+        m_units_controller.get_model_serializer_for_type.return_value = serializer
+        serializer.translate_filters.return_value = {'translated': True}
+        criteria = UnitAssociationCriteria(unit_filters={'key_1': 'one'})
+
+        self.manager._bulk_copy(self.source_repo, self.dest_repo, criteria)
+
+        self.assertEqual(serializer.translate_filters.call_count, 2)
+        serializer.translate_filters.assert_called_with(serializer.model, {'key_1': 'one'})
+        for model_class in self.models.values():
+            unit_q = model_class.objects.call_args[1]['q_obj']
+            self.assertEqual(unit_q.query, {'__raw__': {'translated': True}})
+
+
+@mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager._bulk_copy')
+@mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.'
+            '_units_from_criteria')
+@mock.patch('pulp.server.managers.repo.unit_association.plugin_api')
+@mock.patch('pulp.server.managers.repo.unit_association.repo_controller')
+@mock.patch('pulp.server.managers.repo.unit_association.model')
+class TestAssociateFromRepoBulkCopy(unittest.TestCase):
+    def set_up_plugins(self, m_model, m_plugin_api, bulk_copy):
+        m_model.Repository.objects.get_repo_or_missing_resource.return_value.content_unit_counts \
+            = {'type-1': 1}
+        m_plugin_api.list_importer_types.return_value = {'types': ['type-1'],
+                                                         'bulk_copy': bulk_copy}
+        m_plugin_api.list_unit_models.return_value = {'type-1': mock.MagicMock()}
+        m_plugin_api.get_importer_by_id.return_value = (mock.MagicMock(), {})
+
+    def test_bulk_copy(self, m_model, m_repo_controller, m_plugin_api, m_units_from_criteria,
+                       m_bulk_copy):
+        """
+        Test that importers that opt in to bulk copies are not called.
+        """
+        self.set_up_plugins(m_model, m_plugin_api, True)
+
+        ret = association_manager.RepoUnitAssociationManager.associate_from_repo(
+            'source-repo', 'dest-repo', UnitAssociationCriteria())
+
+        self.assertTrue(ret is m_bulk_copy.return_value)
+        self.assertFalse(m_plugin_api.get_importer_by_id.return_value[0].import_units.called)
+
+    @mock.patch('pulp.server.managers.repo.unit_association.ImportUnitConduit')
+    def test_bulk_copy_limited(self, m_conduit, m_model, m_repo_controller, m_plugin_api,
+                               m_units_from_criteria, m_bulk_copy):
+        """
+        Test that copies limiting the units are passed to the importer.
+        """
+        self.set_up_plugins(m_model, m_plugin_api, True)
+
+        association_manager.RepoUnitAssociationManager.associate_from_repo(
+            'source-repo', 'dest-repo', UnitAssociationCriteria(limit=1))
+
+        self.assertFalse(m_bulk_copy.called)
+        self.assertTrue(m_plugin_api.get_importer_by_id.return_value[0].import_units.called)
+
+    @mock.patch('pulp.server.managers.repo.unit_association.ImportUnitConduit')
+    def test_bulk_copy_not_supported(self, m_conduit, m_model, m_repo_controller, m_plugin_api,
+                                     m_units_from_criteria, m_bulk_copy):
+        """
+        Test that copies are passed to importers that do not opt in to bulk copies.
+        """
+        self.set_up_plugins(m_model, m_plugin_api, False)
+
+        association_manager.RepoUnitAssociationManager.associate_from_repo(
+            'source-repo', 'dest-repo', UnitAssociationCriteria())
+
+        self.assertFalse(m_bulk_copy.called)
+        self.assertTrue(m_plugin_api.get_importer_by_id.return_value[0].import_units.called)
+
+
 @mock.patch('pulp.server.managers.repo.unit_association.model.Repository')
 class RepoUnitAssociationManagerTests(base.PulpServerTests):
 
@@ -139,6 +139,40 @@ class TestGetUpdatedSince(unittest.TestCase):
         mock_get_collection.assert_called_once_with()
 
 
+class TestGetByIds(unittest.TestCase):
+    @mock.patch('pulp.server.db.connection.PulpCollection.query')
+    def test_query(self, mock_query):
+        mock_query.return_value = SCHEDULES
+        schedule_id = str(ObjectId())
+
+        ret = list(utils.get_by_ids([schedule_id]))
+
+        self.assertEqual(mock_query.call_count, 1)
+        criteria = mock_query.call_args[0][0]
+        self.assertTrue(isinstance(criteria, Criteria))
+        # disabled schedules must be returned too, so they can be removed from the schedule
+        self.assertEqual(criteria.filters, {'_id': {'$in': [ObjectId(schedule_id)]}})
+        self.assertEqual(len(ret), 3)
+
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_gets_correct_collection(self, mock_get_collection):
+        """
+        make sure this operation uses the correct collection
+        """
+        utils.get_by_ids([str(ObjectId())])
+
+        mock_get_collection.assert_called_once_with()
+
+
+class TestGetVersion(unittest.TestCase):
+    @mock.patch('pulp.server.managers.schedule.utils.ScheduledCallVersion')
+    def test_get(self, mock_version):
+        ret = utils.get_version()
+
+        mock_version.get.assert_called_once_with()
+        self.assertTrue(ret is mock_version.get.return_value)
+
+
 class TestGetEnabled(unittest.TestCase):
     @mock.patch('pulp.server.db.connection.PulpCollection.query')
     def test_query(self, mock_query):
@@ -181,10 +215,15 @@ class TestGetEnabled(unittest.TestCase):
 class TestDelete(unittest.TestCase):
     schedule_id = str(ObjectId())
 
+    def setUp(self):
+        patcher = mock.patch('pulp.server.managers.schedule.utils.ScheduledCallVersion')
+        self.mock_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_delete(self, mock_get_collection):
         mock_remove = mock_get_collection.return_value.find_and_modify
-        mock_remove.return_value = 'not none'
+        mock_remove.return_value = {'_id': ObjectId(self.schedule_id)}
 
         utils.delete(self.schedule_id)
 
@@ -194,6 +233,15 @@ class TestDelete(unittest.TestCase):
         self.assertEqual(mock_remove.call_args[1]['query'], {'_id': ObjectId(self.schedule_id)})
         self.assertEqual(mock_remove.call_args[1]['remove'], True)
 
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_delete_records_id(self, mock_get_collection):
+        mock_remove = mock_get_collection.return_value.find_and_modify
+        mock_remove.return_value = {'_id': ObjectId(self.schedule_id)}
+
+        utils.delete(self.schedule_id)
+
+        self.mock_version.increment.assert_called_once_with(deleted_ids=[self.schedule_id])
+
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_delete_missing(self, mock_get_collection):
         # this should cause the exception to be raised
@@ -202,6 +250,7 @@ class TestDelete(unittest.TestCase):
 
         self.assertRaises(exceptions.MissingResource, utils.delete, self.schedule_id)
         self.assertEqual(mock_find.call_count, 1)
+        self.assertFalse(self.mock_version.increment.called)
 
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_gets_correct_collection(self, mock_get_collection):
@@ -221,6 +270,11 @@ class TestDelete(unittest.TestCase):
 
 
 class TestDeleteByResource(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch('pulp.server.managers.schedule.utils.ScheduledCallVersion')
+        self.mock_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_calls_remove(self, mock_get_collection):
         mock_remove = mock_get_collection.return_value.remove
@@ -230,10 +284,34 @@ class TestDeleteByResource(unittest.TestCase):
 
         mock_remove.assert_called_once_with({'resource': 'resource1'})
 
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_records_ids(self, mock_get_collection):
+        mock_get_collection.return_value.find.return_value = [{'_id': ObjectId('0' * 24)},
+                                                              {'_id': ObjectId('1' * 24)}]
+
+        utils.delete_by_resource('resource1')
+
+        mock_get_collection.return_value.find.assert_called_once_with(
+            {'resource': 'resource1'}, ['_id'])
+        self.mock_version.increment.assert_called_once_with(deleted_ids=['0' * 24, '1' * 24])
+
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_nothing_deleted(self, mock_get_collection):
+        mock_get_collection.return_value.find.return_value = []
+
+        utils.delete_by_resource('resource1')
+
+        self.assertFalse(self.mock_version.increment.called)
+
 
 class TestUpdate(unittest.TestCase):
     schedule_id = str(ObjectId())
 
+    def setUp(self):
+        patcher = mock.patch('pulp.server.managers.schedule.utils.ScheduledCallVersion')
+        self.mock_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
     @mock.patch('pickle.dumps')
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_update(self, mock_get, mock_pickle):
@@ -254,6 +332,7 @@ class TestUpdate(unittest.TestCase):
 
         self.assertTrue(isinstance(ret, ScheduledCall))
         self.assertEqual(mock_pickle.call_args_list, [])
+        self.mock_version.increment.assert_called_once_with(changed_ids=[self.schedule_id])
 
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_update_iso_schedule(self, mock_get):
@@ -313,6 +392,11 @@ class TestUpdate(unittest.TestCase):
 class TestResetFailureCount(unittest.TestCase):
     schedule_id = str(ObjectId())
 
+    def setUp(self):
+        patcher = mock.patch('pulp.server.managers.schedule.utils.ScheduledCallVersion')
+        self.mock_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_reset(self, mock_get_collection):
         mock_update = mock_get_collection.return_value.update
@@ -326,6 +410,7 @@ class TestResetFailureCount(unittest.TestCase):
         last_updated = mock_update.call_args[1]['document']['$set']['last_updated']
         # make sure the last_updated value is within the last tenth of a second
         self.assertTrue(time.time() - last_updated < .1)
+        self.mock_version.increment.assert_called_once_with(changed_ids=[self.schedule_id])
 
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_gets_correct_collection(self, mock_get_collection):
@@ -347,6 +432,11 @@ class TestResetFailureCount(unittest.TestCase):
 class TestIncrementFailureCount(unittest.TestCase):
     schedule_id = str(ObjectId())
 
+    def setUp(self):
+        patcher = mock.patch('pulp.server.managers.schedule.utils.ScheduledCallVersion')
+        self.mock_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
     @mock.patch('time.time')
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     def test_update(self, mock_get_collection, mock_time):
@@ -364,6 +454,7 @@ class TestIncrementFailureCount(unittest.TestCase):
         self.assertEqual(mock_time.return_value, last_updated)
         # make sure it asks for the new version of the schedule to be returned
         self.assertTrue(mock_find.call_args[1]['new'] is True)
+        self.mock_version.increment.assert_called_once_with(changed_ids=[self.schedule_id])
 
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.from_db')
@@ -423,6 +514,8 @@ class TestIncrementFailureCount(unittest.TestCase):
         last_updated = mock_update.call_args[0][1]['$set']['last_updated']
         # make sure the last_updated value is within the last tenth of a second
         self.assertTrue(time.time() - last_updated < .1)
+        # both the failure count and the disabling are recorded
+        self.assertEqual(self.mock_version.increment.call_count, 2)
 
     def test_invalid_schedule_id(self):
         self.assertRaises(exceptions.InvalidValue, utils.increment_failure_count, 'notavalidid')
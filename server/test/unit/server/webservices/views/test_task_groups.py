@@ -10,66 +10,42 @@ from pulp.server.exceptions import MissingResource
 from pulp.server.webservices.views.task_groups import TaskGroupView, TaskGroupSummaryView
 
 
-class MockQuerySet(object):
-
-    def __init__(self, list_of_objects):
-        self.items = list_of_objects
-        self.i = 0
-        self.n = len(self.items)
-
-    def count(self):
-        return len(self.items)
-
-    def filter(self, state=None):
-        filtered_list = []
-        for item in self.items:
-            if item['state'] == state:
-                filtered_list.append(item)
-        return MockQuerySet(filtered_list)
-
-
 class TestTaskGroupView(unittest.TestCase):
     """
     Tests for TaskGroupView
     """
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_DELETE())
-    @mock.patch('pulp.server.webservices.views.task_groups.TaskStatus.objects')
     @mock.patch('pulp.server.webservices.views.task_groups.tasks')
-    def test_delete_task_resource_nonexistant(self, mock_task, mock_objects):
+    def test_delete_task_resource_nonexistant(self, mock_task):
         """
         Test delete task_group with no tasks
         """
         mock_request = mock.MagicMock()
 
-        mock_objects.only.return_value.filter.return_value = []
+        mock_task.cancel_group.side_effect = MissingResource('mock_task')
         task_resource = TaskGroupView()
 
         self.assertRaises(MissingResource, task_resource.delete, mock_request, 'mock_task')
 
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_DELETE())
-    @mock.patch('pulp.server.webservices.views.task_groups.TaskStatus.objects')
     @mock.patch('pulp.server.webservices.views.task_groups.tasks')
     @mock.patch(
         'pulp.server.webservices.views.task_groups.generate_json_response')
-    def test_delete_task_resource(self, mock_resp, mock_task, mock_objects):
+    def test_delete_task_resource(self, mock_resp, mock_task):
         """
-        Test delete task_group with one task
+        Test delete task_group cancels the tasks of the group in bulk
         """
         mock_request = mock.MagicMock()
-        task1 = mock.Mock(task_id='test_foo_path')
-        task2 = mock.Mock(task_id='test_foo_path1')
-        mock_objects.only.return_value.filter.return_value = [task1, task2]
 
         task_resource = TaskGroupView()
 
         response = task_resource.delete(mock_request, 'mock_task')
 
-        self.assertEqual(mock_task.cancel.call_count, 2)
-
-        mock_task.cancel.assert_any_call('test_foo_path')
-        mock_task.cancel.assert_any_call('test_foo_path1')
+        mock_task.cancel_group.assert_called_once_with('mock_task')
+        self.assertFalse(mock_task.cancel.called)
+        mock_resp.assert_called_once_with(None)
         self.assertTrue(response is mock_resp.return_value)
 
 
@@ -88,7 +64,7 @@ class TestTaskGroupSummary(unittest.TestCase):
         """
 
         mock_request = mock.MagicMock()
-        mock_objects.return_value = MockQuerySet([])
+        mock_objects.return_value.aggregate.return_value = iter([])
 
         task_group_summary = TaskGroupSummaryView()
         response = task_group_summary.get(mock_request, 'mock_task')
@@ -108,17 +84,17 @@ class TestTaskGroupSummary(unittest.TestCase):
         Test get task_group_summary with multiple tasks
         """
         mock_request = mock.MagicMock()
-        mock_objects.return_value = MockQuerySet([{'id': 'mock_task', 'worker_name': 'mock',
-                                                   'state': 'running'},
-                                                  {'id': 'mock_task', 'worker_name': 'mock',
-                                                   'state': 'finished'},
-                                                  {'id': 'mock_task', 'worker_name': 'mock',
-                                                   'state': 'waiting'}])
+        mock_objects.return_value.aggregate.return_value = iter([{'_id': 'running', 'count': 1},
+                                                                 {'_id': 'finished', 'count': 3},
+                                                                 {'_id': 'waiting', 'count': 2}])
 
         task_group_summary = TaskGroupSummaryView()
         response = task_group_summary.get(mock_request, 'mock_task')
 
-        expected_content = {'accepted': 0, 'finished': 1, 'running': 1, 'canceled': 0,
-                            'waiting': 1, 'skipped': 0, 'suspended': 0, 'error': 0, 'total': 3}
+        expected_content = {'accepted': 0, 'finished': 3, 'running': 1, 'canceled': 0,
+                            'waiting': 2, 'skipped': 0, 'suspended': 0, 'error': 0, 'total': 6}
         mock_resp.assert_called_with(expected_content)
+        mock_objects.assert_called_once_with(group_id='mock_task')
+        mock_objects.return_value.aggregate.assert_called_once_with(
+            {'$group': {'_id': '$state', 'count': {'$sum': 1}}})
         self.assertTrue(response is mock_resp.return_value)
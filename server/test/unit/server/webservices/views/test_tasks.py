@@ -1,6 +1,8 @@
 """
 This module contains tests for the pulp.server.webservices.views.tasks module.
 """
+from bson import ObjectId
+from django import http
 import mock
 
 from mongoengine.queryset import DoesNotExist
@@ -66,7 +68,7 @@ class TestTaskCollection(unittest.TestCase):
         """
 
         mock_request = mock.MagicMock()
-        mock_request.GET.getlist.return_value = ['mock_tag_1', 'mock_tag_2']
+        mock_request.GET = http.QueryDict('tag=mock_tag_1&tag=mock_tag_2')
         mock_task_status.objects.return_value = ['mock_1', 'mock_2']
         mock_task_serializer.side_effect = lambda x: x
 
@@ -90,7 +92,7 @@ class TestTaskCollection(unittest.TestCase):
         """
 
         mock_request = mock.MagicMock()
-        mock_request.GET.getlist.return_value = []
+        mock_request.GET = http.QueryDict('')
         mock_task_status.objects.return_value = ['mock_1', 'mock_2']
         mock_task_serializer.side_effect = lambda x: x
 
@@ -102,6 +104,106 @@ class TestTaskCollection(unittest.TestCase):
         mock_task_serializer.assert_has_calls([mock.call('mock_1'), mock.call('mock_2')])
         self.assertTrue(response is mock_resp.return_value)
 
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.tasks.task_serializer')
+    @mock.patch('pulp.server.webservices.views.tasks.TaskStatus')
+    @mock.patch('pulp.server.webservices.views.tasks.generate_json_response_with_pulp_encoder')
+    def test_get_task_collection_filtered(self, mock_resp, mock_task_status,
+                                          mock_task_serializer):
+        """
+        Test get task_collection filtered by state and creation time.
+        """
+        mock_request = mock.MagicMock()
+        mock_request.GET = http.QueryDict('state=running&state=waiting'
+                                          '&created_after=2016-01-01T00:00:00Z'
+                                          '&created_before=2016-02-01T00:00:00Z')
+        mock_task_status.objects.return_value = ['mock_1']
+        mock_task_serializer.side_effect = lambda x: x
+
+        task_collection = TaskCollectionView()
+        task_collection.get(mock_request)
+
+        query = mock_task_status.objects.call_args[1]
+        self.assertEqual(query['group_id'], None)
+        self.assertEqual(query['state__in'], ['running', 'waiting'])
+        self.assertEqual(query['id__gte'].generation_time.isoformat(),
+                         '2016-01-01T00:00:00+00:00')
+        self.assertEqual(query['id__lt'].generation_time.isoformat(),
+                         '2016-02-01T00:00:00+00:00')
+        mock_resp.assert_called_once_with(['mock_1'])
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.tasks.task_serializer')
+    @mock.patch('pulp.server.webservices.views.tasks.TaskStatus')
+    @mock.patch('pulp.server.webservices.views.tasks.generate_json_response_with_pulp_encoder')
+    def test_get_task_collection_paged(self, mock_resp, mock_task_status, mock_task_serializer):
+        """
+        Test get task_collection with a limit and a cursor.
+        """
+        cursor = str(ObjectId())
+        mock_request = mock.MagicMock()
+        mock_request.GET = http.QueryDict('limit=10&cursor=%s' % cursor)
+        mock_query_set = mock_task_status.objects.return_value
+        mock_query_set.order_by.return_value.limit.return_value = ['mock_1', 'mock_2']
+        mock_task_serializer.side_effect = lambda x: x
+
+        task_collection = TaskCollectionView()
+        task_collection.get(mock_request)
+
+        mock_task_status.objects.assert_called_once_with(group_id=None, id__gt=ObjectId(cursor))
+        mock_query_set.order_by.assert_called_once_with('id')
+        mock_query_set.order_by.return_value.limit.assert_called_once_with(10)
+        mock_resp.assert_called_once_with(['mock_1', 'mock_2'])
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.tasks.task_serializer')
+    @mock.patch('pulp.server.webservices.views.tasks.TaskStatus')
+    @mock.patch('pulp.server.webservices.views.tasks.generate_json_response_with_pulp_encoder')
+    def test_get_task_collection_fields(self, mock_resp, mock_task_status, mock_task_serializer):
+        """
+        Test get task_collection with a projection.
+        """
+        mock_request = mock.MagicMock()
+        mock_request.GET = http.QueryDict('fields=state,tags&fields=start_time')
+        mock_query_set = mock_task_status.objects.return_value
+        mock_query_set.only.return_value = ['mock_1']
+        mock_task_serializer.return_value = {
+            '_href': '/pulp/api/v2/tasks/t1/', '_id': 'mock_id', 'id': 'mock_id',
+            'task_id': 't1', 'state': 'running', 'tags': [], 'start_time': None,
+            'progress_report': {}, 'result': None}
+
+        task_collection = TaskCollectionView()
+        task_collection.get(mock_request)
+
+        mock_query_set.only.assert_called_once_with('task_id', 'state', 'tags', 'start_time')
+        self.assertFalse(mock_query_set.order_by.called)
+        mock_resp.assert_called_once_with([{
+            '_href': '/pulp/api/v2/tasks/t1/', '_id': 'mock_id', 'id': 'mock_id',
+            'task_id': 't1', 'state': 'running', 'tags': [], 'start_time': None}])
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.tasks.TaskStatus')
+    def test_get_task_collection_invalid(self, mock_task_status):
+        """
+        Test get task_collection with invalid parameters.
+        """
+        mock_request = mock.MagicMock()
+        mock_request.GET = http.QueryDict('limit=0&cursor=bad&created_after=yesterday'
+                                          '&fields=state,password')
+
+        task_collection = TaskCollectionView()
+        try:
+            task_collection.get(mock_request)
+            self.fail('InvalidValue should have been raised')
+        except pulp_exceptions.InvalidValue, e:
+            self.assertEqual(sorted(e.property_names),
+                             ['created_after', 'cursor', 'fields', 'limit'])
+        self.assertFalse(mock_task_status.objects.called)
+
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_DELETE())
     @mock.patch('pulp.server.webservices.views.tasks.TaskStatus')